@@ -32,6 +32,12 @@ if DEBUG_MODE:
 if TEST_MODE:
     logger.warning("Running in TEST_MODE - using mock GitHub interactions")
 
+# JIRA calls go through the backend's shared session (pooled, 429-aware) when it is importable
+try:
+    from backend.jira_service.http_session import shared_async_client
+except ImportError:
+    shared_async_client = None
+
 # Import GitHub service from backend
 github_service = None
 try:
@@ -596,7 +602,8 @@ async def update_jira_ticket(ticket_id: str, pr_url: Optional[str] = None) -> bo
             return False
         
         # Update JIRA ticket via the API
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        jira_client = shared_async_client() if shared_async_client else httpx.AsyncClient(timeout=30.0)
+        async with jira_client as client:
             # Add comment with PR link
             comment_data = {
                 "body": {
@@ -21,6 +21,7 @@ import os
 # Add the parent directory to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.ticket_cleaner import TicketCleaner, StackTraceExtractor, RepositoryValidator
+from utils.duplicate_index import FIXED, fingerprint_ticket, get_duplicate_index
 
 app = FastAPI(title="BugFix AI Planner Agent")
 
@@ -35,7 +36,8 @@ class TicketRequest(BaseModel):
     description: str
     repository: str
     labels: Optional[List[str]] = None
-    attachments: Optional[List[str]] = None
+    # Attachment descriptors; log files carry an extracted "text" excerpt
+    attachments: Optional[List[Dict[str, Any]]] = None
 
 class PlannerResponse(BaseModel):
     ticket_id: str
@@ -43,8 +45,13 @@ class PlannerResponse(BaseModel):
     affected_files: List[Dict[str, Any]]
     error_type: str
     using_fallback: bool = False
+    duplicate_of: Optional[Dict[str, Any]] = None
     timestamp: str = datetime.now().isoformat()
 
+class FixOutcome(BaseModel):
+    status: str  # "fixed" or "failed"
+    pr_url: Optional[str] = None
+
 def create_enhanced_planning_prompt(ticket_id: str, title: str, 
                                   description: str, labels: List[str] = None, 
                                   has_stack_trace: bool = False) -> str:
@@ -123,6 +130,11 @@ async def analyze_ticket(request: TicketRequest):
         cleaned_description = TicketCleaner.clean_ticket(request.description)
         logger.info(f"Cleaned ticket description, removed {len(request.description) - len(cleaned_description)} characters of noise")
         
+        # Log excerpts from attachments are where the stack trace often lives
+        for attachment in request.attachments or []:
+            if attachment.get("text"):
+                cleaned_description += f"\n\nAttachment {attachment.get('filename', 'unknown')}:\n{attachment['text']}"
+        
         # Step 2: Extract and highlight stack traces
         highlighted_description = StackTraceExtractor.highlight_stack_traces(cleaned_description)
         stack_traces = StackTraceExtractor.extract_stack_traces(cleaned_description)
@@ -131,6 +143,29 @@ async def analyze_ticket(request: TicketRequest):
         if stack_trace_found:
             logger.info(f"Found {len(stack_traces)} stack traces in ticket {request.ticket_id}")
         
+        # Near-duplicates of a fixed ticket reuse its fix; an in-flight original may still fail
+        duplicate_index = get_duplicate_index()
+        if duplicate_index:
+            fingerprint = fingerprint_ticket(request.title, request.description)
+            match = duplicate_index.find_duplicate(fingerprint, exclude=request.ticket_id, fixed_only=True)
+            if match:
+                logger.info(f"Ticket {request.ticket_id} duplicates {match.ticket_id} ({match.status}, similarity {match.similarity})")
+                plan = match.plan or {
+                    "bug_summary": f"Duplicate of {match.ticket_id}",
+                    "affected_files": [],
+                    "error_type": "Duplicate"
+                }
+                return PlannerResponse(**{
+                    **plan,
+                    "ticket_id": request.ticket_id,
+                    "duplicate_of": {
+                        "ticket_id": match.ticket_id,
+                        "status": match.status,
+                        "similarity": match.similarity,
+                        "pr_url": match.pr_url
+                    }
+                })
+        
         # Initialize repository validator if we have repo info
         repo_validator = RepositoryValidator()
         
@@ -154,6 +189,11 @@ async def analyze_ticket(request: TicketRequest):
             "using_fallback": False
         }
         
+        if duplicate_index:
+            duplicate_index.add(request.ticket_id, fingerprint, plan={
+                key: value for key, value in mock_response.items() if key != "ticket_id"
+            })
+        
         logger.info(f"Analysis completed for ticket {request.ticket_id}")
         return PlannerResponse(**mock_response)
     
@@ -164,6 +204,24 @@ async def analyze_ticket(request: TicketRequest):
         fallback = generate_fallback_output(request.ticket_id, request.description)
         return PlannerResponse(**fallback)
 
+@app.post("/duplicates/{ticket_id}")
+async def record_fix_outcome(ticket_id: str, outcome: FixOutcome):
+    """Record how a planned ticket ended so its near-duplicates link to the fix (or stop linking)"""
+    duplicate_index = get_duplicate_index()
+    if not duplicate_index:
+        return {"ticket_id": ticket_id, "indexed": False}
+    if outcome.status == FIXED:
+        indexed = duplicate_index.mark_fixed(ticket_id, outcome.pr_url)
+    else:
+        duplicate_index.remove(ticket_id)
+        indexed = False
+    return {"ticket_id": ticket_id, "indexed": indexed}
+
+@app.get("/duplicates/stats")
+async def duplicate_stats():
+    duplicate_index = get_duplicate_index()
+    return duplicate_index.stats() if duplicate_index else {"enabled": False}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("agent:app", host="0.0.0.0", port=8001, reload=True)
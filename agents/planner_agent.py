@@ -6,6 +6,7 @@ from typing import Dict, Any, List, Optional, Tuple
 import openai
 from .utils.logger import Logger
 from .utils.ticket_cleaner import TicketCleaner, StackTraceExtractor, RepositoryValidator
+from .utils.adf import adf_to_text
 
 class PlannerAgent:
     """
@@ -151,30 +152,7 @@ class PlannerAgent:
             if "content" in description:
                 # Try to extract text from Atlassian Document Format
                 try:
-                    text_parts = []
-                    
-                    # Process content array if it exists
-                    for content_item in description.get("content", []):
-                        # Handle paragraph type
-                        if content_item.get("type") == "paragraph":
-                            for text_item in content_item.get("content", []):
-                                if text_item.get("type") == "text":
-                                    text_parts.append(text_item.get("text", ""))
-                        # Handle code block type
-                        elif content_item.get("type") == "codeBlock":
-                            for text_item in content_item.get("content", []):
-                                if text_item.get("type") == "text":
-                                    text_parts.append(f"```\n{text_item.get('text', '')}\n```")
-                        # Handle bullet list type
-                        elif content_item.get("type") in ["bulletList", "orderedList"]:
-                            for list_item in content_item.get("content", []):
-                                for item_content in list_item.get("content", []):
-                                    if item_content.get("type") == "paragraph":
-                                        for text_item in item_content.get("content", []):
-                                            if text_item.get("type") == "text":
-                                                text_parts.append(f"- {text_item.get('text', '')}")
-                    
-                    return "\n".join(text_parts)
+                    return adf_to_text(description)
                 except Exception as e:
                     self.logger.warning(f"Error extracting text from Atlassian Document Format: {str(e)}")
             
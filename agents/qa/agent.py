@@ -2,13 +2,20 @@ from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 import os
 import logging
-import subprocess
+import shutil
 import sys
+import tempfile
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Literal
 import json
-import tempfile
-import shutil
+import asyncio
+
+from utils.impact_analysis import CACHE_OFF, ImpactSelection, discover_test_files, select_tests
+from utils.junit_report import failure_summary, junit_args, parse_report
+from utils.output_stream import TestProgress, all_progress, get_progress, new_output, start_progress
+from utils.shard_runner import QA_TEST_TIMEOUT, merged_output, run_shards
+from utils.warm_pool import run_pytest
+from utils.workspaces import get_workspace_pool
 
 # Configure logging
 logging.basicConfig(
@@ -37,6 +44,7 @@ class TestResult(BaseModel):
     duration: int
     output: Optional[str] = None
     error_message: Optional[str] = None
+    tests: Optional[List[Dict[str, Any]]] = None  # Per-test status, duration and failure location
 
 class QAResponse(BaseModel):
     ticket_id: str
@@ -48,6 +56,9 @@ class TestConfig(BaseModel):
     command: str = "python -m pytest"  # Default to pytest as a Python module
     codebase_path: str = "/app/code_repo"
     focused_tests: Optional[List[str]] = None
+    deselected_tests: Optional[List[str]] = None
+    fail_fast: bool = False  # Stop at the first failing test
+    cache_mode: str = CACHE_OFF  # use = leave out tests with a cached pass, refresh = run and record them
 
 def apply_diffs(diffs: List[FileDiff], base_path: str) -> None:
     """Apply code diffs to the codebase"""
@@ -93,7 +104,106 @@ def write_tests(test_code: Dict[str, str], codebase_path: str) -> List[str]:
             
     return written_files
 
-def run_tests(config: TestConfig) -> List[TestResult]:
+def changed_files_of(fix: Dict[str, Any], written_test_files: List[str]) -> List[str]:
+    """Repository paths touched by a fix: diffs, patched files and written tests"""
+    changed = [d.get("filename") or d.get("file") for d in fix.get("diffs") or [] if isinstance(d, dict)]
+    changed.extend(fix.get("patched_code") or {})
+    changed.extend(written_test_files)
+    return [path for path in dict.fromkeys(changed) if path]
+
+def run_selected_tests(config: TestConfig, selection: ImpactSelection,
+                       progress: Optional[TestProgress] = None) -> List[TestResult]:
+    """Run the tests affected by the change first, then the rest of the suite if configured"""
+    config = config.model_copy(update={"fail_fast": selection.fail_fast, "cache_mode": selection.cache_mode})
+    progress = progress or TestProgress("unknown")
+    results = []
+    if selection.previous_failures:
+        logger.info(f"Running {len(selection.previous_failures)} tests that failed in the previous attempt first")
+        progress.set_phase("previous_failures")
+        results = run_tests(config.model_copy(update={"focused_tests": list(selection.previous_failures)}),
+                            name="previous_failures", progress=progress)
+        if results[0].status == "fail" and selection.fail_fast:
+            logger.info("A test that failed in the previous attempt still fails, skipping the other tests")
+            return results
+        # The previous failures are not run a second time
+        config = config.model_copy(update={"deselected_tests": list(selection.previous_failures)})
+    
+    if selection.tests is None:
+        logger.info(f"Running the whole suite: {selection.reason}")
+        progress.set_phase("test_suite")
+        test_files = discover_test_files(config.codebase_path)
+        return results + (run_test_files(config, test_files, progress=progress) if test_files
+                          else run_tests(config, progress=progress))
+    
+    if selection.tests:
+        logger.info(f"Running {len(selection.tests)} affected test files first: {selection.reason}")
+        progress.set_phase("affected_tests")
+        affected = run_test_files(config, selection.tests, name="affected_tests", progress=progress)
+        results += affected
+        if any(result.status == "fail" for result in affected) or not selection.run_full_suite:
+            return results
+    elif not selection.run_full_suite:
+        logger.warning("No tests are affected by the change and the full suite run is disabled")
+        return results or [TestResult(name="affected_tests", status="pass", duration=0,
+                                      output="No tests affected by the change")]
+    
+    logger.info("Affected tests passed, running the rest of the suite")
+    selected = set(selection.tests)
+    rest = [test_file for test_file in discover_test_files(config.codebase_path) if test_file not in selected]
+    progress.set_phase("remaining_tests")
+    return results + (run_test_files(config, rest, name="remaining_tests", progress=progress) if rest else [])
+
+def pytest_command(config: TestConfig) -> List[str]:
+    """pytest invocation with the arguments of the configured test command"""
+    # Always use python -m pytest - we're in a Python container
+    command_parts = [sys.executable, "-m", "pytest"]
+    
+    # Add any test-specific arguments if they exist in the command
+    if config.command != "python -m pytest" and " " in config.command:
+        # Extract any arguments after the base command
+        args = config.command.split(" ", 2)[2:]  # This will give us arguments after "python -m pytest"
+        if args:
+            command_parts.extend(args)
+    for nodeid in config.deselected_tests or []:
+        command_parts.extend(["--deselect", nodeid])
+    return command_parts
+
+def run_test_files(config: TestConfig, test_files: List[str], name: str = "test_suite",
+                   progress: Optional[TestProgress] = None) -> List[TestResult]:
+    """Run test modules in parallel shards balanced by their historical durations, merged into one result"""
+    start_time = datetime.now()
+    try:
+        shard_results = run_shards(pytest_command(config), cwd=config.codebase_path,
+                                   test_files=test_files, env=os.environ.copy(), fail_fast=config.fail_fast,
+                                   progress=progress, cache_mode=config.cache_mode)
+    except Exception as e:
+        logger.error(f"Error running test shards: {str(e)}")
+        return [TestResult(name=name, status="fail", duration=0, error_message=str(e))]
+    
+    duration = int((datetime.now() - start_time).total_seconds() * 1000)
+    failed = [shard_result for shard_result in shard_results if not shard_result.passed]
+    for shard_result in shard_results:
+        if not shard_result.cached:
+            logger.info(f"Test shard {shard_result.shard.index} exited with code {shard_result.returncode} "
+                        f"after {shard_result.duration:.1f}s")
+    records = [test for shard_result in shard_results for test in shard_result.tests]
+    return [TestResult(
+        name=name,
+        status="fail" if failed else "pass",
+        duration=duration,
+        output=merged_output(shard_results),
+        error_message="\n".join(filter(None, [failure_summary(records)] + [
+            f"Shard {shard_result.shard.index + 1} timed out after {shard_result.shard.timeout:.0f}s"
+            if shard_result.timed_out
+            else f"Shard {shard_result.shard.index + 1} stopped after another shard failed"
+            if shard_result.stopped
+            else f"Shard {shard_result.shard.index + 1} failed with exit code {shard_result.returncode}"
+            for shard_result in failed])) or None,
+        tests=[record.as_dict() for record in records]
+    )]
+
+def run_tests(config: TestConfig, name: str = "test_suite",
+              progress: Optional[TestProgress] = None) -> List[TestResult]:
     """Run tests and capture results"""
     results = []
     start_time = datetime.now()
@@ -103,79 +213,60 @@ def run_tests(config: TestConfig) -> List[TestResult]:
         env = os.environ.copy()
         logger.info(f"Environment variables: PATH={env.get('PATH')}, PYTHONPATH={env.get('PYTHONPATH')}")
         
-        # Check if pytest is available before attempting to run
         try:
-            # Try to import pytest to make sure it's available
             import pytest
             logger.info(f"Found pytest version: {pytest.__version__}")
         except ImportError:
-            # If pytest isn't available, run a pip install
-            logger.warning("Pytest not found, attempting to install...")
-            try:
-                subprocess.run([sys.executable, "-m", "pip", "install", "pytest"], check=True)
-                logger.info("Installed pytest")
-            except Exception as e:
-                logger.error(f"Failed to install pytest: {str(e)}")
-                return [TestResult(
-                    name="test_suite",
-                    status="fail",
-                    duration=0,
-                    error_message=f"Failed to install pytest: {str(e)}"
-                )]
-        
-        # Always use python -m pytest - we're in a Python container
-        command_parts = [sys.executable, "-m", "pytest"]
+            logger.error("pytest is not installed in the QA environment")
+            return [TestResult(
+                name=name,
+                status="fail",
+                duration=0,
+                error_message="pytest is not installed in the QA environment"
+            )]
         
-        # Add any test-specific arguments if they exist in the command
-        if config.command != "python -m pytest" and " " in config.command:
-            # Extract any arguments after the base command
-            args = config.command.split(" ", 2)[2:]  # This will give us arguments after "python -m pytest"
-            if args:
-                command_parts.extend(args)
+        report_dir = tempfile.mkdtemp(prefix="qa-report-")
+        report_path = os.path.join(report_dir, "report.xml")
+        command_parts = pytest_command(config) + junit_args(report_path) + (["-x"] if config.fail_fast else [])
+        command_parts.extend(config.focused_tests or [])
         
         logger.info(f"Running tests with command: {' '.join(command_parts)}")
         
-        # Run the test command with environment variables properly passed
-        process = subprocess.Popen(
-            command_parts,
-            cwd=config.codebase_path,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            env=os.environ.copy()  # Pass current environment variables
-        )
-        
-        stdout, stderr = process.communicate()
+        # Forked from a warm runner with pytest and the third-party packages already imported
+        try:
+            returncode, output = run_pytest(command_parts, config.codebase_path, env, QA_TEST_TIMEOUT,
+                                            output=new_output(name, progress))
+            records = parse_report(report_path, config.codebase_path) if returncode is not None else []
+        finally:
+            shutil.rmtree(report_dir, ignore_errors=True)
         duration = int((datetime.now() - start_time).total_seconds() * 1000)
         
-        # Log both stdout and stderr for debugging
-        logger.info(f"Command stdout: {stdout}")
-        if stderr:
-            logger.info(f"Command stderr: {stderr}")
-            
-        logger.info(f"Test command exited with code {process.returncode}")
+        logger.info(f"Test command exited with code {returncode}")
         
         # Parse test output
-        if process.returncode == 0:
+        if returncode == 0:
             results.append(TestResult(
-                name="test_suite",
+                name=name,
                 status="pass",
                 duration=duration,
-                output=stdout
+                output=output,
+                tests=[record.as_dict() for record in records]
             ))
         else:
             results.append(TestResult(
-                name="test_suite",
+                name=name,
                 status="fail",
                 duration=duration,
-                output=stdout,
-                error_message=stderr or "Test failed with no error message"
+                output=output,
+                error_message=f"Timeout: Test execution exceeded {QA_TEST_TIMEOUT:.0f} seconds" if returncode is None
+                else failure_summary(records) or f"Tests failed with exit code {returncode}",
+                tests=[record.as_dict() for record in records]
             ))
             
     except Exception as e:
         logger.error(f"Error running tests: {str(e)}")
         results.append(TestResult(
-            name="test_suite",
+            name=name,
             status="fail",
             duration=0,
             error_message=str(e)
@@ -187,6 +278,69 @@ def run_tests(config: TestConfig) -> List[TestResult]:
 async def root():
     return {"message": "QA Agent is running", "status": "healthy"}
 
+def run_fix_in_workspace(fix: Dict[str, Any]) -> QAResponse:
+    """Apply a fix to a workspace of its own and run the tests there"""
+    ticket_id = fix.get("ticket_id", "unknown")
+    codebase_path = os.getenv("CODEBASE_PATH", "/app/code_repo")
+    
+    # Ensure code_repo directory exists
+    if not os.path.exists(codebase_path):
+        logger.warning(f"Codebase path {codebase_path} does not exist, creating it")
+        os.makedirs(codebase_path, exist_ok=True)
+    
+    # Each attempt gets its own worktree, so fixes for different tickets are tested in parallel
+    with get_workspace_pool(codebase_path).workspace(ticket_id) as workspace:
+        # Apply the diffs to the workspace if they exist
+        if "diffs" in fix and isinstance(fix["diffs"], list):
+            apply_diffs(fix["diffs"], workspace.path)
+            logger.info(f"Applied {len(fix['diffs'])} diffs to the codebase")
+        elif "patched_code" in fix and isinstance(fix["patched_code"], dict):
+            # Alternative: Apply patched_code directly
+            workspace.write_files(fix["patched_code"])
+            logger.info(f"Applied {len(fix['patched_code'])} patched files to the codebase")
+        
+        # Write test files if they exist
+        written_test_files = []
+        if "test_code" in fix and isinstance(fix["test_code"], dict):
+            written_test_files = write_tests(fix["test_code"], workspace.path)
+            logger.info(f"Wrote {len(written_test_files)} test files to the codebase")
+        
+        # Configure test settings - use environment variable or default to python module approach
+        test_config = TestConfig(
+            command=os.getenv("TEST_COMMAND", "python -m pytest"),
+            codebase_path=workspace.path
+        )
+        
+        # Run the tests affected by the change first
+        selection = select_tests(workspace.path, changed_files_of(fix, written_test_files),
+                                 fix.get("previous_failures"), bool(fix.get("force_full_run")))
+        progress = start_progress(ticket_id)
+        try:
+            test_results = run_selected_tests(test_config, selection, progress)
+        finally:
+            progress.finish()
+    
+    # Determine overall pass/fail status
+    passed = all(result.status == "pass" for result in test_results)
+    return QAResponse(
+        ticket_id=ticket_id,
+        passed=passed,
+        test_results=test_results
+    )
+
+@app.get("/progress")
+async def list_progress():
+    """Progress of the current and recent QA runs"""
+    return all_progress()
+
+@app.get("/progress/{ticket_id}")
+async def ticket_progress(ticket_id: str):
+    """Tests run, passed and failed so far in the latest QA run of a ticket"""
+    progress = get_progress(ticket_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail=f"No QA run for ticket {ticket_id}")
+    return progress
+
 @app.post("/test", response_model=QAResponse)
 async def test_fix(fix: Dict[str, Any]):
     ticket_id = fix.get("ticket_id", "unknown")
@@ -194,64 +348,10 @@ async def test_fix(fix: Dict[str, Any]):
     logger.info(f"Testing fix for ticket {ticket_id} (attempt {attempt})")
     
     try:
-        # Create a temporary directory for testing
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Copy codebase to temporary directory
-            codebase_path = os.getenv("CODEBASE_PATH", "/app/code_repo")
-            temp_codebase = os.path.join(temp_dir, "code")
-            
-            # Ensure code_repo directory exists
-            if not os.path.exists(codebase_path):
-                logger.warning(f"Codebase path {codebase_path} does not exist, creating it")
-                os.makedirs(codebase_path, exist_ok=True)
-                
-            # Copy the codebase, handling empty directories
-            try:
-                shutil.copytree(codebase_path, temp_codebase)
-            except shutil.Error as e:
-                logger.warning(f"Error during copy: {str(e)}")
-                # Ensure the target directory exists even if copy failed
-                os.makedirs(temp_codebase, exist_ok=True)
-            
-            # Apply the diffs to the temporary codebase if they exist
-            if "diffs" in fix and isinstance(fix["diffs"], list):
-                apply_diffs(fix["diffs"], temp_codebase)
-                logger.info(f"Applied {len(fix['diffs'])} diffs to the codebase")
-            elif "patched_code" in fix and isinstance(fix["patched_code"], dict):
-                # Alternative: Apply patched_code directly
-                for file_path, content in fix["patched_code"].items():
-                    full_path = os.path.join(temp_codebase, file_path)
-                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
-                    with open(full_path, 'w') as f:
-                        f.write(content)
-                logger.info(f"Applied {len(fix['patched_code'])} patched files to the codebase")
-            
-            # Write test files if they exist
-            written_test_files = []
-            if "test_code" in fix and isinstance(fix["test_code"], dict):
-                written_test_files = write_tests(fix["test_code"], temp_codebase)
-                logger.info(f"Wrote {len(written_test_files)} test files to the codebase")
-            
-            # Configure test settings - use environment variable or default to python module approach
-            test_config = TestConfig(
-                command=os.getenv("TEST_COMMAND", "python -m pytest"),
-                codebase_path=temp_codebase
-            )
-            
-            # Run tests
-            test_results = run_tests(test_config)
-            
-            # Determine overall pass/fail status
-            passed = all(result.status == "pass" for result in test_results)
-            
-            response = QAResponse(
-                ticket_id=ticket_id,
-                passed=passed,
-                test_results=test_results
-            )
-            
-            logger.info(f"Testing completed for ticket {ticket_id} (attempt {attempt}): {'Passed' if passed else 'Failed'}")
-            return response
+        # Tests run off the event loop so other tickets' requests are served meanwhile
+        response = await asyncio.to_thread(run_fix_in_workspace, fix)
+        logger.info(f"Testing completed for ticket {ticket_id} (attempt {attempt}): {'Passed' if response.passed else 'Failed'}")
+        return response
             
     except Exception as e:
         logger.error(f"Error testing fix for ticket {ticket_id}: {str(e)}")
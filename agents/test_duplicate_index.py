@@ -0,0 +1,91 @@
+
+import os
+import sys
+import tempfile
+import unittest
+
+# Add the agents directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.duplicate_index import FIXED, IN_FLIGHT, DuplicateBugIndex, fingerprint_ticket
+
+CRASH = """Hi team,
+
+Saving a profile with an empty nickname crashes the app (request id 8f3a91c2d4e5).
+
+Traceback (most recent call last):
+  File "/srv/app/releases/{release}/profile/views.py", line {line}, in save_profile
+    form.save()
+  File "/srv/app/releases/{release}/profile/forms.py", line {other}, in save
+    nickname = self.cleaned_data["nickname"].strip()
+AttributeError: 'NoneType' object has no attribute 'strip'
+
+Thanks,
+{name}"""
+
+PLAN = {"bug_summary": "Empty nickname crashes profile save", "affected_files": [{"file": "profile/forms.py"}],
+        "error_type": "AttributeError"}
+
+
+class TestDuplicateBugIndex(unittest.TestCase):
+    """Test cases for the near-duplicate bug index"""
+
+    def setUp(self):
+        self.index = DuplicateBugIndex(threshold=0.8, path=None)
+        self.original = fingerprint_ticket("Profile save crashes",
+                                           CRASH.format(release="20240301", line=42, other=17, name="Dana"))
+
+    def test_same_crash_reported_twice_is_found(self):
+        """Line numbers, ids, greetings and signatures do not hide a duplicate"""
+        self.index.add("PROJ-1", self.original, plan=PLAN)
+        copy = fingerprint_ticket("Crash when saving profile",
+                                  CRASH.format(release="20240415", line=44, other=19, name="Robin"))
+
+        match = self.index.find_duplicate(copy, exclude="PROJ-2")
+
+        self.assertEqual(match.ticket_id, "PROJ-1")
+        self.assertEqual(match.status, IN_FLIGHT)
+        self.assertEqual(match.plan, PLAN)
+        self.assertGreaterEqual(match.similarity, 0.8)
+        self.assertIsNone(self.index.find_duplicate(self.original, exclude="PROJ-1"))
+
+    def test_only_fixed_tickets_are_linked_when_asked(self):
+        """An in-flight original is skipped until its fix ships, so a failed fix orphans no duplicates"""
+        self.index.add("PROJ-1", self.original, plan=PLAN)
+        copy = fingerprint_ticket("Crash when saving profile",
+                                  CRASH.format(release="20240415", line=44, other=19, name="Robin"))
+
+        self.assertIsNone(self.index.find_duplicate(copy, exclude="PROJ-2", fixed_only=True))
+        self.index.mark_fixed("PROJ-1", "https://github.com/org/repo/pull/7")
+        self.assertEqual(self.index.find_duplicate(copy, exclude="PROJ-2", fixed_only=True).status, FIXED)
+
+    def test_different_bugs_are_not_linked(self):
+        """Another exception, or unrelated text, is not a duplicate"""
+        self.index.add("PROJ-1", self.original, plan=PLAN)
+        other_error = fingerprint_ticket("Profile save crashes", CRASH.format(
+            release="20240301", line=42, other=17, name="Dana").replace("AttributeError", "KeyError"))
+        unrelated = fingerprint_ticket("Dark mode toggle ignored", "The settings page toggle does nothing on Safari.")
+
+        self.assertIsNone(self.index.find_duplicate(other_error))
+        self.assertIsNone(self.index.find_duplicate(unrelated))
+
+    def test_outcomes_are_recorded_and_persisted(self):
+        """Fixed tickets keep their PR across restarts, failed ones are dropped"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "duplicate_index.json")
+            index = DuplicateBugIndex(path=path)
+            index.add("PROJ-1", self.original, plan=PLAN)
+            index.add("PROJ-3", fingerprint_ticket("Dark mode toggle ignored", "The toggle does nothing."))
+            self.assertTrue(index.mark_fixed("PROJ-1", "https://github.com/org/repo/pull/7"))
+            self.assertTrue(index.remove("PROJ-3"))
+
+            reloaded = DuplicateBugIndex(path=path)
+            match = reloaded.find_duplicate(self.original)
+
+        self.assertEqual((match.ticket_id, match.status, match.pr_url),
+                         ("PROJ-1", FIXED, "https://github.com/org/repo/pull/7"))
+        self.assertEqual(reloaded.stats()["tickets"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,347 @@
+
+"""
+Near-duplicate detection for bug tickets
+
+Users often file the same crash several times. Each ticket is reduced to a
+fingerprint: a MinHash signature of the word shingles of its cleaned text
+(TicketCleaner) and the set of normalized stack frames found by
+StackTraceExtractor (line numbers, addresses and build hashes removed).
+Signatures are bucketed with locality-sensitive hashing, so a lookup only
+scores the few tickets sharing a band (or the exact frame set) with the
+query instead of the whole index. A ticket that matches one already fixed
+can be linked to that fix instead of being planned, patched and tested
+again. Tickets still in flight are indexed too but are only linked to once
+their fix ships: a fix that fails would leave its duplicates unhandled.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .ticket_cleaner import TicketCleaner, StackTraceExtractor
+
+logger = logging.getLogger("duplicate-index")
+
+DUPLICATE_INDEX_ENABLED = os.environ.get("DUPLICATE_INDEX_ENABLED", "true").lower() == "true"
+# JSON file the index is kept in across restarts (in memory only when empty)
+DUPLICATE_INDEX_PATH = os.environ.get("DUPLICATE_INDEX_PATH", "")
+DUPLICATE_SIMILARITY_THRESHOLD = float(os.environ.get("DUPLICATE_SIMILARITY_THRESHOLD", "0.8"))
+
+IN_FLIGHT = "in_flight"
+FIXED = "fixed"
+
+NUM_PERMUTATIONS = 64
+# 16 bands of 4 rows: tickets with a Jaccard similarity around 0.5 or more share a band
+LSH_BANDS = 16
+SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _permutations(count: int) -> List[Tuple[int, int]]:
+    """Fixed (a, b) pairs for the hash functions h(x) = (a * x + b) mod p"""
+    pairs = []
+    for index in range(count):
+        digest = hashlib.blake2b(f"minhash-{index}".encode(), digest_size=16).digest()
+        pairs.append((int.from_bytes(digest[:8], "big") % (_MERSENNE_PRIME - 1) + 1,
+                      int.from_bytes(digest[8:], "big") % _MERSENNE_PRIME))
+    return pairs
+
+
+_PERMUTATIONS = _permutations(NUM_PERMUTATIONS)
+
+WORD_RE = re.compile(r"[a-z_][a-z0-9_]+")
+# Tokens that differ between copies of the same crash: ids, hashes, numbers
+NOISE_TOKEN_RE = re.compile(r"^(?:[0-9a-f]{8,}|.*\d{3,}.*)$")
+
+PY_FRAME_RE = re.compile(r'File "([^"]+)", line \d+, in ([\w<>.]+)')
+JAVA_FRAME_RE = re.compile(r"^\s*at ([\w$.<>]+)\([^)]*\)", re.MULTILINE)
+JS_FRAME_RE = re.compile(r"^\s*at (?:([\w$.<> ]+?) \()?([^()\s]+?)(?::\d+)+\)?\s*$", re.MULTILINE)
+EXCEPTION_RE = re.compile(r"\b((?:[A-Za-z_$][\w$]*\.)*[A-Za-z_$][\w$]*(?:Error|Exception))\b")
+BUILD_HASH_RE = re.compile(r"[.-][0-9a-f]{6,}(?=\.)")
+
+
+def _stable_hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=4).digest(), "big")
+
+
+def _path_tail(path: str) -> str:
+    """Last two components of a path, without bundle hashes or query strings"""
+    path = path.split("?")[0].split("#")[0].replace("\\", "/")
+    tail = "/".join(part for part in path.split("/")[-2:] if part)
+    return BUILD_HASH_RE.sub("", tail).lower()
+
+
+def normalize_frames(traces: Iterable[str]) -> FrozenSet[str]:
+    """Frames of Python, Java and JavaScript stack traces, independent of line numbers"""
+    frames: Set[str] = set()
+    for trace in traces:
+        for path, function in PY_FRAME_RE.findall(trace):
+            frames.add(f"{_path_tail(path)}:{function}")
+        for method in JAVA_FRAME_RE.findall(trace):
+            frames.add(re.sub(r"\$\d+", "$", method))
+        for function, path in JS_FRAME_RE.findall(trace):
+            if path.endswith((".js", ".ts", ".jsx", ".tsx", ".mjs")):
+                frames.add(f"{(function or '<anonymous>').strip()}@{_path_tail(path)}")
+    return frozenset(frames)
+
+
+def _shingles(text: str) -> Set[str]:
+    words = [word for word in WORD_RE.findall(text.lower()) if not NOISE_TOKEN_RE.match(word)]
+    if len(words) < SHINGLE_SIZE:
+        return set(words)
+    return {" ".join(words[index:index + SHINGLE_SIZE]) for index in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(features: Set[str]) -> Tuple[int, ...]:
+    """MinHash signature of a feature set (all maximal for an empty set)"""
+    if not features:
+        return (_MAX_HASH,) * NUM_PERMUTATIONS
+    hashes = [_stable_hash(feature) for feature in features]
+    return tuple(
+        min((a * value + b) % _MERSENNE_PRIME for value in hashes) & _MAX_HASH
+        for a, b in _PERMUTATIONS
+    )
+
+
+class BugFingerprint(NamedTuple):
+    """What the index stores and compares for a ticket"""
+    signature: Tuple[int, ...]
+    frames: FrozenSet[str]
+    exception: Optional[str]
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.frames and self.signature[0] == _MAX_HASH
+
+
+def fingerprint_ticket(title: str, description: str) -> BugFingerprint:
+    """
+    Fingerprint a ticket from its title and raw description
+
+    Args:
+        title: Ticket summary
+        description: Description as plain text (noise is removed here)
+
+    Returns:
+        BugFingerprint of the cleaned text and normalized stack frames
+    """
+    cleaned = TicketCleaner.clean_ticket(description or "")
+    traces = StackTraceExtractor.extract_stack_traces(cleaned)
+    exceptions = EXCEPTION_RE.findall("\n".join(traces)) if traces else []
+    return BugFingerprint(
+        signature=minhash(_shingles(f"{title or ''}\n{cleaned}")),
+        frames=normalize_frames(traces),
+        exception=exceptions[-1].split(".")[-1] if exceptions else None,
+    )
+
+
+def similarity(first: BugFingerprint, second: BugFingerprint) -> float:
+    """Estimated similarity in [0, 1]; stack frames weigh as much as the text"""
+    if first.exception and second.exception and first.exception != second.exception:
+        return 0.0
+    text = sum(1 for x, y in zip(first.signature, second.signature) if x == y) / NUM_PERMUTATIONS
+    if first.frames and second.frames:
+        frames = len(first.frames & second.frames) / len(first.frames | second.frames)
+        return (text + frames) / 2
+    return text
+
+
+class DuplicateMatch(NamedTuple):
+    """An indexed ticket the query is a near-duplicate of"""
+    ticket_id: str
+    similarity: float
+    status: str
+    plan: Optional[Dict[str, Any]]
+    pr_url: Optional[str]
+
+
+class DuplicateBugIndex:
+    """LSH index of bug fingerprints for tickets that are fixed or in flight"""
+
+    def __init__(self, threshold: float = DUPLICATE_SIMILARITY_THRESHOLD, path: Optional[str] = DUPLICATE_INDEX_PATH):
+        """
+        Args:
+            threshold: Minimum similarity for a ticket to count as a duplicate
+            path: Optional JSON file the index is loaded from and saved to
+        """
+        self.threshold = threshold
+        self.path = path or None
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._bands: Dict[Tuple[int, int], Set[str]] = defaultdict(set)
+        self._frame_sets: Dict[FrozenSet[str], Set[str]] = defaultdict(set)
+        self._lookups = 0
+        self._duplicates = 0
+        if self.path:
+            self._load()
+
+    def add(self, ticket_id: str, fingerprint: BugFingerprint, plan: Optional[Dict[str, Any]] = None,
+            status: str = IN_FLIGHT) -> None:
+        """Index (or re-index) a ticket whose fix is in flight or done"""
+        if fingerprint.is_empty:
+            return
+        with self._lock:
+            self._unlink(ticket_id)
+            self._entries[ticket_id] = {
+                "fingerprint": fingerprint,
+                "status": status,
+                "plan": plan,
+                "pr_url": None,
+                "updated": time.time(),
+            }
+            self._link(ticket_id, fingerprint)
+        self._save()
+
+    def find_duplicate(self, fingerprint: BugFingerprint, exclude: Optional[str] = None,
+                       fixed_only: bool = False) -> Optional[DuplicateMatch]:
+        """Most similar indexed ticket above the threshold, preferring fixed ones on a tie"""
+        if fingerprint.is_empty:
+            return None
+        with self._lock:
+            self._lookups += 1
+            candidates = set(self._frame_sets.get(fingerprint.frames, ())) if fingerprint.frames else set()
+            for band in self._band_keys(fingerprint.signature):
+                candidates |= self._bands.get(band, set())
+            candidates.discard(exclude)
+
+            best: Optional[DuplicateMatch] = None
+            for ticket_id in candidates:
+                entry = self._entries[ticket_id]
+                if fixed_only and entry["status"] != FIXED:
+                    continue
+                score = similarity(fingerprint, entry["fingerprint"])
+                if score < self.threshold:
+                    continue
+                rank = (score, entry["status"] == FIXED)
+                if best is None or rank > (best.similarity, best.status == FIXED):
+                    best = DuplicateMatch(ticket_id, round(score, 3), entry["status"], entry["plan"], entry["pr_url"])
+            if best is not None:
+                self._duplicates += 1
+            return best
+
+    def mark_fixed(self, ticket_id: str, pr_url: Optional[str] = None) -> bool:
+        """Record that a ticket's fix shipped; returns False if it is not indexed"""
+        with self._lock:
+            entry = self._entries.get(ticket_id)
+            if entry is None:
+                return False
+            entry.update(status=FIXED, pr_url=pr_url, updated=time.time())
+        self._save()
+        return True
+
+    def remove(self, ticket_id: str) -> bool:
+        """Drop a ticket, e.g. when its fix failed and there is nothing to reuse"""
+        with self._lock:
+            removed = self._unlink(ticket_id)
+        if removed:
+            self._save()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses = [entry["status"] for entry in self._entries.values()]
+            return {
+                "tickets": len(statuses),
+                "fixed": statuses.count(FIXED),
+                "in_flight": statuses.count(IN_FLIGHT),
+                "lookups": self._lookups,
+                "duplicates_found": self._duplicates,
+            }
+
+    @staticmethod
+    def _band_keys(signature: Tuple[int, ...]) -> List[Tuple[int, int]]:
+        rows = NUM_PERMUTATIONS // LSH_BANDS
+        return [(band, hash(signature[band * rows:(band + 1) * rows])) for band in range(LSH_BANDS)]
+
+    def _link(self, ticket_id: str, fingerprint: BugFingerprint) -> None:
+        for band in self._band_keys(fingerprint.signature):
+            self._bands[band].add(ticket_id)
+        if fingerprint.frames:
+            self._frame_sets[fingerprint.frames].add(ticket_id)
+
+    def _unlink(self, ticket_id: str) -> bool:
+        entry = self._entries.pop(ticket_id, None)
+        if entry is None:
+            return False
+        fingerprint = entry["fingerprint"]
+        for band in self._band_keys(fingerprint.signature):
+            bucket = self._bands.get(band)
+            if bucket is not None:
+                bucket.discard(ticket_id)
+                if not bucket:
+                    del self._bands[band]
+        bucket = self._frame_sets.get(fingerprint.frames)
+        if bucket is not None:
+            bucket.discard(ticket_id)
+            if not bucket:
+                del self._frame_sets[fingerprint.frames]
+        return True
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load duplicate index from {self.path}: {str(e)}")
+            return
+        for ticket_id, entry in data.get("tickets", {}).items():
+            fingerprint = BugFingerprint(tuple(entry["signature"]), frozenset(entry["frames"]), entry.get("exception"))
+            self._entries[ticket_id] = {
+                "fingerprint": fingerprint,
+                "status": entry.get("status", IN_FLIGHT),
+                "plan": entry.get("plan"),
+                "pr_url": entry.get("pr_url"),
+                "updated": entry.get("updated", 0),
+            }
+            self._link(ticket_id, fingerprint)
+        logger.info(f"Loaded {len(self._entries)} tickets into the duplicate index")
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            data = {"tickets": {
+                ticket_id: {
+                    "signature": list(entry["fingerprint"].signature),
+                    "frames": sorted(entry["fingerprint"].frames),
+                    "exception": entry["fingerprint"].exception,
+                    "status": entry["status"],
+                    "plan": entry["plan"],
+                    "pr_url": entry["pr_url"],
+                    "updated": entry["updated"],
+                }
+                for ticket_id, entry in self._entries.items()
+            }}
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                temp_path = f"{self.path}.tmp"
+                with open(temp_path, "w") as f:
+                    json.dump(data, f)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not save duplicate index to {self.path}: {str(e)}")
+
+
+_index: Optional[DuplicateBugIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_duplicate_index() -> Optional[DuplicateBugIndex]:
+    """Return the process-wide index, or None when DUPLICATE_INDEX_ENABLED is false"""
+    global _index
+    if not DUPLICATE_INDEX_ENABLED:
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = DuplicateBugIndex()
+        return _index
@@ -6,8 +6,11 @@ import requests
 import tempfile
 import subprocess
 import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional, Tuple, Union
 from .logger import Logger
+from .content_cache import get_content_cache, FetchResult
+from .request_scheduler import get_request_scheduler, RequestClass
 
 class GitHubClient:
     """Client for interacting with the GitHub API"""
@@ -26,6 +29,7 @@ class GitHubClient:
         self.debug_mode = os.environ.get("DEBUG_MODE", "False").lower() == "true"
         self.patch_mode = os.environ.get("PATCH_MODE", "line-by-line")
         self.allow_empty_commits = os.environ.get("ALLOW_EMPTY_COMMITS", "False").lower() == "true"
+        self.fetch_workers = int(os.environ.get("GITHUB_FETCH_WORKERS", "8"))
         
         if not all([self.github_token, self.repo_owner, self.repo_name]):
             self.logger.error("Missing required GitHub environment variables")
@@ -51,7 +55,7 @@ class GitHubClient:
         }
         
         # API base URL
-        self.base_url = "https://api.github.com"
+        self.base_url = os.environ.get("GITHUB_API_URL", "https://api.github.com").rstrip("/")
         self.repo_api_url = f"{self.base_url}/repos/{self.repo_owner}/{self.repo_name}"
         
         # Log configuration
@@ -63,6 +67,23 @@ class GitHubClient:
         self.logger.info(f"Patch mode: {self.patch_mode}")
         self.logger.info(f"Allow empty commits: {self.allow_empty_commits}")
         
+    def _request(self, method: str, url: str, request_class: RequestClass, headers: Dict[str, str] = None, **kwargs) -> requests.Response:
+        """
+        Send a GitHub API request through the shared rate-limit-aware scheduler
+        
+        Args:
+            method: HTTP method
+            url: Request URL
+            request_class: Priority class of the request
+            headers: Headers to send instead of the default headers
+            
+        Returns:
+            The response of the last attempt
+        """
+        return get_request_scheduler().execute(
+            request_class, requests.request, method, url, headers=headers or self.headers, **kwargs
+        )
+        
     def check_branch_exists(self, branch_name: str) -> bool:
         """
         Check if a branch exists in the repository
@@ -76,7 +97,7 @@ class GitHubClient:
         url = f"{self.repo_api_url}/git/refs/heads/{branch_name}"
         
         self.logger.info(f"Checking if branch {branch_name} exists")
-        response = requests.get(url, headers=self.headers)
+        response = self._request("GET", url, RequestClass.READ)
         
         if response.status_code == 200:
             self.logger.info(f"Branch {branch_name} exists")
@@ -89,6 +110,30 @@ class GitHubClient:
             # Assume it doesn't exist to be safe
             return False
         
+    def list_branches(self, prefix: str = "") -> Optional[List[str]]:
+        """
+        List branch names starting with a prefix using the matching-refs endpoint
+        
+        Args:
+            prefix: Branch name prefix (empty for all branches)
+            
+        Returns:
+            List of branch names, or None if the request failed
+        """
+        url = f"{self.repo_api_url}/git/matching-refs/heads/{prefix}"
+        branches = []
+        
+        while url:
+            response = self._request("GET", url, RequestClass.READ, params={"per_page": 100})
+            if response.status_code != 200:
+                self.logger.error(f"Failed to list branches with prefix '{prefix}': {response.status_code}, {response.text}")
+                return None
+            branches.extend(ref["ref"][len("refs/heads/"):] for ref in response.json())
+            url = response.links.get("next", {}).get("url")
+        
+        self.logger.info(f"Found {len(branches)} branches with prefix '{prefix}'")
+        return branches
+        
     def create_branch(self, branch_name: str, from_branch: str = None) -> bool:
         """
         Create a new branch in the repository
@@ -117,7 +162,7 @@ class GitHubClient:
         url = f"{self.repo_api_url}/git/refs/heads/{from_branch}"
         
         self.logger.info(f"Getting latest commit from {from_branch}")
-        response = requests.get(url, headers=self.headers)
+        response = self._request("GET", url, RequestClass.READ)
         
         if response.status_code != 200:
             self.logger.error(f"Failed to get commit SHA for {from_branch}: {response.status_code}")
@@ -133,7 +178,7 @@ class GitHubClient:
         }
         
         self.logger.info(f"Creating branch {branch_name} from {from_branch}")
-        create_response = requests.post(create_url, headers=self.headers, json=payload)
+        create_response = self._request("POST", create_url, RequestClass.WRITE, json=payload)
         
         # Handle case where branch might already exist
         if create_response.status_code == 422:
@@ -194,7 +239,7 @@ class GitHubClient:
         }
         
         self.logger.info(f"Creating PR from {head_branch} to {base_branch}")
-        response = requests.post(url, headers=self.headers, json=payload)
+        response = self._request("POST", url, RequestClass.PULL_REQUEST, json=payload)
         
         if response.status_code != 201:
             # Check if it's because the PR already exists
@@ -202,9 +247,10 @@ class GitHubClient:
                 self.logger.info(f"PR from {head_branch} to {base_branch} already exists")
                 
                 # Try to get the URL of the existing PR
-                existing_prs = requests.get(
+                existing_prs = self._request(
+                    "GET",
                     f"{self.repo_api_url}/pulls?head={self.repo_owner}:{head_branch}&base={base_branch}&state=open",
-                    headers=self.headers
+                    RequestClass.READ
                 )
                 
                 if existing_prs.status_code == 200 and existing_prs.json():
@@ -260,7 +306,7 @@ class GitHubClient:
         url = f"{self.repo_api_url}/compare/{base_branch}...{head_branch}"
         self.logger.info(f"Checking for differences between {base_branch} and {head_branch}")
         
-        response = requests.get(url, headers=self.headers)
+        response = self._request("GET", url, RequestClass.READ)
         
         if response.status_code != 200:
             self.logger.error(f"Failed to compare branches: {response.status_code}, {response.text}")
@@ -672,9 +718,12 @@ class GitHubClient:
         
         # Apply and commit patches
         if patch_file_paths and len(patch_file_paths) > 0:
+            # Fetch all original contents up front, concurrently
+            original_contents = self.get_file_contents(patch_file_paths, branch_name)
+            
             for file_path in patch_file_paths:
                 # Get current content
-                current_content = self.get_file_content(file_path, branch_name)
+                current_content = original_contents.get(file_path)
                 
                 if current_content is None:
                     self.logger.warning(f"File {file_path} not found, will be created")
@@ -750,6 +799,9 @@ class GitHubClient:
         """
         Get the content of a file from GitHub
         
+        Cached copies are revalidated with a conditional request, so unchanged
+        files cost a 304 that does not count against the rate limit.
+        
         Args:
             file_path: Path to the file in the repository
             branch: Branch to retrieve from (defaults to default_branch)
@@ -757,31 +809,76 @@ class GitHubClient:
         Returns:
             The content of the file if successful, None otherwise
         """
+        try:
+            entry = self._get_file_entry(file_path, branch)
+        except requests.RequestException as e:
+            self.logger.error(f"Failed to fetch file {file_path}: {str(e)}")
+            return None
+        return entry[0] if entry else None
+    
+    def get_file_contents(self, file_paths: List[str], branch: str = None) -> Dict[str, Optional[str]]:
+        """
+        Get the contents of several files concurrently
+        
+        Args:
+            file_paths: Paths of the files in the repository
+            branch: Branch to retrieve from (defaults to default_branch)
+            
+        Returns:
+            Dictionary mapping each path to its content, or None if it could not be fetched
+        """
+        unique_paths = list(dict.fromkeys(file_paths))
+        if not unique_paths:
+            return {}
+        
+        workers = max(1, min(self.fetch_workers, len(unique_paths)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            contents = list(executor.map(lambda path: self.get_file_content(path, branch), unique_paths))
+        return dict(zip(unique_paths, contents))
+    
+    def _get_file_entry(self, file_path: str, branch: str = None) -> Optional[Tuple[str, str]]:
+        """
+        Get (content, blob_sha) of a file through the shared content cache
+        
+        Returns None if the file does not exist; raises requests.HTTPError on other errors.
+        """
         if not branch:
             branch = self.default_branch
             
         url = f"{self.repo_api_url}/contents/{file_path}"
         params = {"ref": branch}
         
-        self.logger.info(f"Fetching file content: {file_path} from branch {branch}")
-        response = requests.get(url, headers=self.headers, params=params)
-        
-        if response.status_code != 200:
-            self.logger.error(f"Failed to fetch file {file_path}: {response.status_code}")
-            return None
-            
-        content_data = response.json()
-        if content_data.get("type") != "file":
-            self.logger.error(f"Path {file_path} is not a file")
-            return None
-            
-        try:
-            content = base64.b64decode(content_data["content"]).decode("utf-8")
+        def fetch(etag: Optional[str]) -> FetchResult:
+            headers = dict(self.headers)
+            if etag:
+                headers["If-None-Match"] = etag
+            self.logger.info(f"Fetching file content: {file_path} from branch {branch}")
+            response = self._request("GET", url, RequestClass.READ, headers=headers, params=params)
+            
+            if response.status_code == 304:
+                self.logger.info(f"File content unchanged: {file_path}")
+                return FetchResult(304)
+            if response.status_code == 404:
+                self.logger.info(f"File {file_path} not found in branch {branch}")
+                return FetchResult(404)
+            if response.status_code != 200:
+                raise requests.HTTPError(f"{response.status_code}, {response.text}", response=response)
+                
+            content_data = response.json()
+            if content_data.get("type") != "file":
+                self.logger.error(f"Path {file_path} is not a file")
+                return FetchResult(404)
+                
+            try:
+                content = base64.b64decode(content_data["content"]).decode("utf-8")
+            except Exception as e:
+                raise requests.HTTPError(f"Failed to decode file content: {str(e)}", response=response)
             self.logger.info(f"Successfully fetched file content: {file_path}")
-            return content
-        except Exception as e:
-            self.logger.error(f"Failed to decode file content: {str(e)}")
-            return None
+            return FetchResult(200, content, response.headers.get("ETag"), content_data.get("sha"))
+        
+        return get_content_cache().get_entry_or_fetch(
+            f"{self.repo_owner}/{self.repo_name}", branch, file_path, fetch
+        )
 
     def commit_file(self, file_path: str, content: str, commit_message: str, branch_name: str) -> bool:
         """
@@ -799,17 +896,19 @@ class GitHubClient:
         # Calculate file checksum to check if file actually changed
         content_checksum = hashlib.md5(content.encode()).hexdigest()
         
-        # First, get the current file info to get the SHA
+        # First, get the current file info to get the SHA (served from the content cache when unchanged)
         url = f"{self.repo_api_url}/contents/{file_path}"
-        params = {"ref": branch_name}
         
         self.logger.info(f"Checking if file {file_path} exists in {branch_name}")
-        response = requests.get(url, headers=self.headers, params=params)
+        try:
+            entry = self._get_file_entry(file_path, branch_name)
+        except requests.RequestException as e:
+            self.logger.error(f"Failed to check file {file_path}: {str(e)}")
+            return False
         
-        if response.status_code == 200:
+        if entry is not None:
             # File exists, check if it actually changed
-            file_sha = response.json()["sha"]
-            current_content = base64.b64decode(response.json()["content"]).decode()
+            current_content, file_sha = entry
             current_checksum = hashlib.md5(current_content.encode()).hexdigest()
             
             if current_checksum == content_checksum:
@@ -833,7 +932,7 @@ class GitHubClient:
             }
             
             self.logger.info(f"Updating existing file {file_path} in {branch_name}")
-            update_response = requests.put(url, headers=self.headers, json=update_data)
+            update_response = self._request("PUT", url, RequestClass.WRITE, json=update_data)
             
             if update_response.status_code != 200:
                 self.logger.error(f"Failed to update file {file_path}: {update_response.status_code}, {update_response.text}")
@@ -841,7 +940,7 @@ class GitHubClient:
                 
             self.logger.info(f"Successfully updated file {file_path}")
             return True
-        elif response.status_code == 404:
+        else:
             # File doesn't exist, create it
             create_data = {
                 "message": commit_message,
@@ -850,7 +949,7 @@ class GitHubClient:
             }
             
             self.logger.info(f"Creating new file {file_path} in {branch_name}")
-            create_response = requests.put(url, headers=self.headers, json=create_data)
+            create_response = self._request("PUT", url, RequestClass.WRITE, json=create_data)
             
             if create_response.status_code != 201:
                 self.logger.error(f"Failed to create file {file_path}: {create_response.status_code}, {create_response.text}")
@@ -858,7 +957,4 @@ class GitHubClient:
                 
             self.logger.info(f"Successfully created file {file_path}")
             return True
-        else:
-            self.logger.error(f"Failed to check file {file_path}: {response.status_code}, {response.text}")
-            return False
 
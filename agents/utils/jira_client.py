@@ -4,8 +4,77 @@ import json
 import requests
 import time
 import asyncio
-from typing import Dict, Any, List, Optional, Union
+import threading
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Any, List, Optional, Union, AsyncIterator
 from .logger import Logger
+from .adf import adf_to_text
+
+# Issues per search page (JIRA Cloud caps this at 100) and pages fetched at once
+JIRA_SEARCH_PAGE_SIZE = int(os.environ.get("JIRA_SEARCH_PAGE_SIZE", "100"))
+JIRA_SEARCH_CONCURRENCY = int(os.environ.get("JIRA_SEARCH_CONCURRENCY", "4"))
+
+# Connection pool of the shared keep-alive session
+JIRA_HTTP_MAX_CONNECTIONS = int(os.environ.get("JIRA_HTTP_MAX_CONNECTIONS", "20"))
+
+# Retries of throttled requests (429/503), waiting as long as JIRA's Retry-After asks
+JIRA_MAX_RETRIES = int(os.environ.get("MAX_RETRIES", "3"))
+
+# Only the fields mapped into the ticket dictionary
+OPEN_BUG_FIELDS = ["summary", "description", "status", "created", "updated", "assignee", "reporter", "priority"]
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_jira_session() -> requests.Session:
+    """
+    Return the process-wide keep-alive session for JIRA requests
+    
+    Module-level requests.get/post open a new connection (and TLS handshake)
+    per call; the shared session keeps pooled connections alive instead.
+    Throttled requests (429/503) are retried after JIRA's Retry-After.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            retry = Retry(
+                total=JIRA_MAX_RETRIES,
+                connect=0,
+                read=0,
+                status_forcelist=[429, 503],
+                allowed_methods=None,
+                respect_retry_after_header=True,
+                backoff_factor=1,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=JIRA_HTTP_MAX_CONNECTIONS, max_retries=retry)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def get_session_stats() -> Dict[str, Any]:
+    """Requests sent and connections opened by the shared session"""
+    session = get_jira_session()
+    requests_sent = 0
+    connections_opened = 0
+    # The same adapter is mounted for http and https
+    for adapter in {id(adapter): adapter for adapter in session.adapters.values()}.values():
+        pools = adapter.poolmanager.pools
+        for pool in [pools[key] for key in pools.keys()]:
+            requests_sent += pool.num_requests
+            connections_opened += pool.num_connections
+    reused = max(0, requests_sent - connections_opened)
+    return {
+        "requests": requests_sent,
+        "connections_opened": connections_opened,
+        "connections_reused": reused,
+        "reuse_ratio": round(reused / requests_sent, 3) if requests_sent else 0.0
+    }
+
 
 class JiraClient:
     """Client for interacting with JIRA REST API"""
@@ -30,6 +99,7 @@ class JiraClient:
             
         # Set up auth and headers
         self.auth = (self.jira_user, self.jira_token)
+        self.session = get_jira_session()
         self.headers = {
             "Accept": "application/json",
             "Content-Type": "application/json"
@@ -51,7 +121,7 @@ class JiraClient:
         
         self.logger.info(f"Fetching ticket {ticket_id}")
         start_time = time.time()
-        response = requests.get(
+        response = self.session.get(
             url, 
             auth=self.auth, 
             headers=self.headers
@@ -69,35 +139,125 @@ class JiraClient:
         
         return response.json()
     
-    def get_open_bugs(self, max_results: int = 10) -> List[Dict[str, Any]]:
+    def get_open_bugs(self, max_results: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        Fetch open bug tickets from JIRA
+        Fetch open bug tickets from JIRA, paging through all results
         
         Args:
-            max_results: Maximum number of tickets to return
+            max_results: Maximum number of tickets to return (None for all)
             
         Returns:
             List of ticket dictionaries
         """
-        url = f"{self.jira_url}/rest/api/3/search"
+        jql = self._open_bugs_jql()
+        self.logger.info(f"Fetching open bugs with JQL: {jql}")
+        
+        tickets = []
+        seen = set()
+        start_at = 0
+        while max_results is None or len(tickets) < max_results:
+            page_size = JIRA_SEARCH_PAGE_SIZE if max_results is None else min(JIRA_SEARCH_PAGE_SIZE, max_results - len(tickets))
+            data = self._search_page(jql, start_at, page_size)
+            issues = data.get("issues", [])
+            for issue in issues:
+                if issue["key"] not in seen and (max_results is None or len(tickets) < max_results):
+                    seen.add(issue["key"])
+                    tickets.append(self._normalize_issue(issue))
+            start_at += len(issues)
+            if not issues or start_at >= data.get("total", 0):
+                break
+            
+        self.logger.info(f"Found {len(tickets)} open bug tickets to process")
+        return tickets
+    
+    async def iter_bug_tickets(
+        self,
+        page_size: Optional[int] = None,
+        concurrency: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield open bug tickets as search pages arrive
+        
+        The first page reports the total; the remaining pages are then
+        requested up to `concurrency` at a time and yielded in order.
+        
+        Args:
+            page_size: Issues per search page (defaults to JIRA_SEARCH_PAGE_SIZE)
+            concurrency: Search pages fetched at once (defaults to JIRA_SEARCH_CONCURRENCY)
+            
+        Yields:
+            Ticket dictionaries
+        """
+        page_size = max(1, page_size or JIRA_SEARCH_PAGE_SIZE)
+        concurrency = max(1, concurrency or JIRA_SEARCH_CONCURRENCY)
+        jql = self._open_bugs_jql()
+        seen = set()
+        
+        def take(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+            tickets = []
+            for issue in data.get("issues", []):
+                if issue["key"] not in seen:
+                    seen.add(issue["key"])
+                    tickets.append(self._normalize_issue(issue))
+            return tickets
         
-        # Build JQL query for open bugs
+        first = await asyncio.to_thread(self._search_page, jql, 0, page_size)
+        for ticket in take(first):
+            yield ticket
+        
+        # JIRA may cap the page size below what we asked for
+        step = len(first.get("issues", []))
+        if not step:
+            return
+        starts = iter(range(step, first.get("total", 0), step))
+        pending = []
+        try:
+            for start_at in starts:
+                pending.append(asyncio.ensure_future(asyncio.to_thread(self._search_page, jql, start_at, step)))
+                if len(pending) >= concurrency:
+                    break
+            while pending:
+                data = await pending.pop(0)
+                next_start = next(starts, None)
+                if next_start is not None:
+                    pending.append(asyncio.ensure_future(asyncio.to_thread(self._search_page, jql, next_start, step)))
+                for ticket in take(data):
+                    yield ticket
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    def _open_bugs_jql(self) -> str:
+        """JQL for open bugs, ordered so pages stay stable while paging"""
         project_clause = f"project = {self.project_key}" if self.project_key else ""
         jql = f"issuetype = Bug AND (status = \"To Do\" OR status = Open)"
         if project_clause:
             jql += f" AND {project_clause}"
+        return jql + " ORDER BY created ASC"
+    
+    def _search_page(self, jql: str, start_at: int, max_results: int) -> Dict[str, Any]:
+        """
+        Fetch one page of search results
         
+        Args:
+            jql: JQL query
+            start_at: Index of the first issue in the page
+            max_results: Page size
+            
+        Returns:
+            Search response with issues, startAt, maxResults and total
+        """
+        url = f"{self.jira_url}/rest/api/3/search"
         params = {
             "jql": jql,
+            "startAt": start_at,
             "maxResults": max_results,
-            "fields": "summary,description,status,issuetype,created,updated,assignee,reporter,priority"
+            "fields": ",".join(OPEN_BUG_FIELDS)
         }
         
-        self.logger.info(f"Fetching open bugs with JQL: {jql}")
         self.logger.debug(f"GET {url} with params: {params}")
-        
         start_time = time.time()
-        response = requests.get(
+        response = self.session.get(
             url,
             params=params,
             auth=self.auth,
@@ -105,83 +265,54 @@ class JiraClient:
         )
         end_time = time.time()
         
-        self.logger.info(f"GET {url} - Status: {response.status_code} - Time: {end_time - start_time:.2f}s")
+        self.logger.info(f"GET {url} startAt={start_at} - Status: {response.status_code} - Time: {end_time - start_time:.2f}s")
         
         if response.status_code != 200:
             self.logger.error(f"Failed to fetch open bugs: {response.status_code}, {response.text}")
             response.raise_for_status()
         
-        data = response.json()
-        tickets = []
-        
-        # Debug full response
-        self.logger.debug(f"JIRA API response: {json.dumps(data)[:500]}...")
-        
-        issues = data.get("issues", [])
-        if not issues:
-            self.logger.info("No open bug tickets found")
-            return []
-            
-        for issue in issues:
-            ticket_id = issue["key"]
-            fields = issue["fields"]
-            
-            # Safely extract fields
-            assignee = "Unassigned"
-            if fields.get("assignee"):
-                assignee = fields["assignee"].get("displayName", "Unassigned")
-                
-            # Extract description text from Atlassian Document Format if available
-            description = fields.get("description", "")
-            if isinstance(description, dict) and "content" in description:
-                description_text = self._extract_text_from_adf(description)
-                self.logger.debug(f"Extracted description text from ADF: {description_text[:100]}...")
-            else:
-                description_text = str(description)
-                
-            ticket = {
-                "ticket_id": ticket_id,
-                "title": fields.get("summary", "No title"),
-                "description": description_text,
-                "status": fields.get("status", {}).get("name", "Unknown") if fields.get("status") else "Unknown",
-                "created": fields.get("created", ""),
-                "updated": fields.get("updated", ""),
-                "assignee": assignee,
-                "reporter": fields.get("reporter", {}).get("displayName", "Unknown") if fields.get("reporter") else "Unknown",
-                "priority": fields.get("priority", {}).get("name", "Normal") if fields.get("priority") else "Normal"
-            }
-            
-            self.logger.debug(f"Processed ticket {ticket_id}: {json.dumps(ticket)[:500]}...")
-            tickets.append(ticket)
-            
-        self.logger.info(f"Found {len(tickets)} open bug tickets to process")
-        return tickets
+        return response.json()
     
-    def _extract_text_from_adf(self, adf_doc: Dict[str, Any]) -> str:
+    def _normalize_issue(self, issue: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Extract plain text from Atlassian Document Format (ADF)
+        Map a search issue to the ticket dictionary format
         
         Args:
-            adf_doc: ADF document object
+            issue: Issue as returned by the search API
             
         Returns:
-            Plain text representation of the document
+            Ticket dictionary
         """
-        text_parts = []
+        ticket_id = issue["key"]
+        fields = issue["fields"]
         
-        def _process_content(content):
-            if not content:
-                return
-                
-            for item in content:
-                if item.get("type") == "text" and "text" in item:
-                    text_parts.append(item["text"])
-                    
-                if "content" in item:
-                    _process_content(item["content"])
+        # Safely extract fields
+        assignee = "Unassigned"
+        if fields.get("assignee"):
+            assignee = fields["assignee"].get("displayName", "Unassigned")
+            
+        # Extract description text from Atlassian Document Format if available
+        description = fields.get("description", "")
+        if isinstance(description, dict) and "content" in description:
+            description_text = adf_to_text(description)
+            self.logger.debug(f"Extracted description text from ADF: {description_text[:100]}...")
+        else:
+            description_text = str(description)
+            
+        ticket = {
+            "ticket_id": ticket_id,
+            "title": fields.get("summary", "No title"),
+            "description": description_text,
+            "status": fields.get("status", {}).get("name", "Unknown") if fields.get("status") else "Unknown",
+            "created": fields.get("created", ""),
+            "updated": fields.get("updated", ""),
+            "assignee": assignee,
+            "reporter": fields.get("reporter", {}).get("displayName", "Unknown") if fields.get("reporter") else "Unknown",
+            "priority": fields.get("priority", {}).get("name", "Normal") if fields.get("priority") else "Normal"
+        }
         
-        _process_content(adf_doc.get("content", []))
-        return " ".join(text_parts)
+        self.logger.debug(f"Processed ticket {ticket_id}: {json.dumps(ticket)[:500]}...")
+        return ticket
     
     def add_comment(self, ticket_id: str, comment: str) -> bool:
         """
@@ -220,7 +351,7 @@ class JiraClient:
         
         try:
             start_time = time.time()
-            response = requests.post(
+            response = self.session.post(
                 url,
                 json=payload,
                 auth=self.auth,
@@ -269,7 +400,7 @@ class JiraClient:
             try:
                 self.logger.info(f"Fetching available transitions for {ticket_id}")
                 start_time = time.time()
-                transitions_response = requests.get(
+                transitions_response = self.session.get(
                     transitions_url,
                     auth=self.auth,
                     headers=self.headers
@@ -313,7 +444,7 @@ class JiraClient:
                 self.logger.info(f"Updating ticket {ticket_id} to status '{status}' using transition ID {transition_id}")
                 
                 start_time = time.time()
-                transition_result = requests.post(
+                transition_result = self.session.post(
                     transitions_url,
                     json=transition_payload,
                     auth=self.auth,
@@ -338,18 +469,18 @@ class JiraClient:
 
     async def fetch_bug_tickets(self) -> List[Dict[str, Any]]:
         """
-        Asynchronous wrapper for get_open_bugs
+        Fetch all open bug tickets, paging through the search results
         
         Returns:
             List of ticket dictionaries
         """
         self.logger.info("Fetching bug tickets from JIRA")
+        tickets = []
         try:
-            # Use asyncio.to_thread to properly run the synchronous method in a separate thread
-            # This prevents blocking the event loop
-            tickets = await asyncio.to_thread(self.get_open_bugs)
-            self.logger.info(f"Found {len(tickets)} bug tickets to process")
-            return tickets
+            async for ticket in self.iter_bug_tickets():
+                tickets.append(ticket)
         except Exception as e:
+            # Keep the pages that did arrive
             self.logger.error(f"Error fetching bug tickets: {str(e)}")
-            return []
+        self.logger.info(f"Found {len(tickets)} bug tickets to process")
+        return tickets
@@ -0,0 +1,267 @@
+
+"""
+Rate-limit-aware scheduler for GitHub API requests
+
+Every GitHub call acquires a permit from a token bucket whose refill rate
+is derived from the X-RateLimit-Remaining / X-RateLimit-Reset headers, so
+the remaining budget is spread over the rest of the window instead of
+being burned in a burst. Waiting requests are served by request class
+(PR creation before commits, reads and comments), low-priority classes
+are held back when the budget runs low, and Retry-After is honoured for
+both primary and secondary rate limits.
+"""
+
+import os
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+import threading
+from enum import IntEnum
+from typing import Dict, Any, Optional, Callable, Awaitable, Mapping
+
+logger = logging.getLogger("request-scheduler")
+
+GITHUB_SCHEDULER_BURST = int(os.environ.get('GITHUB_SCHEDULER_BURST', '50'))
+GITHUB_SCHEDULER_RESERVE = int(os.environ.get('GITHUB_SCHEDULER_RESERVE', '100'))
+GITHUB_SCHEDULER_MAX_RETRIES = int(os.environ.get('GITHUB_SCHEDULER_MAX_RETRIES', '3'))
+GITHUB_SCHEDULER_MAX_WAIT = float(os.environ.get('GITHUB_SCHEDULER_MAX_WAIT', '900'))
+
+# GitHub's primary limit for authenticated requests
+DEFAULT_RATE_PER_SECOND = 5000 / 3600
+# GitHub asks clients to wait at least a minute after a secondary rate limit without Retry-After
+SECONDARY_RATE_LIMIT_DELAY = 60.0
+
+
+class RequestClass(IntEnum):
+    """Request classes in priority order (lower value is served first)"""
+    PULL_REQUEST = 0
+    WRITE = 1
+    READ = 2
+    COMMENT = 3
+
+
+class RateLimitWaitExceeded(Exception):
+    """Raised when a request would have to wait longer than the configured maximum"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        super().__init__(f"GitHub rate limit requires waiting {delay:.0f}s, above the configured maximum")
+
+
+def _lower_headers(headers: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+    return {str(k).lower(): v for k, v in (headers or {}).items()}
+
+
+class GitHubRequestScheduler:
+    """Token bucket plus priority queue shared by all GitHub calls in a process"""
+
+    def __init__(self, burst: int = GITHUB_SCHEDULER_BURST, reserve: int = GITHUB_SCHEDULER_RESERVE,
+                 max_retries: int = GITHUB_SCHEDULER_MAX_RETRIES, max_wait: float = GITHUB_SCHEDULER_MAX_WAIT):
+        self.burst = burst
+        self.reserve = reserve
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._sequence = itertools.count()
+
+        self._tokens = float(burst)
+        self._rate = DEFAULT_RATE_PER_SECOND
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._remaining: Optional[int] = None
+        self._reset_at = 0.0
+
+        self._class_metrics = {
+            request_class.name: {"requests": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+            for request_class in RequestClass
+        }
+        self._retries = 0
+        self._throttled_seconds = 0.0
+
+    def execute(self, request_class: RequestClass, fn: Callable, *args, **kwargs):
+        """
+        Run a GitHub call under the scheduler, retrying when rate limited
+
+        fn may raise an exception carrying ``status`` and ``headers`` (PyGithub)
+        or return a response carrying ``status_code`` and ``headers`` (requests).
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(request_class)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not self._retry_after_error(request_class, e, attempt):
+                    raise
+                continue
+            if not self._retry_after_response(request_class, result, attempt):
+                return result
+        return result
+
+    async def execute_async(self, request_class: RequestClass, fn: Callable[..., Awaitable], *args, **kwargs):
+        """Async variant of execute for coroutine calls (e.g. httpx.AsyncClient requests)"""
+        for attempt in range(self.max_retries + 1):
+            # Waiting for a permit blocks, so keep it off the event loop
+            await asyncio.to_thread(self.acquire, request_class)
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                if not self._retry_after_error(request_class, e, attempt):
+                    raise
+                continue
+            if not self._retry_after_response(request_class, result, attempt):
+                return result
+        return result
+
+    def acquire(self, request_class: RequestClass) -> float:
+        """Block until the request may be sent; returns the time spent queued"""
+        entry = (int(request_class), next(self._sequence))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    delay = self._delay_for(entry, now)
+                    if delay == 0:
+                        break
+                    if delay is not None and delay > self.max_wait:
+                        raise RateLimitWaitExceeded(delay)
+                    self._cond.wait(timeout=delay)
+                self._tokens -= 1
+                if self._remaining is not None:
+                    self._remaining -= 1
+            finally:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+            waited = time.monotonic() - start
+            metrics = self._class_metrics[request_class.name]
+            metrics["requests"] += 1
+            metrics["wait_seconds"] += waited
+            metrics["max_wait_seconds"] = max(metrics["max_wait_seconds"], waited)
+        return waited
+
+    def observe_response(self, status: Optional[int], headers: Optional[Mapping[str, Any]],
+                         body: str = "") -> Optional[float]:
+        """
+        Update the budget from response headers
+
+        Returns:
+            Seconds to wait before retrying if the response was rate limited, None otherwise
+        """
+        headers = _lower_headers(headers)
+        now = time.monotonic()
+        delay = None
+        with self._cond:
+            remaining = headers.get("x-ratelimit-remaining")
+            reset = headers.get("x-ratelimit-reset")
+            if remaining is not None and reset is not None:
+                self._set_budget(int(remaining), float(reset))
+
+            if status in (403, 429):
+                retry_after = headers.get("retry-after")
+                if retry_after is not None:
+                    delay = float(retry_after)
+                elif remaining is not None and int(remaining) == 0:
+                    delay = max(0.0, self._reset_at - now)
+                elif "secondary rate limit" in (body or "").lower() or status == 429:
+                    delay = SECONDARY_RATE_LIMIT_DELAY
+
+                if delay is not None:
+                    self._pause(now + delay)
+                    logger.warning(f"GitHub rate limit hit (status {status}), pausing requests for {delay:.0f}s")
+            self._cond.notify_all()
+        return delay
+
+    def update_budget(self, remaining: int, reset_epoch: float) -> None:
+        """Seed the token bucket from the remaining budget and the window reset time"""
+        with self._cond:
+            self._set_budget(remaining, reset_epoch)
+            self._cond.notify_all()
+
+    def _set_budget(self, remaining: int, reset_epoch: float) -> None:
+        now = time.monotonic()
+        reset_in = max(0.0, reset_epoch - time.time())
+        self._remaining = remaining
+        self._reset_at = now + reset_in
+        self._rate = max(remaining, 1) / max(reset_in, 1.0)
+        if remaining <= 0:
+            self._pause(self._reset_at)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue-wait and throttling metrics"""
+        with self._cond:
+            return {
+                "classes": {name: dict(metrics) for name, metrics in self._class_metrics.items()},
+                "queued": len(self._waiting),
+                "retries": self._retries,
+                "throttled_seconds": self._throttled_seconds,
+                "remaining": self._remaining,
+                "rate_per_second": self._rate,
+                "tokens": self._tokens,
+            }
+
+    def _retry_after_error(self, request_class: RequestClass, error: Exception, attempt: int) -> bool:
+        status = getattr(error, "status", None)
+        delay = self.observe_response(status, getattr(error, "headers", None), str(error)) if status else None
+        if delay is None or attempt == self.max_retries:
+            return False
+        self._record_retry(request_class, delay)
+        return True
+
+    def _retry_after_response(self, request_class: RequestClass, response: Any, attempt: int) -> bool:
+        if not (hasattr(response, "status_code") and hasattr(response, "headers")):
+            return False
+        delay = self.observe_response(response.status_code, response.headers, getattr(response, "text", ""))
+        if delay is None or attempt == self.max_retries:
+            return False
+        self._record_retry(request_class, delay)
+        return True
+
+    def _record_retry(self, request_class: RequestClass, delay: float) -> None:
+        with self._cond:
+            self._retries += 1
+        logger.warning(f"GitHub {request_class.name} request rate limited, retrying in {delay:.0f}s")
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(float(self.burst), self._tokens + elapsed * self._rate)
+
+    def _pause(self, until: float) -> None:
+        if until > self._paused_until:
+            self._throttled_seconds += until - max(self._paused_until, time.monotonic())
+            self._paused_until = until
+
+    def _delay_for(self, entry, now: float) -> Optional[float]:
+        """Seconds to wait before this entry may proceed; None means wait for another request"""
+        if self._waiting[0] != entry:
+            return None
+        if now < self._paused_until:
+            return self._paused_until - now
+        # Keep the last part of the budget for PR creation and commits
+        if (entry[0] > RequestClass.WRITE and self._remaining is not None
+                and self._remaining <= self.reserve and now < self._reset_at):
+            return self._reset_at - now
+        if self._tokens >= 1:
+            return 0
+        return (1 - self._tokens) / self._rate
+
+
+_request_scheduler: Optional[GitHubRequestScheduler] = None
+_request_scheduler_lock = threading.Lock()
+
+
+def get_request_scheduler() -> GitHubRequestScheduler:
+    """Return the process-wide request scheduler"""
+    global _request_scheduler
+    with _request_scheduler_lock:
+        if _request_scheduler is None:
+            _request_scheduler = GitHubRequestScheduler()
+        return _request_scheduler
@@ -0,0 +1,274 @@
+
+"""
+Duration-balanced parallel test shards
+
+A single pytest process keeps one core busy however large the machine.
+The runner splits the test modules to run across QA_TEST_WORKERS pytest
+processes. Modules are the unit of sharding, so module and class fixtures
+still run once. Shards are balanced with the longest-processing-time rule
+on the durations of earlier runs, kept per test module in a small SQLite
+database (exponentially weighted, so a slow run does not skew the plan for
+long). The same history sets each shard's timeout: a multiple of its
+expected duration, within QA_TEST_MIN_TIMEOUT and QA_TEST_MAX_TIMEOUT.
+Shards holding a module without history get the fixed QA_TEST_TIMEOUT.
+With fail_fast, every shard stops at its first failure (`-x`) and the
+first failing shard stops the others. With a result cache, tests that
+passed before on identical inputs are left out and returned as one extra
+result holding their cached records.
+"""
+
+import os
+import time
+import heapq
+import sqlite3
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from .junit_report import TestRecord, junit_args, module_durations, parse_report
+from .impact_analysis import CACHE_OFF
+from .output_stream import TestProgress, new_output
+from .result_cache import CachePlan, ResultCache, get_result_cache
+from .warm_pool import run_pytest
+
+logger = logging.getLogger("qa-shard-runner")
+
+# Parallel pytest processes (0 = one per CPU)
+QA_TEST_WORKERS = int(os.environ.get("QA_TEST_WORKERS", "0")) or os.cpu_count() or 1
+# SQLite database of per-module durations (in memory only when empty)
+QA_TIMING_DB_PATH = os.environ.get("QA_TIMING_DB_PATH", "logs/qa_timings.sqlite3")
+# Timeout of a shard holding modules that never ran before
+QA_TEST_TIMEOUT = float(os.environ.get("QA_TEST_TIMEOUT", "300"))
+# A shard may take this many times its expected duration (plus interpreter startup) before it is killed
+QA_TIMEOUT_FACTOR = float(os.environ.get("QA_TIMEOUT_FACTOR", "3"))
+QA_TEST_MIN_TIMEOUT = float(os.environ.get("QA_TEST_MIN_TIMEOUT", "30"))
+QA_TEST_MAX_TIMEOUT = float(os.environ.get("QA_TEST_MAX_TIMEOUT", "900"))
+
+STARTUP_SECONDS = 5.0
+# Assumed duration of a module without history when nothing else is known
+DEFAULT_DURATION = 1.0
+# Weight of the latest run in the recorded duration
+EWMA_ALPHA = 0.5
+# pytest exit code when a shard collected no tests
+NO_TESTS_COLLECTED = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS test_durations (
+    test_file TEXT PRIMARY KEY,
+    duration REAL NOT NULL,
+    runs INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class TimingDB:
+    """Historical durations of test modules"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = QA_TIMING_DB_PATH if path is None else path
+        if self.path and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path or ":memory:", check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+
+    def durations(self, test_files: Iterable[str]) -> Dict[str, float]:
+        """Recorded durations of the modules that ran before"""
+        test_files = list(test_files)
+        found = {}
+        with self._lock:
+            # Stay below SQLite's bound-parameter limit
+            for start in range(0, len(test_files), 500):
+                chunk = test_files[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT test_file, duration FROM test_durations WHERE test_file IN ({','.join('?' * len(chunk))})",
+                    chunk).fetchall()
+                found.update(rows)
+        return found
+
+    def record(self, durations: Dict[str, float]):
+        """Blend the durations of a run into the history"""
+        if not durations:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO test_durations (test_file, duration, runs, updated_at) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT(test_file) DO UPDATE SET "
+                f"duration = {EWMA_ALPHA} * excluded.duration + {1 - EWMA_ALPHA} * duration, "
+                "runs = runs + 1, updated_at = excluded.updated_at",
+                [(test_file, duration, now) for test_file, duration in durations.items()])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_timing_db: Optional[TimingDB] = None
+_timing_db_lock = threading.Lock()
+
+
+def get_timing_db() -> TimingDB:
+    """Process-wide timing database"""
+    global _timing_db
+    with _timing_db_lock:
+        if _timing_db is None:
+            _timing_db = TimingDB()
+        return _timing_db
+
+
+class Shard(NamedTuple):
+    index: int
+    test_files: List[str]
+    estimate: float
+    timeout: float
+
+
+class ShardResult(NamedTuple):
+    shard: Shard
+    returncode: Optional[int]  # None when the shard timed out
+    output: str
+    duration: float
+    tests: List[TestRecord]  # Per-test results from the shard's JUnit report
+    stopped: bool = False  # Killed because another shard failed first
+    cached: bool = False  # Not run: the tests that passed before on identical inputs
+
+    @property
+    def passed(self) -> bool:
+        return self.returncode in (0, NO_TESTS_COLLECTED)
+
+    @property
+    def timed_out(self) -> bool:
+        return self.returncode is None and not self.stopped
+
+
+def shard_timeout(estimate: float, complete_history: bool) -> float:
+    """Timeout of a shard expected to take `estimate` seconds"""
+    if not complete_history:
+        return min(QA_TEST_TIMEOUT, QA_TEST_MAX_TIMEOUT)
+    return min(max(estimate * QA_TIMEOUT_FACTOR + STARTUP_SECONDS, QA_TEST_MIN_TIMEOUT), QA_TEST_MAX_TIMEOUT)
+
+
+def plan_shards(test_files: List[str], workers: int, durations: Dict[str, float]) -> List[Shard]:
+    """Split modules into at most `workers` shards of similar expected duration (longest first)"""
+    if not test_files:
+        return []
+    known = sorted(durations[f] for f in test_files if f in durations)
+    default = known[len(known) // 2] if known else DEFAULT_DURATION
+    count = max(1, min(workers, len(test_files)))
+
+    heap = [(0.0, index) for index in range(count)]
+    assigned: List[List[str]] = [[] for _ in range(count)]
+    for test_file in sorted(test_files, key=lambda f: (-durations.get(f, default), f)):
+        load, index = heapq.heappop(heap)
+        assigned[index].append(test_file)
+        heapq.heappush(heap, (load + durations.get(test_file, default), index))
+
+    shards = []
+    for load, index in sorted(heap, key=lambda item: item[1]):
+        files = assigned[index]
+        complete = all(f in durations for f in files)
+        shards.append(Shard(index, files, load, shard_timeout(load, complete)))
+    return shards
+
+
+def _run_shard(shard: Shard, command: List[str], cwd: str, env: Optional[Dict[str, str]],
+               report_dir: str, stop: Optional[threading.Event] = None,
+               progress: Optional[TestProgress] = None) -> ShardResult:
+    report_path = os.path.join(report_dir, f"shard-{shard.index}.xml")
+    args = command + junit_args(report_path) + shard.test_files
+    started = time.monotonic()
+    returncode, output = run_pytest(args, cwd, env, shard.timeout, stop, new_output(f"shard-{shard.index}", progress))
+    duration = time.monotonic() - started
+    if returncode is None and stop is not None and stop.is_set() and duration < shard.timeout:
+        logger.info(f"Test shard {shard.index} stopped after another shard failed")
+        output += "\nStopped: another test shard failed"
+        return ShardResult(shard, returncode, output, duration, [], stopped=True)
+
+    tests: List[TestRecord] = []
+    if returncode is None:
+        logger.error(f"Test shard {shard.index} timed out after {shard.timeout:.0f}s "
+                     f"(expected {shard.estimate:.1f}s)")
+        output += f"\nTimeout: test shard exceeded {shard.timeout:.0f} seconds"
+    else:
+        tests = parse_report(report_path, cwd)
+    result = ShardResult(shard, returncode, output, duration, tests)
+    if stop is not None and not result.passed:
+        stop.set()
+    return result
+
+
+def _deselected(command: List[str]) -> List[str]:
+    """Node ids passed to --deselect in a pytest command"""
+    return [value for option, value in zip(command, command[1:]) if option == "--deselect"] + [
+        arg.split("=", 1)[1] for arg in command if arg.startswith("--deselect=")]
+
+
+def _cached_result(plan: CachePlan) -> ShardResult:
+    shard = Shard(-1, plan.skipped_files, 0.0, 0.0)
+    output = (f"{len(plan.cached)} tests passed before on identical inputs and were not run again "
+              f"({len(plan.skipped_files)} modules skipped)")
+    return ShardResult(shard, 0, output, 0.0, plan.cached, cached=True)
+
+
+def run_shards(command: List[str], cwd: str, test_files: List[str], workers: Optional[int] = None,
+               env: Optional[Dict[str, str]] = None, timing_db: Optional[TimingDB] = None,
+               fail_fast: bool = False, progress: Optional[TestProgress] = None,
+               cache_mode: str = CACHE_OFF, result_cache: Optional[ResultCache] = None) -> List[ShardResult]:
+    """Run test modules in parallel pytest processes and record how long each module took
+
+    cache_mode use leaves out the tests with a cached pass, refresh runs
+    them all; both record the new passes in the result cache.
+    """
+    timing_db = timing_db or get_timing_db()
+    # Modules with tests deselected by the caller do not run whole, whatever the cache says
+    partial_files = {nodeid.split("::")[0] for nodeid in _deselected(command)}
+    plan = None
+    results: List[ShardResult] = []
+    if cache_mode != CACHE_OFF:
+        result_cache = result_cache or get_result_cache()
+        try:
+            plan = result_cache.plan(cwd, test_files, command, cache_mode)
+        except Exception as e:
+            logger.warning(f"Result cache unavailable, running every test: {str(e)}")
+        if plan is not None and plan.cached:
+            skipped = set(plan.skipped_files)
+            test_files = [test_file for test_file in test_files if test_file not in skipped]
+            command = command + [arg for nodeid in plan.deselected for arg in ("--deselect", nodeid)]
+            results.append(_cached_result(plan))
+            if progress is not None:
+                progress.add_cached(len(plan.cached))
+    stop = threading.Event() if fail_fast else None
+    if fail_fast:
+        command = command + ["-x"]
+    shards = plan_shards(test_files, workers or QA_TEST_WORKERS, timing_db.durations(test_files))
+    if not shards:
+        return results
+    logger.info(f"Running {len(test_files)} test modules in {len(shards)} shards: " + ", ".join(
+        f"{len(shard.test_files)} modules ~{shard.estimate:.1f}s (timeout {shard.timeout:.0f}s)" for shard in shards))
+
+    with tempfile.TemporaryDirectory(prefix="qa-shards-") as report_dir:
+        with ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix="qa-shard") as pool:
+            shard_results = list(pool.map(
+                lambda shard: _run_shard(shard, command, cwd, env, report_dir, stop, progress), shards))
+    # A shard cut short by -x only ran part of its failing module, and cached tests did not run at all
+    cached_files = {record.file for record in plan.cached} if plan else set()
+    timing_db.record(module_durations(test for result in shard_results if result.passed or not fail_fast
+                                      for test in result.tests if test.file not in cached_files))
+    if plan is not None:
+        result_cache.record(plan, (test for result in shard_results for test in result.tests), partial_files)
+    return results + shard_results
+
+
+def merged_output(results: List[ShardResult]) -> str:
+    """Outputs of all shards, each under a header"""
+    if len(results) == 1:
+        return results[0].output
+    shards = [result for result in results if not result.cached]
+    return "".join(f"\n===== cached =====\n{result.output}" if result.cached else
+                   f"\n===== shard {result.shard.index + 1}/{len(shards)}: {len(result.shard.test_files)} modules, "
+                   f"{result.duration:.1f}s =====\n{result.output}" for result in results)
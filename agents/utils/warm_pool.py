@@ -0,0 +1,291 @@
+
+"""
+Warm pytest runners
+
+Every QA run used to start a cold interpreter that imported pytest, its
+plugins and the project's third-party dependencies again, seconds before
+the first test ran. Test sessions are forked from a multiprocessing
+forkserver instead, which imports all of those once when it starts: pytest,
+the plugins registered under the pytest11 entry point, the third-party
+packages the repository imports (from the import graph) and
+QA_PRELOAD_MODULES. Project modules are never preloaded, so every session
+imports the code under test fresh from its workspace. A forked session
+inherits the interpreter the forkserver started with, so sessions whose
+PYTHON* variables (PYTHONPATH, PYTHONHASHSEED, PYTHONWARNINGS, ...) differ
+from the forkserver's run in a cold interpreter instead.
+
+Candidates are first imported in a throwaway interpreter and only those
+that import cleanly are preloaded, since an import error inside the
+forkserver would take it down. If the forkserver cannot be used, sessions
+fall back to a `python -m pytest` subprocess. Either way the session output
+is streamed into an OutputBuffer while the tests run.
+"""
+
+import os
+import sys
+import json
+import codecs
+import time
+import logging
+import tempfile
+import threading
+import subprocess
+import multiprocessing
+from importlib import metadata
+from typing import IO, Any, Dict, Iterable, List, Optional, Tuple
+
+from .impact_analysis import ImportGraph
+from .output_stream import OutputBuffer
+
+logger = logging.getLogger("qa-warm-pool")
+
+QA_WARM_RUNNERS = os.environ.get("QA_WARM_RUNNERS", "true").lower() == "true"
+# Extra modules to import in the forkserver, comma separated
+QA_PRELOAD_MODULES = [name.strip() for name in os.environ.get("QA_PRELOAD_MODULES", "").split(",") if name.strip()]
+
+PROBE_TIMEOUT = 120
+# Startup variables a forked session cannot honour; PYTHONUNBUFFERED is covered by the line-buffered output
+UNFORKABLE_ENV_PREFIX = "PYTHON"
+FORKABLE_ENV = {"PYTHONUNBUFFERED"}
+# How often a running session checks whether it was asked to stop (and its output is read)
+STOP_POLL_SECONDS = 0.2
+READ_CHUNK = 65536
+READER_GRACE_SECONDS = 5
+# Imports each module given on the command line and prints the ones that imported cleanly
+PROBE_SCRIPT = """
+import sys, json, importlib
+ok = []
+for name in sys.argv[1:]:
+    try:
+        importlib.import_module(name)
+        ok.append(name)
+    except BaseException:
+        pass
+print(json.dumps(ok))
+"""
+
+
+def pytest_plugin_modules() -> List[str]:
+    """Modules of the installed pytest plugins"""
+    try:
+        entry_points = metadata.entry_points()
+        group = entry_points.select(group="pytest11") if hasattr(entry_points, "select") \
+            else entry_points.get("pytest11", [])
+        return sorted({entry_point.value.split(":")[0] for entry_point in group})
+    except Exception:
+        return []
+
+
+def probe_imports(modules: Iterable[str]) -> List[str]:
+    """The modules that import without error in a fresh interpreter"""
+    modules = list(dict.fromkeys(modules))
+    if not modules:
+        return []
+    try:
+        process = subprocess.run([sys.executable, "-c", PROBE_SCRIPT] + modules, capture_output=True, text=True,
+                                 timeout=PROBE_TIMEOUT)
+        return json.loads(process.stdout.strip().splitlines()[-1])
+    except (OSError, subprocess.TimeoutExpired, ValueError, IndexError) as e:
+        logger.warning(f"Could not probe preload modules: {str(e)}")
+        return []
+
+
+def _startup_env(env: Dict[str, str]) -> Dict[str, str]:
+    """The variables of env that are read when an interpreter starts"""
+    return {key: value for key, value in env.items()
+            if key.startswith(UNFORKABLE_ENV_PREFIX) and key not in FORKABLE_ENV}
+
+
+def _run_session(args: List[str], cwd: str, env: Dict[str, str], output_path: str):
+    """Child side: one pytest session, with output going to output_path"""
+    fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.dup2(fd, 1)
+    os.dup2(fd, 2)
+    os.close(fd)
+    # Line by line, so the parent sees progress while the tests run
+    sys.stdout.reconfigure(line_buffering=True)
+    sys.stderr.reconfigure(line_buffering=True)
+    code = 1
+    try:
+        os.chdir(cwd)
+        os.environ.clear()
+        os.environ.update(env)
+        # Our own package must not shadow a same-named package of the project under test
+        package = __name__.split(".")[0]
+        for name in [name for name in sys.modules if name == package or name.startswith(package + ".")]:
+            del sys.modules[name]
+        # Same as `python -m pytest`: the working directory comes first on sys.path
+        sys.path.insert(0, cwd)
+        sys.argv = ["pytest"] + args
+
+        import pytest
+        code = int(pytest.main(args))
+    except BaseException as e:
+        print(f"Test session failed: {e!r}", file=sys.stderr)
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+
+
+class WarmRunner:
+    """Forks pytest sessions from a forkserver with pytest and third-party packages preloaded"""
+
+    def __init__(self):
+        self._context = multiprocessing.get_context("forkserver")
+        self._lock = threading.Lock()
+        self.preloaded: List[str] = []
+        self.started = False
+        self.broken = False
+        self._startup_env: Dict[str, str] = {}
+        self._stats = {"sessions": 0, "fallbacks": 0, "startup_seconds": 0.0}
+
+    def start(self, repo_path: Optional[str] = None):
+        """Probe the preload candidates for a repository and start the forkserver (once)"""
+        with self._lock:
+            if self.started or self.broken:
+                return
+            started = time.monotonic()
+            candidates = ["pytest"] + pytest_plugin_modules() + QA_PRELOAD_MODULES
+            if repo_path:
+                try:
+                    candidates += sorted(ImportGraph(repo_path).external_modules())
+                except Exception as e:
+                    logger.warning(f"Could not list the third-party imports of {repo_path}: {str(e)}")
+            self.preloaded = probe_imports(candidates)
+            try:
+                self._context.set_forkserver_preload(self.preloaded + [__name__])
+                from multiprocessing import forkserver
+                forkserver.ensure_running()
+                self._startup_env = _startup_env(os.environ)
+                self.started = True
+            except Exception as e:
+                logger.warning(f"Warm test runners unavailable, using cold interpreters: {str(e)}")
+                self.broken = True
+            self._stats["startup_seconds"] = round(time.monotonic() - started, 3)
+            logger.info(f"Warm test runner started in {self._stats['startup_seconds']}s "
+                        f"with {len(self.preloaded)} preloaded modules")
+
+    def run(self, args: List[str], cwd: str, env: Optional[Dict[str, str]] = None, timeout: Optional[float] = None,
+            stop: Optional[threading.Event] = None,
+            output: Optional[OutputBuffer] = None) -> Tuple[Optional[int], str]:
+        """Run one pytest session; returns (exit code or None on timeout or stop, output)"""
+        output = output if output is not None else OutputBuffer()
+        self.start(cwd)
+        if self.broken:
+            return run_cold([sys.executable, "-m", "pytest"] + args, cwd, env, timeout, stop, output)
+
+        env = dict(env if env is not None else os.environ)
+        if _startup_env(env) != self._startup_env:
+            logger.info("Test session sets interpreter startup variables, using a cold interpreter")
+            with self._lock:
+                self._stats["fallbacks"] += 1
+            return run_cold([sys.executable, "-m", "pytest"] + args, cwd, env, timeout, stop, output)
+
+        fd, output_path = tempfile.mkstemp(prefix="qa-session-", suffix=".log")
+        os.close(fd)
+        try:
+            process = self._context.Process(target=_run_session, args=(args, cwd, env, output_path))
+            process.start()
+        except Exception as e:
+            os.unlink(output_path)
+            logger.warning(f"Warm test session failed to start, using a cold interpreter: {str(e)}")
+            with self._lock:
+                self._stats["fallbacks"] += 1
+            return run_cold([sys.executable, "-m", "pytest"] + args, cwd, env, timeout, stop, output)
+
+        try:
+            # The session writes to a file, which is followed while it runs
+            with open(output_path, "r", errors="replace") as f:
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while process.is_alive() and not _expired(deadline, stop):
+                    process.join(STOP_POLL_SECONDS)
+                    _pump(f, output)
+                if process.is_alive():
+                    process.kill()
+                    process.join()
+                    returncode = None
+                else:
+                    returncode = process.exitcode
+                _pump(f, output)
+        finally:
+            os.unlink(output_path)
+            output.close()
+
+        with self._lock:
+            self._stats["sessions"] += 1
+        return returncode, output.getvalue()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, started=self.started, broken=self.broken, preloaded=list(self.preloaded))
+
+
+def _expired(deadline: Optional[float], stop: Optional[threading.Event]) -> bool:
+    return (deadline is not None and time.monotonic() >= deadline) or (stop is not None and stop.is_set())
+
+
+def _pump(stream: IO[str], output: OutputBuffer):
+    """Move what has been written to a file so far into the output buffer"""
+    while True:
+        chunk = stream.read(READ_CHUNK)
+        if not chunk:
+            return
+        output.write(chunk)
+
+
+def _pump_pipe(stream: IO[bytes], output: OutputBuffer):
+    """Move what arrives on a pipe into the output buffer, without waiting for whole lines"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for chunk in iter(lambda: stream.read1(READ_CHUNK), b""):
+        output.write(decoder.decode(chunk))
+    output.write(decoder.decode(b"", final=True))
+    stream.close()
+
+
+def run_cold(command: List[str], cwd: str, env: Optional[Dict[str, str]] = None, timeout: Optional[float] = None,
+             stop: Optional[threading.Event] = None,
+             output: Optional[OutputBuffer] = None) -> Tuple[Optional[int], str]:
+    """Run a test command in a fresh interpreter; returns (exit code or None on timeout or stop, output)"""
+    output = output if output is not None else OutputBuffer()
+    env = dict(env if env is not None else os.environ, PYTHONUNBUFFERED="1")
+    process = subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=env)
+    reader = threading.Thread(target=_pump_pipe, args=(process.stdout, output), name="qa-output", daemon=True)
+    reader.start()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    returncode = None
+    while True:
+        try:
+            returncode = process.wait(timeout=STOP_POLL_SECONDS)
+            break
+        except subprocess.TimeoutExpired:
+            if _expired(deadline, stop):
+                process.kill()
+                process.wait()
+                break
+    # A leftover grandchild may hold the pipe open; do not wait for it forever
+    reader.join(READER_GRACE_SECONDS)
+    output.close()
+    return returncode, output.getvalue()
+
+
+_warm_runner: Optional[WarmRunner] = None
+_warm_runner_lock = threading.Lock()
+
+
+def get_warm_runner() -> WarmRunner:
+    """Process-wide warm runner (there is one forkserver per process)"""
+    global _warm_runner
+    with _warm_runner_lock:
+        if _warm_runner is None:
+            _warm_runner = WarmRunner()
+        return _warm_runner
+
+
+def run_pytest(command: List[str], cwd: str, env: Optional[Dict[str, str]] = None, timeout: Optional[float] = None,
+               stop: Optional[threading.Event] = None,
+               output: Optional[OutputBuffer] = None) -> Tuple[Optional[int], str]:
+    """Run a `python -m pytest ...` command in a warm runner when enabled, else in a fresh interpreter"""
+    if QA_WARM_RUNNERS and command[1:3] == ["-m", "pytest"]:
+        return get_warm_runner().run(command[3:], cwd, env, timeout, stop, output)
+    return run_cold(command, cwd, env, timeout, stop, output)
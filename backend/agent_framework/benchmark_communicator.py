@@ -0,0 +1,147 @@
+
+"""
+Throughput benchmark for the communicator's GitHub path
+
+Starts the local fake GitHub API, points AsyncGitHubClient at it through
+GITHUB_API_URL and drives CommunicatorAgent.run for a batch of tickets.
+Reports PRs per minute and API calls per PR, so GitHub-path changes can be
+measured offline. JIRA is always mocked.
+
+Run from the repository root:
+
+    python backend/agent_framework/benchmark_communicator.py --tickets 50 --files 5 --latency 0.05
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from typing import Dict, Any, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(BACKEND_DIR))
+
+from github_service.fake_github_server import FakeGitHubServer, FakeGitHubConfig
+
+OWNER = "bench-org"
+REPO = "bench-repo"
+
+
+def build_files(count: int) -> Dict[str, str]:
+    """Seed repository with one module per file a PR may touch"""
+    return {f"src/module_{i}.py": f"def handler_{i}(value):\n    return value\n" for i in range(count)}
+
+
+def build_input(ticket_id: str, file_count: int) -> Dict[str, Any]:
+    """Communicator input for a ticket whose fix touches file_count files"""
+    patches = [
+        {
+            "file_path": f"src/module_{i}.py",
+            "diff": f"def handler_{i}(value):\n    # {ticket_id}\n    return value if value is not None else 0\n",
+        }
+        for i in range(file_count)
+    ]
+    return {"ticket_id": ticket_id, "test_passed": True, "patches": patches}
+
+
+async def run_tickets(agent, ticket_ids: List[str], file_count: int, concurrency: int) -> List[Dict[str, Any]]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(ticket_id: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await agent.run(build_input(ticket_id, file_count))
+
+    return await asyncio.gather(*(run_one(ticket_id) for ticket_id in ticket_ids))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CommunicatorAgent against a fake GitHub API")
+    parser.add_argument("--tickets", type=int, default=20, help="Number of tickets (PRs) to process")
+    parser.add_argument("--files", type=int, default=3, help="Files changed per PR")
+    parser.add_argument("--concurrency", type=int, default=4, help="Tickets processed at the same time")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds added to every API response")
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 502")
+    parser.add_argument("--rate-limit", type=int, default=None, help="Requests allowed per rate-limit window")
+    parser.add_argument("--rate-limit-window", type=float, default=60.0)
+    parser.add_argument("--secondary-rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--scheduler-burst", type=int, default=100000,
+                        help="Request scheduler burst, large by default so the local budget does not throttle")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    config = FakeGitHubConfig(
+        latency=args.latency, latency_jitter=args.latency_jitter, error_rate=args.error_rate,
+        rate_limit=args.rate_limit, rate_limit_window=args.rate_limit_window,
+        secondary_rate_limit_rate=args.secondary_rate_limit_rate, seed=args.seed,
+    )
+    server = FakeGitHubServer(build_files(args.files), owner=OWNER, repo=REPO, config=config)
+    server.start()
+
+    # Module-level configuration is read at import time, so set it before importing the agent
+    os.environ.update({
+        "GITHUB_TOKEN": "bench-token",
+        "GITHUB_REPO_OWNER": OWNER,
+        "GITHUB_REPO_NAME": REPO,
+        "GITHUB_DEFAULT_BRANCH": "main",
+        "GITHUB_API_URL": server.url,
+        "GITHUB_SCHEDULER_BURST": str(args.scheduler_burst),
+        "TEST_MODE": "false",
+    })
+    from backend.agent_framework.communicator_agent import CommunicatorAgent
+    from github_service.request_scheduler import get_request_scheduler
+
+    try:
+        agent = CommunicatorAgent()
+        agent.jira_client = agent._create_mock_jira_client()
+        server.reset_stats()
+
+        ticket_ids = [f"BENCH-{i + 1}" for i in range(args.tickets)]
+        started = time.perf_counter()
+        results = asyncio.run(run_tickets(agent, ticket_ids, args.files, args.concurrency))
+        elapsed = time.perf_counter() - started
+    finally:
+        server.stop()
+
+    stats = server.stats()
+    created = sum(1 for result in results if result.get("github_pr_url"))
+    report = {
+        "tickets": args.tickets,
+        "files_per_pr": args.files,
+        "concurrency": args.concurrency,
+        "latency": args.latency,
+        "prs_created": created,
+        "failures": args.tickets - created,
+        "elapsed_seconds": round(elapsed, 3),
+        "prs_per_minute": round(created / elapsed * 60, 1) if elapsed else 0.0,
+        "api_calls": stats["requests"],
+        "api_calls_per_pr": round(stats["requests"] / created, 1) if created else None,
+        "injected": stats["injected"],
+        "routes": dict(sorted(stats["routes"].items(), key=lambda item: -item[1])),
+        "scheduler_retries": get_request_scheduler().stats()["retries"],
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{args.tickets} tickets x {args.files} files, concurrency {args.concurrency}, latency {args.latency}s")
+    print(f"PRs created:      {created}/{args.tickets}")
+    print(f"Elapsed:          {report['elapsed_seconds']}s")
+    print(f"PRs/minute:       {report['prs_per_minute']}")
+    print(f"API calls:        {report['api_calls']} ({report['api_calls_per_pr']} per PR)")
+    print(f"Scheduler retries: {report['scheduler_retries']}, injected faults: {report['injected'] or 'none'}")
+    print("Calls by route:")
+    for route, count in report["routes"].items():
+        print(f"  {count:6d}  {route}")
+
+
+if __name__ == "__main__":
+    main()
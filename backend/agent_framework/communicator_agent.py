@@ -28,6 +28,7 @@ class CommunicatorAgent:
     def __init__(self):
         """Initialize the Communicator Agent with necessary clients"""
         self.status = AgentStatus.IDLE
+        self.async_github = None
         
         # Initialize JIRA client if credentials are available
         try:
@@ -50,15 +51,20 @@ class CommunicatorAgent:
             from backend.github_service.config import verify_config
             if verify_config():
                 logger.info("GitHub service initialized successfully with valid configuration")
+                # Async client for the PR path, so GitHub calls don't block the event loop
+                from backend.github_service.async_github_client import AsyncGitHubClient
+                self.async_github = AsyncGitHubClient()
             else:
                 logger.error("GitHub service initialized, but configuration is invalid")
                 raise ValueError("Invalid GitHub configuration - using placeholders")
         except ImportError as e:
             logger.warning(f"GitHub service could not be imported - will mock GitHub interactions: {e}")
             self.github_service = self._create_mock_github_service()
+            self.async_github = None
         except Exception as e:
             logger.error(f"Error initializing GitHub service: {str(e)}")
             self.github_service = self._create_mock_github_service()
+            self.async_github = None
             
         # Initialize patch validator
         try:
@@ -590,8 +596,14 @@ class CommunicatorAgent:
         # 3. Try to find existing PR for this branch
         branch_name = f"fix/{ticket_id}"
         
+        if self.async_github is not None:
+            return await self._handle_github_pr_async(
+                ticket_id, branch_name, patches, patch_content, patched_files, input_data, developer_result
+            )
+        
         # Check if PR already exists for this branch
-        existing_pr = self.github_service.find_pr_for_branch(branch_name)
+        # GitHubService is synchronous, so keep its calls off the event loop
+        existing_pr = await asyncio.to_thread(self.github_service.find_pr_for_branch, branch_name)
         if existing_pr:
             logger.info(f"Found existing PR for branch {branch_name}: {existing_pr.get('url')}")
             result["success"] = True
@@ -600,7 +612,7 @@ class CommunicatorAgent:
             
         # 4. Create branch and PR
         # Create a branch for the fix
-        branch_created, actual_branch_name = self.github_service.create_fix_branch(ticket_id)
+        branch_created, actual_branch_name = await asyncio.to_thread(self.github_service.create_fix_branch, ticket_id)
         if not branch_created:
             logger.error(f"Failed to create branch {branch_name}")
             result["error"] = "Failed to create branch"
@@ -611,43 +623,12 @@ class CommunicatorAgent:
         logger.info(f"Branch created: {branch_name}")
         
         # Prepare file changes for commit
-        file_changes = []
-        
-        # Handle the two different formats for patches
-        if patches and isinstance(patches, list) and len(patches) > 0:
-            # Format 1: List of patches with file_path and diff
-            for patch in patches:
-                if isinstance(patch, dict):
-                    file_path = patch.get("file_path", "")
-                    diff = patch.get("diff", "")
-                    
-                    if file_path and diff:
-                        file_changes.append({
-                            "filename": file_path,
-                            "content": diff
-                        })
-        elif patch_content and patched_files:
-            # Format 2: Single patch content with list of files
-            # In this format, we need to distribute the patch content across files
-            for file_path in patched_files:
-                file_changes.append({
-                    "filename": file_path,
-                    "content": patch_content
-                })
-        
-        # Commit the changes
-        commit_message = f"Fix {ticket_id}: Automated bug fix"
-        if "commit_message" in input_data:
-            commit_message = input_data["commit_message"]
-        elif developer_result and "commit_message" in developer_result:
-            commit_message = developer_result["commit_message"]
-            
-        # Ensure commit message starts with ticket ID
-        if not commit_message.startswith(f"Fix {ticket_id}"):
-            commit_message = f"Fix {ticket_id}: {commit_message}"
+        file_changes = self._build_file_changes(patches, patch_content, patched_files)
+        commit_message = self._build_commit_message(ticket_id, input_data, developer_result)
             
         logger.info(f"Committing {len(file_changes)} file changes to branch {branch_name}")
-        commit_success, commit_details = self.github_service.commit_bug_fix(
+        commit_success, commit_details = await asyncio.to_thread(
+            self.github_service.commit_bug_fix,
             branch_name, 
             file_changes,
             ticket_id,
@@ -664,7 +645,8 @@ class CommunicatorAgent:
         pr_body = f"Automated bug fix for issue {ticket_id}"
         
         logger.info(f"Creating pull request for branch {branch_name}")
-        pr_result = self.github_service.create_fix_pr(
+        pr_result = await asyncio.to_thread(
+            self.github_service.create_fix_pr,
             branch_name,
             ticket_id,
             pr_title,
@@ -719,6 +701,106 @@ class CommunicatorAgent:
         
         return result
     
+    async def _handle_github_pr_async(self, ticket_id: str, branch_name: str, patches: List[Dict[str, Any]],
+                                      patch_content: str, patched_files: List[str], input_data: Dict[str, Any],
+                                      developer_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Create the branch, commit and PR through the async GitHub client"""
+        result = {
+            "success": False,
+            "pr_url": None,
+            "error": None
+        }
+        
+        existing_pr = await self.async_github.find_pr_for_branch(branch_name)
+        if existing_pr:
+            logger.info(f"Found existing PR for branch {branch_name}: {existing_pr.get('url')}")
+            result["success"] = True
+            result["pr_url"] = existing_pr.get("url")
+            return result
+        
+        if not await self.async_github.create_branch(branch_name):
+            logger.error(f"Failed to create branch {branch_name}")
+            result["error"] = "Failed to create branch"
+            return result
+        logger.info(f"Branch created: {branch_name}")
+        
+        file_changes = self._build_file_changes(patches, patch_content, patched_files)
+        commit_message = self._build_commit_message(ticket_id, input_data, developer_result)
+        
+        logger.info(f"Committing {len(file_changes)} file changes to branch {branch_name}")
+        commit_result = await self.async_github.commit_changes(
+            branch_name,
+            [{"path": change["filename"], "content": change["content"]} for change in file_changes],
+            commit_message
+        )
+        if not commit_result.get("committed"):
+            error_code = commit_result.get("error", {}).get("code")
+            allow_empty = os.environ.get("ALLOW_EMPTY_COMMITS", "false").lower() in ("true", "yes", "1", "t")
+            if error_code == "EMPTY_COMMIT" and allow_empty:
+                logger.warning("Commit resulted in no changes, but ALLOW_EMPTY_COMMITS is true")
+            else:
+                logger.error(f"Failed to commit changes: {commit_result}")
+                result["error"] = "Failed to commit changes"
+                return result
+        
+        logger.info(f"Creating pull request for branch {branch_name}")
+        pr_url = await self.async_github.create_pull_request(
+            branch_name,
+            f"Fix {ticket_id}",
+            f"Automated bug fix for issue {ticket_id}"
+        )
+        if not pr_url:
+            logger.error("Failed to create pull request - PR result is None or empty")
+            result["error"] = "Failed to create pull request"
+            return result
+        
+        logger.info(f"PR created: {pr_url}")
+        result["success"] = True
+        result["pr_url"] = pr_url
+        return result
+    
+    def _build_file_changes(self, patches: List[Dict[str, Any]], patch_content: str,
+                            patched_files: List[str]) -> List[Dict[str, str]]:
+        """Build the filename/content list committed for a fix"""
+        file_changes = []
+        
+        # Handle the two different formats for patches
+        if patches and isinstance(patches, list) and len(patches) > 0:
+            # Format 1: List of patches with file_path and diff
+            for patch in patches:
+                if isinstance(patch, dict):
+                    file_path = patch.get("file_path", "")
+                    diff = patch.get("diff", "")
+                    
+                    if file_path and diff:
+                        file_changes.append({
+                            "filename": file_path,
+                            "content": diff
+                        })
+        elif patch_content and patched_files:
+            # Format 2: Single patch content with list of files
+            # In this format, we need to distribute the patch content across files
+            for file_path in patched_files:
+                file_changes.append({
+                    "filename": file_path,
+                    "content": patch_content
+                })
+        return file_changes
+    
+    def _build_commit_message(self, ticket_id: str, input_data: Dict[str, Any],
+                              developer_result: Dict[str, Any]) -> str:
+        """Build the commit message, making sure it starts with the ticket ID"""
+        commit_message = f"Fix {ticket_id}: Automated bug fix"
+        if "commit_message" in input_data:
+            commit_message = input_data["commit_message"]
+        elif developer_result and "commit_message" in developer_result:
+            commit_message = developer_result["commit_message"]
+            
+        # Ensure commit message starts with ticket ID
+        if not commit_message.startswith(f"Fix {ticket_id}"):
+            commit_message = f"Fix {ticket_id}: {commit_message}"
+        return commit_message
+    
     async def _update_jira(self, ticket_id: str, status: str, comment: str) -> bool:
         """Update JIRA ticket with new status and comment"""
         try:
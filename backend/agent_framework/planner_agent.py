@@ -225,12 +225,15 @@ class PlannerAgent(Agent):
         """
         validated_files = []
         
+        # Without an explicit list, use the cached tree index of the default branch
+        tree_index = self._get_repo_tree_index() if not repo_files else None
+        
         # Simple validation if we don't have repo files
-        if not repo_files:
+        if not repo_files and tree_index is None:
             return [{"file": f, "valid": True} for f in files]
         
         # Convert repo_files to lowercase for case-insensitive matching
-        repo_files_lower = [f.lower() for f in repo_files]
+        repo_files_lower = {f.lower() for f in repo_files} if repo_files else None
         
         for file_path in files:
             # Normalize path
@@ -240,7 +243,10 @@ class PlannerAgent(Agent):
                 normalized = normalized[1:]
             
             # Check if file exists in repo
-            is_valid = normalized.lower() in repo_files_lower
+            if tree_index is not None:
+                is_valid = tree_index.find(normalized) is not None
+            else:
+                is_valid = normalized.lower() in repo_files_lower
             
             validated_files.append({
                 "file": file_path,
@@ -249,6 +255,18 @@ class PlannerAgent(Agent):
         
         return validated_files
 
+    def _get_repo_tree_index(self):
+        """Get the shared tree index of the default branch, or None if GitHub is unavailable"""
+        try:
+            try:
+                from github_service.tree_index import get_tree_index
+            except ImportError:
+                from ..github_service.tree_index import get_tree_index
+            return get_tree_index()
+        except Exception as e:
+            self.log(f"Repository tree index unavailable: {str(e)}")
+            return None
+
     def _save_output(self, ticket_id: str, output_data: Dict[str, Any]) -> None:
         """Save the analysis output to a JSON file"""
         filename = f"planner_output_{ticket_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
@@ -366,7 +384,7 @@ class PlannerAgent(Agent):
             
             if is_valid and parsed_data:
                 # Step 6: Validate affected files against repository structure
-                # In real implementation, we would have repo files available
+                # (the cached tree index of the default branch)
                 affected_files = self._validate_affected_files(parsed_data["affected_files"])
                 
                 # Add additional metadata to the output
@@ -1,11 +1,17 @@
 import os
+import shutil
 import logging
-import subprocess
-import sys
+import tempfile
 import json
 import time
 from typing import Dict, Any, List, Optional
 from .agent_base import Agent
+from qa_service.impact_analysis import CACHE_OFF, ImpactSelection, discover_test_files, select_tests
+from qa_service.junit_report import TestRecord, failure_summary, junit_args, parse_report, summarize
+from qa_service.output_stream import TestProgress, new_output, start_progress
+from qa_service.shard_runner import QA_TEST_TIMEOUT, merged_output, run_shards
+from qa_service.warm_pool import run_pytest
+from qa_service.workspaces import Workspace, get_workspace_pool
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -72,9 +78,43 @@ class QAAgent(Agent):
             logger.error("Developer agent reported failure, skipping QA tests")
             return result
             
+        # Apply the fix in a private workspace instead of the shared checkout at REPO_PATH
+        pool = get_workspace_pool(os.environ.get("REPO_PATH", "/mnt/codebase"))
+        try:
+            workspace = pool.acquire(input_data.get("ticket_id"))
+        except Exception as e:
+            result["error_message"] = f"Could not create a QA workspace: {str(e)}"
+            logger.error(result["error_message"])
+            return result
+        
+        try:
+            return self._test_in_workspace(developer_data, workspace, result, input_data.get("previous_failures"),
+                                           bool(input_data.get("force_full_run")))
+        finally:
+            pool.release(workspace)
+    
+    def _test_in_workspace(self, developer_data: Dict[str, Any], workspace: Workspace,
+                           result: Dict[str, Any], previous_failures: Optional[List[str]] = None,
+                           force_full_run: bool = False) -> Dict[str, Any]:
+        """
+        Apply the developer's fix to a workspace and run the tests there
+        
+        Args:
+            developer_data: Validated developer agent output
+            workspace: Workspace acquired for this attempt
+            result: Result dictionary to fill in
+            previous_failures: Tests that failed in the previous attempt of the ticket, run first
+            force_full_run: Run the whole suite without cached results
+            
+        Returns:
+            Dictionary with test results
+        """
+        repo_path = workspace.path
+        workspace.write_files(developer_data.get("patched_code") or {})
+        
         # Verify that code changes were actually made
         logger.info("Verifying code changes")
-        if not self._verify_code_changes(result):
+        if not self._verify_code_changes(result, workspace):
             result["error_message"] = "No code changes detected"
             logger.error("No code changes detected in the repository")
             return result
@@ -83,7 +123,7 @@ class QAAgent(Agent):
         test_files_written = []
         if "test_code" in developer_data and developer_data["test_code"]:
             logger.info("Found test code in developer output, writing test files")
-            test_files_written = self._write_test_files(developer_data["test_code"])
+            test_files_written = self._write_test_files(developer_data["test_code"], repo_path)
             logger.info(f"Wrote {len(test_files_written)} test files")
             
         # Run tests
@@ -91,14 +131,24 @@ class QAAgent(Agent):
         # IMPORTANT: Always use pytest in the backend containers - never npm
         test_command = "python -m pytest"
         logger.info(f"Using test command: {test_command}")
-        success, test_output = self._run_test_command(test_command)
+        changed_files = list(developer_data.get("patched_files") or []) + test_files_written
+        selection = select_tests(repo_path, changed_files, previous_failures, force_full_run)
+        result["selected_tests"] = selection.tests
+        records: List[TestRecord] = []
+        progress = start_progress(workspace.ticket_id)
+        started = time.monotonic()
+        try:
+            success, test_output = self._run_selected_tests(test_command, selection, repo_path, records, progress)
+        finally:
+            progress.finish()
+        result["execution_time"] = round(time.monotonic() - started, 3)
+        result["test_results"] = self._parse_test_output(test_output, records)
+        result["test_counts"] = summarize(records)
         
         # Parse and process test results
         if success:
             logger.info("Tests passed successfully")
             result["passed"] = True
-            result["test_results"] = self._parse_test_output(test_output)
-            result["execution_time"] = self._calculate_execution_time(test_output)
             result["success"] = True
             
             # Add a failure_summary field for consistency even when tests pass
@@ -107,11 +157,9 @@ class QAAgent(Agent):
             logger.error("Tests failed")
             result["passed"] = False
             result["error_message"] = "Tests failed"
-            result["test_results"] = self._parse_test_output(test_output)
-            result["execution_time"] = self._calculate_execution_time(test_output)
             
-            # Extract a failure summary from the test output
-            result["failure_summary"] = self._extract_failure_summary(test_output)
+            # Summarize the failed tests (or the output when no test report was written)
+            result["failure_summary"] = self._extract_failure_summary(test_output, records)
             
         logger.info(f"QA Agent completed with success={result['success']} and passed={result['passed']}")
         return result
@@ -123,18 +171,19 @@ class QAAgent(Agent):
         """
         return self.run(input_data)
     
-    def _write_test_files(self, test_code: Dict[str, str]) -> List[str]:
+    def _write_test_files(self, test_code: Dict[str, str], repo_path: Optional[str] = None) -> List[str]:
         """
         Write test files to the repository
         
         Args:
             test_code: Dictionary mapping file names to test code
+            repo_path: Checkout to write into (REPO_PATH by default)
             
         Returns:
             List of written test file paths
         """
         written_files = []
-        repo_path = os.environ.get("REPO_PATH", "/mnt/codebase")
+        repo_path = repo_path or os.environ.get("REPO_PATH", "/mnt/codebase")
         
         try:
             for file_name, content in test_code.items():
@@ -238,33 +287,28 @@ class QAAgent(Agent):
         
         return valid
         
-    def _verify_code_changes(self, result: Dict[str, Any]) -> bool:
+    def _verify_code_changes(self, result: Dict[str, Any], workspace: Workspace) -> bool:
         """
-        Verify that code changes were actually made using git diff
+        Verify that code changes were actually made in the attempt's workspace
         
         Args:
             result: Result dictionary to update
+            workspace: Workspace the fix was applied to
             
         Returns:
             Boolean indicating if code changes were detected
         """
         try:
-            # Run git diff to check for changes
-            diff_process = subprocess.run(
-                ["git", "diff", "--exit-code"],
-                cwd=os.environ.get("REPO_PATH", "/mnt/codebase"),
-                capture_output=True,
-                text=True
-            )
-            
-            # If git diff exits with code 0, there are no changes
-            if diff_process.returncode == 0:
-                logger.warning("No code changes detected by git diff")
+            # Only this workspace is inspected, not changes made for other tickets
+            changed_files = workspace.changed_files()
+            
+            if not changed_files:
+                logger.warning("No code changes detected in the workspace")
                 result["code_changes_detected"] = False
                 return False
                 
             # Changes detected
-            logger.info("Code changes detected by git diff")
+            logger.info(f"Code changes detected in {len(changed_files)} files")
             result["code_changes_detected"] = True
             return True
             
@@ -274,13 +318,137 @@ class QAAgent(Agent):
             result["code_changes_detected"] = False
             return False
     
-    def _run_test_command(self, test_command: str, timeout: int = 300) -> tuple:
+    def _run_selected_tests(self, test_command: str, selection: ImpactSelection,
+                            repo_path: Optional[str] = None, records: Optional[List[TestRecord]] = None,
+                            progress: Optional[TestProgress] = None) -> tuple:
+        """
+        Run the tests affected by the change first, then the rest of the suite if configured
+        
+        Args:
+            test_command: Command to run tests
+            selection: Tests selected from the import graph
+            repo_path: Checkout to run the tests in (REPO_PATH by default)
+            records: List the per-test results are appended to
+            progress: Live progress of the run, updated from the test output
+            
+        Returns:
+            Tuple of (success, output)
+        """
+        repo_path = repo_path or os.environ.get("REPO_PATH", "/mnt/codebase")
+        progress = progress or TestProgress("unknown")
+        fail_fast_args = ["-x"] if selection.fail_fast else []
+        output = ""
+        passed = True
+        if selection.previous_failures:
+            logger.info(f"Running {len(selection.previous_failures)} tests that failed in the previous attempt first")
+            progress.set_phase("previous_failures")
+            passed, output = self._run_test_command(test_command, extra_args=fail_fast_args + list(
+                selection.previous_failures), repo_path=repo_path, records=records, progress=progress)
+            if not passed and selection.fail_fast:
+                logger.info("A test that failed in the previous attempt still fails, skipping the other tests")
+                return passed, output
+        # The previous failures are not run a second time
+        extra_args = [arg for nodeid in selection.previous_failures for arg in ("--deselect", nodeid)]
+        
+        if selection.tests is None:
+            logger.info(f"Running the whole suite: {selection.reason}")
+            progress.set_phase("test_suite")
+            test_files = discover_test_files(repo_path)
+            if not test_files:
+                success, suite_output = self._run_test_command(test_command, extra_args=fail_fast_args + extra_args,
+                                                               repo_path=repo_path, records=records, progress=progress)
+            else:
+                success, suite_output = self._run_test_files(test_command, test_files, repo_path, records,
+                                                             extra_args, selection.fail_fast, progress,
+                                                             selection.cache_mode)
+            return passed and success, output + suite_output
+        
+        if selection.tests:
+            logger.info(f"Running {len(selection.tests)} affected test files first: {selection.reason}")
+            progress.set_phase("affected_tests")
+            success, affected_output = self._run_test_files(test_command, selection.tests, repo_path, records,
+                                                            extra_args, selection.fail_fast, progress,
+                                                            selection.cache_mode)
+            passed, output = passed and success, output + affected_output
+            if not success or not selection.run_full_suite:
+                return passed, output
+        elif not selection.run_full_suite:
+            logger.warning("No tests are affected by the change and the full suite run is disabled")
+            return passed, output or "No tests affected by the change"
+        
+        logger.info("Affected tests passed, running the rest of the suite")
+        selected = set(selection.tests)
+        rest = [test_file for test_file in discover_test_files(repo_path) if test_file not in selected]
+        if not rest:
+            return passed, output
+        progress.set_phase("remaining_tests")
+        success, rest_output = self._run_test_files(test_command, rest, repo_path, records, extra_args,
+                                                    selection.fail_fast, progress, selection.cache_mode)
+        return passed and success, output + rest_output
+    
+    def _run_test_files(self, test_command: str, test_files: List[str], repo_path: Optional[str] = None,
+                        records: Optional[List[TestRecord]] = None, extra_args: Optional[List[str]] = None,
+                        fail_fast: bool = False, progress: Optional[TestProgress] = None,
+                        cache_mode: str = CACHE_OFF) -> tuple:
+        """
+        Run test modules in parallel shards balanced by their historical durations
+        
+        Args:
+            test_command: Command to run tests
+            test_files: Test modules to run, relative to the repository
+            repo_path: Checkout to run the tests in (REPO_PATH by default)
+            records: List the per-test results are appended to
+            extra_args: Additional pytest arguments (deselections)
+            fail_fast: Stop every shard at the first failing test
+            progress: Live progress of the run, updated from the test output
+            cache_mode: Whether tests with a cached pass are left out (use) or run and recorded (refresh)
+            
+        Returns:
+            Tuple of (success, output)
+        """
+        try:
+            shard_results = run_shards(self._pytest_command(test_command) + (extra_args or []),
+                                       cwd=repo_path or os.environ.get("REPO_PATH", "/mnt/codebase"),
+                                       test_files=test_files, env=os.environ.copy(), fail_fast=fail_fast,
+                                       progress=progress, cache_mode=cache_mode)
+        except Exception as e:
+            logger.error(f"Error running test shards: {str(e)}")
+            return False, str(e)
+        
+        for shard_result in shard_results:
+            if not shard_result.cached:
+                logger.info(f"Test shard {shard_result.shard.index} exited with code {shard_result.returncode} "
+                            f"after {shard_result.duration:.1f}s")
+            if records is not None:
+                records.extend(shard_result.tests)
+        return all(shard_result.passed for shard_result in shard_results), merged_output(shard_results)
+    
+    def _pytest_command(self, test_command: str) -> List[str]:
+        """pytest invocation with the arguments of the configured test command"""
+        # ALWAYS use python -m pytest in the backend container
+        command_parts = ["python", "-m", "pytest"]
+        
+        # Add any additional arguments if specified in the test command
+        if "python -m pytest" in test_command and test_command != "python -m pytest":
+            command_args = test_command.replace("python -m pytest", "").strip().split()
+            if command_args:
+                command_parts.extend(command_args)
+        return command_parts
+    
+    def _run_test_command(self, test_command: str, timeout: Optional[float] = None,
+                          extra_args: Optional[List[str]] = None, repo_path: Optional[str] = None,
+                          records: Optional[List[TestRecord]] = None,
+                          progress: Optional[TestProgress] = None) -> tuple:
         """
         Run tests using the specified command
         
         Args:
             test_command: Command to run tests
-            timeout: Timeout in seconds
+            timeout: Timeout in seconds (QA_TEST_TIMEOUT by default)
+            extra_args: Additional pytest arguments (test paths, deselections)
+            repo_path: Checkout to run the tests in (REPO_PATH by default)
+            records: List the per-test results are appended to
+            progress: Live progress of the run, updated from the test output
             
         Returns:
             Tuple of (success, output)
@@ -288,27 +456,19 @@ class QAAgent(Agent):
         try:
             logger.info(f"Running test command: {test_command}")
             
-            # Check if pytest is available
+            # pytest comes with the image; installing it at run time cost every cold container a pip run
             try:
                 import pytest
                 logger.info(f"Found pytest version: {pytest.__version__}")
             except ImportError:
-                logger.warning("Pytest not found, attempting to install...")
-                try:
-                    subprocess.run([sys.executable, "-m", "pip", "install", "pytest"], check=True)
-                    logger.info("Successfully installed pytest")
-                except Exception as e:
-                    logger.error(f"Failed to install pytest: {str(e)}")
-                    return False, f"Failed to install pytest: {str(e)}"
-            
-            # ALWAYS use python -m pytest in the backend container
-            command_parts = ["python", "-m", "pytest"]
-            
-            # Add any additional arguments if specified in the test command
-            if "python -m pytest" in test_command and test_command != "python -m pytest":
-                extra_args = test_command.replace("python -m pytest", "").strip().split()
-                if extra_args:
-                    command_parts.extend(extra_args)
+                logger.error("pytest is not installed in the QA environment")
+                return False, "pytest is not installed in the QA environment"
+            
+            timeout = timeout or QA_TEST_TIMEOUT
+            repo_path = repo_path or os.environ.get("REPO_PATH", "/mnt/codebase")
+            report_dir = tempfile.mkdtemp(prefix="qa-report-")
+            report_path = os.path.join(report_dir, "report.xml")
+            command_parts = self._pytest_command(test_command) + junit_args(report_path) + (extra_args or [])
                     
             logger.info(f"Executing test command: {' '.join(command_parts)}")
             
@@ -316,72 +476,60 @@ class QAAgent(Agent):
             env = os.environ.copy()
             logger.info(f"Environment variables for test command: PATH={env.get('PATH', '')}, PYTHONPATH={env.get('PYTHONPATH', '')}")
             
-            process = subprocess.run(
-                command_parts,
-                cwd=os.environ.get("REPO_PATH", "/mnt/codebase"),
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                env=env  # Pass environment variables
-            )
+            # Forked from a warm runner with pytest and the third-party packages already imported
+            try:
+                returncode, output = run_pytest(command_parts, repo_path, env, timeout,
+                                                output=new_output("session", progress))
+                if records is not None and returncode is not None:
+                    records.extend(parse_report(report_path, repo_path))
+            finally:
+                shutil.rmtree(report_dir, ignore_errors=True)
+            if returncode is None:
+                logger.error(f"Test command timed out after {timeout} seconds")
+                return False, f"{output}\nTimeout: Test execution exceeded {timeout} seconds"
             
             # Check if tests passed
-            success = process.returncode == 0
-            logger.info(f"Test command exited with code {process.returncode}")
+            success = returncode == 0
+            logger.info(f"Test command exited with code {returncode}")
             
-            # Log output for debugging
-            logger.info(f"Test stdout: {process.stdout}")
-            if process.stderr:
-                logger.info(f"Test stderr: {process.stderr}")
+            return success, output
             
-            return success, process.stdout + process.stderr
-            
-        except subprocess.TimeoutExpired as e:
-            logger.error(f"Test command timed out after {timeout} seconds")
-            return False, f"Timeout: Test execution exceeded {timeout} seconds"
         except Exception as e:
             logger.error(f"Error running tests: {str(e)}")
             return False, str(e)
             
-    def _parse_test_output(self, output: str) -> List[Dict[str, Any]]:
+    def _parse_test_output(self, output: str, records: Optional[List[TestRecord]] = None) -> List[Dict[str, Any]]:
         """
         Parse test output into structured format
         
         Args:
             output: Test output to parse
+            records: Per-test results read from the JUnit reports
             
         Returns:
-            List of test results
+            List of test results, one per test when reports were written
         """
-        # Simple implementation - in a real system, you would parse the test output
-        # into a structured format based on the testing framework used
+        if records:
+            return [record.as_dict() for record in records]
+        # No report, e.g. pytest crashed or timed out before writing it
         return [{"raw_output": output}]
         
-    def _calculate_execution_time(self, output: str) -> float:
-        """
-        Calculate test execution time from output
-        
-        Args:
-            output: Test output
-            
-        Returns:
-            Execution time in seconds
-        """
-        # Simple implementation - in a real system, you would extract the actual
-        # execution time from the test output
-        return 1.5  # Mock execution time
-        
-    def _extract_failure_summary(self, output: str) -> str:
+    def _extract_failure_summary(self, output: str, records: Optional[List[TestRecord]] = None) -> str:
         """
         Extract a concise failure summary from test output
         
         Args:
             output: Test output
+            records: Per-test results read from the JUnit reports
             
         Returns:
             Concise failure summary
         """
-        # Look for common failure patterns in test output
+        summary = failure_summary(records or [])
+        if summary:
+            return summary
+        
+        # Without a report (collection errors, timeouts) look for common failure patterns in the output
         failure_lines = []
         
         # Process the output line by line to extract key failure information
@@ -0,0 +1,29 @@
+
+import os
+import sys
+import json
+import subprocess
+import unittest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARK = os.path.join(BACKEND_DIR, "agent_framework", "benchmark_communicator.py")
+
+
+class TestBenchmarkCommunicator(unittest.TestCase):
+    """Smoke test for the communicator benchmark against the fake GitHub API"""
+
+    def test_benchmark_opens_a_pr_per_ticket(self):
+        """Every ticket gets a PR through AsyncGitHubClient"""
+        # The benchmark configures the GitHub clients through the environment, so keep it in its own process
+        completed = subprocess.run(
+            [sys.executable, BENCHMARK, "--tickets", "3", "--files", "2", "--latency", "0", "--json"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, timeout=120)
+
+        self.assertEqual(completed.returncode, 0, completed.stderr[-2000:])
+        report = json.loads(completed.stdout)
+        self.assertEqual((report["prs_created"], report["failures"]), (3, 0))
+        self.assertEqual(report["routes"]["POST /pulls"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
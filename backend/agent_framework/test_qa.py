@@ -16,6 +16,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from agent_framework.agent_base import Agent, AgentStatus
 from agent_framework.qa_agent import QAAgent
+from qa_service import output_stream
 
 class TestQAAgent(unittest.TestCase):
     """Test cases for the QA Agent"""
@@ -27,6 +28,11 @@ class TestQAAgent(unittest.TestCase):
         # Create a temporary directory for test outputs
         self.temp_dir = tempfile.TemporaryDirectory()
         self.qa_agent.repo_path = self.temp_dir.name
+        self.output_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.output_dir.cleanup)
+        patcher = patch.object(output_stream, "QA_OUTPUT_DIR", self.output_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
         
         # Create test data
         self.test_input = {
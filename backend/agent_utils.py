@@ -5,6 +5,8 @@ import httpx
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 
+from qa_service.shard_runner import QA_TEST_MAX_TIMEOUT, QA_TEST_TIMEOUT
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("agent-utils")
@@ -14,6 +16,10 @@ PLANNER_URL = os.getenv("PLANNER_URL", "http://planner:8001")
 DEVELOPER_URL = os.getenv("DEVELOPER_URL", "http://developer:8002")
 QA_URL = os.getenv("QA_URL", "http://qa:8003")
 COMMUNICATOR_URL = os.getenv("COMMUNICATOR_URL", "http://communicator:8004")
+# The QA agent runs the previous attempt's failures (one run with QA_TEST_TIMEOUT), then the affected
+# tests and the rest of the suite, each in one wave of shards. Waiting for a free workspace when more
+# than QA_WORKSPACE_MAX attempts run at once is not bounded; raise this for such loads.
+QA_REQUEST_TIMEOUT = float(os.getenv("QA_REQUEST_TIMEOUT", str(QA_TEST_TIMEOUT + 2 * QA_TEST_MAX_TIMEOUT + 60)))
 
 async def call_planner_agent(ticket: Dict[str, Any]):
     """Send ticket information to the enhanced Planner agent"""
@@ -126,7 +132,7 @@ async def call_qa_agent(developer_response: Dict[str, Any]):
             
         logger.info(f"Calling QA agent with payload: {developer_response}")
         
-        async with httpx.AsyncClient(timeout=120.0) as client:
+        async with httpx.AsyncClient(timeout=QA_REQUEST_TIMEOUT) as client:
             response = await client.post(
                 f"{QA_URL}/test",
                 json=developer_response
@@ -139,7 +145,9 @@ async def call_qa_agent(developer_response: Dict[str, Any]):
             # Safely parse JSON response
             try:
                 result = response.json()
-                logger.info(f"QA agent returned: {result}")
+                # The results carry test output, which is not logged
+                logger.info(f"QA agent returned passed={result.get('passed')} "
+                            f"with {len(result.get('test_results') or [])} test results")
                 return result
             except Exception as json_error:
                 logger.error(f"Failed to parse QA agent response: {str(json_error)}")
@@ -232,6 +240,22 @@ async def call_communicator_agent(
         logger.error(f"Error calling Communicator agent: {str(e)}")
         return None
 
+async def report_fix_outcome(ticket_id: str, status: str, pr_url: Optional[str] = None):
+    """
+    Tell the Planner how a ticket ended ("fixed" or "failed"), so near-duplicates
+    filed later are linked to the fix, or no longer linked to failed work
+    """
+    try:
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.post(
+                f"{PLANNER_URL}/duplicates/{ticket_id}",
+                json={"status": status, "pr_url": pr_url}
+            )
+            if response.status_code != 200:
+                logger.warning(f"Planner did not record outcome of {ticket_id}: {response.status_code}")
+    except Exception as e:
+        logger.warning(f"Error reporting outcome of {ticket_id} to Planner agent: {str(e)}")
+
 def _ensure_json_serializable(obj):
     """Recursively ensures that an object is JSON serializable"""
     if isinstance(obj, dict):
@@ -0,0 +1,335 @@
+
+"""
+Asyncio-native GitHub client
+
+Exposes the same operations as GitHubClient for code that runs on an event
+loop (e.g. the communicator agent). All requests share one keep-alive
+connection pool per event loop, use HTTP/2 when the h2 package is
+installed, and go through the shared request scheduler and content cache,
+so independent calls such as fetching several files run concurrently
+without blocking the loop.
+"""
+
+import os
+import base64
+import asyncio
+import logging
+import importlib.util
+import weakref
+from typing import Dict, List, Any, Optional, Tuple
+
+import httpx
+
+try:
+    from github_service.content_cache import get_content_cache, FetchResult
+    from github_service.request_scheduler import get_request_scheduler, RequestClass, RateLimitWaitExceeded
+except ImportError:
+    from .content_cache import get_content_cache, FetchResult
+    from .request_scheduler import get_request_scheduler, RequestClass, RateLimitWaitExceeded
+
+# Configure logger
+logger = logging.getLogger("async-github-client")
+
+# Get environment variables
+GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN')
+GITHUB_REPO_OWNER = os.environ.get('GITHUB_REPO_OWNER')
+GITHUB_REPO_NAME = os.environ.get('GITHUB_REPO_NAME')
+GITHUB_DEFAULT_BRANCH = os.environ.get('GITHUB_DEFAULT_BRANCH', 'main')
+GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+GITHUB_ASYNC_MAX_CONNECTIONS = int(os.environ.get('GITHUB_ASYNC_MAX_CONNECTIONS', '20'))
+GITHUB_ASYNC_MAX_KEEPALIVE = int(os.environ.get('GITHUB_ASYNC_MAX_KEEPALIVE', '10'))
+GITHUB_ASYNC_KEEPALIVE_EXPIRY = float(os.environ.get('GITHUB_ASYNC_KEEPALIVE_EXPIRY', '60'))
+GITHUB_ASYNC_CONCURRENCY = int(os.environ.get('GITHUB_ASYNC_CONCURRENCY', '8'))
+GITHUB_ASYNC_TIMEOUT = float(os.environ.get('GITHUB_ASYNC_TIMEOUT', '30'))
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Modes a rewritten file keeps (executable, symlink); other files are written as regular files (100644)
+PRESERVED_MODES = ("100755", "120000")
+EMPTY_COMMIT_ERROR = {"code": "EMPTY_COMMIT", "message": "No files were changed in this commit"}
+
+
+class AsyncGitHubClient:
+    """Async client for interacting with GitHub API"""
+
+    def __init__(self, token: Optional[str] = None, repo_owner: Optional[str] = None,
+                 repo_name: Optional[str] = None, default_branch: Optional[str] = None,
+                 base_url: Optional[str] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Initialize the client
+
+        Args:
+            token: GitHub token (defaults to GITHUB_TOKEN)
+            repo_owner: Repository owner (defaults to GITHUB_REPO_OWNER)
+            repo_name: Repository name (defaults to GITHUB_REPO_NAME)
+            default_branch: Base branch for new branches and PRs (defaults to GITHUB_DEFAULT_BRANCH)
+            base_url: API root (defaults to GITHUB_API_URL)
+            transport: Optional httpx transport, used by tests
+        """
+        self.token = token or GITHUB_TOKEN
+        self.repo_owner = repo_owner or GITHUB_REPO_OWNER
+        self.repo_name = repo_name or GITHUB_REPO_NAME
+        if not self.token:
+            raise ValueError("GitHub token not provided")
+        if not self.repo_owner or not self.repo_name:
+            raise ValueError("GitHub repository information not provided")
+
+        self.default_branch_name = default_branch or GITHUB_DEFAULT_BRANCH
+        self.base_url = (base_url or GITHUB_API_URL).rstrip('/')
+        self.repo_full_name = f"{self.repo_owner}/{self.repo_name}"
+        self.repo_url = f"{self.base_url}/repos/{self.repo_full_name}"
+        self._transport = transport
+
+        # httpx clients and semaphores are bound to the loop they were first used on
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+        logger.info(f"Async GitHub client initialized with repo {self.repo_full_name} "
+                    f"(HTTP/2 {'enabled' if HTTP2_AVAILABLE else 'unavailable'})")
+
+    async def check_branch_exists(self, branch_name: str) -> bool:
+        """Check whether a branch exists"""
+        response = await self._request(RequestClass.READ, "GET", f"/branches/{branch_name}")
+        return response.status_code == 200
+
+    async def create_branch(self, branch_name: str, base_branch: str = None) -> str:
+        """Create a branch in the repository"""
+        try:
+            if await self.check_branch_exists(branch_name):
+                logger.warning(f"Branch {branch_name} already exists")
+                return branch_name
+
+            base_branch = base_branch or self.default_branch_name
+            base_ref = await self._request_json(RequestClass.READ, "GET", f"/git/ref/heads/{base_branch}")
+            await self._request_json(RequestClass.WRITE, "POST", "/git/refs", json={
+                "ref": f"refs/heads/{branch_name}",
+                "sha": base_ref["object"]["sha"],
+            })
+            logger.info(f"Created branch {branch_name} from {base_branch}")
+            return branch_name
+        except Exception as e:
+            logger.error(f"Error creating branch {branch_name}: {str(e)}")
+            return ""
+
+    async def get_file_content(self, file_path: str, branch_name: str) -> Optional[str]:
+        """Get the content of a file on a branch, or None if it cannot be read"""
+        try:
+            entry = await self._get_file_entry(file_path, branch_name)
+            return entry[0] if entry else None
+        except Exception as e:
+            logger.error(f"Error getting content of {file_path} from {branch_name}: {str(e)}")
+            return None
+
+    async def get_file_contents(self, file_paths: List[str], branch_name: str) -> Dict[str, Optional[str]]:
+        """Fetch several files concurrently; missing or unreadable files map to None"""
+        contents = await asyncio.gather(*(self.get_file_content(path, branch_name) for path in file_paths))
+        return dict(zip(file_paths, contents))
+
+    async def commit_changes(
+        self,
+        branch_name: str,
+        changes: List[Dict[str, str]],
+        commit_message: str
+    ) -> Dict[str, Any]:
+        """
+        Commit all changes as a single commit using the Git Data API
+
+        Returns the same result shape as GitHubClient.commit_changes.
+        """
+        valid_changes = []
+        for change in changes:
+            if not change.get("path") or not change.get("content"):
+                logger.warning(f"Skipping invalid change: missing path or content")
+                continue
+            valid_changes.append(change)
+
+        if not valid_changes:
+            logger.warning(f"No files were changed in this commit")
+            return {"committed": False, "error": dict(EMPTY_COMMIT_ERROR)}
+
+        try:
+            blobs = await asyncio.gather(*(
+                self._request_json(RequestClass.WRITE, "POST", "/git/blobs",
+                                   json={"content": change["content"], "encoding": "utf-8"})
+                for change in valid_changes
+            ))
+            logger.info(f"Created {len(blobs)} blobs for {branch_name}")
+
+            # The branch may move between reading the ref and updating it, so retry once on a fresh head
+            for attempt in range(2):
+                ref = await self._request_json(RequestClass.READ, "GET", f"/git/ref/heads/{branch_name}")
+                parent_sha = ref["object"]["sha"]
+                parent_commit = await self._request_json(RequestClass.READ, "GET", f"/git/commits/{parent_sha}")
+                base_tree_sha = parent_commit["tree"]["sha"]
+                # Existing executables and symlinks keep their mode; new files are regular files
+                modes = await self._tree_modes(base_tree_sha, [change["path"] for change in valid_changes])
+                tree_elements = [
+                    {"path": change["path"], "mode": modes.get(change["path"], "100644"), "type": "blob",
+                     "sha": blob["sha"]}
+                    for change, blob in zip(valid_changes, blobs)
+                ]
+                new_tree = await self._request_json(RequestClass.WRITE, "POST", "/git/trees",
+                                                    json={"base_tree": base_tree_sha, "tree": tree_elements})
+
+                # Identical tree means every file already had the requested content
+                if new_tree["sha"] == base_tree_sha:
+                    logger.warning(f"No files were changed in this commit")
+                    return {"committed": False, "error": dict(EMPTY_COMMIT_ERROR)}
+
+                new_commit = await self._request_json(RequestClass.WRITE, "POST", "/git/commits", json={
+                    "message": commit_message, "tree": new_tree["sha"], "parents": [parent_sha],
+                })
+                response = await self._request(RequestClass.WRITE, "PATCH", f"/git/refs/heads/{branch_name}",
+                                               json={"sha": new_commit["sha"]})
+                if response.status_code == 422 and attempt == 0:
+                    logger.warning(f"Branch {branch_name} moved during commit, retrying on new head")
+                    continue
+                response.raise_for_status()
+                break
+
+            logger.info(f"Committed {len(tree_elements)} files to {branch_name} in commit {new_commit['sha']}")
+            return {"committed": True, "files_changed": len(tree_elements), "commit_sha": new_commit["sha"]}
+        except RateLimitWaitExceeded as e:
+            logger.error(f"Rate limited while committing changes as tree: {str(e)}")
+            return {"committed": False, "error": {"code": "RATE_LIMITED", "message": str(e)}}
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 429 or e.response.headers.get("x-ratelimit-remaining") == "0":
+                logger.error(f"Rate limited while committing changes as tree: {str(e)}")
+                return {"committed": False, "error": {"code": "RATE_LIMITED", "message": str(e)}}
+            logger.error(f"Error committing changes as tree: {str(e)}")
+            return {"committed": False, "error": {"code": "COMMIT_ERROR", "message": str(e)}}
+        except Exception as e:
+            logger.error(f"Error committing changes as tree: {str(e)}")
+            return {"committed": False, "error": {"code": "COMMIT_ERROR", "message": str(e)}}
+
+    async def _tree_modes(self, tree_sha: str, paths: List[str]) -> Dict[str, str]:
+        """
+        Modes of the given paths in a tree that a rewritten file must keep (PRESERVED_MODES)
+
+        One recursive tree request; if GitHub truncates it, the directories of
+        the paths are listed one level at a time instead.
+        """
+        wanted = set(paths)
+        tree = await self._request_json(RequestClass.READ, "GET", f"/git/trees/{tree_sha}", params={"recursive": "1"})
+        if not tree.get("truncated"):
+            return {entry["path"]: entry["mode"] for entry in tree.get("tree", [])
+                    if entry["path"] in wanted and entry.get("mode") in PRESERVED_MODES}
+
+        listings: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+        async def entries(directory: str) -> Dict[str, Dict[str, Any]]:
+            if directory not in listings:
+                listings[directory] = {}
+                if directory:
+                    parent, _, name = directory.rpartition("/")
+                    entry = (await entries(parent)).get(name)
+                    sha = entry["sha"] if entry is not None and entry.get("type") == "tree" else None
+                else:
+                    sha = tree_sha
+                if sha:
+                    listing = await self._request_json(RequestClass.READ, "GET", f"/git/trees/{sha}")
+                    listings[directory] = {entry["path"]: entry for entry in listing.get("tree", [])}
+            return listings[directory]
+
+        modes = {}
+        for path in wanted:
+            directory, _, name = path.rpartition("/")
+            entry = (await entries(directory)).get(name)
+            if entry is not None and entry.get("mode") in PRESERVED_MODES:
+                modes[path] = entry["mode"]
+        return modes
+
+    async def create_pull_request(self, branch_name: str, title: str, description: str) -> str:
+        """Create a pull request from branch to default branch"""
+        try:
+            pr = await self._request_json(RequestClass.PULL_REQUEST, "POST", "/pulls", json={
+                "title": title,
+                "body": description,
+                "head": branch_name,
+                "base": self.default_branch_name,
+            })
+            logger.info(f"Created PR #{pr['number']}: {pr['html_url']}")
+            return pr["html_url"]
+        except Exception as e:
+            logger.error(f"Error creating PR for {branch_name}: {str(e)}")
+            return ""
+
+    async def find_pr_for_branch(self, branch_name: str) -> Optional[Dict[str, Any]]:
+        """Find an open PR for a branch; returns a dict with url and number, or None"""
+        try:
+            pulls = await self._request_json(RequestClass.READ, "GET", "/pulls", params={
+                "head": f"{self.repo_owner}:{branch_name}",
+                "state": "open",
+            })
+        except Exception as e:
+            logger.error(f"Error finding PR for {branch_name}: {str(e)}")
+            return None
+        if not pulls:
+            return None
+        return {"url": pulls[0]["html_url"], "number": pulls[0]["number"]}
+
+    async def aclose(self) -> None:
+        """Close the connection pool of the running event loop"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    async def _get_file_entry(self, file_path: str, branch_name: str) -> Optional[Tuple[str, str]]:
+        """
+        Get (content, blob_sha) of a file through the shared content cache
+
+        Returns None if the file does not exist; raises httpx.HTTPStatusError on other errors.
+        """
+        async def fetch(etag: Optional[str]) -> FetchResult:
+            headers = {"If-None-Match": etag} if etag else None
+            response = await self._request(RequestClass.READ, "GET", f"/contents/{file_path}",
+                                           params={"ref": branch_name}, headers=headers)
+            if response.status_code in (304, 404):
+                return FetchResult(response.status_code)
+            response.raise_for_status()
+            data = response.json()
+            if data.get("type") != "file":
+                logger.warning(f"Path {file_path} is not a file")
+                return FetchResult(404)
+            encoded = data.get("content", "")
+            if data.get("encoding") == "none":
+                # Files over 1 MB have no inline content; the blob API still returns it
+                encoded = (await self._request_json(RequestClass.READ, "GET", f"/git/blobs/{data['sha']}"))["content"]
+            content = base64.b64decode(encoded).decode('utf-8')
+            return FetchResult(200, content, response.headers.get("etag"), data.get("sha"))
+
+        return await get_content_cache().aget_entry_or_fetch(self.repo_full_name, branch_name, file_path, fetch)
+
+    async def _request(self, request_class: RequestClass, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send a repository request through the shared scheduler and connection pool"""
+        client, semaphore = self._pool()
+        async with semaphore:
+            return await get_request_scheduler().execute_async(
+                request_class, client.request, method, f"{self.repo_url}{path}", **kwargs
+            )
+
+    async def _request_json(self, request_class: RequestClass, method: str, path: str, **kwargs) -> Any:
+        response = await self._request(request_class, method, path, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def _pool(self) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                headers={
+                    "Authorization": f"token {self.token}",
+                    "Accept": "application/vnd.github.v3+json",
+                },
+                limits=httpx.Limits(
+                    max_connections=GITHUB_ASYNC_MAX_CONNECTIONS,
+                    max_keepalive_connections=GITHUB_ASYNC_MAX_KEEPALIVE,
+                    keepalive_expiry=GITHUB_ASYNC_KEEPALIVE_EXPIRY,
+                ),
+                timeout=GITHUB_ASYNC_TIMEOUT,
+                http2=HTTP2_AVAILABLE and self._transport is None,
+                transport=self._transport,
+            )
+            self._clients[loop] = client
+            self._semaphores[loop] = asyncio.Semaphore(GITHUB_ASYNC_CONCURRENCY)
+        return client, self._semaphores[loop]
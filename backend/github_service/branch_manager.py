@@ -1,8 +1,9 @@
 
 import logging
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, Set
 import re
 import os
+import time
 from datetime import datetime
 
 # Import the environment validator
@@ -10,6 +11,11 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config.env_loader import get_config, get_env
 
+# Prefixes of branches that may hold work for a ticket, in order of preference
+BRANCH_PREFIXES = ["fix/", "bugfix/", "feature/", "hotfix/"]
+# How long the branch index is reused before it is listed again
+GITHUB_BRANCH_INDEX_TTL = float(os.environ.get('GITHUB_BRANCH_INDEX_TTL', '60'))
+
 class BranchManager:
     """Manager for Git branch operations with standardized naming and error handling"""
     
@@ -18,10 +24,13 @@ class BranchManager:
         self.logger = logging.getLogger("branch-manager")
         self.github_client = github_client
         self.env = get_config()
+        self._branch_index: Optional[Set[str]] = None
+        self._branch_index_loaded_at = 0.0
     
     def set_github_client(self, github_client):
         """Set the GitHub client instance"""
         self.github_client = github_client
+        self._branch_index = None
     
     def _sanitize_branch_name(self, name: str) -> str:
         """
@@ -88,6 +97,7 @@ class BranchManager:
         
         if success:
             self.logger.info(f"Created branch {branch_name} from {default_branch}")
+            self._record_branch(branch_name)
             return True, branch_name
         else:
             self.logger.error(f"Failed to create branch {branch_name}")
@@ -128,6 +138,7 @@ class BranchManager:
         success = self.github_client.create_branch(fallback_branch)
         if success:
             self.logger.info(f"Created fallback branch {fallback_branch}")
+            self._record_branch(fallback_branch)
             return True, fallback_branch
         
         self.logger.error("All attempts to create branch failed")
@@ -147,20 +158,78 @@ class BranchManager:
             self.logger.error("GitHub client not set")
             return None
         
-        # Common branch prefixes to check
-        prefixes = ["fix/", "bugfix/", "feature/", "hotfix/"]
+        ticket = ticket_id.upper()
+        
+        # One listing of all branches answers every ticket until the index expires
+        branch_index = self._get_branch_index()
+        if branch_index is not None:
+            branch_name = self._match_ticket_branch(branch_index, ticket)
+            if branch_name:
+                self.logger.info(f"Found existing branch {branch_name} for ticket {ticket_id}")
+                return branch_name
+            self.logger.info(f"No existing branch found for ticket {ticket_id}")
+            return None
         
-        for prefix in prefixes:
-            branch_name = f"{prefix}{ticket_id.upper()}"
+        # Clients without branch listing can only check exact names
+        for prefix in BRANCH_PREFIXES:
+            branch_name = f"{prefix}{ticket}"
             if self.github_client.check_branch_exists(branch_name):
                 self.logger.info(f"Found existing branch {branch_name} for ticket {ticket_id}")
                 return branch_name
-                
-            # Also check for branches with descriptions (truncated search)
-            pattern = f"{prefix}{ticket_id.upper()}-"
-            # Note: This is a simplified version - in a real implementation,
-            # we would need to list all branches and filter by pattern
-            # which requires more GitHub API functionality than shown here
         
         self.logger.info(f"No existing branch found for ticket {ticket_id}")
         return None
+    
+    def _get_branch_index(self, refresh: bool = False) -> Optional[Set[str]]:
+        """
+        Get the set of branch names, listing them again once the index has expired
+        
+        Returns:
+            Set of branch names, or None if the client cannot list branches
+        """
+        if not hasattr(self.github_client, "list_branches"):
+            return None
+        
+        expired = time.monotonic() - self._branch_index_loaded_at > GITHUB_BRANCH_INDEX_TTL
+        if refresh or self._branch_index is None or expired:
+            branches = self.github_client.list_branches()
+            if branches is None:
+                # Keep serving the previous index rather than failing the lookup
+                return self._branch_index
+            self._branch_index = set(branches)
+            self._branch_index_loaded_at = time.monotonic()
+            self.logger.info(f"Indexed {len(self._branch_index)} branches")
+        return self._branch_index
+    
+    def _record_branch(self, branch_name: str) -> None:
+        """Add a branch created by this manager to the index without listing again"""
+        if self._branch_index is not None:
+            self._branch_index.add(branch_name)
+    
+    def _match_ticket_branch(self, branch_index: Set[str], ticket: str) -> Optional[str]:
+        """
+        Pick the branch for a ticket from the index
+        
+        Exact names (fix/TICKET-1) are preferred over descriptive ones
+        (fix/TICKET-1-null-check), and earlier prefixes over later ones.
+        """
+        exact = {prefix: f"{prefix}{ticket}".lower() for prefix in BRANCH_PREFIXES}
+        descriptive = {prefix: f"{prefix}{ticket}-".lower() for prefix in BRANCH_PREFIXES}
+        exact_matches = {}
+        descriptive_matches = {}
+        
+        for branch_name in branch_index:
+            lowered = branch_name.lower()
+            for prefix in BRANCH_PREFIXES:
+                if lowered == exact[prefix]:
+                    exact_matches[prefix] = branch_name
+                elif lowered.startswith(descriptive[prefix]):
+                    descriptive_matches.setdefault(prefix, []).append(branch_name)
+        
+        for prefix in BRANCH_PREFIXES:
+            if prefix in exact_matches:
+                return exact_matches[prefix]
+        for prefix in BRANCH_PREFIXES:
+            if prefix in descriptive_matches:
+                return sorted(descriptive_matches[prefix])[0]
+        return None
@@ -0,0 +1,203 @@
+
+"""
+Shared cache for GitHub file contents
+
+Contents are stored once per blob SHA and indexed by (repo, ref, path).
+Entries looked up by ref are revalidated with a conditional request
+(If-None-Match), so an unchanged file costs a 304 that does not count
+against the rate limit. Entries looked up by blob SHA are immutable and
+are served without any request.
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable, NamedTuple
+
+logger = logging.getLogger("github-content-cache")
+
+GITHUB_CONTENT_CACHE_MAX_BYTES = int(os.environ.get('GITHUB_CONTENT_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+GITHUB_CONTENT_CACHE_MAX_ENTRIES = int(os.environ.get('GITHUB_CONTENT_CACHE_MAX_ENTRIES', '4096'))
+
+
+class FetchResult(NamedTuple):
+    """Result of a (possibly conditional) contents request"""
+    status: int
+    content: Optional[str] = None
+    etag: Optional[str] = None
+    sha: Optional[str] = None
+
+
+# fetch(etag) -> FetchResult; the etag is None when no validator is cached
+Fetcher = Callable[[Optional[str]], FetchResult]
+
+
+def git_blob_sha(content: str) -> str:
+    """Compute the git blob SHA of text content, as GitHub reports it"""
+    data = content.encode('utf-8')
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class FileContentCache:
+    """Bounded, thread-safe LRU cache of file contents with ETag revalidation"""
+
+    def __init__(self, max_bytes: int = GITHUB_CONTENT_CACHE_MAX_BYTES,
+                 max_entries: int = GITHUB_CONTENT_CACHE_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # (repo, blob_sha) -> content, in LRU order
+        self._blobs: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        # (repo, ref, path) -> (etag, blob_sha), in LRU order
+        self._refs: "OrderedDict[Tuple[str, str, str], Tuple[Optional[str], str]]" = OrderedDict()
+        self._bytes = 0
+        self._metrics = {
+            "hits": 0,
+            "revalidated": 0,
+            "misses": 0,
+            "not_found": 0,
+            "evictions": 0,
+        }
+
+    def get_or_fetch(self, repo: str, ref: str, path: str, fetch: Fetcher) -> Optional[str]:
+        """
+        Get file content for a ref, revalidating any cached copy
+
+        Args:
+            repo: Repository in 'owner/name' format
+            ref: Branch, tag or commit the content is read from
+            path: Path of the file in the repository
+            fetch: Callable performing the request, given the cached ETag (or None)
+
+        Returns:
+            File content, or None if the file does not exist or the request failed
+        """
+        entry = self.get_entry_or_fetch(repo, ref, path, fetch)
+        return entry[0] if entry else None
+
+    def get_entry_or_fetch(self, repo: str, ref: str, path: str,
+                           fetch: Fetcher) -> Optional[Tuple[str, str]]:
+        """Like get_or_fetch, but returns a (content, blob_sha) tuple"""
+        key, etag, blob_sha, content = self._lookup(repo, ref, path)
+        return self._record(key, blob_sha, content, fetch(etag))
+
+    async def aget_entry_or_fetch(self, repo: str, ref: str, path: str,
+                                  fetch: Callable[[Optional[str]], Awaitable[FetchResult]]) -> Optional[Tuple[str, str]]:
+        """Async variant of get_entry_or_fetch for coroutine fetchers"""
+        key, etag, blob_sha, content = self._lookup(repo, ref, path)
+        return self._record(key, blob_sha, content, await fetch(etag))
+
+    def get_by_sha(self, repo: str, blob_sha: str) -> Optional[str]:
+        """Get immutable content by blob SHA without any request"""
+        with self._lock:
+            content = self._blobs.get((repo, blob_sha))
+            if content is not None:
+                self._metrics["hits"] += 1
+                self._blobs.move_to_end((repo, blob_sha))
+            return content
+
+    def put_by_sha(self, repo: str, blob_sha: str, content: str) -> None:
+        """Store content fetched by blob SHA"""
+        with self._lock:
+            self._metrics["misses"] += 1
+            self._store(repo, blob_sha, content)
+            self._evict()
+
+    def invalidate(self, repo: str, ref: str, path: Optional[str] = None) -> None:
+        """Drop ref index entries for a path, or for every path of a ref"""
+        with self._lock:
+            for key in [k for k in self._refs if k[0] == repo and k[1] == ref and (path is None or k[2] == path)]:
+                del self._refs[key]
+
+    def clear(self) -> None:
+        """Remove all cached content"""
+        with self._lock:
+            self._blobs.clear()
+            self._refs.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache metrics including the hit rate"""
+        with self._lock:
+            stats = dict(self._metrics)
+            lookups = stats["hits"] + stats["revalidated"] + stats["misses"]
+            stats["hit_rate"] = (stats["hits"] + stats["revalidated"]) / lookups if lookups else 0.0
+            stats["bytes"] = self._bytes
+            stats["blobs"] = len(self._blobs)
+            stats["refs"] = len(self._refs)
+            return stats
+
+    def _lookup(self, repo: str, ref: str, path: str):
+        """Return (key, etag to send, blob_sha, cached content) for a ref lookup"""
+        key = (repo, ref, path)
+        with self._lock:
+            cached = self._refs.get(key)
+            etag, blob_sha = cached if cached else (None, None)
+            content = self._blobs.get((repo, blob_sha)) if blob_sha else None
+            if cached and content is None:
+                # The blob was evicted, so the validator is useless
+                del self._refs[key]
+        return key, etag if content is not None else None, blob_sha, content
+
+    def _record(self, key: Tuple[str, str, str], blob_sha: Optional[str], content: Optional[str],
+                result: FetchResult) -> Optional[Tuple[str, str]]:
+        """Apply a fetch result to the cache and return the (content, blob_sha) to serve"""
+        repo = key[0]
+        with self._lock:
+            if result.status == 304 and content is not None:
+                self._metrics["revalidated"] += 1
+                self._touch(key, (repo, blob_sha))
+                return content, blob_sha
+            if result.status == 200 and result.content is not None:
+                self._metrics["misses"] += 1
+                sha = result.sha or git_blob_sha(result.content)
+                self._store(repo, sha, result.content)
+                self._refs[key] = (result.etag, sha)
+                self._refs.move_to_end(key)
+                self._evict()
+                return result.content, sha
+            if result.status == 404:
+                self._metrics["not_found"] += 1
+                self._refs.pop(key, None)
+            return None
+
+    def _store(self, repo: str, blob_sha: str, content: str) -> None:
+        blob_key = (repo, blob_sha)
+        if blob_key in self._blobs:
+            self._blobs.move_to_end(blob_key)
+            return
+        self._blobs[blob_key] = content
+        self._bytes += len(content)
+
+    def _touch(self, ref_key: Tuple[str, str, str], blob_key: Tuple[str, str]) -> None:
+        # Another thread may have evicted the entry while the request was in flight
+        if ref_key in self._refs:
+            self._refs.move_to_end(ref_key)
+        if blob_key in self._blobs:
+            self._blobs.move_to_end(blob_key)
+
+    def _evict(self) -> None:
+        while self._blobs and (self._bytes > self.max_bytes or len(self._blobs) > self.max_entries):
+            _, content = self._blobs.popitem(last=False)
+            self._bytes -= len(content)
+            self._metrics["evictions"] += 1
+        # Ref entries are small, but keep the index bounded as well
+        while len(self._refs) > self.max_entries:
+            self._refs.popitem(last=False)
+
+
+_content_cache: Optional[FileContentCache] = None
+_content_cache_lock = threading.Lock()
+
+
+def get_content_cache() -> FileContentCache:
+    """Return the process-wide content cache"""
+    global _content_cache
+    with _content_cache_lock:
+        if _content_cache is None:
+            _content_cache = FileContentCache()
+            logger.info(f"Initialized GitHub content cache ({_content_cache.max_bytes} bytes, "
+                        f"{_content_cache.max_entries} entries)")
+        return _content_cache
@@ -0,0 +1,556 @@
+
+"""
+Local stand-in for the GitHub REST API
+
+Serves the endpoints used by GitHubClient, AsyncGitHubClient,
+agents/utils/github_client and github_utils (repository, branches, refs,
+contents, blobs, trees, commits, compare, pulls and issue comments) from an
+in-memory repository, so the GitHub path can be exercised and tuned
+without a real repository or token. Latency, server errors and primary or
+secondary rate limits can be injected.
+
+Point the clients at it with GITHUB_API_URL=<server url>. It can also be run
+standalone:
+
+    python -m github_service.fake_github_server --port 8765 --latency 0.05
+"""
+
+import re
+import json
+import time
+import base64
+import random
+import hashlib
+import logging
+import argparse
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs, unquote
+
+try:
+    from github_service.content_cache import git_blob_sha
+except ImportError:
+    from .content_cache import git_blob_sha
+
+logger = logging.getLogger("fake-github-server")
+
+# Like GitHub, the contents API only inlines files up to 1 MB (larger ones are read through the blob API)
+CONTENTS_INLINE_LIMIT = 1024 * 1024
+
+
+@dataclass
+class FakeGitHubConfig:
+    """Fault and latency injection settings"""
+    # Seconds added to every response, plus up to latency_jitter seconds at random
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    # Fraction of requests answered with a 502
+    error_rate: float = 0.0
+    # Requests allowed per rate-limit window (None disables the primary limit)
+    rate_limit: Optional[int] = None
+    rate_limit_window: float = 3600.0
+    # Fraction of requests answered with a secondary rate limit (403 + Retry-After)
+    secondary_rate_limit_rate: float = 0.0
+    secondary_retry_after: int = 1
+    seed: Optional[int] = None
+
+
+class FakeRepository:
+    """In-memory git object store with branches, pull requests and comments"""
+
+    def __init__(self, files: Dict[str, str], default_branch: str = "main"):
+        self.default_branch = default_branch
+        self.blobs: Dict[str, str] = {}
+        self.trees: Dict[str, Dict[str, str]] = {}
+        self.commits: Dict[str, Dict[str, Any]] = {}
+        self.branches: Dict[str, str] = {}
+        self.pulls: List[Dict[str, Any]] = []
+        self.comments: Dict[int, List[Dict[str, Any]]] = {}
+
+        tree_sha = self.write_tree({path: self.write_blob(content) for path, content in files.items()})
+        self.branches[default_branch] = self.write_commit("Initial commit", tree_sha, [])
+
+    def write_blob(self, content: str) -> str:
+        sha = git_blob_sha(content)
+        self.blobs[sha] = content
+        return sha
+
+    def write_tree(self, entries: Dict[str, str]) -> str:
+        sha = hashlib.sha1(json.dumps(sorted(entries.items())).encode()).hexdigest()
+        self.trees[sha] = dict(entries)
+        return sha
+
+    def write_commit(self, message: str, tree_sha: str, parents: List[str]) -> str:
+        payload = json.dumps([message, tree_sha, parents, len(self.commits)])
+        sha = hashlib.sha1(payload.encode()).hexdigest()
+        self.commits[sha] = {"message": message, "tree": tree_sha, "parents": parents}
+        return sha
+
+    def files_at(self, ref: str) -> Optional[Dict[str, str]]:
+        """Map of path -> blob SHA at a branch name or commit SHA"""
+        commit_sha = self.branches.get(ref, ref)
+        commit = self.commits.get(commit_sha)
+        return self.trees[commit["tree"]] if commit else None
+
+
+class FakeGitHubServer:
+    """Threaded HTTP server exposing a FakeRepository through GitHub's REST routes"""
+
+    def __init__(self, files: Dict[str, str] = None, owner: str = "bench-org", repo: str = "bench-repo",
+                 default_branch: str = "main", config: FakeGitHubConfig = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.owner = owner
+        self.repo_name = repo
+        self.config = config or FakeGitHubConfig()
+        self.repository = FakeRepository(files or {"README.md": "# Benchmark repository\n"}, default_branch)
+        self._lock = threading.Lock()
+        self._random = random.Random(self.config.seed)
+        self._requests: Counter = Counter()
+        self._injected: Counter = Counter()
+        self._window_started = time.time()
+        self._window_used = 0
+
+        server = self
+        class Handler(_FakeGitHubHandler):
+            fake = server
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def repo_url(self) -> str:
+        return f"{self.url}/repos/{self.owner}/{self.repo_name}"
+
+    def start(self) -> str:
+        """Serve in a background thread; returns the base URL to use as GITHUB_API_URL"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Fake GitHub API listening on {self.url}")
+        return self.url
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Request counts per route plus injected faults"""
+        with self._lock:
+            return {
+                "requests": sum(self._requests.values()),
+                "routes": dict(self._requests),
+                "injected": dict(self._injected),
+                "pulls": len(self.repository.pulls),
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._requests.clear()
+            self._injected.clear()
+
+    def _admit(self, route: str) -> Tuple[Optional[Tuple[int, Dict[str, Any]]], Dict[str, str]]:
+        """
+        Count the request and decide on fault injection
+
+        Returns (injected response or None, rate-limit headers for the response)
+        """
+        config = self.config
+        with self._lock:
+            self._requests[route] += 1
+            now = time.time()
+            if now - self._window_started >= config.rate_limit_window:
+                self._window_started = now
+                self._window_used = 0
+            reset = int(self._window_started + config.rate_limit_window)
+            limit = config.rate_limit if config.rate_limit is not None else 5000
+            if config.rate_limit is not None and self._window_used >= config.rate_limit:
+                self._injected["rate_limit"] += 1
+                headers = {"X-RateLimit-Limit": str(limit), "X-RateLimit-Remaining": "0",
+                           "X-RateLimit-Reset": str(reset)}
+                return (403, {"message": "API rate limit exceeded"}), headers
+            self._window_used += 1
+            remaining = max(0, limit - self._window_used) if config.rate_limit is not None else limit
+            headers = {"X-RateLimit-Limit": str(limit), "X-RateLimit-Remaining": str(remaining),
+                       "X-RateLimit-Reset": str(reset)}
+            roll = self._random.random()
+            if roll < config.secondary_rate_limit_rate:
+                self._injected["secondary_rate_limit"] += 1
+                headers["Retry-After"] = str(config.secondary_retry_after)
+                return (403, {"message": "You have exceeded a secondary rate limit"}), headers
+            if roll < config.secondary_rate_limit_rate + config.error_rate:
+                self._injected["error"] += 1
+                return (502, {"message": "Server Error"}), headers
+            delay = config.latency + self._random.random() * config.latency_jitter
+        if delay:
+            time.sleep(delay)
+        return None, headers
+
+    # JSON representations
+
+    def _ref_json(self, branch: str) -> Dict[str, Any]:
+        sha = self.repository.branches[branch]
+        return {
+            "ref": f"refs/heads/{branch}",
+            "url": f"{self.repo_url}/git/refs/heads/{branch}",
+            "object": {"sha": sha, "type": "commit", "url": f"{self.repo_url}/git/commits/{sha}"},
+        }
+
+    def _commit_json(self, sha: str) -> Dict[str, Any]:
+        commit = self.repository.commits[sha]
+        person = {"name": "Bench", "email": "bench@example.com", "date": "2024-01-01T00:00:00Z"}
+        return {
+            "sha": sha,
+            "url": f"{self.repo_url}/git/commits/{sha}",
+            "message": commit["message"],
+            "author": person,
+            "committer": person,
+            "tree": {"sha": commit["tree"], "url": f"{self.repo_url}/git/trees/{commit['tree']}"},
+            "parents": [{"sha": parent, "url": f"{self.repo_url}/git/commits/{parent}"} for parent in commit["parents"]],
+        }
+
+    def _tree_json(self, sha: str, recursive: bool) -> Dict[str, Any]:
+        files = self.repository.trees[sha]
+        entries = []
+        for path, blob_sha in sorted(files.items()):
+            if not recursive and "/" in path:
+                continue
+            entries.append({"path": path, "mode": "100644", "type": "blob", "sha": blob_sha,
+                            "size": len(self.repository.blobs[blob_sha]),
+                            "url": f"{self.repo_url}/git/blobs/{blob_sha}"})
+        return {"sha": sha, "url": f"{self.repo_url}/git/trees/{sha}", "tree": entries, "truncated": False}
+
+    def _content_json(self, path: str, blob_sha: str) -> Dict[str, Any]:
+        content = self.repository.blobs[blob_sha].encode("utf-8")
+        inline = len(content) <= CONTENTS_INLINE_LIMIT
+        return {
+            "type": "file", "encoding": "base64" if inline else "none", "name": path.rsplit("/", 1)[-1],
+            "path": path, "sha": blob_sha, "size": len(content),
+            "content": base64.b64encode(content).decode("ascii") if inline else "",
+            "url": f"{self.repo_url}/contents/{path}",
+        }
+
+    def _pull_json(self, pull: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "number": pull["number"], "state": pull["state"], "title": pull["title"], "body": pull["body"],
+            "url": f"{self.repo_url}/pulls/{pull['number']}",
+            "html_url": f"{self.url}/{self.owner}/{self.repo_name}/pull/{pull['number']}",
+            "head": {"ref": pull["head"], "sha": self.repository.branches.get(pull["head"])},
+            "base": {"ref": pull["base"], "sha": self.repository.branches.get(pull["base"])},
+        }
+
+    def _repo_json(self) -> Dict[str, Any]:
+        return {
+            "id": 1, "name": self.repo_name, "full_name": f"{self.owner}/{self.repo_name}",
+            "url": self.repo_url, "html_url": f"{self.url}/{self.owner}/{self.repo_name}",
+            "default_branch": self.repository.default_branch, "private": False,
+            "owner": {"login": self.owner, "url": f"{self.url}/users/{self.owner}"},
+        }
+
+    # Route handlers: (method, regex relative to the repository URL) -> handler
+
+    def handle(self, method: str, path: str, query: Dict[str, str], headers, body: Dict[str, Any]
+               ) -> Tuple[int, Any, Dict[str, str]]:
+        """Dispatch a request to the matching route; returns (status, json body, extra headers)"""
+        prefix = f"/repos/{self.owner}/{self.repo_name}"
+        if path == "/user":
+            return 200, {"login": "bench-user", "url": f"{self.url}/users/bench-user"}, {}
+        if path == "/rate_limit":
+            return 200, {"resources": {"core": {"limit": 5000, "remaining": 5000, "reset": int(time.time()) + 3600}}}, {}
+        if not path.startswith(prefix):
+            return 404, {"message": "Not Found"}, {}
+        relative = path[len(prefix):]
+        for route_method, pattern, handler in self._routes():
+            match = re.fullmatch(pattern, relative)
+            if route_method == method and match:
+                with self._lock:
+                    return handler(match, query, headers, body)
+        return 404, {"message": "Not Found"}, {}
+
+    def route_name(self, method: str, path: str) -> str:
+        prefix = f"/repos/{self.owner}/{self.repo_name}"
+        relative = path[len(prefix):] if path.startswith(prefix) else path
+        for route_method, pattern, _ in self._routes():
+            if route_method == method and re.fullmatch(pattern, relative):
+                return f"{method} {pattern}"
+        return f"{method} {relative}"
+
+    def _routes(self):
+        return [
+            ("GET", r"", self._get_repo),
+            ("GET", r"/branches/(?P<branch>.+)", self._get_branch),
+            ("GET", r"/git/refs?/heads/(?P<branch>.+)", self._get_ref),
+            ("GET", r"/git/matching-refs/heads/(?P<prefix>.*)", self._matching_refs),
+            ("POST", r"/git/refs", self._create_ref),
+            ("PATCH", r"/git/refs/heads/(?P<branch>.+)", self._update_ref),
+            ("DELETE", r"/git/refs/heads/(?P<branch>.+)", self._delete_ref),
+            ("GET", r"/contents/(?P<path>.+)", self._get_contents),
+            ("PUT", r"/contents/(?P<path>.+)", self._put_contents),
+            ("POST", r"/git/blobs", self._create_blob),
+            ("GET", r"/git/blobs/(?P<sha>\w+)", self._get_blob),
+            ("GET", r"/git/trees/(?P<sha>\w+)", self._get_tree),
+            ("POST", r"/git/trees", self._create_tree),
+            ("GET", r"/git/commits/(?P<sha>\w+)", self._get_commit),
+            ("POST", r"/git/commits", self._create_commit),
+            ("GET", r"/compare/(?P<base>.+)\.\.\.(?P<head>.+)", self._compare),
+            ("GET", r"/pulls", self._list_pulls),
+            ("POST", r"/pulls", self._create_pull),
+            ("GET", r"/pulls/(?P<number>\d+)", self._get_pull),
+            ("GET", r"/issues/(?P<number>\d+)/comments", self._list_comments),
+            ("POST", r"/issues/(?P<number>\d+)/comments", self._create_comment),
+        ]
+
+    def _get_repo(self, match, query, headers, body):
+        return 200, self._repo_json(), {}
+
+    def _get_branch(self, match, query, headers, body):
+        branch = unquote(match["branch"])
+        if branch not in self.repository.branches:
+            return 404, {"message": "Branch not found"}, {}
+        sha = self.repository.branches[branch]
+        return 200, {"name": branch, "protected": False,
+                     "commit": {"sha": sha, "url": f"{self.repo_url}/commits/{sha}"}}, {}
+
+    def _get_ref(self, match, query, headers, body):
+        branch = unquote(match["branch"])
+        if branch not in self.repository.branches:
+            return 404, {"message": "Not Found"}, {}
+        return 200, self._ref_json(branch), {}
+
+    def _matching_refs(self, match, query, headers, body):
+        prefix = unquote(match["prefix"])
+        return 200, [self._ref_json(branch) for branch in sorted(self.repository.branches) if branch.startswith(prefix)], {}
+
+    def _create_ref(self, match, query, headers, body):
+        ref = body.get("ref", "")
+        if not ref.startswith("refs/heads/") or body.get("sha") not in self.repository.commits:
+            return 422, {"message": "Invalid request"}, {}
+        branch = ref[len("refs/heads/"):]
+        if branch in self.repository.branches:
+            return 422, {"message": "Reference already exists"}, {}
+        self.repository.branches[branch] = body["sha"]
+        return 201, self._ref_json(branch), {}
+
+    def _update_ref(self, match, query, headers, body):
+        branch = unquote(match["branch"])
+        sha = body.get("sha")
+        if branch not in self.repository.branches or sha not in self.repository.commits:
+            return 422, {"message": "Reference does not exist"}, {}
+        # Only fast-forwards are accepted unless forced
+        if not body.get("force") and self.repository.branches[branch] not in self.repository.commits[sha]["parents"] \
+                and self.repository.branches[branch] != sha:
+            return 422, {"message": "Update is not a fast forward"}, {}
+        self.repository.branches[branch] = sha
+        return 200, self._ref_json(branch), {}
+
+    def _delete_ref(self, match, query, headers, body):
+        if self.repository.branches.pop(unquote(match["branch"]), None) is None:
+            return 422, {"message": "Reference does not exist"}, {}
+        return 204, None, {}
+
+    def _get_contents(self, match, query, headers, body):
+        path = unquote(match["path"])
+        files = self.repository.files_at(query.get("ref", self.repository.default_branch))
+        if files is None or path not in files:
+            return 404, {"message": "Not Found"}, {}
+        etag = f'"{files[path]}"'
+        if headers.get("If-None-Match") == etag:
+            return 304, None, {"ETag": etag}
+        return 200, self._content_json(path, files[path]), {"ETag": etag}
+
+    def _put_contents(self, match, query, headers, body):
+        path = unquote(match["path"])
+        branch = body.get("branch", self.repository.default_branch)
+        files = self.repository.files_at(branch)
+        if files is None:
+            return 404, {"message": "Branch not found"}, {}
+        if path in files and body.get("sha") != files[path]:
+            return 409, {"message": f"{path} does not match {body.get('sha')}"}, {}
+        content = base64.b64decode(body.get("content", "")).decode("utf-8")
+        blob_sha = self.repository.write_blob(content)
+        tree_sha = self.repository.write_tree({**files, path: blob_sha})
+        commit_sha = self.repository.write_commit(body.get("message", ""), tree_sha, [self.repository.branches[branch]])
+        self.repository.branches[branch] = commit_sha
+        status = 200 if path in files else 201
+        return status, {"content": self._content_json(path, blob_sha), "commit": self._commit_json(commit_sha)}, {}
+
+    def _create_blob(self, match, query, headers, body):
+        content = body.get("content", "")
+        if body.get("encoding") == "base64":
+            content = base64.b64decode(content).decode("utf-8")
+        sha = self.repository.write_blob(content)
+        return 201, {"sha": sha, "url": f"{self.repo_url}/git/blobs/{sha}"}, {}
+
+    def _get_blob(self, match, query, headers, body):
+        content = self.repository.blobs.get(match["sha"])
+        if content is None:
+            return 404, {"message": "Not Found"}, {}
+        return 200, {"sha": match["sha"], "encoding": "base64", "size": len(content),
+                     "content": base64.b64encode(content.encode("utf-8")).decode("ascii")}, {}
+
+    def _get_tree(self, match, query, headers, body):
+        sha = match["sha"]
+        if sha in self.repository.commits:
+            sha = self.repository.commits[sha]["tree"]
+        if sha not in self.repository.trees:
+            return 404, {"message": "Not Found"}, {}
+        return 200, self._tree_json(sha, query.get("recursive") not in (None, "", "0", "false")), {}
+
+    def _create_tree(self, match, query, headers, body):
+        entries = dict(self.repository.trees.get(body.get("base_tree"), {}))
+        for element in body.get("tree", []):
+            if element.get("sha") is None and "content" not in element:
+                entries.pop(element["path"], None)
+            elif "content" in element:
+                entries[element["path"]] = self.repository.write_blob(element["content"])
+            else:
+                entries[element["path"]] = element["sha"]
+        return 201, self._tree_json(self.repository.write_tree(entries), True), {}
+
+    def _get_commit(self, match, query, headers, body):
+        if match["sha"] not in self.repository.commits:
+            return 404, {"message": "Not Found"}, {}
+        return 200, self._commit_json(match["sha"]), {}
+
+    def _create_commit(self, match, query, headers, body):
+        if body.get("tree") not in self.repository.trees:
+            return 422, {"message": "Tree not found"}, {}
+        sha = self.repository.write_commit(body.get("message", ""), body["tree"], list(body.get("parents", [])))
+        return 201, self._commit_json(sha), {}
+
+    def _compare(self, match, query, headers, body):
+        base = self.repository.files_at(unquote(match["base"]))
+        head = self.repository.files_at(unquote(match["head"]))
+        if base is None or head is None:
+            return 404, {"message": "Not Found"}, {}
+        changed = [path for path in set(base) | set(head) if base.get(path) != head.get(path)]
+        return 200, {"status": "ahead" if changed else "identical", "ahead_by": 1 if changed else 0,
+                     "files": [{"filename": path} for path in sorted(changed)]}, {}
+
+    def _list_pulls(self, match, query, headers, body):
+        head = query.get("head", "")
+        branch = head.split(":", 1)[-1] if head else None
+        state = query.get("state", "open")
+        pulls = [pull for pull in self.repository.pulls
+                 if (branch is None or pull["head"] == branch) and (state == "all" or pull["state"] == state)]
+        return 200, [self._pull_json(pull) for pull in pulls], {}
+
+    def _create_pull(self, match, query, headers, body):
+        head, base = body.get("head"), body.get("base", self.repository.default_branch)
+        if head not in self.repository.branches or base not in self.repository.branches:
+            return 422, {"message": "Validation Failed"}, {}
+        if any(pull["head"] == head and pull["state"] == "open" for pull in self.repository.pulls):
+            return 422, {"message": f"A pull request already exists for {self.owner}:{head}."}, {}
+        pull = {"number": len(self.repository.pulls) + 1, "state": "open", "head": head, "base": base,
+                "title": body.get("title", ""), "body": body.get("body", "")}
+        self.repository.pulls.append(pull)
+        return 201, self._pull_json(pull), {}
+
+    def _get_pull(self, match, query, headers, body):
+        number = int(match["number"])
+        if not 0 < number <= len(self.repository.pulls):
+            return 404, {"message": "Not Found"}, {}
+        return 200, self._pull_json(self.repository.pulls[number - 1]), {}
+
+    def _list_comments(self, match, query, headers, body):
+        return 200, self.repository.comments.get(int(match["number"]), []), {}
+
+    def _create_comment(self, match, query, headers, body):
+        comments = self.repository.comments.setdefault(int(match["number"]), [])
+        comment = {"id": len(comments) + 1, "body": body.get("body", "")}
+        comments.append(comment)
+        return 201, comment, {}
+
+
+class _FakeGitHubHandler(BaseHTTPRequestHandler):
+    fake: FakeGitHubServer = None
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _dispatch(self, method: str) -> None:
+        parsed = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw_body = self.rfile.read(length) if length else b""
+
+        injected, rate_headers = self.fake._admit(self.fake.route_name(method, parsed.path))
+        if injected is not None:
+            status, payload = injected
+            self._respond(status, payload, rate_headers)
+            return
+
+        try:
+            body = json.loads(raw_body) if raw_body else {}
+        except ValueError:
+            self._respond(400, {"message": "Problems parsing JSON"}, rate_headers)
+            return
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        status, payload, headers = self.fake.handle(method, parsed.path, query, self.headers, body)
+        self._respond(status, payload, {**rate_headers, **headers})
+
+    def _respond(self, status: int, payload: Any, headers: Dict[str, str]) -> None:
+        data = json.dumps(payload).encode("utf-8") if payload is not None and status != 304 else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        if data:
+            self.wfile.write(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake GitHub API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--owner", default="bench-org")
+    parser.add_argument("--repo", default="bench-repo")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 502")
+    parser.add_argument("--rate-limit", type=int, default=None, help="Requests allowed per window")
+    parser.add_argument("--rate-limit-window", type=float, default=3600.0)
+    parser.add_argument("--secondary-rate-limit-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    config = FakeGitHubConfig(
+        latency=args.latency, latency_jitter=args.latency_jitter, error_rate=args.error_rate,
+        rate_limit=args.rate_limit, rate_limit_window=args.rate_limit_window,
+        secondary_rate_limit_rate=args.secondary_rate_limit_rate,
+    )
+    server = FakeGitHubServer(owner=args.owner, repo=args.repo, config=config, host=args.host, port=args.port)
+    server.start()
+    print(f"GITHUB_API_URL={server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
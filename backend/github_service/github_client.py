@@ -1,14 +1,17 @@
 import os
 import sys
+import json
+import base64
 import logging
 import traceback
-from typing import Dict, List, Any, Union, Optional
+from typing import Dict, List, Any, Union, Optional, Tuple
 from datetime import datetime
 from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
 
 # Try to import PyGithub
 try:
-    from github import Github, GithubException, UnknownObjectException
+    from github import Github, GithubException, UnknownObjectException, RateLimitExceededException, InputGitTreeElement
     from github.Repository import Repository
     from github.Branch import Branch
     from github.ContentFile import ContentFile
@@ -33,6 +36,17 @@ except ImportError:
         logging.info("Successfully imported patch_engine using relative import")
     except ImportError:
         logging.critical("Could not import patch_engine module")
+
+try:
+    from github_service.content_cache import get_content_cache, FetchResult
+    from github_service.request_scheduler import get_request_scheduler, RequestClass, RateLimitWaitExceeded
+    from github_service.local_git_backend import LocalGitBackend
+    from github_service.tree_index import get_tree_index
+except ImportError:
+    from .content_cache import get_content_cache, FetchResult
+    from .request_scheduler import get_request_scheduler, RequestClass, RateLimitWaitExceeded
+    from .local_git_backend import LocalGitBackend
+    from .tree_index import get_tree_index
         
 # Configure logger
 logger = logging.getLogger("github-client")
@@ -42,8 +56,16 @@ GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN')
 GITHUB_REPO_OWNER = os.environ.get('GITHUB_REPO_OWNER')
 GITHUB_REPO_NAME = os.environ.get('GITHUB_REPO_NAME')
 GITHUB_DEFAULT_BRANCH = os.environ.get('GITHUB_DEFAULT_BRANCH', 'main')
+GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
 GITHUB_USE_DEFAULT_BRANCH_ONLY = os.environ.get('GITHUB_USE_DEFAULT_BRANCH_ONLY', 'false').lower() in ('true', 'yes', '1', 't')
 TEST_MODE = os.environ.get('TEST_MODE', 'false').lower() in ('true', 'yes', '1', 't')
+# "tree" commits all files at once through the Git Data API, "file" uses one contents API commit per file,
+# "local" commits in the local clone at REPO_PATH and pushes once (REST is then only used for PRs)
+GITHUB_COMMIT_MODE = os.environ.get('GITHUB_COMMIT_MODE', 'tree').lower()
+GITHUB_BLOB_WORKERS = int(os.environ.get('GITHUB_BLOB_WORKERS', '8'))
+# Modes a rewritten file keeps (executable, symlink); other files are written as regular files (100644)
+PRESERVED_MODES = ("100755", "120000")
+GITHUB_FETCH_WORKERS = int(os.environ.get('GITHUB_FETCH_WORKERS', '8'))
 
 class GitHubClient:
     """Client for interacting with GitHub API"""
@@ -71,10 +93,10 @@ class GitHubClient:
             raise ValueError("GitHub repository information not provided")
         
         # Create GitHub client
-        self.github = Github(GITHUB_TOKEN)
+        self.github = Github(GITHUB_TOKEN, base_url=GITHUB_API_URL)
         
         # Get repository
-        self.repo = self.github.get_repo(f"{GITHUB_REPO_OWNER}/{GITHUB_REPO_NAME}")
+        self.repo = self._call(RequestClass.READ, self.github.get_repo, f"{GITHUB_REPO_OWNER}/{GITHUB_REPO_NAME}")
         logger.info(f"GitHub client initialized with repo {GITHUB_REPO_OWNER}/{GITHUB_REPO_NAME}")
         
         # Get default branch
@@ -82,6 +104,14 @@ class GitHubClient:
         logger.info(f"Default branch: {self.default_branch_name}")
         logger.info(f"Use default branch only: {GITHUB_USE_DEFAULT_BRANCH_ONLY}")
         
+        # Local clone used for branches and commits in local commit mode
+        self.local_git = None
+        if GITHUB_COMMIT_MODE == "local":
+            self.local_git = LocalGitBackend(default_branch=self.default_branch_name)
+            if not self.local_git.ensure_mirror():
+                raise ValueError(f"Local repository at {self.local_git.repo_path} is not available")
+            logger.info(f"Using local git backend at {self.local_git.repo_path}")
+        
     def init_test_mode(self):
         """Initialize client for test mode with mocked functionality"""
         logger.warning("Running in TEST MODE - using mock GitHub implementation")
@@ -99,12 +129,15 @@ class GitHubClient:
         """Create a branch in the repository"""
         if TEST_MODE:
             return self._mock_create_branch(branch_name)
+        
+        if getattr(self, "local_git", None):
+            return branch_name if self.local_git.create_branch(branch_name, base_branch) else ""
             
         try:
             # Check if branch already exists
             try:
                 logger.info(f"Checking if branch {branch_name} exists")
-                existing_branch = self.repo.get_branch(branch_name)
+                existing_branch = self._call(RequestClass.READ, self.repo.get_branch, branch_name)
                 logger.info(f"Branch {branch_name} exists")
                 logger.warning(f"Branch {branch_name} already exists")
                 return branch_name
@@ -117,10 +150,10 @@ class GitHubClient:
                 base_branch = self.default_branch_name
                 
             # Get the base branch ref
-            base_ref = self.repo.get_git_ref(f"heads/{base_branch}")
+            base_ref = self._call(RequestClass.READ, self.repo.get_git_ref, f"heads/{base_branch}")
             
             # Create new branch
-            self.repo.create_git_ref(f"refs/heads/{branch_name}", base_ref.object.sha)
+            self._call(RequestClass.WRITE, self.repo.create_git_ref, f"refs/heads/{branch_name}", base_ref.object.sha)
             logger.info(f"Created branch {branch_name} from {base_branch}")
             
             return branch_name
@@ -130,6 +163,107 @@ class GitHubClient:
 
     # ... keep existing code (_mock_create_branch)
 
+    def get_branch_head(self, branch_name: str) -> Optional[str]:
+        """Get the commit SHA a branch points to, or None if it cannot be read"""
+        if TEST_MODE:
+            return None
+        
+        if getattr(self, "local_git", None):
+            return self.local_git.get_branch_head(branch_name)
+            
+        try:
+            ref = self._call(RequestClass.READ, self.repo.get_git_ref, f"heads/{branch_name}")
+            return ref.object.sha
+        except Exception as e:
+            logger.error(f"Error getting head of {branch_name}: {str(e)}")
+            return None
+
+    def list_tree_paths(self, commit_sha: str) -> Optional[List[str]]:
+        """List every file path at a commit with one recursive tree request; None on failure or truncation"""
+        if getattr(self, "local_git", None):
+            return self.local_git.list_tree_paths(commit_sha)
+            
+        try:
+            tree = self._call(RequestClass.READ, self.repo.get_git_tree, commit_sha, recursive=True)
+            if tree.raw_data.get("truncated"):
+                # An incomplete index would report existing files as missing; use per-path lookups instead
+                logger.warning(f"Tree of {commit_sha} is truncated, not indexing it")
+                return None
+            return [element.path for element in tree.tree if element.type == "blob"]
+        except Exception as e:
+            logger.error(f"Error listing tree of {commit_sha}: {str(e)}")
+            return None
+
+    def _tree_modes(self, tree_sha: str, paths: List[str]) -> Dict[str, str]:
+        """
+        Modes of the given paths in a tree that a rewritten file must keep (PRESERVED_MODES)
+        
+        One recursive tree request; if GitHub truncates it, the directories of
+        the paths are listed one level at a time instead.
+        """
+        wanted = set(paths)
+        tree = self._call(RequestClass.READ, self.repo.get_git_tree, tree_sha, recursive=True)
+        if not tree.raw_data.get("truncated"):
+            return {element.path: element.mode for element in tree.tree
+                    if element.path in wanted and element.mode in PRESERVED_MODES}
+        
+        listings: Dict[str, Dict[str, Any]] = {}
+        
+        def entries(directory: str) -> Dict[str, Any]:
+            if directory not in listings:
+                listings[directory] = {}
+                if directory:
+                    parent, _, name = directory.rpartition("/")
+                    entry = entries(parent).get(name)
+                    sha = entry.sha if entry is not None and entry.type == "tree" else None
+                else:
+                    sha = tree_sha
+                if sha:
+                    listing = self._call(RequestClass.READ, self.repo.get_git_tree, sha)
+                    listings[directory] = {element.path: element for element in listing.tree}
+            return listings[directory]
+        
+        modes = {}
+        for path in wanted:
+            directory, _, name = path.rpartition("/")
+            entry = entries(directory).get(name)
+            if entry is not None and entry.mode in PRESERVED_MODES:
+                modes[path] = entry.mode
+        return modes
+
+    def check_file_exists(self, file_path: str, branch_name: str = None) -> bool:
+        """
+        Check whether a file exists on a branch
+        
+        The default branch is answered from the cached tree index without a
+        request per path; other branches fall back to a contents lookup.
+        """
+        if TEST_MODE:
+            return file_path in self.mock_files
+            
+        branch_name = branch_name or self.default_branch_name
+        if branch_name == self.default_branch_name:
+            index = get_tree_index(self, branch_name)
+            if index is not None:
+                return index.exists(file_path)
+        try:
+            return self._get_file_entry(file_path, branch_name) is not None
+        except Exception as e:
+            logger.error(f"Error checking if {file_path} exists on {branch_name}: {str(e)}")
+            return False
+
+    def list_branches(self, prefix: str = "") -> Optional[List[str]]:
+        """List branch names starting with a prefix in one matching-refs query; None on failure"""
+        if TEST_MODE:
+            return [branch for branch in self.mock_branches if branch.startswith(prefix)]
+            
+        try:
+            refs = self._call(RequestClass.READ, lambda: list(self.repo.get_git_matching_refs(f"heads/{prefix}")))
+            return [ref.ref[len("refs/heads/"):] for ref in refs]
+        except Exception as e:
+            logger.error(f"Error listing branches with prefix '{prefix}': {str(e)}")
+            return None
+
     def commit_changes(
         self, 
         branch_name: str, 
@@ -140,6 +274,12 @@ class GitHubClient:
         if TEST_MODE:
             return self._mock_commit_changes(branch_name, changes, commit_message)
         
+        if getattr(self, "local_git", None):
+            return self.local_git.commit_changes(branch_name, changes, commit_message)
+        
+        if GITHUB_COMMIT_MODE == "tree":
+            return self._commit_changes_as_tree(branch_name, changes, commit_message)
+        
         try:
             # Track if anything was actually changed
             files_changed = 0
@@ -154,25 +294,30 @@ class GitHubClient:
                     continue
                 
                 try:
-                    # Check if file exists
-                    try:
-                        file = self.repo.get_contents(file_path, ref=branch_name)
+                    # Check if file exists (revalidated against the shared content cache)
+                    entry = self._get_file_entry(file_path, branch_name)
+                    if entry is not None:
+                        current_content, file_sha = entry
                         # Update file
-                        if file.decoded_content.decode('utf-8') != content:
-                            self.repo.update_file(
+                        if current_content != content:
+                            self._call(
+                                RequestClass.WRITE,
+                                self.repo.update_file,
                                 path=file_path,
                                 message=f"{commit_message} - Update {file_path}",
                                 content=content,
-                                sha=file.sha,
+                                sha=file_sha,
                                 branch=branch_name
                             )
                             files_changed += 1
                             logger.info(f"Updated file {file_path}")
                         else:
                             logger.info(f"File {file_path} unchanged, skipping")
-                    except UnknownObjectException:
+                    else:
                         # Create new file
-                        self.repo.create_file(
+                        self._call(
+                            RequestClass.WRITE,
+                            self.repo.create_file,
                             path=file_path,
                             message=f"{commit_message} - Create {file_path}",
                             content=content,
@@ -180,6 +325,14 @@ class GitHubClient:
                         )
                         files_changed += 1
                         logger.info(f"Created file {file_path}")
+                except (RateLimitExceededException, RateLimitWaitExceeded) as inner_e:
+                    # Stop instead of skipping the file, so the caller sees the branch is incomplete
+                    logger.error(f"Rate limited while processing file {file_path}: {str(inner_e)}")
+                    return {
+                        "committed": False,
+                        "files_changed": files_changed,
+                        "error": {"code": "RATE_LIMITED", "message": str(inner_e)}
+                    }
                 except Exception as inner_e:
                     logger.error(f"Error processing file {file_path}: {str(inner_e)}")
             
@@ -198,6 +351,83 @@ class GitHubClient:
             logger.error(f"Error committing changes: {str(e)}")
             return {"committed": False, "error": {"code": "COMMIT_ERROR", "message": str(e)}}
 
+    def _commit_changes_as_tree(
+        self, 
+        branch_name: str, 
+        changes: List[Dict[str, str]], 
+        commit_message: str
+    ) -> Dict[str, Any]:
+        """
+        Commit all changes as a single commit using the Git Data API
+        
+        Blobs are created concurrently, then one tree, one commit and one ref
+        update are made, so the number of round-trips does not grow with the
+        number of files and a failure leaves the branch untouched.
+        """
+        valid_changes = []
+        for change in changes:
+            if not change.get("path") or not change.get("content"):
+                logger.warning(f"Skipping invalid change: missing path or content")
+                continue
+            valid_changes.append(change)
+        
+        if not valid_changes:
+            logger.warning(f"No files were changed in this commit")
+            return {
+                "committed": False, 
+                "error": {"code": "EMPTY_COMMIT", "message": "No files were changed in this commit"}
+            }
+        
+        try:
+            # Create blobs concurrently - these are independent of each other
+            def create_blob(change: Dict[str, str]) -> str:
+                return self._call(RequestClass.WRITE, self.repo.create_git_blob, change["content"], "utf-8").sha
+            
+            workers = max(1, min(GITHUB_BLOB_WORKERS, len(valid_changes)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                blob_shas = list(executor.map(create_blob, valid_changes))
+            logger.info(f"Created {len(blob_shas)} blobs for {branch_name}")
+            
+            # The branch may move between reading the ref and updating it, so retry once on a fresh head
+            for attempt in range(2):
+                ref = self._call(RequestClass.READ, self.repo.get_git_ref, f"heads/{branch_name}")
+                parent_commit = self._call(RequestClass.READ, self.repo.get_git_commit, ref.object.sha)
+                # Existing executables and symlinks keep their mode; new files are regular files
+                modes = self._tree_modes(parent_commit.tree.sha, [change["path"] for change in valid_changes])
+                tree_elements = [
+                    InputGitTreeElement(path=change["path"], mode=modes.get(change["path"], "100644"), type="blob",
+                                        sha=blob_sha)
+                    for change, blob_sha in zip(valid_changes, blob_shas)
+                ]
+                new_tree = self._call(RequestClass.WRITE, self.repo.create_git_tree, tree_elements, parent_commit.tree)
+                
+                # Identical tree means every file already had the requested content
+                if new_tree.sha == parent_commit.tree.sha:
+                    logger.warning(f"No files were changed in this commit")
+                    return {
+                        "committed": False, 
+                        "error": {"code": "EMPTY_COMMIT", "message": "No files were changed in this commit"}
+                    }
+                
+                new_commit = self._call(RequestClass.WRITE, self.repo.create_git_commit, commit_message, new_tree, [parent_commit])
+                try:
+                    self._call(RequestClass.WRITE, ref.edit, new_commit.sha)
+                    break
+                except GithubException as e:
+                    if attempt == 0 and e.status == 422:
+                        logger.warning(f"Branch {branch_name} moved during commit, retrying on new head")
+                        continue
+                    raise
+            
+            logger.info(f"Committed {len(tree_elements)} files to {branch_name} in commit {new_commit.sha}")
+            return {"committed": True, "files_changed": len(tree_elements), "commit_sha": new_commit.sha}
+        except (RateLimitExceededException, RateLimitWaitExceeded) as e:
+            logger.error(f"Rate limited while committing changes as tree: {str(e)}")
+            return {"committed": False, "error": {"code": "RATE_LIMITED", "message": str(e)}}
+        except Exception as e:
+            logger.error(f"Error committing changes as tree: {str(e)}")
+            return {"committed": False, "error": {"code": "COMMIT_ERROR", "message": str(e)}}
+
     # ... keep existing code (_mock_commit_changes)
 
     def create_pull_request(self, branch_name: str, title: str, description: str) -> str:
@@ -208,7 +438,9 @@ class GitHubClient:
         try:
             # Create PR
             base_branch = self.default_branch_name
-            pr = self.repo.create_pull(
+            pr = self._call(
+                RequestClass.PULL_REQUEST,
+                self.repo.create_pull,
                 title=title,
                 body=description,
                 head=branch_name,
@@ -296,12 +528,14 @@ class GitHubClient:
         logger.info(f"Parsing and applying patch for files: {allowed_file_paths}")
         
         results = {}
+        # Fetch all original contents concurrently instead of one file at a time
+        original_contents = self.get_file_contents(allowed_file_paths, branch_name)
         
         # Process each file path
         for file_path in allowed_file_paths:
             if file_path not in results:
                 # Get the current content of the file
-                original_content = self._get_file_content(file_path, branch_name)
+                original_content = original_contents.get(file_path)
                 
                 # Apply the patch to the file using our layered patch engine
                 success, patched_content, method = apply_patch_to_content(
@@ -324,7 +558,7 @@ class GitHubClient:
             validation_result = validate_patch(
                 patch_content=patch_content,
                 file_paths=allowed_file_paths,
-                original_contents={path: self._get_file_content(path, branch_name) for path in allowed_file_paths},
+                original_contents=original_contents,
                 expected_contents=expected_content
             )
             
@@ -339,6 +573,87 @@ class GitHubClient:
         
         return results
         
+    def _call(self, request_class: RequestClass, fn, *args, **kwargs):
+        """Run a PyGithub call through the shared rate-limit-aware scheduler"""
+        scheduler = get_request_scheduler()
+        try:
+            return scheduler.execute(request_class, fn, *args, **kwargs)
+        finally:
+            # PyGithub records the rate-limit headers of every response on its requester
+            requester = getattr(getattr(self, "repo", None), "_requester", None)
+            rate_limiting = getattr(requester, "rate_limiting", None)
+            reset_time = getattr(requester, "rate_limiting_resettime", None)
+            if isinstance(rate_limiting, tuple) and rate_limiting[0] >= 0 and isinstance(reset_time, (int, float)):
+                scheduler.update_budget(rate_limiting[0], reset_time)
+
+    def _get_file_content(self, file_path: str, branch_name: str) -> Optional[str]:
+        """Get the content of a file on a branch, or None if it cannot be read"""
+        if TEST_MODE:
+            return self.mock_files.get(file_path)
+        
+        if getattr(self, "local_git", None):
+            return self.local_git.get_file_content(file_path, branch_name)
+            
+        try:
+            entry = self._get_file_entry(file_path, branch_name)
+            return entry[0] if entry else None
+        except Exception as e:
+            logger.error(f"Error getting content of {file_path} from {branch_name}: {str(e)}")
+            return None
+
+    def get_file_contents(self, file_paths: List[str], branch_name: str) -> Dict[str, Optional[str]]:
+        """
+        Get the contents of several files concurrently
+        
+        Returns a map of path to content (None if the file cannot be read),
+        in the shape patch validation takes as original_contents.
+        """
+        unique_paths = list(dict.fromkeys(file_paths))
+        if not unique_paths:
+            return {}
+        
+        workers = max(1, min(GITHUB_FETCH_WORKERS, len(unique_paths)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            contents = list(executor.map(lambda path: self._get_file_content(path, branch_name), unique_paths))
+        return dict(zip(unique_paths, contents))
+
+    def _get_file_entry(self, file_path: str, branch_name: str) -> Optional[Tuple[str, str]]:
+        """
+        Get (content, blob_sha) of a file through the shared content cache
+        
+        Returns None if the file does not exist; raises GithubException on other errors.
+        """
+        url = f"{self.repo.url}/contents/{file_path}"
+        
+        def request(headers: Optional[Dict[str, str]]):
+            status, response_headers, output = self.repo._requester.requestJson(
+                "GET", url, parameters={"ref": branch_name}, headers=headers
+            )
+            if status in (403, 429):
+                # Raise so the scheduler can back off and retry
+                raise GithubException(status, output, response_headers)
+            return status, response_headers, output
+        
+        def fetch(etag: Optional[str]) -> FetchResult:
+            headers = {"If-None-Match": etag} if etag else None
+            status, response_headers, output = self._call(RequestClass.READ, request, headers)
+            if status in (304, 404):
+                return FetchResult(status)
+            if status != 200:
+                raise GithubException(status, output, response_headers)
+            data = json.loads(output)
+            if data.get("type") != "file":
+                logger.warning(f"Path {file_path} is not a file")
+                return FetchResult(404)
+            encoded = data.get("content", "")
+            if data.get("encoding") == "none":
+                # Files over 1 MB have no inline content; the blob API still returns it
+                encoded = self._call(RequestClass.READ, self.repo.get_git_blob, data["sha"]).content
+            content = base64.b64decode(encoded).decode('utf-8')
+            return FetchResult(200, content, response_headers.get("etag"), data.get("sha"))
+        
+        return get_content_cache().get_entry_or_fetch(self.repo.full_name, branch_name, file_path, fetch)
+        
     def _mock_create_branch(self, branch_name: str) -> str:
         """Mock implementation of create_branch for testing"""
         logger.info(f"MOCK: Creating branch {branch_name}")
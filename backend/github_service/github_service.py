@@ -260,6 +260,10 @@ class GitHubService:
 
     # ... keep existing code (create_pull_request, create_fix_pr, find_pr_for_branch, check_for_existing_pr, add_pr_comment methods)
 
+    def check_file_exists(self, file_path: str, branch_name: str = None) -> bool:
+        """Check whether a file exists (default branch lookups use the cached tree index)"""
+        return self.client.check_file_exists(file_path, branch_name)
+
     def commit_patch(
         self, 
         branch_name: str, 
@@ -298,10 +302,9 @@ class GitHubService:
             if missing_files:
                 logger.warning(f"Some files missing in patch: {', '.join(missing_files)}")
             
-            # Get the original content for each file for validation
+            # Get the original content for each file for validation (fetched concurrently)
             original_contents = {}
-            for file_path in patch_file_paths:
-                content = self.client._get_file_content(file_path, branch_name)
+            for file_path, content in self.client.get_file_contents(patch_file_paths, branch_name).items():
                 if content is not None:
                     original_contents[file_path] = content
                     logger.info(f"Retrieved original content for {file_path}: {len(content)} bytes")
@@ -0,0 +1,244 @@
+
+"""
+Commit backend working on the local repository clone
+
+Instead of one REST call per branch, blob and file update, branches are
+created locally and commits are built with git plumbing against a
+temporary index (no checkout, so the working tree other agents use is never
+touched). Each commit is then published with a single ``git push``. The
+REST API is only needed for pull requests.
+"""
+
+import os
+import logging
+import tempfile
+import threading
+import subprocess
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger("local-git-backend")
+
+REPO_PATH = os.environ.get('REPO_PATH', '/app/code_repo')
+GITHUB_DEFAULT_BRANCH = os.environ.get('GITHUB_DEFAULT_BRANCH', 'main')
+GIT_REMOTE = os.environ.get('GIT_REMOTE', 'origin')
+GIT_COMMAND_TIMEOUT = int(os.environ.get('GIT_COMMAND_TIMEOUT', '120'))
+# Modes a rewritten file keeps (executable, symlink); other files are written as regular files (100644)
+PRESERVED_MODES = ("100755", "120000")
+
+# Identity used for commits unless GIT_AUTHOR_* / GIT_COMMITTER_* are set
+DEFAULT_GIT_IDENTITY = {
+    "GIT_AUTHOR_NAME": "BugFix AI",
+    "GIT_AUTHOR_EMAIL": "bugfix-ai@users.noreply.github.com",
+    "GIT_COMMITTER_NAME": "BugFix AI",
+    "GIT_COMMITTER_EMAIL": "bugfix-ai@users.noreply.github.com",
+}
+
+
+class LocalGitError(Exception):
+    """Raised when a git command fails"""
+
+
+class LocalGitBackend:
+    """Branch, commit and push through a local clone of the repository"""
+
+    def __init__(self, repo_path: str = None, remote: str = GIT_REMOTE,
+                 default_branch: str = GITHUB_DEFAULT_BRANCH):
+        self.repo_path = repo_path or REPO_PATH
+        self.remote = remote
+        self.default_branch = default_branch
+        self._lock = threading.Lock()
+
+    def ensure_mirror(self) -> bool:
+        """Clone the repository if needed and fetch the latest remote state"""
+        if not os.path.isdir(os.path.join(self.repo_path, ".git")):
+            try:
+                from repo_manager import RepositoryManager
+            except ImportError:
+                from ..repo_manager import RepositoryManager
+            manager = RepositoryManager()
+            manager.repo_path = self.repo_path
+            if not manager.clone_repository():
+                return False
+        try:
+            self._git("fetch", "--prune", self.remote)
+            return True
+        except LocalGitError as e:
+            logger.error(f"Error fetching {self.remote} into {self.repo_path}: {str(e)}")
+            return False
+
+    def create_branch(self, branch_name: str, base_branch: str = None) -> bool:
+        """
+        Create a local branch for later commits
+
+        A branch that already exists on the remote is continued from its remote head.
+        """
+        base_branch = base_branch or self.default_branch
+        with self._lock:
+            try:
+                self._fetch_branch(branch_name)
+                start = self._resolve(f"refs/remotes/{self.remote}/{branch_name}")
+                if start is None:
+                    self._fetch_branch(base_branch)
+                    start = self._resolve(f"refs/remotes/{self.remote}/{base_branch}")
+                if start is None:
+                    logger.error(f"Base branch {base_branch} not found on {self.remote}")
+                    return False
+                self._update_local_branch(branch_name, start)
+                logger.info(f"Created local branch {branch_name} at {start[:12]}")
+                return True
+            except LocalGitError as e:
+                logger.error(f"Error creating local branch {branch_name}: {str(e)}")
+                return False
+
+    def get_file_content(self, file_path: str, ref: str) -> Optional[str]:
+        """Read a file at a branch or commit from the object database; None if missing"""
+        commit = self._resolve(f"refs/heads/{ref}") or self._resolve(f"refs/remotes/{self.remote}/{ref}") \
+            or self._resolve(ref)
+        if commit is None:
+            return None
+        try:
+            return self._git("cat-file", "blob", f"{commit}:{file_path}", strip=False)
+        except LocalGitError:
+            return None
+        except UnicodeDecodeError as e:
+            logger.error(f"Error getting content of {file_path} from {ref}: {str(e)}")
+            return None
+
+    def get_branch_head(self, branch_name: str) -> Optional[str]:
+        """Fetch a branch and return its remote head SHA, or None if it does not exist"""
+        with self._lock:
+            try:
+                self._fetch_branch(branch_name)
+            except LocalGitError as e:
+                logger.warning(f"Error fetching {branch_name}, using last known head: {str(e)}")
+            return self._resolve(f"refs/remotes/{self.remote}/{branch_name}")
+
+    def list_tree_paths(self, commit_sha: str) -> Optional[List[str]]:
+        """List every file path at a commit"""
+        try:
+            output = self._git("ls-tree", "-r", "-z", "--name-only", commit_sha, strip=False)
+        except LocalGitError as e:
+            logger.error(f"Error listing tree of {commit_sha}: {str(e)}")
+            return None
+        return [path for path in output.split("\0") if path]
+
+    def commit_changes(
+        self,
+        branch_name: str,
+        changes: List[Dict[str, str]],
+        commit_message: str
+    ) -> Dict[str, Any]:
+        """
+        Commit all changes as one commit using a temporary index and push it
+
+        Returns the same result shape as GitHubClient.commit_changes.
+        """
+        valid_changes = []
+        for change in changes:
+            if not change.get("path") or not change.get("content"):
+                logger.warning(f"Skipping invalid change: missing path or content")
+                continue
+            valid_changes.append(change)
+
+        if not valid_changes:
+            logger.warning(f"No files were changed in this commit")
+            return {
+                "committed": False,
+                "error": {"code": "EMPTY_COMMIT", "message": "No files were changed in this commit"}
+            }
+
+        with self._lock:
+            try:
+                self._fetch_branch(branch_name)
+                parent = (self._resolve(f"refs/remotes/{self.remote}/{branch_name}")
+                          or self._resolve(f"refs/heads/{branch_name}"))
+                if parent is None:
+                    self._fetch_branch(self.default_branch)
+                    parent = self._resolve(f"refs/remotes/{self.remote}/{self.default_branch}")
+                if parent is None:
+                    raise LocalGitError(f"No base commit found for {branch_name}")
+
+                tree = self._write_tree(parent, valid_changes)
+                if tree == self._git("rev-parse", f"{parent}^{{tree}}"):
+                    logger.warning(f"No files were changed in this commit")
+                    return {
+                        "committed": False,
+                        "error": {"code": "EMPTY_COMMIT", "message": "No files were changed in this commit"}
+                    }
+
+                commit = self._git("commit-tree", tree, "-p", parent, "-m", commit_message, env=self._identity())
+                self._update_local_branch(branch_name, commit)
+                self._git("push", self.remote, f"{commit}:refs/heads/{branch_name}")
+                self._git("update-ref", f"refs/remotes/{self.remote}/{branch_name}", commit)
+
+                logger.info(f"Committed and pushed {len(valid_changes)} files to {branch_name} in commit {commit}")
+                return {"committed": True, "files_changed": len(valid_changes), "commit_sha": commit}
+            except LocalGitError as e:
+                logger.error(f"Error committing changes locally: {str(e)}")
+                return {"committed": False, "error": {"code": "COMMIT_ERROR", "message": str(e)}}
+
+    def _write_tree(self, parent: str, changes: List[Dict[str, str]]) -> str:
+        """Build a tree from the parent commit plus the changes without touching the working tree"""
+        index_fd, index_path = tempfile.mkstemp(prefix="bugfix-index-")
+        os.close(index_fd)
+        os.unlink(index_path)
+        env = {"GIT_INDEX_FILE": index_path}
+        try:
+            self._git("read-tree", parent, env=env)
+            # Existing executables and symlinks keep their mode; new files are regular files
+            listed = self._git("ls-files", "--stage", "-z", "--", *[change["path"] for change in changes],
+                               env={**env, "GIT_LITERAL_PATHSPECS": "1"}, strip=False)
+            modes = {}
+            for record in filter(None, listed.split("\0")):
+                info, path = record.split("\t", 1)
+                if info.split()[0] in PRESERVED_MODES:
+                    modes[path] = info.split()[0]
+            entries = []
+            for change in changes:
+                blob = self._git("hash-object", "-w", "--stdin", input=change["content"])
+                entries.append(f"{modes.get(change['path'], '100644')} {blob}\t{change['path']}\n")
+            self._git("update-index", "--index-info", input="".join(entries), env=env)
+            return self._git("write-tree", env=env)
+        finally:
+            if os.path.exists(index_path):
+                os.unlink(index_path)
+
+    def _update_local_branch(self, branch_name: str, commit: str) -> None:
+        # Moving the checked-out branch would make the working tree look modified
+        try:
+            checked_out = self._git("symbolic-ref", "--quiet", "HEAD")
+        except LocalGitError:
+            checked_out = None
+        if checked_out != f"refs/heads/{branch_name}":
+            self._git("update-ref", f"refs/heads/{branch_name}", commit)
+
+    def _fetch_branch(self, branch_name: str) -> None:
+        """Fetch a single branch; a branch missing on the remote is not an error"""
+        try:
+            self._git("fetch", self.remote, f"+refs/heads/{branch_name}:refs/remotes/{self.remote}/{branch_name}")
+        except LocalGitError as e:
+            if "couldn't find remote ref" not in str(e):
+                raise
+
+    def _resolve(self, ref: str) -> Optional[str]:
+        try:
+            return self._git("rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}")
+        except LocalGitError:
+            return None
+
+    def _identity(self) -> Dict[str, str]:
+        return {key: os.environ.get(key, value) for key, value in DEFAULT_GIT_IDENTITY.items()}
+
+    def _git(self, *args: str, input: str = None, env: Dict[str, str] = None, strip: bool = True) -> str:
+        result = subprocess.run(
+            ["git", *args],
+            cwd=self.repo_path,
+            input=input,
+            capture_output=True,
+            text=True,
+            timeout=GIT_COMMAND_TIMEOUT,
+            env={**os.environ, **(env or {})},
+        )
+        if result.returncode != 0:
+            raise LocalGitError(f"git {args[0]} failed: {result.stderr.strip()}")
+        return result.stdout.strip() if strip else result.stdout
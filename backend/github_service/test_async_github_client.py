@@ -0,0 +1,177 @@
+
+import os
+import sys
+import json
+import base64
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github_service import async_github_client
+from github_service.async_github_client import AsyncGitHubClient
+from github_service.content_cache import FileContentCache
+from github_service.request_scheduler import GitHubRequestScheduler
+
+REPO = "/repos/org/repo"
+
+
+class FakeGitHub:
+    """In-memory stand-in for the GitHub REST endpoints used by the async client"""
+
+    def __init__(self):
+        self.files = {"a.py": "a = 1\n", "b.py": "b = 2\n"}
+        # Base tree listings, one level per directory: a.py is executable, bin/run a symlink
+        self.trees = {
+            "base-tree": [{"path": "a.py", "mode": "100755", "type": "blob", "sha": "sha-a"},
+                          {"path": "b.py", "mode": "100644", "type": "blob", "sha": "sha-b"},
+                          {"path": "bin", "mode": "040000", "type": "tree", "sha": "bin-tree"}],
+            "bin-tree": [{"path": "run", "mode": "120000", "type": "blob", "sha": "sha-run"}],
+        }
+        self.truncated = False
+        self.created_trees = []
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append((request.method, request.url.path))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            return self.route(request)
+        finally:
+            self.in_flight -= 1
+
+    def route(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path[len(REPO):]
+        if request.method == "GET" and path.startswith("/contents/"):
+            name = path[len("/contents/"):]
+            if name not in self.files:
+                return httpx.Response(404, json={"message": "Not Found"})
+            if request.headers.get("If-None-Match") == f'"{name}"':
+                return httpx.Response(304)
+            content = base64.b64encode(self.files[name].encode()).decode()
+            return httpx.Response(200, json={"type": "file", "content": content, "sha": f"sha-{name}"},
+                                  headers={"ETag": f'"{name}"'})
+        if request.method == "GET" and path.startswith("/branches/"):
+            return httpx.Response(404, json={"message": "Branch not found"})
+        if request.method == "GET" and path.startswith("/git/ref/heads/"):
+            return httpx.Response(200, json={"object": {"sha": "head-sha"}})
+        if request.method == "POST" and path == "/git/refs":
+            return httpx.Response(201, json={"ref": json.loads(request.content)["ref"]})
+        if request.method == "POST" and path == "/git/blobs":
+            return httpx.Response(201, json={"sha": f"blob-{len(self.requests)}"})
+        if request.method == "GET" and path.startswith("/git/commits/"):
+            return httpx.Response(200, json={"sha": "head-sha", "tree": {"sha": "base-tree"}})
+        if request.method == "GET" and path.startswith("/git/trees/"):
+            sha = path[len("/git/trees/"):]
+            if not request.url.params.get("recursive"):
+                return httpx.Response(200, json={"sha": sha, "tree": self.trees[sha], "truncated": False})
+            entries = self.trees["base-tree"] + [dict(entry, path=f"bin/{entry['path']}")
+                                                 for entry in self.trees["bin-tree"]]
+            return httpx.Response(200, json={"sha": sha, "tree": [] if self.truncated else entries,
+                                             "truncated": self.truncated})
+        if request.method == "POST" and path == "/git/trees":
+            self.created_trees.append(json.loads(request.content))
+            return httpx.Response(201, json={"sha": "new-tree"})
+        if request.method == "POST" and path == "/git/commits":
+            return httpx.Response(201, json={"sha": "new-commit"})
+        if request.method == "PATCH" and path.startswith("/git/refs/heads/"):
+            return httpx.Response(200, json={"object": {"sha": "new-commit"}})
+        if request.method == "POST" and path == "/pulls":
+            return httpx.Response(201, json={"number": 7, "html_url": "https://github.com/org/repo/pull/7"})
+        if request.method == "GET" and path == "/pulls":
+            return httpx.Response(200, json=[])
+        return httpx.Response(500, json={"message": f"Unexpected {request.method} {path}"})
+
+
+class TestAsyncGitHubClient(unittest.TestCase):
+    """Test cases for the asyncio GitHub client"""
+
+    def setUp(self):
+        self.github = FakeGitHub()
+        self.client = AsyncGitHubClient(
+            token="token", repo_owner="org", repo_name="repo", default_branch="main",
+            base_url="https://api.github.test", transport=httpx.MockTransport(self.github.handler)
+        )
+        patchers = [
+            patch.object(async_github_client, "get_request_scheduler", return_value=GitHubRequestScheduler(burst=1000)),
+            patch.object(async_github_client, "get_content_cache", return_value=FileContentCache()),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def run_async(self, coro):
+        async def run():
+            try:
+                return await coro
+            finally:
+                await self.client.aclose()
+        return asyncio.run(run())
+
+    def test_get_file_contents_runs_concurrently(self):
+        """Independent file reads are in flight at the same time"""
+        contents = self.run_async(self.client.get_file_contents(["a.py", "b.py", "missing.py"], "main"))
+
+        self.assertEqual(contents, {"a.py": "a = 1\n", "b.py": "b = 2\n", "missing.py": None})
+        self.assertGreater(self.github.max_in_flight, 1)
+
+    def test_get_file_content_revalidates_cached_entry(self):
+        """A repeated read is served from the cache after a 304"""
+        async def read_twice():
+            await self.client.get_file_content("a.py", "main")
+            return await self.client.get_file_content("a.py", "main")
+
+        self.assertEqual(self.run_async(read_twice()), "a = 1\n")
+        self.assertEqual(len(self.github.requests), 2)
+
+    def test_commit_changes_creates_single_commit(self):
+        """All files go into one tree and one commit"""
+        changes = [{"path": "a.py", "content": "a = 2\n"}, {"path": "c.py", "content": "c = 3\n"}]
+        result = self.run_async(self.client.commit_changes("fix/TEST-1", changes, "Fix TEST-1"))
+
+        self.assertEqual(result, {"committed": True, "files_changed": 2, "commit_sha": "new-commit"})
+        methods = [request for request in self.github.requests if request[0] != "GET"]
+        self.assertEqual(sum(1 for method, path in methods if path.endswith("/git/blobs")), 2)
+        self.assertEqual(sum(1 for method, path in methods if path.endswith("/git/commits")), 1)
+
+    def test_commit_keeps_modes_of_existing_files(self):
+        """Executables and symlinks keep their mode, also when the recursive tree is truncated"""
+        changes = [{"path": "a.py", "content": "a = 2\n"}, {"path": "bin/run", "content": "../a.py"},
+                   {"path": "c.py", "content": "c = 3\n"}]
+        for truncated in (False, True):
+            self.github.truncated = truncated
+            self.client = AsyncGitHubClient(
+                token="token", repo_owner="org", repo_name="repo", default_branch="main",
+                base_url="https://api.github.test", transport=httpx.MockTransport(self.github.handler)
+            )
+            self.assertTrue(self.run_async(self.client.commit_changes("fix/TEST-1", changes, "Fix"))["committed"])
+
+            modes = {entry["path"]: entry["mode"] for entry in self.github.created_trees[-1]["tree"]}
+            self.assertEqual(modes, {"a.py": "100755", "bin/run": "120000", "c.py": "100644"})
+
+    def test_branch_and_pull_request(self):
+        """A missing branch is created from the default branch before opening the PR"""
+        async def open_pr():
+            branch = await self.client.create_branch("fix/TEST-2")
+            existing = await self.client.find_pr_for_branch(branch)
+            pr_url = await self.client.create_pull_request(branch, "Fix TEST-2", "Automated bug fix")
+            return branch, existing, pr_url
+
+        branch, existing, pr_url = self.run_async(open_pr())
+
+        self.assertEqual(branch, "fix/TEST-2")
+        self.assertIsNone(existing)
+        self.assertEqual(pr_url, "https://github.com/org/repo/pull/7")
+        self.assertIn(("POST", f"{REPO}/git/refs"), self.github.requests)
+
+
+if __name__ == "__main__":
+    unittest.main()
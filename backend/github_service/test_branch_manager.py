@@ -0,0 +1,60 @@
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github_service import branch_manager
+from github_service.branch_manager import BranchManager
+
+
+class TestFindExistingBranch(unittest.TestCase):
+    """Test cases for branch discovery through the branch index"""
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.list_branches.return_value = [
+            "main",
+            "hotfix/PROJ-1",
+            "fix/PROJ-1-null-pointer-check",
+            "fix/PROJ-12",
+            "feature/proj-2-new-endpoint",
+        ]
+        self.manager = BranchManager(self.client)
+
+    def test_prefers_exact_name_then_prefix_order(self):
+        """An exact branch name wins over a descriptive one"""
+        self.assertEqual(self.manager.find_existing_branch("proj-1"), "hotfix/PROJ-1")
+        self.assertEqual(self.manager.find_existing_branch("PROJ-12"), "fix/PROJ-12")
+
+    def test_matches_descriptive_suffix(self):
+        """Branches named after the ticket plus a description are found"""
+        self.assertEqual(self.manager.find_existing_branch("PROJ-2"), "feature/proj-2-new-endpoint")
+        self.assertIsNone(self.manager.find_existing_branch("PROJ-3"))
+
+    def test_index_is_listed_once_and_updated_on_create(self):
+        """Lookups reuse the index and created branches are added to it"""
+        self.client.check_branch_exists.return_value = False
+        self.client.create_branch.return_value = True
+
+        self.manager.find_existing_branch("PROJ-1")
+        self.manager.create_bugfix_branch("PROJ-4")
+        found = self.manager.find_existing_branch("PROJ-4")
+
+        self.assertEqual(found, "fix/PROJ-4")
+        self.client.list_branches.assert_called_once()
+
+    def test_index_expires(self):
+        """The branch list is fetched again once the TTL has passed"""
+        with patch.object(branch_manager, "GITHUB_BRANCH_INDEX_TTL", 0):
+            self.manager.find_existing_branch("PROJ-1")
+            self.manager.find_existing_branch("PROJ-1")
+
+        self.assertEqual(self.client.list_branches.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
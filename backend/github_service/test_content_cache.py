@@ -0,0 +1,99 @@
+
+import os
+import sys
+import unittest
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github_service.content_cache import FileContentCache, FetchResult, git_blob_sha
+
+
+class FakeContents:
+    """Fake contents endpoint that honours If-None-Match"""
+
+    def __init__(self, content: str):
+        self.content = content
+        self.requests = []
+
+    def fetch(self, etag):
+        self.requests.append(etag)
+        current_etag = f'"{git_blob_sha(self.content)}"'
+        if etag == current_etag:
+            return FetchResult(304)
+        return FetchResult(200, self.content, current_etag, git_blob_sha(self.content))
+
+
+class TestFileContentCache(unittest.TestCase):
+    """Test cases for the shared GitHub content cache"""
+
+    def setUp(self):
+        self.cache = FileContentCache(max_bytes=1024, max_entries=16)
+
+    def test_revalidates_with_etag(self):
+        """A second read sends the cached ETag and reuses the content on 304"""
+        remote = FakeContents("print('hello')\n")
+        first = self.cache.get_or_fetch("org/repo", "main", "app.py", remote.fetch)
+        second = self.cache.get_or_fetch("org/repo", "main", "app.py", remote.fetch)
+
+        self.assertEqual(first, second)
+        self.assertIsNone(remote.requests[0])
+        self.assertIsNotNone(remote.requests[1])
+        stats = self.cache.stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["revalidated"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_changed_content_is_refetched(self):
+        """A changed file returns the new content instead of the cached copy"""
+        remote = FakeContents("v1")
+        self.cache.get_or_fetch("org/repo", "main", "app.py", remote.fetch)
+        remote.content = "v2"
+
+        self.assertEqual(self.cache.get_or_fetch("org/repo", "main", "app.py", remote.fetch), "v2")
+
+    def test_blob_sha_lookup_needs_no_request(self):
+        """Content fetched by ref can be served by blob SHA without a request"""
+        remote = FakeContents("shared")
+        self.cache.get_or_fetch("org/repo", "main", "a.py", remote.fetch)
+
+        self.assertEqual(self.cache.get_by_sha("org/repo", git_blob_sha("shared")), "shared")
+        self.assertEqual(len(remote.requests), 1)
+
+    def test_identical_content_is_stored_once(self):
+        """Two refs with the same blob share one copy of the content"""
+        remote = FakeContents("x" * 100)
+        self.cache.get_or_fetch("org/repo", "main", "a.py", remote.fetch)
+        self.cache.get_or_fetch("org/repo", "fix/BUG-1", "a.py", remote.fetch)
+
+        self.assertEqual(self.cache.stats()["bytes"], 100)
+
+    def test_memory_is_bounded(self):
+        """Least recently used blobs are evicted beyond max_bytes"""
+        for i in range(10):
+            remote = FakeContents(str(i) * 300)
+            self.cache.get_or_fetch("org/repo", "main", f"f{i}.py", remote.fetch)
+
+        stats = self.cache.stats()
+        self.assertLessEqual(stats["bytes"], 1024)
+        self.assertGreater(stats["evictions"], 0)
+
+    def test_evicted_blob_fetches_without_validator(self):
+        """An entry whose blob was evicted is fetched unconditionally"""
+        remote = FakeContents("a" * 600)
+        self.cache.get_or_fetch("org/repo", "main", "a.py", remote.fetch)
+        self.cache.get_or_fetch("org/repo", "main", "b.py", FakeContents("b" * 600).fetch)
+        self.cache.get_or_fetch("org/repo", "main", "a.py", remote.fetch)
+
+        self.assertEqual(remote.requests, [None, None])
+
+    def test_not_found_returns_none(self):
+        """Missing files are reported as None"""
+        content = self.cache.get_or_fetch("org/repo", "main", "missing.py", lambda etag: FetchResult(404))
+
+        self.assertIsNone(content)
+        self.assertEqual(self.cache.stats()["not_found"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+
+import os
+import sys
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import requests
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github_service import async_github_client
+from github_service.async_github_client import AsyncGitHubClient
+from github_service.content_cache import FileContentCache
+from github_service.fake_github_server import FakeGitHubServer, FakeGitHubConfig
+from github_service.request_scheduler import GitHubRequestScheduler
+
+
+class TestFakeGitHubServer(unittest.TestCase):
+    """Test cases for the local fake GitHub API"""
+
+    def start_server(self, config=None):
+        server = FakeGitHubServer({"app.py": "value = 1\n"}, owner="org", repo="repo", config=config)
+        server.start()
+        self.addCleanup(server.stop)
+        return server
+
+    def test_async_client_opens_pull_request(self):
+        """Branch, commit and PR round-trip through the fake server"""
+        server = self.start_server()
+        client = AsyncGitHubClient(token="token", repo_owner="org", repo_name="repo",
+                                   default_branch="main", base_url=server.url)
+        patchers = [
+            patch.object(async_github_client, "get_request_scheduler", return_value=GitHubRequestScheduler(burst=1000)),
+            patch.object(async_github_client, "get_content_cache", return_value=FileContentCache()),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        async def open_pr():
+            try:
+                await client.create_branch("fix/TEST-1")
+                result = await client.commit_changes(
+                    "fix/TEST-1", [{"path": "app.py", "content": "value = 2\n"}], "Fix TEST-1")
+                pr_url = await client.create_pull_request("fix/TEST-1", "Fix TEST-1", "Body")
+                content = await client.get_file_content("app.py", "fix/TEST-1")
+                return result, pr_url, content
+            finally:
+                await client.aclose()
+
+        result, pr_url, content = asyncio.run(open_pr())
+
+        self.assertTrue(result["committed"])
+        self.assertTrue(pr_url.endswith("/org/repo/pull/1"))
+        self.assertEqual(content, "value = 2\n")
+        self.assertNotEqual(server.repository.files_at("main"), server.repository.files_at("fix/TEST-1"))
+        self.assertEqual(server.stats()["pulls"], 1)
+
+    def test_large_files_are_read_through_the_blob_api(self):
+        """Files over 1 MB come without inline content and are fetched as blobs"""
+        large = "x = 1\n" * 200000
+        server = FakeGitHubServer({"app.py": "value = 1\n", "data.py": large}, owner="org", repo="repo")
+        server.start()
+        self.addCleanup(server.stop)
+        client = AsyncGitHubClient(token="token", repo_owner="org", repo_name="repo",
+                                   default_branch="main", base_url=server.url)
+        patchers = [
+            patch.object(async_github_client, "get_request_scheduler", return_value=GitHubRequestScheduler(burst=1000)),
+            patch.object(async_github_client, "get_content_cache", return_value=FileContentCache()),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        async def read():
+            try:
+                return await client.get_file_content("data.py", "main")
+            finally:
+                await client.aclose()
+
+        self.assertEqual(requests.get(f"{server.repo_url}/contents/data.py").json()["content"], "")
+        self.assertEqual(asyncio.run(read()), large)
+
+    def test_contents_revalidation(self):
+        """A matching If-None-Match is answered with 304"""
+        server = self.start_server()
+        url = f"{server.repo_url}/contents/app.py"
+
+        etag = requests.get(url).headers["ETag"]
+        response = requests.get(url, headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_injected_rate_limits(self):
+        """Secondary limits carry Retry-After and the primary limit exhausts the window"""
+        server = self.start_server(FakeGitHubConfig(secondary_rate_limit_rate=1.0, secondary_retry_after=2))
+        response = requests.get(server.repo_url)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.headers["Retry-After"], "2")
+
+        server = self.start_server(FakeGitHubConfig(rate_limit=1))
+        self.assertEqual(requests.get(server.repo_url).status_code, 200)
+        response = requests.get(server.repo_url)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.headers["X-RateLimit-Remaining"], "0")
+        self.assertEqual(server.stats()["injected"], {"rate_limit": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
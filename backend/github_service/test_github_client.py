@@ -0,0 +1,214 @@
+
+import os
+import sys
+import json
+import time
+import base64
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github import GithubException
+from github_service import github_client, tree_index
+from github_service.github_client import GitHubClient
+from github_service.content_cache import FileContentCache
+from github_service.request_scheduler import GitHubRequestScheduler
+
+
+def make_client() -> GitHubClient:
+    """Create a client wired to a mocked PyGithub repository"""
+    client = GitHubClient.__new__(GitHubClient)
+    client.github = MagicMock()
+    client.repo = MagicMock()
+    client.default_branch_name = "main"
+    return client
+
+
+class TestTreeCommit(unittest.TestCase):
+    """Test cases for single-commit multi-file writes"""
+
+    def setUp(self):
+        scheduler_patch = patch.object(github_client, "get_request_scheduler",
+                                       return_value=GitHubRequestScheduler(burst=1000))
+        scheduler_patch.start()
+        self.addCleanup(scheduler_patch.stop)
+        self.client = make_client()
+        repo = self.client.repo
+        repo.create_git_blob.side_effect = lambda content, encoding: MagicMock(sha=f"blob-{content}")
+        self.ref = MagicMock()
+        self.ref.object.sha = "head-sha"
+        repo.get_git_ref.return_value = self.ref
+        self.parent = MagicMock()
+        self.parent.tree.sha = "base-tree"
+        repo.get_git_commit.return_value = self.parent
+        repo.create_git_tree.return_value = MagicMock(sha="new-tree")
+        repo.create_git_commit.return_value = MagicMock(sha="new-commit")
+        repo.get_git_tree.return_value = MagicMock(raw_data={"truncated": False}, tree=[])
+        self.changes = [{"path": f"src/file{i}.py", "content": f"content {i}"} for i in range(10)]
+
+    def test_single_commit_for_many_files(self):
+        """All files land in one tree, one commit and one ref update"""
+        with patch.object(github_client, "GITHUB_COMMIT_MODE", "tree"):
+            result = self.client.commit_changes("fix/BUG-1", self.changes, "Fix BUG-1")
+
+        self.assertTrue(result["committed"])
+        self.assertEqual(result["files_changed"], 10)
+        self.assertEqual(self.client.repo.create_git_blob.call_count, 10)
+        self.client.repo.create_git_tree.assert_called_once()
+        self.client.repo.create_git_commit.assert_called_once()
+        self.ref.edit.assert_called_once_with("new-commit")
+        self.client.repo.update_file.assert_not_called()
+        self.client.repo.create_file.assert_not_called()
+
+        elements = self.client.repo.create_git_tree.call_args[0][0]
+        self.assertEqual(len(elements), 10)
+
+    def test_existing_files_keep_their_mode(self):
+        """Executables and symlinks keep their mode, also when the recursive tree is truncated"""
+        run = MagicMock(path="src/file0.py", mode="100755", type="blob")
+        link = MagicMock(path="src/file1.py", mode="120000", type="blob")
+        listings = {
+            "base-tree": [MagicMock(path="src", mode="040000", type="tree", sha="src-tree")],
+            "src-tree": [MagicMock(path="file0.py", mode="100755", type="blob"),
+                         MagicMock(path="file1.py", mode="120000", type="blob"),
+                         MagicMock(path="file2.py", mode="100644", type="blob")],
+        }
+        recursive = MagicMock(raw_data={"truncated": False}, tree=[run, link])
+        truncated = MagicMock(raw_data={"truncated": True}, tree=[])
+        for tree in (recursive, truncated):
+            self.client.repo.get_git_tree.side_effect = \
+                lambda sha, recursive=False: tree if recursive else MagicMock(tree=listings[sha])
+            with patch.object(github_client, "GITHUB_COMMIT_MODE", "tree"):
+                self.assertTrue(self.client.commit_changes("fix/BUG-1", self.changes, "Fix BUG-1")["committed"])
+
+            elements = self.client.repo.create_git_tree.call_args[0][0]
+            modes = {element._identity["path"]: element._identity["mode"] for element in elements}
+            self.assertEqual((modes["src/file0.py"], modes["src/file1.py"], modes["src/file2.py"]),
+                             ("100755", "120000", "100644"))
+
+    def test_unchanged_tree_is_empty_commit(self):
+        """A tree identical to the base tree produces no commit"""
+        self.client.repo.create_git_tree.return_value = MagicMock(sha="base-tree")
+        with patch.object(github_client, "GITHUB_COMMIT_MODE", "tree"):
+            result = self.client.commit_changes("fix/BUG-1", self.changes, "Fix BUG-1")
+
+        self.assertFalse(result["committed"])
+        self.assertEqual(result["error"]["code"], "EMPTY_COMMIT")
+        self.client.repo.create_git_commit.assert_not_called()
+        self.ref.edit.assert_not_called()
+
+    def test_blob_failure_leaves_branch_untouched(self):
+        """A failed blob aborts before any commit is made"""
+        self.client.repo.create_git_blob.side_effect = GithubException(403, "rate limited", None)
+        with patch.object(github_client, "GITHUB_COMMIT_MODE", "tree"):
+            result = self.client.commit_changes("fix/BUG-1", self.changes, "Fix BUG-1")
+
+        self.assertFalse(result["committed"])
+        self.assertEqual(result["error"]["code"], "COMMIT_ERROR")
+        self.client.repo.create_git_commit.assert_not_called()
+        self.ref.edit.assert_not_called()
+
+    def test_retries_when_branch_moves(self):
+        """A non-fast-forward ref update is retried once on the new head"""
+        self.ref.edit.side_effect = [GithubException(422, "not a fast forward", None), None]
+        with patch.object(github_client, "GITHUB_COMMIT_MODE", "tree"):
+            result = self.client.commit_changes("fix/BUG-1", self.changes, "Fix BUG-1")
+
+        self.assertTrue(result["committed"])
+        self.assertEqual(self.client.repo.create_git_commit.call_count, 2)
+        # Blobs are reused across the retry
+        self.assertEqual(self.client.repo.create_git_blob.call_count, 10)
+
+    def test_file_mode_still_available(self):
+        """The per-file contents API path is used when configured"""
+        self.client.repo.full_name = "org/repo"
+        self.client.repo.url = "https://api.github.com/repos/org/repo"
+        self.client.repo._requester.requestJson.return_value = (404, {}, "")
+        with patch.object(github_client, "GITHUB_COMMIT_MODE", "file"):
+            result = self.client.commit_changes("fix/BUG-1", self.changes[:2], "Fix BUG-1")
+
+        self.assertTrue(result["committed"])
+        self.assertEqual(self.client.repo.create_file.call_count, 2)
+        self.client.repo.create_git_tree.assert_not_called()
+
+
+class TestTreeListing(unittest.TestCase):
+    """Test cases for the default-branch tree listing"""
+
+    def setUp(self):
+        tree_index_patch = patch.dict(tree_index._tree_indexes, clear=True)
+        tree_index_patch.start()
+        self.addCleanup(tree_index_patch.stop)
+        self.client = make_client()
+        self.client.get_branch_head = MagicMock(return_value="head-sha")
+        self.client._get_file_entry = MagicMock(return_value=("content", "file-sha"))
+
+    def test_complete_tree_answers_lookups(self):
+        """Existence checks on the default branch are answered from the listed tree"""
+        self.client.repo.get_git_tree.return_value = MagicMock(
+            raw_data={"truncated": False}, tree=[MagicMock(path="src/app.py", type="blob")])
+
+        self.assertEqual(self.client.list_tree_paths("head-sha"), ["src/app.py"])
+        self.assertTrue(self.client.check_file_exists("src/app.py"))
+        self.assertFalse(self.client.check_file_exists("src/other.py"))
+        self.client._get_file_entry.assert_not_called()
+
+    def test_truncated_tree_falls_back_to_contents_lookup(self):
+        """A truncated tree is not indexed, so files missing from it are still found"""
+        self.client.repo.get_git_tree.return_value = MagicMock(
+            raw_data={"truncated": True}, tree=[MagicMock(path="src/app.py", type="blob")])
+
+        self.assertIsNone(self.client.list_tree_paths("head-sha"))
+        self.assertTrue(self.client.check_file_exists("src/other.py"))
+        self.client._get_file_entry.assert_called_once_with("src/other.py", "main")
+
+
+class TestFileEntry(unittest.TestCase):
+    """Test cases for reading single files"""
+
+    def test_large_file_is_read_through_the_blob_api(self):
+        """Files over 1 MB have no inline content and are fetched as blobs"""
+        client = make_client()
+        client.repo.full_name = "org/repo"
+        client.repo.url = "https://api.github.com/repos/org/repo"
+        contents = {"type": "file", "encoding": "none", "content": "", "sha": "blob-sha", "size": 2 * 1024 * 1024}
+        client.repo._requester.requestJson.return_value = (200, {"etag": '"large"'}, json.dumps(contents))
+        client.repo.get_git_blob.return_value = MagicMock(content=base64.b64encode(b"x = 1\n").decode("ascii"))
+        with patch.object(github_client, "get_content_cache", return_value=FileContentCache()), \
+                patch.object(github_client, "get_request_scheduler", return_value=GitHubRequestScheduler(burst=1000)):
+            self.assertEqual(client._get_file_entry("data.py", "main"), ("x = 1\n", "blob-sha"))
+
+        client.repo.get_git_blob.assert_called_once_with("blob-sha")
+
+
+class TestFileContentsPrefetch(unittest.TestCase):
+    """Test cases for fetching original contents in bulk"""
+
+    def test_fetches_files_concurrently(self):
+        """Files are fetched in parallel and returned as a path map"""
+        client = make_client()
+        lock = threading.Lock()
+        state = {"in_flight": 0, "max_in_flight": 0}
+
+        def fake_get_file_content(file_path, branch_name):
+            with lock:
+                state["in_flight"] += 1
+                state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+            time.sleep(0.02)
+            with lock:
+                state["in_flight"] -= 1
+            return None if file_path == "missing.py" else f"content of {file_path}"
+
+        client._get_file_content = fake_get_file_content
+        with patch.object(github_client, "GITHUB_FETCH_WORKERS", 4):
+            contents = client.get_file_contents(["a.py", "b.py", "missing.py", "a.py"], "main")
+
+        self.assertEqual(contents, {"a.py": "content of a.py", "b.py": "content of b.py", "missing.py": None})
+        self.assertGreater(state["max_in_flight"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
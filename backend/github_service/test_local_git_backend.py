@@ -0,0 +1,99 @@
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github_service.local_git_backend import LocalGitBackend
+
+
+def git(cwd, *args):
+    return subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=True).stdout.strip()
+
+
+@unittest.skipUnless(shutil.which("git"), "git is not installed")
+class TestLocalGitBackend(unittest.TestCase):
+    """Test cases for committing through the local clone"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.remote = os.path.join(self.tmp, "remote.git")
+        self.clone = os.path.join(self.tmp, "clone")
+        git(self.tmp, "init", "--bare", "-b", "main", self.remote)
+
+        seed = os.path.join(self.tmp, "seed")
+        git(self.tmp, "clone", self.remote, seed)
+        with open(os.path.join(seed, "app.py"), "w") as f:
+            f.write("value = 1\n")
+        with open(os.path.join(seed, "logo.png"), "wb") as f:
+            f.write(b"\x89PNG\r\n\x1a\n\xff\xfe")
+        with open(os.path.join(seed, "run.sh"), "w") as f:
+            f.write("#!/bin/sh\n")
+        os.chmod(os.path.join(seed, "run.sh"), 0o755)
+        git(seed, "add", "app.py", "logo.png", "run.sh")
+        git(seed, "-c", "user.name=Test", "-c", "user.email=test@example.com", "commit", "-m", "Initial commit")
+        git(seed, "push", "origin", "HEAD:main")
+
+        git(self.tmp, "clone", self.remote, self.clone)
+        self.backend = LocalGitBackend(repo_path=self.clone, default_branch="main")
+        self.assertTrue(self.backend.ensure_mirror())
+
+    def test_commit_is_pushed_as_single_commit(self):
+        """All files land in one commit on the remote branch"""
+        self.assertTrue(self.backend.create_branch("fix/TEST-1"))
+        changes = [
+            {"path": "app.py", "content": "value = 2\n"},
+            {"path": "pkg/new.py", "content": "created = True\n"},
+        ]
+        result = self.backend.commit_changes("fix/TEST-1", changes, "Fix TEST-1")
+
+        self.assertTrue(result["committed"])
+        self.assertEqual(result["files_changed"], 2)
+        self.assertEqual(git(self.remote, "rev-parse", "fix/TEST-1"), result["commit_sha"])
+        self.assertEqual(git(self.remote, "rev-list", "--count", "main..fix/TEST-1"), "1")
+        self.assertEqual(self.backend.get_file_content("pkg/new.py", "fix/TEST-1"), "created = True\n")
+
+    def test_existing_files_keep_their_mode(self):
+        """A rewritten executable stays executable; new files are regular files"""
+        self.backend.create_branch("fix/TEST-4")
+        changes = [{"path": "run.sh", "content": "#!/bin/sh\nexit 0\n"}, {"path": "tool.sh", "content": "#!/bin/sh\n"}]
+        self.assertTrue(self.backend.commit_changes("fix/TEST-4", changes, "Fix TEST-4")["committed"])
+
+        listing = git(self.remote, "ls-tree", "fix/TEST-4", "run.sh", "tool.sh").splitlines()
+        self.assertEqual([line.split()[0] for line in listing], ["100755", "100644"])
+
+    def test_working_tree_is_untouched(self):
+        """Committing does not check out the branch or modify files"""
+        self.backend.create_branch("fix/TEST-2")
+        self.backend.commit_changes("fix/TEST-2", [{"path": "app.py", "content": "value = 3\n"}], "Fix TEST-2")
+
+        self.assertEqual(git(self.clone, "symbolic-ref", "--short", "HEAD"), "main")
+        self.assertEqual(git(self.clone, "status", "--porcelain"), "")
+        with open(os.path.join(self.clone, "app.py")) as f:
+            self.assertEqual(f.read(), "value = 1\n")
+
+    def test_file_content_is_read_from_the_object_database(self):
+        """Text files are returned as text; missing and binary files as None"""
+        self.assertEqual(self.backend.get_file_content("app.py", "main"), "value = 1\n")
+        self.assertIsNone(self.backend.get_file_content("missing.py", "main"))
+        self.assertIsNone(self.backend.get_file_content("logo.png", "main"))
+
+    def test_unchanged_content_is_empty_commit(self):
+        """Committing identical content reports EMPTY_COMMIT and pushes nothing"""
+        self.backend.create_branch("fix/TEST-3")
+        result = self.backend.commit_changes("fix/TEST-3", [{"path": "app.py", "content": "value = 1\n"}], "Fix TEST-3")
+
+        self.assertFalse(result["committed"])
+        self.assertEqual(result["error"]["code"], "EMPTY_COMMIT")
+        with self.assertRaises(subprocess.CalledProcessError):
+            git(self.remote, "rev-parse", "--verify", "fix/TEST-3")
+
+
+if __name__ == "__main__":
+    unittest.main()
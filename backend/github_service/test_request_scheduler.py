@@ -0,0 +1,128 @@
+
+import os
+import sys
+import time
+import threading
+import unittest
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github import GithubException
+from github_service.request_scheduler import GitHubRequestScheduler, RequestClass, RateLimitWaitExceeded
+
+
+class FakeResponse:
+    """Minimal stand-in for requests.Response"""
+
+    def __init__(self, status_code: int, headers: dict = None, text: str = ""):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = text
+
+
+class TestRequestScheduler(unittest.TestCase):
+    """Test cases for the rate-limit-aware GitHub request scheduler"""
+
+    def test_pull_requests_served_before_comments(self):
+        """Queued requests are released in priority order"""
+        scheduler = GitHubRequestScheduler(burst=10)
+        scheduler.observe_response(403, {"Retry-After": "0.3"})
+        order = []
+
+        def worker(request_class):
+            scheduler.acquire(request_class)
+            order.append(request_class)
+
+        comment = threading.Thread(target=worker, args=(RequestClass.COMMENT,))
+        comment.start()
+        time.sleep(0.05)
+        pull_request = threading.Thread(target=worker, args=(RequestClass.PULL_REQUEST,))
+        pull_request.start()
+        comment.join()
+        pull_request.join()
+
+        self.assertEqual(order, [RequestClass.PULL_REQUEST, RequestClass.COMMENT])
+
+    def test_retry_after_is_honoured(self):
+        """A rate-limited response is retried after Retry-After"""
+        scheduler = GitHubRequestScheduler(burst=10)
+        responses = [FakeResponse(403, {"Retry-After": "0.2"}, "secondary rate limit"), FakeResponse(200)]
+
+        start = time.monotonic()
+        response = scheduler.execute(RequestClass.WRITE, lambda: responses.pop(0))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+        self.assertEqual(scheduler.stats()["retries"], 1)
+
+    def test_pygithub_rate_limit_exception_is_retried(self):
+        """PyGithub exceptions carrying rate-limit headers are retried"""
+        scheduler = GitHubRequestScheduler(burst=10)
+        calls = []
+
+        def create_pull():
+            calls.append(1)
+            if len(calls) == 1:
+                raise GithubException(429, {"message": "too many"}, {"retry-after": "0.1"})
+            return "pr"
+
+        self.assertEqual(scheduler.execute(RequestClass.PULL_REQUEST, create_pull), "pr")
+        self.assertEqual(len(calls), 2)
+
+    def test_other_errors_are_not_retried(self):
+        """Permission errors are raised immediately"""
+        scheduler = GitHubRequestScheduler(burst=10)
+
+        def forbidden():
+            raise GithubException(403, {"message": "Resource not accessible"}, {})
+
+        with self.assertRaises(GithubException):
+            scheduler.execute(RequestClass.WRITE, forbidden)
+        self.assertEqual(scheduler.stats()["retries"], 0)
+
+    def test_low_budget_is_reserved_for_writes(self):
+        """Reads wait for the window reset once the budget is down to the reserve"""
+        scheduler = GitHubRequestScheduler(burst=10, reserve=10)
+        scheduler.update_budget(5, time.time() + 0.3)
+
+        start = time.monotonic()
+        scheduler.acquire(RequestClass.WRITE)
+        self.assertLess(time.monotonic() - start, 0.1)
+
+        waited = scheduler.acquire(RequestClass.READ)
+        self.assertGreaterEqual(waited, 0.2)
+
+    def test_budget_paces_requests(self):
+        """Once the burst is spent, requests are paced at remaining / reset window"""
+        scheduler = GitHubRequestScheduler(burst=1, reserve=0)
+        scheduler.update_budget(1000, time.time() + 100)
+
+        scheduler.acquire(RequestClass.READ)
+        waited = scheduler.acquire(RequestClass.READ)
+
+        self.assertGreaterEqual(waited, 0.05)
+        self.assertAlmostEqual(scheduler.stats()["rate_per_second"], 10, delta=0.5)
+
+    def test_exhausted_budget_beyond_max_wait_raises(self):
+        """Waits longer than max_wait fail fast instead of blocking the caller"""
+        scheduler = GitHubRequestScheduler(burst=10, max_wait=1)
+        scheduler.update_budget(0, time.time() + 3600)
+
+        with self.assertRaises(RateLimitWaitExceeded):
+            scheduler.acquire(RequestClass.PULL_REQUEST)
+        self.assertEqual(scheduler.stats()["queued"], 0)
+
+    def test_queue_wait_metrics(self):
+        """Per-class request counts and wait times are recorded"""
+        scheduler = GitHubRequestScheduler(burst=10)
+        scheduler.acquire(RequestClass.READ)
+        scheduler.acquire(RequestClass.READ)
+
+        stats = scheduler.stats()["classes"]["READ"]
+        self.assertEqual(stats["requests"], 2)
+        self.assertGreaterEqual(stats["wait_seconds"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
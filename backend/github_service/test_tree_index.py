@@ -0,0 +1,65 @@
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github_service.tree_index import TreeIndex, TreeIndexCache
+
+
+class TestTreeIndex(unittest.TestCase):
+    """Test cases for the cached default-branch tree index"""
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.get_branch_head.return_value = "sha-1"
+        self.client.list_tree_paths.return_value = ["src/App.py", "src/utils/helpers.py", "README.md"]
+
+    def test_exact_and_case_insensitive_lookups(self):
+        """Paths are normalized and resolved to their repository spelling"""
+        index = TreeIndex("sha-1", self.client.list_tree_paths.return_value)
+
+        self.assertTrue(index.exists("/src/utils/helpers.py"))
+        self.assertTrue(index.exists(".\\src\\App.py"))
+        self.assertFalse(index.exists("src/app.py"))
+        self.assertEqual(index.find("SRC/app.py"), "src/App.py")
+        self.assertIsNone(index.find("src/missing.py"))
+
+    def test_tree_listed_once_per_head(self):
+        """The tree is only listed again after the head moves"""
+        cache = TreeIndexCache(self.client, "main", head_ttl=0)
+
+        first = cache.get()
+        second = cache.get()
+        self.client.get_branch_head.return_value = "sha-2"
+        self.client.list_tree_paths.return_value = ["src/App.py"]
+        third = cache.get()
+
+        self.assertIs(first, second)
+        self.assertEqual(self.client.list_tree_paths.call_count, 2)
+        self.assertEqual(third.head_sha, "sha-2")
+        self.assertFalse(third.exists("README.md"))
+
+    def test_head_check_is_rate_limited(self):
+        """Within the TTL the head is not requested again"""
+        cache = TreeIndexCache(self.client, "main", head_ttl=60)
+
+        cache.get()
+        cache.get()
+
+        self.client.get_branch_head.assert_called_once_with("main")
+
+    def test_keeps_last_index_when_head_unavailable(self):
+        """A failed head lookup keeps serving the previous index"""
+        cache = TreeIndexCache(self.client, "main", head_ttl=0)
+        index = cache.get()
+        self.client.get_branch_head.return_value = None
+
+        self.assertIs(cache.get(), index)
+
+
+if __name__ == "__main__":
+    unittest.main()
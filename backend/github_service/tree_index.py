@@ -0,0 +1,141 @@
+
+"""
+Cached index of the files on the default branch
+
+The full recursive tree is listed once per head SHA and kept in memory, so
+path-existence and case-insensitive lookups are dictionary lookups instead
+of one contents request per path. The head is re-checked at most every
+GITHUB_TREE_INDEX_HEAD_TTL seconds, and the tree is only listed again when
+the head has moved.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("github-tree-index")
+
+GITHUB_TREE_INDEX_HEAD_TTL = float(os.environ.get('GITHUB_TREE_INDEX_HEAD_TTL', '30'))
+
+
+def normalize_path(file_path: str) -> str:
+    """Normalize a path as written in tickets and patches to a repository path"""
+    normalized = file_path.strip().replace('\\', '/')
+    while normalized.startswith('./'):
+        normalized = normalized[2:]
+    return normalized.lstrip('/')
+
+
+class TreeIndex:
+    """Immutable set of file paths at one commit"""
+
+    def __init__(self, head_sha: str, paths: List[str]):
+        self.head_sha = head_sha
+        self._paths = frozenset(paths)
+        # Lowercase path -> first path with that spelling, for case-insensitive lookups
+        self._lower: Dict[str, str] = {}
+        for path in sorted(self._paths):
+            self._lower.setdefault(path.lower(), path)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def exists(self, file_path: str) -> bool:
+        """Check whether a file exists (exact case)"""
+        return normalize_path(file_path) in self._paths
+
+    def find(self, file_path: str) -> Optional[str]:
+        """Resolve a path case-insensitively to its spelling in the repository"""
+        normalized = normalize_path(file_path)
+        if normalized in self._paths:
+            return normalized
+        return self._lower.get(normalized.lower())
+
+
+class TreeIndexCache:
+    """Keeps the tree index of one branch up to date with its head"""
+
+    def __init__(self, client, branch: Optional[str] = None, head_ttl: float = GITHUB_TREE_INDEX_HEAD_TTL):
+        """
+        Args:
+            client: Object providing get_branch_head(branch) and list_tree_paths(sha)
+            branch: Branch to index (defaults to the client's default branch)
+            head_ttl: Seconds between checks of the branch head
+        """
+        self.client = client
+        self.branch = branch or getattr(client, "default_branch_name", None) or "main"
+        self.head_ttl = head_ttl
+        self._lock = threading.Lock()
+        self._index: Optional[TreeIndex] = None
+        self._head_checked_at = 0.0
+
+    def get(self) -> Optional[TreeIndex]:
+        """Return the current index, or None if the tree cannot be listed"""
+        with self._lock:
+            now = time.monotonic()
+            if self._index is not None and now - self._head_checked_at < self.head_ttl:
+                return self._index
+
+            head_sha = self.client.get_branch_head(self.branch)
+            self._head_checked_at = now
+            if head_sha is None:
+                # Keep serving the last known tree rather than failing lookups
+                return self._index
+            if self._index is None or self._index.head_sha != head_sha:
+                paths = self.client.list_tree_paths(head_sha)
+                if paths is not None:
+                    self._index = TreeIndex(head_sha, paths)
+                    logger.info(f"Indexed {len(self._index)} files of {self.branch} at {head_sha[:12]}")
+            return self._index
+
+
+_tree_indexes: Dict[Tuple[str, str], TreeIndexCache] = {}
+_tree_indexes_lock = threading.Lock()
+
+
+def get_tree_index(client=None, branch: Optional[str] = None) -> Optional[TreeIndex]:
+    """
+    Return the process-wide tree index of a branch
+
+    Args:
+        client: GitHub client to list the tree with (a GitHubClient is created if omitted)
+        branch: Branch to index (defaults to the default branch)
+
+    Returns:
+        The index, or None if it cannot be built
+    """
+    if client is None:
+        client = _get_default_client()
+        if client is None:
+            return None
+    branch = branch or getattr(client, "default_branch_name", None) or "main"
+    # Clients of the same repository share one index
+    repo_name = getattr(getattr(client, "repo", None), "full_name", None)
+    key = (repo_name if isinstance(repo_name, str) else str(id(client)), branch)
+    with _tree_indexes_lock:
+        cache = _tree_indexes.get(key)
+        if cache is None:
+            cache = _tree_indexes[key] = TreeIndexCache(client, branch)
+    return cache.get()
+
+
+_default_client = None
+
+
+def _get_default_client():
+    global _default_client
+    with _tree_indexes_lock:
+        if _default_client is None:
+            try:
+                try:
+                    from github_service.github_client import GitHubClient
+                except ImportError:
+                    from .github_client import GitHubClient
+                _default_client = GitHubClient()
+            except Exception as e:
+                logger.warning(f"Tree index unavailable, GitHub client could not be created: {str(e)}")
+                # Don't retry on every lookup when GitHub is not configured
+                _default_client = False
+        return _default_client or None
@@ -9,6 +9,7 @@ import subprocess
 from typing import List, Dict, Any, Optional, Tuple, Union
 from datetime import datetime
 from github import Github, GithubException, InputGitTreeElement
+from github_service.request_scheduler import get_request_scheduler, RequestClass
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -33,9 +34,9 @@ def authenticate_github():
         return None
         
     try:
-        github_client = Github(github_token)
+        github_client = Github(github_token, base_url=os.environ.get("GITHUB_API_URL", "https://api.github.com"))
         # Test the connection
-        user = github_client.get_user()
+        user = get_request_scheduler().execute(RequestClass.READ, github_client.get_user)
         logger.info(f"Authenticated as GitHub user: {user.login}")
         return github_client
     except GithubException as e:
@@ -51,7 +52,7 @@ def get_repo(repo_name: str = None):
     # If repo_name is provided, use it directly
     if repo_name:
         try:
-            return github_client.get_repo(repo_name)
+            return get_request_scheduler().execute(RequestClass.READ, github_client.get_repo, repo_name)
         except GithubException as e:
             logger.error(f"Error accessing repository {repo_name}: {str(e)}")
             return None
@@ -66,7 +67,7 @@ def get_repo(repo_name: str = None):
     
     try:
         full_name = f"{owner}/{name}"
-        return github_client.get_repo(full_name)
+        return get_request_scheduler().execute(RequestClass.READ, github_client.get_repo, full_name)
     except GithubException as e:
         logger.error(f"Error accessing repository {full_name}: {str(e)}")
         return None
@@ -91,8 +92,9 @@ def commit_multiple_changes_as_tree(repo_name: str, branch_name: str,
         
         try:
             # Get the latest commit on the branch
-            ref = repo.get_git_ref(f"heads/{branch_name}")
-            latest_commit = repo.get_git_commit(ref.object.sha)
+            scheduler = get_request_scheduler()
+            ref = scheduler.execute(RequestClass.READ, repo.get_git_ref, f"heads/{branch_name}")
+            latest_commit = scheduler.execute(RequestClass.READ, repo.get_git_commit, ref.object.sha)
             base_tree = latest_commit.tree
             
             # Create tree elements for new files
@@ -118,17 +120,19 @@ def commit_multiple_changes_as_tree(repo_name: str, branch_name: str,
                 tree_elements.append(element)
             
             # Create a tree with the new files
-            new_tree = repo.create_git_tree(tree_elements, base_tree)
+            new_tree = scheduler.execute(RequestClass.WRITE, repo.create_git_tree, tree_elements, base_tree)
             
             # Create a commit with the new tree
-            new_commit = repo.create_git_commit(
+            new_commit = scheduler.execute(
+                RequestClass.WRITE,
+                repo.create_git_commit,
                 message=commit_message,
                 tree=new_tree,
                 parents=[latest_commit]
             )
             
             # Update the reference to point to the new commit
-            ref.edit(new_commit.sha)
+            scheduler.execute(RequestClass.WRITE, ref.edit, new_commit.sha)
             
             logger.info(f"Committed {len(tree_elements)} files to {branch_name}")
             return True
@@ -152,7 +156,7 @@ def get_file_content(repo_name: str, file_path: str, branch: str = None) -> Opti
             branch = os.environ.get("GITHUB_DEFAULT_BRANCH", "main")
             
         try:
-            file_content = repo.get_contents(file_path, ref=branch)
+            file_content = get_request_scheduler().execute(RequestClass.READ, repo.get_contents, file_path, ref=branch)
             if file_content.encoding == "base64":
                 return base64.b64decode(file_content.content).decode('utf-8')
             else:
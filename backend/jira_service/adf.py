@@ -0,0 +1,152 @@
+
+"""
+Atlassian Document Format (ADF) to plain text
+
+One converter for every JIRA caller. It walks the document with an explicit
+stack instead of recursion, and covers the block nodes where stack traces
+usually live: code blocks (kept fenced, line breaks intact), lists,
+blockquotes, panels, expands and tables. Results are memoized by a hash
+of the document, so descriptions that did not change between polls are
+not converted again.
+"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+JIRA_ADF_CACHE_SIZE = int(os.getenv('JIRA_ADF_CACHE_SIZE', '2048'))
+
+# Block nodes whose children are inline nodes
+TEXT_BLOCKS = {"paragraph", "heading"}
+# Block nodes rendered as their children, one after the other
+CONTAINERS = {"doc", "panel", "expand", "nestedExpand", "listItem", "tableCell", "tableHeader",
+              "layoutSection", "layoutColumn", "bodiedExtension", "decisionList", "taskList",
+              "mediaSingle", "mediaGroup"}
+
+
+def _inline_text(node: Dict[str, Any]) -> str:
+    """Text of an inline node (ADF inline nodes never contain blocks)"""
+    node_type = node.get("type")
+    attrs = node.get("attrs") or {}
+    if node_type == "text":
+        return node.get("text") or ""
+    if node_type == "hardBreak":
+        return "\n"
+    if node_type in ("mention", "status"):
+        return attrs.get("text") or ""
+    if node_type == "emoji":
+        return attrs.get("text") or attrs.get("shortName") or ""
+    if node_type in ("inlineCard", "blockCard", "embedCard"):
+        return attrs.get("url") or ""
+    if node_type == "date":
+        return str(attrs.get("timestamp") or "")
+    if node_type == "media":
+        return f"[attachment: {attrs['alt']}]" if attrs.get("alt") else ""
+    return node.get("text") or ""
+
+
+def _children_text(node: Dict[str, Any]) -> str:
+    return "".join(_inline_text(child) for child in node.get("content") or () if isinstance(child, dict))
+
+
+def _convert(doc: Dict[str, Any]) -> str:
+    lines: List[str] = []
+
+    def emit(text: str, first_prefix: str, rest_prefix: str) -> None:
+        for index, line in enumerate(text.split("\n")):
+            lines.append(((first_prefix if index == 0 else rest_prefix) + line).rstrip())
+
+    # Each entry is (node, prefix of its first line, prefix of its other lines)
+    stack: List[Tuple[Dict[str, Any], str, str]] = [(doc, "", "")]
+    while stack:
+        node, first_prefix, rest_prefix = stack.pop()
+        node_type = node.get("type")
+        children = [child for child in node.get("content") or () if isinstance(child, dict)]
+
+        if node_type in TEXT_BLOCKS or node_type in ("taskItem", "decisionItem"):
+            text = _children_text(node)
+            if text.strip():
+                emit(text, first_prefix, rest_prefix)
+        elif node_type == "codeBlock":
+            language = (node.get("attrs") or {}).get("language") or ""
+            emit(f"```{language}\n{_children_text(node)}\n```", first_prefix, rest_prefix)
+        elif node_type == "rule":
+            emit("---", first_prefix, rest_prefix)
+        elif node_type in ("bulletList", "orderedList"):
+            start = (node.get("attrs") or {}).get("order") or 1
+            items = []
+            for index, child in enumerate(children):
+                marker = "- " if node_type == "bulletList" else f"{start + index}. "
+                prefix = first_prefix if index == 0 else rest_prefix
+                items.append((child, prefix + marker, rest_prefix + " " * len(marker)))
+            stack.extend(reversed(items))
+        elif node_type == "blockquote":
+            stack.extend(reversed([
+                (child, (first_prefix if index == 0 else rest_prefix) + "> ", rest_prefix + "> ")
+                for index, child in enumerate(children)
+            ]))
+        elif node_type == "table":
+            for index, row in enumerate(children):
+                # Tables cannot be nested, so each cell is converted on its own
+                cells = [_convert(cell).replace("\n", " ") for cell in row.get("content") or () if isinstance(cell, dict)]
+                emit(" | ".join(cells), first_prefix if index == 0 else rest_prefix, rest_prefix)
+        elif children and (node_type in CONTAINERS or all(child.get("type") not in ("text", "hardBreak") for child in children)):
+            if node_type in ("expand", "nestedExpand") and (node.get("attrs") or {}).get("title"):
+                emit(node["attrs"]["title"], first_prefix, rest_prefix)
+                first_prefix = rest_prefix
+            stack.extend(reversed([
+                (child, first_prefix if index == 0 else rest_prefix, rest_prefix)
+                for index, child in enumerate(children)
+            ]))
+        else:
+            # Unknown inline-level node or unknown block of inline nodes
+            text = _children_text(node) if children else _inline_text(node)
+            if text.strip():
+                emit(text, first_prefix, rest_prefix)
+
+    return "\n".join(lines)
+
+
+_cache: "OrderedDict[str, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def adf_to_text(value: Any) -> str:
+    """
+    Convert a JIRA rich-text field to plain text
+
+    Args:
+        value: ADF document, plain string or None
+
+    Returns:
+        Plain text (code blocks fenced with ```)
+    """
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if not isinstance(value, dict):
+        return str(value)
+
+    try:
+        key = hashlib.blake2b(
+            json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8"), digest_size=16
+        ).hexdigest()
+    except (TypeError, ValueError, RecursionError):
+        # Not JSON serializable (or absurdly deep): convert without memoizing
+        return _convert(value)
+    with _cache_lock:
+        text = _cache.get(key)
+        if text is not None:
+            _cache.move_to_end(key)
+            return text
+
+    text = _convert(value)
+    with _cache_lock:
+        _cache[key] = text
+        while len(_cache) > JIRA_ADF_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return text
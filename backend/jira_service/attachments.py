@@ -0,0 +1,320 @@
+
+"""
+Download and text extraction of JIRA ticket attachments
+
+Logs and screenshots attached to a bug are often where the stack trace
+lives, but tickets only carried their content URLs. Attachments are now
+downloaded in parallel (bounded by JIRA_ATTACHMENT_CONCURRENCY) through the
+shared JIRA session and streamed to disk, so a large file never sits in
+memory; anything above JIRA_ATTACHMENT_MAX_BYTES is abandoned as soon as
+the limit is crossed. JIRA never changes the content of an attachment ID,
+so files are cached on disk by ID for good (oldest entries are evicted
+past JIRA_ATTACHMENT_CACHE_MAX_BYTES). For log-like files a bounded text
+excerpt is extracted line by line: the lines around errors and stack
+traces, or the tail of the file when there are none.
+"""
+
+import os
+import re
+import json
+import gzip
+import shutil
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from . import config
+from .http_session import shared_async_client
+
+logger = logging.getLogger("jira-service.attachments")
+
+JIRA_ATTACHMENT_DIR = os.getenv('JIRA_ATTACHMENT_DIR', 'logs/attachments')
+JIRA_ATTACHMENT_MAX_BYTES = int(os.getenv('JIRA_ATTACHMENT_MAX_BYTES', str(20 * 1024 * 1024)))
+JIRA_ATTACHMENT_CONCURRENCY = int(os.getenv('JIRA_ATTACHMENT_CONCURRENCY', '4'))
+JIRA_ATTACHMENT_CACHE_MAX_BYTES = int(os.getenv('JIRA_ATTACHMENT_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+# Characters of extracted log text handed to the planner per attachment
+JIRA_ATTACHMENT_TEXT_CHARS = int(os.getenv('JIRA_ATTACHMENT_TEXT_CHARS', '20000'))
+
+TEXT_EXTENSIONS = {".log", ".txt", ".out", ".err", ".trace", ".stacktrace", ".json", ".xml", ".csv", ".yaml", ".yml"}
+TEXT_MIME_TYPES = {"application/json", "application/xml", "application/x-log", "application/x-ndjson"}
+
+# Lines that start an excerpt, and how much context is kept around them
+ERROR_LINE_RE = re.compile(
+    r"Traceback \(most recent call last\)|\b\w*(?:Error|Exception)\b|^\s+at \S|\b(?:FATAL|CRITICAL|SEVERE|panic)\b",
+    re.IGNORECASE
+)
+CONTEXT_BEFORE = 5
+CONTEXT_AFTER = 20
+TAIL_LINES = 200
+CHUNK_SIZE = 64 * 1024
+
+
+def attachment_metadata(fields: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Attachment descriptors of an issue's fields
+
+    JIRA returns them under "attachment"; "attachments" is read as well for
+    payloads built by hand.
+    """
+    attachments = []
+    for attachment in fields.get("attachment") or fields.get("attachments") or []:
+        if not attachment:
+            continue
+        attachments.append({
+            "attachment_id": str(attachment.get("id") or ""),
+            "filename": attachment.get("filename", "unknown"),
+            "content_url": attachment.get("content", ""),
+            "mime_type": attachment.get("mimeType", "application/octet-stream"),
+            "size": attachment.get("size")
+        })
+    return attachments
+
+
+def is_text_attachment(filename: str, mime_type: Optional[str]) -> bool:
+    name = (filename or "").lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    mime_type = (mime_type or "").split(";")[0].strip().lower()
+    return (os.path.splitext(name)[1] in TEXT_EXTENSIONS
+            or mime_type.startswith("text/") or mime_type in TEXT_MIME_TYPES)
+
+
+def _read_lines(path: str, filename: str) -> Iterable[str]:
+    opener = gzip.open if filename.lower().endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            yield line.rstrip("\n")
+
+
+def extract_log_text(path: str, filename: str = "", max_chars: int = JIRA_ATTACHMENT_TEXT_CHARS) -> str:
+    """
+    Bounded excerpt of a log file, read one line at a time
+
+    Args:
+        path: File on disk (gzip is decompressed on the fly)
+        filename: Original attachment name, used to detect compression
+        max_chars: Upper bound of the returned text
+
+    Returns:
+        The lines around errors and stack traces, or the tail of the file
+    """
+    excerpt: List[str] = []
+    size = 0
+    before: deque = deque(maxlen=CONTEXT_BEFORE)
+    tail: deque = deque(maxlen=TAIL_LINES)
+    after = 0
+    last_emitted = -2
+
+    try:
+        for number, line in enumerate(_read_lines(path, filename or path)):
+            if size >= max_chars:
+                break
+            tail.append(line)
+            if ERROR_LINE_RE.search(line):
+                if before and last_emitted < number - len(before) - 1:
+                    excerpt.append("...")
+                for previous in before:
+                    excerpt.append(previous)
+                    size += len(previous) + 1
+                before.clear()
+                after = CONTEXT_AFTER
+            elif after == 0:
+                before.append(line)
+                continue
+            else:
+                after -= 1
+            excerpt.append(line)
+            size += len(line) + 1
+            last_emitted = number
+    except (OSError, EOFError, gzip.BadGzipFile) as e:
+        logger.warning(f"Could not read attachment {filename or path}: {str(e)}")
+
+    if excerpt:
+        return "\n".join(excerpt)[:max_chars]
+    # The end of the log is the part worth keeping
+    return "\n".join(tail)[-max_chars:]
+
+
+class AttachmentFetcher:
+    """Parallel, size-capped attachment downloads with an on-disk cache by attachment ID"""
+
+    def __init__(self, cache_dir: str = JIRA_ATTACHMENT_DIR, auth: Optional[Tuple[str, str]] = None,
+                 max_bytes: int = JIRA_ATTACHMENT_MAX_BYTES, concurrency: int = JIRA_ATTACHMENT_CONCURRENCY,
+                 cache_max_bytes: int = JIRA_ATTACHMENT_CACHE_MAX_BYTES,
+                 text_chars: int = JIRA_ATTACHMENT_TEXT_CHARS):
+        self.cache_dir = cache_dir
+        self.auth = auth
+        self.max_bytes = max_bytes
+        self.concurrency = max(1, concurrency)
+        self.cache_max_bytes = cache_max_bytes
+        self.text_chars = text_chars
+        self._lock = threading.Lock()
+        self._stats = {"downloads": 0, "cache_hits": 0, "bytes_downloaded": 0, "too_large": 0, "errors": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    async def fetch_all(self, attachments: List[Dict[str, Any]],
+                        client: Optional[httpx.AsyncClient] = None) -> List[Dict[str, Any]]:
+        """
+        Download the attachments of a ticket, at most `concurrency` at a time
+
+        Returns:
+            One result per attachment, in order: metadata plus the local path
+            and extracted text, or "skipped" with the reason
+        """
+        if not attachments:
+            return []
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(http: httpx.AsyncClient, attachment: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.fetch(http, attachment)
+
+        if client is not None:
+            results = await asyncio.gather(*(fetch(client, attachment) for attachment in attachments))
+        else:
+            async with shared_async_client() as shared:
+                results = await asyncio.gather(*(fetch(shared, attachment) for attachment in attachments))
+        await asyncio.to_thread(self._evict)
+        return list(results)
+
+    async def fetch(self, client: httpx.AsyncClient, attachment: Dict[str, Any]) -> Dict[str, Any]:
+        """Download one attachment unless it is cached"""
+        entry_dir = os.path.join(self.cache_dir, self._cache_key(attachment))
+        cached = self._read_meta(entry_dir)
+        if cached is not None:
+            self._count("cache_hits")
+            os.utime(os.path.join(entry_dir, "meta.json"))
+            return cached
+
+        result = {key: attachment.get(key) for key in ("attachment_id", "filename", "mime_type")}
+        declared_size = attachment.get("size")
+        if isinstance(declared_size, int) and declared_size > self.max_bytes:
+            return self._skip(entry_dir, result, "too_large")
+        url = attachment.get("content_url")
+        if not url:
+            return {**result, "skipped": "no_url"}
+
+        os.makedirs(entry_dir, exist_ok=True)
+        content_path = os.path.join(entry_dir, "content")
+        partial_path = content_path + ".part"
+        size = 0
+        try:
+            async with client.stream("GET", url, auth=self.auth, follow_redirects=True) as response:
+                if response.status_code != 200:
+                    self._count("errors")
+                    logger.warning(f"Attachment {result['filename']} returned HTTP {response.status_code}")
+                    return {**result, "skipped": f"http_{response.status_code}"}
+                length = response.headers.get("Content-Length")
+                if length and length.isdigit() and int(length) > self.max_bytes:
+                    return self._skip(entry_dir, result, "too_large")
+                with open(partial_path, "wb") as f:
+                    async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > self.max_bytes:
+                            break
+                        f.write(chunk)
+            if size > self.max_bytes:
+                os.remove(partial_path)
+                return self._skip(entry_dir, result, "too_large")
+            os.replace(partial_path, content_path)
+        except (httpx.HTTPError, OSError) as e:
+            self._count("errors")
+            logger.warning(f"Error downloading attachment {result['filename']}: {str(e)}")
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            return {**result, "skipped": "error"}
+
+        self._count("downloads")
+        self._count("bytes_downloaded", size)
+        text = None
+        if is_text_attachment(result["filename"], result["mime_type"]):
+            text = await asyncio.to_thread(extract_log_text, content_path, result["filename"] or "", self.text_chars)
+        result.update(path=os.path.abspath(content_path), size=size, text=text)
+        self._write_meta(entry_dir, result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _skip(self, entry_dir: str, result: Dict[str, Any], reason: str) -> Dict[str, Any]:
+        """Cache a skipped attachment, so the same oversized file is not requested again"""
+        self._count(reason)
+        logger.info(f"Skipping attachment {result['filename']}: {reason} (limit {self.max_bytes} bytes)")
+        result = {**result, "skipped": reason}
+        os.makedirs(entry_dir, exist_ok=True)
+        self._write_meta(entry_dir, result)
+        return result
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += amount
+
+    @staticmethod
+    def _cache_key(attachment: Dict[str, Any]) -> str:
+        attachment_id = str(attachment.get("attachment_id") or "")
+        if attachment_id.isdigit():
+            return attachment_id
+        # Without an ID the content URL (which embeds it) identifies the file
+        return hashlib.sha1(str(attachment.get("content_url") or "").encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _read_meta(entry_dir: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(entry_dir, "meta.json"), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_meta(entry_dir: str, result: Dict[str, Any]) -> None:
+        # Written last: an entry without meta.json is an interrupted download
+        temp_path = os.path.join(entry_dir, "meta.json.tmp")
+        with open(temp_path, "w") as f:
+            json.dump(result, f)
+        os.replace(temp_path, os.path.join(entry_dir, "meta.json"))
+
+    def _evict(self) -> None:
+        """Remove least recently used entries while the cache is over its byte budget"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            if not os.path.isdir(entry_dir):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(entry_dir) if entry.is_file())
+            meta_path = os.path.join(entry_dir, "meta.json")
+            used = os.path.getmtime(meta_path) if os.path.exists(meta_path) else 0
+            entries.append((used, size, entry_dir))
+            total += size
+        for _, size, entry_dir in sorted(entries):
+            if total <= self.cache_max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+
+
+_fetcher: Optional[AttachmentFetcher] = None
+_fetcher_lock = threading.Lock()
+
+
+def get_attachment_fetcher() -> AttachmentFetcher:
+    """Return the process-wide attachment fetcher"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            auth = (config.JIRA_USERNAME, config.JIRA_API_TOKEN) if config.JIRA_USERNAME else None
+            _fetcher = AttachmentFetcher(auth=auth)
+        return _fetcher
+
+
+async def fetch_ticket_attachments(attachments: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Download a ticket's attachments and extract text from its logs"""
+    if not attachments:
+        return []
+    return await get_attachment_fetcher().fetch_all(attachments)
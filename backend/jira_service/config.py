@@ -13,6 +13,10 @@ JIRA_API_TOKEN = os.getenv('JIRA_TOKEN') or os.getenv('JIRA_API_TOKEN')
 JIRA_PROJECT_KEY = os.getenv('JIRA_PROJECT_KEY', '')
 JIRA_POLL_INTERVAL = int(os.getenv('JIRA_POLL_INTERVAL', '30'))
 
+# Search Configuration
+JIRA_SEARCH_PAGE_SIZE = int(os.getenv('JIRA_SEARCH_PAGE_SIZE', '100'))  # JIRA Cloud caps pages at 100
+JIRA_SEARCH_CONCURRENCY = int(os.getenv('JIRA_SEARCH_CONCURRENCY', '4'))
+
 # Retry Configuration
 MAX_RETRIES = int(os.getenv('MAX_RETRIES', '3'))
 RETRY_BACKOFF_FACTOR = 2  # For exponential backoff
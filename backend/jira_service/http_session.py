@@ -0,0 +1,191 @@
+
+"""
+Shared keep-alive HTTP session for JIRA
+
+Every JIRA caller used to open its own httpx.AsyncClient (or call
+requests.get/post without a Session), so each call paid a fresh TCP and
+TLS handshake. All JIRA traffic now goes through one pooled client per
+process: an httpx.AsyncClient per event loop for async callers and a
+thread-safe httpx.Client facade for the synchronous ones. Pool limits,
+keep-alive expiry and HTTP/2 are configurable, and the session counts how
+many requests reused a pooled connection. Both clients send through one
+adaptive concurrency limiter that backs off and retries when JIRA answers
+429 (see rate_limiter).
+"""
+
+import os
+import asyncio
+import logging
+import threading
+import contextlib
+import importlib.util
+import weakref
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from .rate_limiter import AdaptiveConcurrencyLimiter, AsyncThrottlingTransport, ThrottlingTransport
+
+logger = logging.getLogger("jira-service.http")
+
+JIRA_HTTP_MAX_CONNECTIONS = int(os.getenv('JIRA_HTTP_MAX_CONNECTIONS', '20'))
+JIRA_HTTP_MAX_KEEPALIVE = int(os.getenv('JIRA_HTTP_MAX_KEEPALIVE', '10'))
+JIRA_HTTP_KEEPALIVE_EXPIRY = float(os.getenv('JIRA_HTTP_KEEPALIVE_EXPIRY', '60'))
+JIRA_HTTP_TIMEOUT = float(os.getenv('JIRA_HTTP_TIMEOUT', '30'))
+# auto: use HTTP/2 when the h2 package is installed
+JIRA_HTTP2 = os.getenv('JIRA_HTTP2', 'auto').lower()
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class JiraHttpSession:
+    """Process-wide pooled HTTP clients for JIRA requests"""
+
+    def __init__(self, transport: Optional[httpx.BaseTransport] = None,
+                 async_transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Args:
+            transport: Optional transport for the sync client, used by tests
+            async_transport: Optional transport for the async clients, used by tests
+        """
+        self._transport = transport
+        self._async_transport = async_transport
+        self.limiter = AdaptiveConcurrencyLimiter()
+        self._lock = threading.Lock()
+        self._sync_client: Optional[httpx.Client] = None
+        # httpx async clients are bound to the loop they were first used on
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+        self._requests = 0
+        self._connections_opened = 0
+
+    def async_client(self) -> httpx.AsyncClient:
+        """Pooled async client of the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None or client.is_closed:
+                transport = self._async_transport or httpx.AsyncHTTPTransport(
+                    limits=self._limits(), http2=self._http2()
+                )
+                client = httpx.AsyncClient(
+                    timeout=JIRA_HTTP_TIMEOUT,
+                    transport=AsyncThrottlingTransport(transport, self.limiter),
+                    event_hooks={"request": [self._on_async_request]},
+                )
+                self._async_clients[loop] = client
+        return client
+
+    def sync_client(self) -> httpx.Client:
+        """Pooled client for synchronous callers (safe to share between threads)"""
+        with self._lock:
+            if self._sync_client is None or self._sync_client.is_closed:
+                transport = self._transport or httpx.HTTPTransport(limits=self._limits(), http2=self._http2())
+                self._sync_client = httpx.Client(
+                    timeout=JIRA_HTTP_TIMEOUT,
+                    transport=ThrottlingTransport(transport, self.limiter),
+                    event_hooks={"request": [self._on_sync_request]},
+                )
+            return self._sync_client
+
+    # Sync facade with the requests-style calls used by the legacy callers
+
+    def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        return self.sync_client().request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> httpx.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection reuse and throttling counters across the sync and async clients"""
+        with self._lock:
+            requests = self._requests
+            opened = self._connections_opened
+        reused = max(0, requests - opened)
+        return {
+            "requests": requests,
+            "connections_opened": opened,
+            "connections_reused": reused,
+            "reuse_ratio": round(reused / requests, 3) if requests else 0.0,
+            "rate_limit": self.limiter.stats(),
+        }
+
+    async def aclose(self) -> None:
+        """Close the pool of the running event loop"""
+        with self._lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def close(self) -> None:
+        """Close the synchronous pool"""
+        with self._lock:
+            client, self._sync_client = self._sync_client, None
+        if client is not None:
+            client.close()
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=JIRA_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=JIRA_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=JIRA_HTTP_KEEPALIVE_EXPIRY,
+        )
+
+    def _http2(self) -> bool:
+        if JIRA_HTTP2 == "auto":
+            return HTTP2_AVAILABLE
+        return JIRA_HTTP2 == "true" and HTTP2_AVAILABLE
+
+    # Connection metrics: httpcore reports every new TCP connection through the trace extension
+
+    def _count_request(self) -> None:
+        with self._lock:
+            self._requests += 1
+
+    def _count_trace(self, event_name: str) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self._connections_opened += 1
+
+    def _on_sync_request(self, request: httpx.Request) -> None:
+        self._count_request()
+        request.extensions["trace"] = self._sync_trace
+
+    async def _on_async_request(self, request: httpx.Request) -> None:
+        self._count_request()
+        request.extensions["trace"] = self._async_trace
+
+    def _sync_trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        self._count_trace(event_name)
+
+    async def _async_trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        self._count_trace(event_name)
+
+
+_session: Optional[JiraHttpSession] = None
+_session_lock = threading.Lock()
+
+
+def get_jira_session() -> JiraHttpSession:
+    """Return the process-wide JIRA HTTP session"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = JiraHttpSession()
+            logger.info(f"JIRA HTTP session created (max connections {JIRA_HTTP_MAX_CONNECTIONS}, "
+                        f"HTTP/2 {'enabled' if _session._http2() else 'disabled'})")
+        return _session
+
+
+@contextlib.asynccontextmanager
+async def shared_async_client() -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Drop-in for `async with httpx.AsyncClient() as client` that borrows the
+    pooled client instead of opening (and closing) a new one
+    """
+    yield get_jira_session().async_client()
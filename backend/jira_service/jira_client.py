@@ -1,12 +1,21 @@
 import logging
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 import httpx
 import json
 import asyncio
 from datetime import datetime
 
 from . import config
+from .search import search_issues
+from .adf import adf_to_text
+from .http_session import shared_async_client
+from .ticket_mirror import get_ticket_mirror
+from .transition_cache import get_transition_cache, live_transitions, transition_key_for, TransitionKey, TRANSITION_PARAMS
+
+# Only the fields mapped into the ticket dictionary
+BUG_TICKET_STATUSES = ["To Do", "Open", "In Progress"]
+BUG_TICKET_FIELDS = ["summary", "description", "status", "created", "updated", "assignee", "reporter", "priority"]
 
 # Set up logging
 logger = logging.getLogger("jira-service.client")
@@ -31,162 +40,115 @@ class JiraClient:
         Returns:
             List of ticket dictionaries with fields mapped to standard format
         """
+        mirror = get_ticket_mirror()
+        if mirror and mirror.covers(issue_types=["Bug"], project=self.project_key or None) \
+                and await mirror.ensure_fresh():
+            issues = mirror.query(
+                statuses=BUG_TICKET_STATUSES, issue_types=["Bug"], project=self.project_key or None
+            )
+            logger.info(f"Found {len(issues)} bug tickets to process in the local mirror")
+            return [self._normalize_issue(issue) for issue in issues]
+        
+        logger.info("Fetching bug tickets from JIRA")
+        tickets = []
         try:
-            logger.info("Fetching bug tickets from JIRA")
-            
-            # Build JQL query to find bug tickets including In Progress status
-            jql = f"issuetype = Bug AND (status = \"To Do\" OR status = Open OR status = \"In Progress\") AND project = {self.project_key}"
-            
-            # Fields to retrieve
-            fields = "summary,description,status,issuetype,created,updated,assignee,reporter,priority"
-            
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    f"{self.jira_url}/rest/api/3/search",
-                    params={"jql": jql, "fields": fields},
-                    auth=self.auth
-                )
-                
-                # Log the HTTP request for debugging
-                logger.info(f"HTTP Request: {response.request.method} {response.request.url} \"{response.http_version} {response.status_code} {response.reason_phrase}\"")
-                
-                if response.status_code != 200:
-                    logger.error(f"Failed to fetch bug tickets: {response.status_code} - {response.text}")
-                    return []
-                
-                data = response.json()
-                issues = data.get("issues", [])
-                
-                if not issues:
-                    logger.info("No issues found in JIRA response")
-                    return []
-                
-                logger.info(f"Found {len(issues)} bug tickets to process")
-                
-                # Map JIRA fields to standard ticket format
-                tickets = []
-                for issue in issues:
-                    # Handle description field which might be complex JSON or plain text
-                    description = issue["fields"].get("description", "")
-                    desc_text = ""
-                    
-                    # Enhanced error handling for description field
-                    try:
-                        if description is None:
-                            desc_text = ""
-                        elif isinstance(description, dict):
-                            # Extract text from Atlassian Document Format
-                            desc_text = self._extract_text_from_adf(description)
-                            # If we couldn't extract text, provide a fallback message
-                            if not desc_text.strip():
-                                desc_text = "No readable description available"
-                        else:
-                            desc_text = str(description)
-                    except Exception as e:
-                        logger.error(f"Error processing description for {issue['key']}: {str(e)}")
-                        desc_text = "Error processing description"
-                    
-                    # Safely extract fields with null checks
-                    status_name = "Unknown"
-                    if issue["fields"].get("status") and isinstance(issue["fields"]["status"], dict):
-                        status_name = issue["fields"]["status"].get("name", "Unknown")
-                        
-                    reporter_name = "Unknown"
-                    if issue["fields"].get("reporter") and isinstance(issue["fields"]["reporter"], dict):
-                        reporter_name = issue["fields"]["reporter"].get("displayName", "Unknown")
-                        
-                    assignee_name = "Unassigned"
-                    if issue["fields"].get("assignee") and isinstance(issue["fields"]["assignee"], dict):
-                        assignee_name = issue["fields"]["assignee"].get("displayName", "Unassigned")
-                        
-                    priority_name = "Medium"
-                    if issue["fields"].get("priority") and isinstance(issue["fields"]["priority"], dict):
-                        priority_name = issue["fields"]["priority"].get("name", "Medium")
-                    
-                    ticket = {
-                        "ticket_id": issue["key"],
-                        "title": issue["fields"].get("summary", "No title"),
-                        "description": desc_text,
-                        "status": status_name,
-                        "created": issue["fields"].get("created", ""),
-                        "updated": issue["fields"].get("updated", ""),
-                        "reporter": reporter_name,
-                        "assignee": assignee_name,
-                        "priority": priority_name
-                    }
-                    tickets.append(ticket)
-                
-                return tickets
-                
+            async for ticket in self.iter_bug_tickets():
+                tickets.append(ticket)
         except Exception as e:
+            # Keep the pages that did arrive, they are still valid tickets
             logger.error(f"Error fetching bug tickets: {e}")
-            return []
+        
+        logger.info(f"Found {len(tickets)} bug tickets to process")
+        return tickets
     
-    def _extract_text_from_adf(self, doc: Dict[str, Any]) -> str:
+    async def iter_bug_tickets(
+        self,
+        page_size: Optional[int] = None,
+        concurrency: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
         """
-        Extract plain text from Atlassian Document Format (ADF)
+        Yield bug tickets in To Do, Open, or In Progress status as search pages arrive
         
         Args:
-            doc: The ADF document as a dictionary
+            page_size: Issues per search page (defaults to JIRA_SEARCH_PAGE_SIZE)
+            concurrency: Search pages fetched at once (defaults to JIRA_SEARCH_CONCURRENCY)
             
-        Returns:
-            Extracted plain text
-        """
-        if not doc or not isinstance(doc, dict):
-            return ""
+        Yields:
+            Ticket dictionaries with fields mapped to standard format
             
-        text_parts = []
+        Raises:
+            JiraSearchError: If a search page cannot be fetched
+        """
+        # Build JQL query to find bug tickets including In Progress status
+        jql = f"issuetype = Bug AND (status = \"To Do\" OR status = Open OR status = \"In Progress\") AND project = {self.project_key} ORDER BY created ASC"
         
-        # Process content array
-        content = doc.get("content", [])
-        if content is None:  # Additional null check
-            return ""
-            
-        for item in content:
-            if not item or not isinstance(item, dict):
-                continue
-                
-            # Handle paragraph
-            if item.get("type") == "paragraph":
-                paragraph_text = self._process_content_item(item)
-                if paragraph_text:
-                    text_parts.append(paragraph_text)
-            # Handle other types like headings, lists, etc.
-            elif item.get("text"):
-                text_parts.append(item["text"])
-                
-        return "\n".join(text_parts)
+        async with shared_async_client() as client:
+            async for issue in search_issues(
+                client, self.jira_url, self.auth, jql, BUG_TICKET_FIELDS,
+                page_size=page_size, concurrency=concurrency
+            ):
+                yield self._normalize_issue(issue)
     
-    def _process_content_item(self, item: Dict[str, Any]) -> str:
+    def _normalize_issue(self, issue: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Process a content item from ADF
+        Map a JIRA search issue to the standard ticket format
         
         Args:
-            item: The content item
+            issue: Issue as returned by the search API
             
         Returns:
-            Extracted text from the item
+            Ticket dictionary
         """
-        if not item or not isinstance(item, dict):
-            return ""
-            
-        text_parts = []
+        fields = issue.get("fields") or {}
+        
+        # Handle description field which might be complex JSON or plain text
+        description = fields.get("description", "")
+        desc_text = ""
         
-        # Process content array
-        content = item.get("content", [])
-        if content is None:  # Additional null check
-            return ""
+        # Enhanced error handling for description field
+        try:
+            if description is None:
+                desc_text = ""
+            elif isinstance(description, dict):
+                # Extract text from Atlassian Document Format
+                desc_text = adf_to_text(description)
+                # If we couldn't extract text, provide a fallback message
+                if not desc_text.strip():
+                    desc_text = "No readable description available"
+            else:
+                desc_text = str(description)
+        except Exception as e:
+            logger.error(f"Error processing description for {issue['key']}: {str(e)}")
+            desc_text = "Error processing description"
+        
+        # Safely extract fields with null checks
+        status_name = "Unknown"
+        if fields.get("status") and isinstance(fields["status"], dict):
+            status_name = fields["status"].get("name", "Unknown")
             
-        for subitem in content:
-            if not subitem or not isinstance(subitem, dict):
-                continue
-                
-            if subitem.get("text"):
-                text_parts.append(subitem["text"])
-            elif subitem.get("content") and isinstance(subitem.get("content"), list):
-                text_parts.append(self._process_content_item(subitem))
-                
-        return " ".join(text_parts)
+        reporter_name = "Unknown"
+        if fields.get("reporter") and isinstance(fields["reporter"], dict):
+            reporter_name = fields["reporter"].get("displayName", "Unknown")
+            
+        assignee_name = "Unassigned"
+        if fields.get("assignee") and isinstance(fields["assignee"], dict):
+            assignee_name = fields["assignee"].get("displayName", "Unassigned")
+            
+        priority_name = "Medium"
+        if fields.get("priority") and isinstance(fields["priority"], dict):
+            priority_name = fields["priority"].get("name", "Medium")
+        
+        return {
+            "ticket_id": issue["key"],
+            "title": fields.get("summary", "No title"),
+            "description": desc_text,
+            "status": status_name,
+            "created": fields.get("created", ""),
+            "updated": fields.get("updated", ""),
+            "reporter": reporter_name,
+            "assignee": assignee_name,
+            "priority": priority_name
+        }
     
     async def update_ticket(self, ticket_id: str, status: str, comment: str) -> bool:
         """
@@ -223,7 +185,7 @@ class JiraClient:
                     }
                 }
                 
-                async with httpx.AsyncClient(timeout=30.0) as client:
+                async with shared_async_client() as client:
                     response = await client.post(
                         f"{self.jira_url}/rest/api/3/issue/{ticket_id}/comment",
                         json=comment_data,
@@ -241,56 +203,99 @@ class JiraClient:
             # Then, update the status
             logger.info(f"Updating ticket {ticket_id} status to '{status}'")
             
-            # Get available transitions
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    f"{self.jira_url}/rest/api/3/issue/{ticket_id}/transitions",
-                    auth=self.auth
-                )
-                
-                # Log the HTTP request for debugging
-                logger.info(f"HTTP Request: {response.request.method} {response.request.url} \"{response.http_version} {response.status_code} {response.reason_phrase}\"")
-                
-                if response.status_code != 200:
-                    logger.error(f"Failed to get transitions for ticket {ticket_id}: {response.status_code} - {response.text}")
-                    return False
-                
-                transitions = response.json()["transitions"]
-                
-                # Find the transition ID for the desired status
-                transition_id = None
-                for transition in transitions:
-                    if transition["to"]["name"].lower() == status.lower():
-                        transition_id = transition["id"]
-                        break
-                
-                if not transition_id:
-                    logger.error(f"No transition found for status '{status}' for ticket {ticket_id}")
-                    return False
-                
-                # Perform the transition
-                transition_data = {
-                    "transition": {
-                        "id": transition_id
+            # Get available transitions (cached per project, issue type and current status)
+            cache = get_transition_cache()
+            key = transition_key_for(ticket_id)
+            async with shared_async_client() as client:
+                transitions = cache.get(key)
+                # Cached transitions get one retry with the ticket's live transitions
+                for cached in ((True, False) if transitions is not None else (False,)):
+                    if not cached:
+                        fetched = await self._get_transitions(client, ticket_id)
+                        if fetched is None:
+                            return False
+                        key, transitions = fetched
+                    
+                    # Find the transition ID for the desired status
+                    transition = self._find_transition(transitions, status)
+                    if not transition:
+                        if cached:
+                            # The cached workflow (or the mirrored status) may be out of date, ask JIRA
+                            cache.invalidate(key)
+                            continue
+                        logger.error(f"No transition found for status '{status}' for ticket {ticket_id}")
+                        return False
+                    
+                    # Perform the transition
+                    transition_data = {
+                        "transition": {
+                            "id": transition["id"]
+                        }
                     }
-                }
-                
-                response = await client.post(
-                    f"{self.jira_url}/rest/api/3/issue/{ticket_id}/transitions",
-                    json=transition_data,
-                    auth=self.auth
-                )
-                
-                # Log the HTTP request for debugging
-                logger.info(f"HTTP Request: {response.request.method} {response.request.url} \"{response.http_version} {response.status_code} {response.reason_phrase}\"")
-                
-                if response.status_code not in (204, 200):
+                    
+                    response = await client.post(
+                        f"{self.jira_url}/rest/api/3/issue/{ticket_id}/transitions",
+                        json=transition_data,
+                        auth=self.auth
+                    )
+                    
+                    # Log the HTTP request for debugging
+                    logger.info(f"HTTP Request: {response.request.method} {response.request.url} \"{response.http_version} {response.status_code} {response.reason_phrase}\"")
+                    
+                    if response.status_code in (204, 200):
+                        logger.info(f"Successfully updated ticket {ticket_id} status to '{status}'")
+                        mirror = get_ticket_mirror()
+                        if mirror:
+                            mirror.record_update(ticket_id, status=transition["to"]["name"])
+                        return True
+                    
                     logger.error(f"Failed to update status for ticket {ticket_id}: {response.status_code} - {response.text}")
-                    return False
-                
-                logger.info(f"Successfully updated ticket {ticket_id} status to '{status}'")
-                return True
+                    cache.invalidate(key)
+                return False
                 
         except Exception as e:
             logger.error(f"Error updating ticket {ticket_id}: {e}")
             return False
+    
+    async def _get_transitions(
+        self,
+        client: httpx.AsyncClient,
+        ticket_id: str
+    ) -> Optional[Tuple[Optional[TransitionKey], List[Dict[str, Any]]]]:
+        """
+        Get the transitions available to a ticket from JIRA and cache them
+        
+        Args:
+            client: Pooled HTTP client
+            ticket_id: The JIRA ticket ID
+            
+        Returns:
+            Cache key of the ticket's live state and its transitions, or None if they could not be fetched
+        """
+        response = await client.get(
+            f"{self.jira_url}/rest/api/3/issue/{ticket_id}",
+            params=TRANSITION_PARAMS,
+            auth=self.auth
+        )
+        
+        # Log the HTTP request for debugging
+        logger.info(f"HTTP Request: {response.request.method} {response.request.url} \"{response.http_version} {response.status_code} {response.reason_phrase}\"")
+        
+        if response.status_code != 200:
+            logger.error(f"Failed to get transitions for ticket {ticket_id}: {response.status_code} - {response.text}")
+            mirror = get_ticket_mirror() if response.status_code == 404 else None
+            if mirror:
+                # Deleted issues never show up in a sync
+                mirror.evict(ticket_id)
+            return None
+        
+        key, transitions = live_transitions(response.json())
+        get_transition_cache().put(key, transitions)
+        return key, transitions
+    
+    def _find_transition(self, transitions: List[Dict[str, Any]], status: str) -> Optional[Dict[str, Any]]:
+        """Find the transition leading to a status (case-insensitive)"""
+        for transition in transitions:
+            if transition["to"]["name"].lower() == status.lower():
+                return transition
+        return None
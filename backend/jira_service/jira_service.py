@@ -2,10 +2,13 @@
 import os
 import logging
 import json
-import requests
 from typing import Dict, Any, Optional, List, Tuple
 import time
 
+from .http_session import get_jira_session
+from .ticket_mirror import get_ticket_mirror
+from .transition_cache import get_transition_cache, live_transitions, transition_key_for, TransitionKey, TRANSITION_PARAMS
+
 class JiraService:
     """Service for interacting with JIRA"""
     
@@ -18,6 +21,8 @@ class JiraService:
         self.jira_user = os.environ.get("JIRA_USER")
         self.jira_token = os.environ.get("JIRA_TOKEN")
         self.test_mode = os.environ.get("JIRA_TEST_MODE", "false").lower() == "true"
+        # Pooled keep-alive client shared with the other JIRA callers
+        self.http = get_jira_session()
         
         # Check if we have the necessary credentials
         self.is_configured = all([self.jira_url, self.jira_user, self.jira_token])
@@ -68,10 +73,12 @@ class JiraService:
         
         try:
             self.logger.info(f"Getting ticket {ticket_id}")
-            response = requests.get(url, auth=self.auth, headers=self.headers)
+            response = self.http.get(url, auth=self.auth, headers=self.headers)
             
             if response.status_code != 200:
                 self.logger.error(f"Failed to get ticket {ticket_id}: {response.status_code}")
+                if response.status_code == 404:
+                    self._evict_from_mirror(ticket_id)
                 return None
                 
             ticket_data = response.json()
@@ -104,56 +111,56 @@ class JiraService:
                 self.logger.info(f"Test mode: Would add comment to {ticket_id}: {comment[:50]}...")
             return True
             
-        # First get the available transitions
+        # First get the available transitions (cached per project, issue type and current status)
         transitions_url = f"{self.jira_url}/rest/api/2/issue/{ticket_id}/transitions"
+        cache = get_transition_cache()
+        key = transition_key_for(ticket_id)
         
         try:
-            self.logger.info(f"Getting available transitions for {ticket_id}")
-            transitions_response = requests.get(transitions_url, auth=self.auth, headers=self.headers)
-            
-            if transitions_response.status_code != 200:
-                self.logger.error(f"Failed to get transitions for {ticket_id}: {transitions_response.status_code}")
-                return False
-                
-            transitions = transitions_response.json().get("transitions", [])
-            target_transition = None
-            
-            # Find the transition that matches the target status
-            for transition in transitions:
-                if transition.get("to", {}).get("name", "").lower() == status.lower():
-                    target_transition = transition
-                    break
+            transitions = cache.get(key)
+            # Cached transitions get one retry with the ticket's live transitions
+            for cached in ((True, False) if transitions is not None else (False,)):
+                if not cached:
+                    fetched = self._get_transitions(ticket_id)
+                    if fetched is None:
+                        return False
+                    key, transitions = fetched
                     
-            # If no exact match, try to find a transition with a similar name
-            if not target_transition:
-                for transition in transitions:
-                    if status.lower() in transition.get("name", "").lower():
-                        target_transition = transition
-                        break
-                        
-            if not target_transition:
-                self.logger.error(f"No transition found for status {status}")
-                return False
-                
-            # Apply the transition
-            transition_data = {
-                "transition": {
-                    "id": target_transition.get("id")
+                target_transition = self._find_transition(transitions, status)
+                if not target_transition:
+                    if cached:
+                        # The cached workflow (or the mirrored status) may be out of date, ask JIRA
+                        cache.invalidate(key)
+                        continue
+                    self.logger.error(f"No transition found for status {status}")
+                    return False
+                    
+                # Apply the transition
+                transition_data = {
+                    "transition": {
+                        "id": target_transition.get("id")
+                    }
                 }
-            }
-            
-            self.logger.info(f"Updating ticket {ticket_id} status to {status}")
-            transition_response = requests.post(
-                transitions_url,
-                auth=self.auth,
-                headers=self.headers,
-                json=transition_data
-            )
-            
-            if transition_response.status_code not in [200, 204]:
+                
+                self.logger.info(f"Updating ticket {ticket_id} status to {status}")
+                transition_response = self.http.post(
+                    transitions_url,
+                    auth=self.auth,
+                    headers=self.headers,
+                    json=transition_data
+                )
+                
+                if transition_response.status_code in [200, 204]:
+                    break
                 self.logger.error(f"Failed to update status for {ticket_id}: {transition_response.status_code}")
+                cache.invalidate(key)
+            else:
                 return False
                 
+            mirror = get_ticket_mirror()
+            if mirror:
+                mirror.record_update(ticket_id, status=target_transition.get("to", {}).get("name") or status)
+                
             # Add comment if provided
             if comment:
                 self.add_comment(ticket_id, comment)
@@ -164,6 +171,44 @@ class JiraService:
             self.logger.error(f"Error updating ticket {ticket_id} status: {e}")
             return False
     
+    def _get_transitions(self, ticket_id: str) -> Optional[Tuple[Optional[TransitionKey], List[Dict[str, Any]]]]:
+        """
+        Get the transitions available to a ticket from JIRA and cache them
+        
+        Args:
+            ticket_id: JIRA ticket ID
+            
+        Returns:
+            Cache key of the ticket's live state and its transitions, or None if unsuccessful
+        """
+        self.logger.info(f"Getting available transitions for {ticket_id}")
+        issue_response = self.http.get(f"{self.jira_url}/rest/api/2/issue/{ticket_id}", auth=self.auth,
+                                       headers=self.headers, params=TRANSITION_PARAMS)
+        
+        if issue_response.status_code != 200:
+            self.logger.error(f"Failed to get transitions for {ticket_id}: {issue_response.status_code}")
+            if issue_response.status_code == 404:
+                self._evict_from_mirror(ticket_id)
+            return None
+            
+        key, transitions = live_transitions(issue_response.json())
+        get_transition_cache().put(key, transitions)
+        return key, transitions
+        
+    def _find_transition(self, transitions: List[Dict[str, Any]], status: str) -> Optional[Dict[str, Any]]:
+        """Find the transition to a status, falling back to a transition with a similar name"""
+        # Find the transition that matches the target status
+        for transition in transitions:
+            if transition.get("to", {}).get("name", "").lower() == status.lower():
+                return transition
+                
+        # If no exact match, try to find a transition with a similar name
+        for transition in transitions:
+            if status.lower() in transition.get("name", "").lower():
+                return transition
+                
+        return None
+    
     def add_comment(self, ticket_id: str, comment: str) -> bool:
         """
         Add a comment to a JIRA ticket
@@ -193,7 +238,7 @@ class JiraService:
             }
             
             self.logger.info(f"Adding comment to ticket {ticket_id}")
-            response = requests.post(url, auth=self.auth, headers=self.headers, json=comment_data)
+            response = self.http.post(url, auth=self.auth, headers=self.headers, json=comment_data)
             
             if response.status_code not in [200, 201]:
                 self.logger.error(f"Failed to add comment to {ticket_id}: {response.status_code}")
@@ -280,6 +325,10 @@ class JiraService:
         Returns:
             True if the ticket exists, False otherwise
         """
+        # Served from the local mirror while it is fresh; this process may not be the one syncing it
+        mirror = get_ticket_mirror() if not self.test_mode else None
+        if mirror and mirror.is_fresh() and mirror.get_issue(ticket_id):
+            return True
         ticket = self.get_ticket(ticket_id)
         return ticket is not None
         
@@ -293,9 +342,21 @@ class JiraService:
         Returns:
             Status name or None if unsuccessful
         """
+        # Served from the local mirror when the ticket is mirrored and the mirror is fresh
+        mirror = get_ticket_mirror() if not self.test_mode else None
+        issue = mirror.get_issue(ticket_id) if mirror and mirror.is_fresh() else None
+        if issue:
+            return (issue.get("fields", {}).get("status") or {}).get("name")
+        
         ticket = self.get_ticket(ticket_id)
         
         if ticket:
             return ticket.get("fields", {}).get("status", {}).get("name")
         
         return None
+        
+    def _evict_from_mirror(self, ticket_id: str) -> None:
+        """Drop a ticket JIRA reports as missing (deleted issues never show up in a sync)"""
+        mirror = get_ticket_mirror() if not self.test_mode else None
+        if mirror:
+            mirror.evict(ticket_id)
@@ -0,0 +1,306 @@
+
+"""
+Adaptive concurrency and 429 handling for JIRA
+
+JIRA Cloud throttles a service account with HTTP 429 (and sometimes 503)
+plus a Retry-After header. Every request of the shared HTTP session goes
+through one AIMD limiter: the number of requests allowed in flight grows
+by one per window of successful, fast responses, and is halved when JIRA
+answers 429 (or shrinks a little when responses get slower than the
+latency target). A throttled request closes a gate until Retry-After has
+passed, so the other callers wait instead of piling more 429s on top, and
+is then retried. The limiter counts how long the gate was closed.
+"""
+
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, Optional, Tuple, Union
+
+import httpx
+
+from .config import MAX_RETRIES, RETRY_BACKOFF_FACTOR
+
+logger = logging.getLogger("jira-service.rate-limit")
+
+JIRA_CONCURRENCY_INITIAL = int(os.getenv('JIRA_CONCURRENCY_INITIAL', '4'))
+JIRA_CONCURRENCY_MIN = int(os.getenv('JIRA_CONCURRENCY_MIN', '1'))
+JIRA_CONCURRENCY_MAX = int(os.getenv('JIRA_CONCURRENCY_MAX', '16'))
+# Responses slower than this (seconds) shrink the limit
+JIRA_LATENCY_TARGET = float(os.getenv('JIRA_LATENCY_TARGET', '2.0'))
+# Upper bound of a single wait, whatever Retry-After says
+JIRA_RETRY_MAX_WAIT = float(os.getenv('JIRA_RETRY_MAX_WAIT', '60'))
+
+THROTTLE_STATUSES = {429, 503}
+
+# Slowdowns caused by latency are gentler than the ones caused by a 429
+LATENCY_DECREASE_FACTOR = 0.9
+THROTTLE_DECREASE_FACTOR = 0.5
+# Concurrent requests that overlap one slowdown only shrink the limit once
+DECREASE_COOLDOWN = 1.0
+# Waiters re-check the gate and the limit at least this often
+WAIT_POLL_INTERVAL = 1.0
+
+Waiter = Union[threading.Event, Tuple[asyncio.AbstractEventLoop, "asyncio.Future[None]"]]
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Delay before retrying a throttled response, capped at JIRA_RETRY_MAX_WAIT"""
+    delay = parse_retry_after(response.headers.get("Retry-After"))
+    if delay is None:
+        # No hint from JIRA: exponential backoff with jitter
+        delay = RETRY_BACKOFF_FACTOR ** attempt * random.uniform(0.5, 1.0)
+    return min(delay, JIRA_RETRY_MAX_WAIT)
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on in-flight JIRA requests, shared by threads and event loops"""
+
+    def __init__(self, initial: int = JIRA_CONCURRENCY_INITIAL, min_limit: int = JIRA_CONCURRENCY_MIN,
+                 max_limit: int = JIRA_CONCURRENCY_MAX, latency_target: float = JIRA_LATENCY_TARGET):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.latency_target = latency_target
+        self._lock = threading.Lock()
+        self._limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._waiters: Deque[Waiter] = deque()
+        self._resume_at = 0.0
+        self._last_decrease = 0.0
+        self._throttled_seconds = 0.0
+        self._queued_seconds = 0.0
+        self._throttled_responses = 0
+        self._retries = 0
+
+    @property
+    def limit(self) -> int:
+        with self._lock:
+            return int(self._limit)
+
+    def _try_acquire(self) -> Optional[float]:
+        """Take a slot (returns None) or return how long the gate stays closed (0 when full)"""
+        now = time.monotonic()
+        if now < self._resume_at:
+            return self._resume_at - now
+        if self._in_flight < int(self._limit):
+            self._in_flight += 1
+            return None
+        return 0.0
+
+    def acquire(self) -> None:
+        """Block the calling thread until a request may be sent"""
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                delay = self._try_acquire()
+                if delay is None:
+                    self._queued_seconds += time.monotonic() - started
+                    return
+                waiter = threading.Event() if delay == 0 else None
+                if waiter is not None:
+                    self._waiters.append(waiter)
+            if waiter is None:
+                time.sleep(delay)
+            elif not waiter.wait(WAIT_POLL_INTERVAL):
+                self._forget(waiter)
+
+    async def acquire_async(self) -> None:
+        """Wait, without blocking the event loop, until a request may be sent"""
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                delay = self._try_acquire()
+                if delay is None:
+                    self._queued_seconds += time.monotonic() - started
+                    return
+                future = loop.create_future() if delay == 0 else None
+                if future is not None:
+                    self._waiters.append((loop, future))
+            if future is None:
+                await asyncio.sleep(delay)
+                continue
+            try:
+                await asyncio.wait_for(future, WAIT_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                self._forget((loop, future))
+
+    def release(self, latency: float, throttled_for: Optional[float] = None) -> None:
+        """
+        Return a slot and adapt the limit
+
+        Args:
+            latency: Seconds until the response headers arrived
+            throttled_for: Retry-After delay when JIRA throttled the request
+        """
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            now = time.monotonic()
+            if throttled_for is not None:
+                self._throttled_responses += 1
+                resume_at = now + throttled_for
+                if resume_at > self._resume_at:
+                    self._throttled_seconds += resume_at - max(now, self._resume_at)
+                    self._resume_at = resume_at
+                self._decrease(now, THROTTLE_DECREASE_FACTOR)
+            elif latency > self.latency_target:
+                self._decrease(now, LATENCY_DECREASE_FACTOR)
+            else:
+                # Additive increase: about one more slot per limit's worth of good responses
+                self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+            wake = []
+            while self._waiters and self._in_flight + len(wake) < int(self._limit):
+                wake.append(self._waiters.popleft())
+        for waiter in wake:
+            self._wake(waiter)
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self._retries += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiters),
+                "throttled": now < self._resume_at,
+                "throttled_seconds": round(self._throttled_seconds, 3),
+                "queued_seconds": round(self._queued_seconds, 3),
+                "throttled_responses": self._throttled_responses,
+                "retries": self._retries,
+            }
+
+    def _decrease(self, now: float, factor: float) -> None:
+        if now - self._last_decrease < DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        previous = int(self._limit)
+        self._limit = max(float(self.min_limit), self._limit * factor)
+        if int(self._limit) != previous:
+            logger.info(f"JIRA concurrency limit lowered from {previous} to {int(self._limit)}")
+
+    def _forget(self, waiter: Waiter) -> None:
+        with self._lock:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    @staticmethod
+    def _wake(waiter: Waiter) -> None:
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+            return
+        loop, future = waiter
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(_resolve, future)
+
+
+def _resolve(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ThrottlingTransport(httpx.BaseTransport):
+    """Sync transport that sends through the limiter and retries throttled responses"""
+
+    def __init__(self, transport: httpx.BaseTransport, limiter: AdaptiveConcurrencyLimiter,
+                 max_retries: int = MAX_RETRIES):
+        self._transport = transport
+        self._limiter = limiter
+        self._max_retries = max_retries
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            self._limiter.acquire()
+            started = time.monotonic()
+            try:
+                response = self._transport.handle_request(request)
+            except BaseException:
+                self._limiter.release(time.monotonic() - started)
+                raise
+            latency = time.monotonic() - started
+            if response.status_code not in THROTTLE_STATUSES:
+                self._limiter.release(latency)
+                return response
+
+            delay = retry_delay(response, attempt)
+            self._limiter.release(latency, throttled_for=delay)
+            if attempt >= self._max_retries:
+                logger.error(f"JIRA still throttling {request.method} {request.url.path} after {attempt} retries")
+                return response
+            logger.warning(f"JIRA answered {response.status_code} to {request.method} {request.url.path}, "
+                           f"retrying in {delay:.1f}s")
+            response.read()
+            response.close()
+            attempt += 1
+            self._limiter.record_retry()
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncThrottlingTransport(httpx.AsyncBaseTransport):
+    """Async transport that sends through the limiter and retries throttled responses"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: AdaptiveConcurrencyLimiter,
+                 max_retries: int = MAX_RETRIES):
+        self._transport = transport
+        self._limiter = limiter
+        self._max_retries = max_retries
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            await self._limiter.acquire_async()
+            started = time.monotonic()
+            try:
+                response = await self._transport.handle_async_request(request)
+            except BaseException:
+                self._limiter.release(time.monotonic() - started)
+                raise
+            latency = time.monotonic() - started
+            if response.status_code not in THROTTLE_STATUSES:
+                self._limiter.release(latency)
+                return response
+
+            delay = retry_delay(response, attempt)
+            self._limiter.release(latency, throttled_for=delay)
+            if attempt >= self._max_retries:
+                logger.error(f"JIRA still throttling {request.method} {request.url.path} after {attempt} retries")
+                return response
+            logger.warning(f"JIRA answered {response.status_code} to {request.method} {request.url.path}, "
+                           f"retrying in {delay:.1f}s")
+            await response.aread()
+            await response.aclose()
+            attempt += 1
+            self._limiter.record_retry()
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
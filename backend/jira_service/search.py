@@ -0,0 +1,142 @@
+
+"""
+Paginated JIRA issue search
+
+/rest/api/3/search returns at most one page (JIRA Cloud caps maxResults at
+100), so callers that only issue a single request silently miss every issue
+past the first page. search_issues pages through the full result set with
+startAt/maxResults and yields issues as each page arrives. The first page
+tells us the total, after which up to `concurrency` pages are requested at
+once and yielded in order.
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from . import config
+
+logger = logging.getLogger("jira-service.search")
+
+
+class JiraSearchError(Exception):
+    """Raised when a search page cannot be fetched"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"JIRA search failed: {status_code} - {message}")
+        self.status_code = status_code
+
+
+async def search_issues(
+    client: httpx.AsyncClient,
+    jira_url: str,
+    auth: Tuple[str, str],
+    jql: str,
+    fields: List[str],
+    page_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    max_results: Optional[int] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield every issue matching a JQL query, page by page
+
+    Args:
+        client: httpx client to issue the requests with
+        jira_url: Base URL of the JIRA instance
+        auth: (user, token) basic auth
+        jql: JQL query
+        fields: Fields to return for each issue (keep this minimal)
+        page_size: Issues requested per page (defaults to JIRA_SEARCH_PAGE_SIZE)
+        concurrency: Pages in flight at once (defaults to JIRA_SEARCH_CONCURRENCY)
+        max_results: Stop after this many issues (None for all)
+
+    Yields:
+        Raw issue dictionaries, in search order and without duplicates
+
+    Raises:
+        JiraSearchError: If a page request fails
+    """
+    page_size = max(1, page_size or config.JIRA_SEARCH_PAGE_SIZE)
+    concurrency = max(1, concurrency or config.JIRA_SEARCH_CONCURRENCY)
+    url = f"{jira_url}/rest/api/3/search"
+    field_list = ",".join(fields)
+
+    async def fetch_page(start_at: int, size: int) -> Dict[str, Any]:
+        params = {"jql": jql, "fields": field_list, "startAt": start_at, "maxResults": size}
+        response = await client.get(url, params=params, auth=auth)
+        logger.debug(f"Search page startAt={start_at}: {response.status_code}")
+        if response.status_code != 200:
+            raise JiraSearchError(response.status_code, response.text)
+        return response.json()
+
+    def page_limit(start_at: int) -> int:
+        return page_size if max_results is None else min(page_size, max_results - start_at)
+
+    # Issues can move between pages while we page (e.g. a status change), so skip repeats
+    seen = set()
+    yielded = 0
+
+    def take(page: Dict[str, Any]) -> List[Dict[str, Any]]:
+        nonlocal yielded
+        issues = []
+        for issue in page.get("issues") or []:
+            if max_results is not None and yielded >= max_results:
+                break
+            key = issue.get("key") if issue else None
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            yielded += 1
+            issues.append(issue)
+        return issues
+
+    if max_results is not None and max_results <= 0:
+        return
+
+    first = await fetch_page(0, page_limit(0))
+    first_issues = first.get("issues") or []
+    for issue in take(first):
+        yield issue
+
+    total = first.get("total")
+    # JIRA may return fewer issues per page than requested, so step by what it actually returned
+    step = len(first_issues)
+    if step == 0 or (max_results is not None and yielded >= max_results):
+        return
+
+    if total is None:
+        # No total reported: page sequentially until a short page
+        start_at = step
+        while max_results is None or yielded < max_results:
+            page = await fetch_page(start_at, page_limit(start_at))
+            page_issues = page.get("issues") or []
+            for issue in take(page):
+                yield issue
+            if len(page_issues) < step:
+                return
+            start_at += len(page_issues)
+        return
+
+    end = total if max_results is None else min(total, max_results)
+    starts = iter(range(step, end, step))
+    logger.info(f"Search matched {total} issues, fetching {max(0, end - step)} more in pages of {step}")
+
+    # Keep up to `concurrency` pages in flight and yield them in order as they complete
+    pending: List[asyncio.Task] = []
+    try:
+        for start_at in starts:
+            pending.append(asyncio.create_task(fetch_page(start_at, min(step, end - start_at))))
+            if len(pending) >= concurrency:
+                break
+        while pending:
+            page = await pending.pop(0)
+            next_start = next(starts, None)
+            if next_start is not None:
+                pending.append(asyncio.create_task(fetch_page(next_start, min(step, end - next_start))))
+            for issue in take(page):
+                yield issue
+    finally:
+        for task in pending:
+            task.cancel()
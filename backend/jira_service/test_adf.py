@@ -0,0 +1,87 @@
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jira_service import adf
+from jira_service.adf import adf_to_text
+
+
+def paragraph(*nodes):
+    return {"type": "paragraph", "content": list(nodes)}
+
+
+def text(value):
+    return {"type": "text", "text": value}
+
+
+def item(*blocks):
+    return {"type": "listItem", "content": list(blocks)}
+
+
+class TestAdfToText(unittest.TestCase):
+    """Test cases for the ADF converter"""
+
+    def test_code_block_inside_panel_is_preserved(self):
+        """Stack traces in code blocks keep their lines and fences"""
+        doc = {"type": "doc", "content": [
+            paragraph(text("Crash on save")),
+            {"type": "panel", "attrs": {"panelType": "error"}, "content": [
+                {"type": "codeBlock", "attrs": {"language": "python"}, "content": [
+                    text('Traceback (most recent call last):\n  File "app.py", line 3\nKeyError: \'id\'')
+                ]}
+            ]},
+        ]}
+
+        self.assertEqual(adf_to_text(doc), (
+            "Crash on save\n"
+            "```python\n"
+            "Traceback (most recent call last):\n"
+            '  File "app.py", line 3\n'
+            "KeyError: 'id'\n"
+            "```"
+        ))
+
+    def test_lists_quotes_and_inline_nodes(self):
+        """Nested lists are indented; marks, mentions and hard breaks stay inline"""
+        doc = {"type": "doc", "content": [
+            {"type": "orderedList", "content": [
+                item(paragraph(text("Open "), {"type": "text", "text": "settings", "marks": [{"type": "strong"}]}),
+                     {"type": "bulletList", "content": [item(paragraph(text("as admin")))]}),
+                item(paragraph(text("Save"))),
+            ]},
+            {"type": "blockquote", "content": [
+                paragraph(text("seen by "), {"type": "mention", "attrs": {"text": "@sam"}},
+                          {"type": "hardBreak"}, text("twice"))
+            ]},
+        ]}
+
+        self.assertEqual(adf_to_text(doc), "1. Open settings\n   - as admin\n2. Save\n> seen by @sam\n> twice")
+
+    def test_plain_values_and_memoization(self):
+        """Strings pass through and unchanged documents are converted once"""
+        doc = {"type": "doc", "content": [paragraph(text("cached body"))]}
+        self.assertEqual(adf_to_text("plain"), "plain")
+        self.assertEqual(adf_to_text(None), "")
+
+        with patch.object(adf, "_convert", wraps=adf._convert) as convert:
+            adf_to_text(doc)
+            adf_to_text({"content": [paragraph(text("cached body"))], "type": "doc"})
+
+        self.assertEqual(convert.call_count, 1)
+
+    def test_deep_nesting_does_not_recurse(self):
+        """Deeply nested lists do not hit the recursion limit"""
+        node = paragraph(text("leaf"))
+        for _ in range(sys.getrecursionlimit() + 100):
+            node = {"type": "bulletList", "content": [item(node)]}
+
+        self.assertTrue(adf._convert({"type": "doc", "content": [node]}).endswith("- leaf"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+
+import os
+import sys
+import gzip
+import asyncio
+import tempfile
+import unittest
+
+import httpx
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jira_service.attachments import AttachmentFetcher, attachment_metadata, extract_log_text
+
+NOISE = "".join(f"2024-03-01 10:00:{i % 60:02d} INFO request {i} served\n" for i in range(500))
+TRACE = ('Traceback (most recent call last):\n'
+         '  File "app/profile/forms.py", line 17, in save\n'
+         "AttributeError: 'NoneType' object has no attribute 'strip'\n")
+
+ISSUE_FIELDS = {"attachment": [
+    {"id": "10001", "filename": "server.log", "content": "https://jira.test/attachment/content/10001",
+     "mimeType": "text/plain", "size": len(NOISE + TRACE)},
+    {"id": "10002", "filename": "heap.hprof", "content": "https://jira.test/attachment/content/10002",
+     "mimeType": "application/octet-stream"},
+    {"id": "10003", "filename": "screen.png", "content": "https://jira.test/attachment/content/10003",
+     "mimeType": "image/png", "size": 10 ** 9},
+]}
+
+
+class TestAttachmentFetcher(unittest.TestCase):
+    """Test cases for the JIRA attachment fetcher"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.requests = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def handler(self, request):
+        self.requests.append(request.url.path)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if request.url.path.endswith("10001"):
+            return httpx.Response(200, content=(NOISE + TRACE + NOISE).encode())
+        # Streamed without a Content-Length, larger than the cap
+        async def body():
+            for _ in range(64):
+                yield b"x" * 4096
+        return httpx.Response(200, content=body())
+
+    def fetch(self, fetcher):
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(self.handler)) as client:
+                return await fetcher.fetch_all(attachment_metadata(ISSUE_FIELDS), client=client)
+        return asyncio.run(run())
+
+    def test_download_cap_and_cache(self):
+        """Logs are excerpted, oversized files abandoned, and nothing is downloaded twice"""
+        fetcher = AttachmentFetcher(cache_dir=self.temp_dir.name, max_bytes=100 * 1024, concurrency=2)
+
+        log, dump, screenshot = self.fetch(fetcher)
+
+        self.assertIn("AttributeError", log["text"])
+        self.assertNotIn("request 100 served", log["text"])
+        self.assertTrue(os.path.exists(log["path"]))
+        self.assertEqual(dump["skipped"], "too_large")
+        self.assertEqual(screenshot["skipped"], "too_large")
+        self.assertEqual(len(self.requests), 2)
+        self.assertLessEqual(self.peak, 2)
+
+        self.assertEqual(self.fetch(fetcher)[0]["text"], log["text"])
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(fetcher.stats()["cache_hits"], 3)
+
+    def test_extract_gzip_and_tail(self):
+        """Compressed logs are read on the fly; logs without errors yield their tail"""
+        path = os.path.join(self.temp_dir.name, "app.log.gz")
+        with gzip.open(path, "wt") as f:
+            f.write(NOISE + TRACE)
+        plain = os.path.join(self.temp_dir.name, "quiet.log")
+        with open(plain, "w") as f:
+            f.write(NOISE)
+
+        self.assertTrue(extract_log_text(path, "app.log.gz").endswith("object has no attribute 'strip'"))
+        tail = extract_log_text(plain, "quiet.log", max_chars=200)
+        self.assertTrue(tail.endswith("2024-03-01 10:00:19 INFO request 499 served"))
+        self.assertLessEqual(len(tail), 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
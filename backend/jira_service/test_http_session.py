@@ -0,0 +1,68 @@
+
+import os
+import sys
+import asyncio
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jira_service.http_session import JiraHttpSession
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestJiraHttpSession(unittest.TestCase):
+    """Test cases for the shared JIRA HTTP session"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/rest/api/3/myself"
+        self.session = JiraHttpSession()
+        self.addCleanup(self.session.close)
+
+    def test_sync_facade_reuses_connection(self):
+        """Sequential sync requests share one pooled connection"""
+        for _ in range(3):
+            self.assertEqual(self.session.get(self.url).json(), {"ok": True})
+
+        stats = self.session.stats()
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["connections_reused"], 2)
+
+    def test_async_client_is_shared_per_loop(self):
+        """The same pooled async client is returned within a loop and reused"""
+        async def run():
+            client = self.session.async_client()
+            self.assertIs(self.session.async_client(), client)
+            for _ in range(3):
+                await client.get(self.url)
+            await self.session.aclose()
+
+        asyncio.run(run())
+
+        self.assertEqual(self.session.stats()["connections_opened"], 1)
+        self.assertEqual(self.session.stats()["connections_reused"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+
+import os
+import sys
+import time
+import asyncio
+import unittest
+
+import httpx
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jira_service.http_session import JiraHttpSession
+from jira_service.rate_limiter import AdaptiveConcurrencyLimiter, parse_retry_after
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test cases for the adaptive JIRA concurrency limiter"""
+
+    def test_retry_after_is_honored(self):
+        """A 429 is retried after Retry-After and counted as throttled time"""
+        calls = []
+
+        def handler(request):
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                return httpx.Response(429, headers={"Retry-After": "0.2"})
+            return httpx.Response(200, json={"ok": True})
+
+        session = JiraHttpSession(transport=httpx.MockTransport(handler))
+        self.addCleanup(session.close)
+
+        response = session.post("https://jira.test/rest/api/3/issue/PROJ-1/transitions", json={"id": "21"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(calls), 2)
+        self.assertGreaterEqual(calls[1] - calls[0], 0.2)
+        stats = session.stats()["rate_limit"]
+        self.assertEqual(stats["throttled_responses"], 1)
+        self.assertEqual(stats["retries"], 1)
+        self.assertGreaterEqual(stats["throttled_seconds"], 0.2)
+
+    def test_aimd_limit(self):
+        """Fast responses grow the limit additively, a 429 halves it"""
+        limiter = AdaptiveConcurrencyLimiter(initial=4, min_limit=1, max_limit=8, latency_target=1.0)
+        for _ in range(8):
+            limiter.acquire()
+            limiter.release(0.01)
+        self.assertEqual(limiter.limit, 5)
+
+        limiter.acquire()
+        limiter.release(0.01, throttled_for=0)
+        self.assertEqual(limiter.limit, 2)
+
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+        self.assertIsNone(parse_retry_after("soon"))
+
+    def test_async_callers_stay_within_limit(self):
+        """Concurrent async requests never exceed the current limit"""
+        in_flight = 0
+        peak = 0
+
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200)
+
+        session = JiraHttpSession(async_transport=httpx.MockTransport(handler))
+        session.limiter = AdaptiveConcurrencyLimiter(initial=2, min_limit=1, max_limit=2)
+
+        async def run():
+            client = session.async_client()
+            await asyncio.gather(*(client.get(f"https://jira.test/rest/api/3/issue/PROJ-{i}") for i in range(10)))
+            await session.aclose()
+
+        asyncio.run(run())
+
+        self.assertEqual(peak, 2)
+        self.assertEqual(session.limiter.stats()["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+
+import os
+import sys
+import asyncio
+import unittest
+
+import httpx
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jira_service.search import search_issues, JiraSearchError
+
+
+class FakeJiraSearch:
+    """Search endpoint over a fixed list of issues that caps the page size"""
+
+    def __init__(self, total, page_cap=50, fail_at=None):
+        self.issues = [{"key": f"BUG-{i}", "fields": {"summary": f"Bug {i}"}} for i in range(total)]
+        self.page_cap = page_cap
+        self.fail_at = fail_at
+        self.calls = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        start_at = int(request.url.params["startAt"])
+        max_results = min(int(request.url.params["maxResults"]), self.page_cap)
+        self.calls.append((start_at, max_results, request.url.params["fields"]))
+        if start_at == self.fail_at:
+            return httpx.Response(500, text="boom")
+        return httpx.Response(200, json={
+            "startAt": start_at,
+            "maxResults": max_results,
+            "total": len(self.issues),
+            "issues": self.issues[start_at:start_at + max_results],
+        })
+
+
+class TestSearchIssues(unittest.TestCase):
+    """Test cases for the paginated JIRA search"""
+
+    def collect(self, jira, **kwargs):
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(jira.handler)) as client:
+                return [issue["key"] async for issue in search_issues(
+                    client, "https://jira.test", ("user", "token"), "issuetype = Bug", ["summary", "status"], **kwargs
+                )]
+        return asyncio.run(run())
+
+    def test_pages_through_all_results(self):
+        """Every issue is returned in order, stepping by the server's page cap"""
+        jira = FakeJiraSearch(total=230, page_cap=50)
+
+        keys = self.collect(jira, page_size=100, concurrency=3)
+
+        self.assertEqual(keys, [f"BUG-{i}" for i in range(230)])
+        self.assertEqual(sorted(call[0] for call in jira.calls), [0, 50, 100, 150, 200])
+        self.assertTrue(all(call[2] == "summary,status" for call in jira.calls))
+
+    def test_max_results_limits_requests(self):
+        """Only the pages needed for max_results are requested"""
+        jira = FakeJiraSearch(total=500, page_cap=100)
+
+        keys = self.collect(jira, page_size=100, max_results=150)
+
+        self.assertEqual(len(keys), 150)
+        self.assertEqual(sorted((call[0], call[1]) for call in jira.calls), [(0, 100), (100, 50)])
+
+    def test_failed_page_raises(self):
+        """A failing page surfaces as JiraSearchError"""
+        jira = FakeJiraSearch(total=120, page_cap=50, fail_at=50)
+
+        with self.assertRaises(JiraSearchError):
+            self.collect(jira, page_size=50)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+
+import os
+import sys
+import time
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jira_service import jira_service, ticket_mirror
+from jira_service.jira_service import JiraService
+from jira_service.ticket_mirror import JiraTicketMirror, MirrorScope
+
+
+def issue(key, status="Open", labels=("Bug",), priority="High", updated="2024-03-01T10:00:00.000+0000"):
+    return {
+        "key": key,
+        "fields": {
+            "summary": f"Issue {key}",
+            "status": {"name": status},
+            "issuetype": {"name": "Bug"},
+            "project": {"key": "PROJ"},
+            "priority": {"name": priority},
+            "labels": list(labels),
+            "created": f"2024-01-01T00:00:0{key[-1]}.000+0000",
+            "updated": updated,
+        },
+    }
+
+
+class TestJiraTicketMirror(unittest.TestCase):
+    """Test cases for the local JIRA ticket mirror"""
+
+    def setUp(self):
+        self.mirror = JiraTicketMirror(":memory:", "https://jira.test", ("user", "token"), "issuetype = Bug",
+                                       overlap_minutes=2)
+        self.addCleanup(self.mirror.close)
+
+    def sync_with(self, issues, out_of_scope=()):
+        """Run a sync against a fake search and return the JQL it used"""
+        calls = self.search_calls = []
+
+        async def fake_search(client, jira_url, auth, jql, fields, **kwargs):
+            calls.append(jql)
+            # The eviction search asks for issues updated outside the scope
+            for item in out_of_scope if "AND NOT (" in jql else issues:
+                yield item
+
+        with patch.object(ticket_mirror, "search_issues", fake_search):
+            asyncio.run(self.mirror.sync())
+        return calls[0]
+
+    def test_indexed_filters(self):
+        """Status, label and priority filters match case-insensitively"""
+        self.mirror.upsert_issues([
+            issue("PROJ-1", status="Open"),
+            issue("PROJ-2", status="Done"),
+            issue("PROJ-3", status="In Progress", labels=("ui",), priority="Low"),
+        ])
+
+        open_bugs = self.mirror.query(statuses=["open", "In Progress"], labels=["bug"])
+        low = self.mirror.query(priorities=["LOW"], project="proj")
+
+        self.assertEqual([item["key"] for item in open_bugs], ["PROJ-1"])
+        self.assertEqual([item["key"] for item in low], ["PROJ-3"])
+        self.assertEqual(len(self.mirror.query(limit=2)), 2)
+
+    def test_sync_advances_watermark(self):
+        """The next sync only asks for issues updated since the last one, minus the overlap"""
+        first_jql = self.sync_with([issue("PROJ-1", updated="2024-03-01T10:30:00.000+0000")])
+        second_jql = self.sync_with([issue("PROJ-1", status="Done", updated="2024-03-01T11:00:00.000+0000")])
+
+        self.assertEqual(first_jql, "(issuetype = Bug) ORDER BY updated ASC")
+        self.assertEqual(second_jql, '(issuetype = Bug) AND updated >= "2024/03/01 10:28" ORDER BY updated ASC')
+        self.assertEqual(self.mirror.query(statuses=["Open"]), [])
+        self.assertTrue(self.mirror.has_synced())
+
+    def test_record_update_is_optimistic(self):
+        """A successful transition is visible before the next sync"""
+        self.mirror.upsert_issues([issue("PROJ-1")])
+
+        self.assertTrue(self.mirror.record_update("PROJ-1", status="In Review"))
+        self.assertFalse(self.mirror.record_update("PROJ-9", status="In Review"))
+
+        self.assertEqual(self.mirror.get_issue("PROJ-1")["fields"]["status"]["name"], "In Review")
+        self.assertEqual([item["key"] for item in self.mirror.query(statuses=["in review"])], ["PROJ-1"])
+
+    def test_issues_leaving_the_scope_are_evicted(self):
+        """Mirrored issues updated outside the scope (or moved under a new key) are dropped on the next sync"""
+        moved = dict(issue("PROJ-2"), id="10002")
+        self.sync_with([issue("PROJ-1"), moved, issue("PROJ-3")])
+        relabelled = issue("PROJ-1", labels=())
+
+        self.sync_with([], out_of_scope=[relabelled, dict(issue("OTHER-7"), id="10002"), issue("OTHER-8")])
+
+        self.assertEqual(self.search_calls[1], 'updated >= "2024/03/01 09:58" AND NOT (issuetype = Bug)')
+        self.assertEqual([item["key"] for item in self.mirror.query()], ["PROJ-3"])
+
+    def test_deleted_issues_are_evicted(self):
+        """A ticket JIRA no longer returns is removed with its labels"""
+        self.mirror.upsert_issues([issue("PROJ-1"), issue("PROJ-2")])
+
+        self.assertTrue(self.mirror.evict("PROJ-1"))
+        self.assertFalse(self.mirror.evict("PROJ-1"))
+
+        self.assertIsNone(self.mirror.get_issue("PROJ-1"))
+        self.assertEqual([item["key"] for item in self.mirror.query(labels=["Bug"])], ["PROJ-2"])
+
+    def test_covers_only_filters_within_the_scope(self):
+        """Filters matching issues outside the scope (other labels, all projects) are not served by the mirror"""
+        self.assertFalse(self.mirror.covers(labels=["Bug"]))
+
+        self.mirror.scope = MirrorScope(("Bug",), ("Bug",), "PROJ")
+        self.assertTrue(self.mirror.covers(labels=["bug"], project="proj"))
+        self.assertTrue(self.mirror.covers(issue_types=["Bug"], project="PROJ"))
+        self.assertFalse(self.mirror.covers(labels=["Bug", "ui"], project="PROJ"))
+        self.assertFalse(self.mirror.covers(labels=["Bug"]))
+        self.assertFalse(self.mirror.covers(project="PROJ"))
+
+        self.mirror.scope = MirrorScope(("Bug",), ("Bug",))
+        self.assertTrue(self.mirror.covers(labels=["Bug"]))
+        self.assertFalse(self.mirror.covers())
+
+
+class TestJiraServiceMirrorReads(unittest.TestCase):
+    """Test cases for JiraService reads served from the mirror"""
+
+    def setUp(self):
+        self.mirror = JiraTicketMirror(":memory:", "https://jira.test", ("user", "token"), "issuetype = Bug",
+                                       sync_interval=60)
+        self.addCleanup(self.mirror.close)
+        self.mirror.upsert_issues([issue("PROJ-1", status="In Review")])
+        mirror_patch = patch.object(jira_service, "get_ticket_mirror", return_value=self.mirror)
+        mirror_patch.start()
+        self.addCleanup(mirror_patch.stop)
+
+        self.service = JiraService()
+        self.service.is_configured = True
+        self.service.test_mode = False
+        self.service.jira_url = "https://jira.test"
+        self.service.auth = ("user", "token")
+        self.service.headers = {}
+        self.service.http = MagicMock()
+        self.service.http.get.return_value = MagicMock(status_code=200, json=lambda: issue("PROJ-1", status="Done"))
+
+    def test_fresh_mirror_answers_without_jira(self):
+        """A recently synced mirror serves status and existence checks"""
+        self.mirror._set_state("last_sync", str(time.time()))
+
+        self.assertEqual(self.service.get_ticket_status("PROJ-1"), "In Review")
+        self.assertTrue(self.service.check_ticket_exists("PROJ-1"))
+        self.service.http.get.assert_not_called()
+
+    def test_stale_mirror_falls_through_to_jira(self):
+        """Without a recent sync (e.g. no process syncs the mirror) JIRA is asked"""
+        self.assertEqual(self.service.get_ticket_status("PROJ-1"), "Done")
+
+    def test_deleted_ticket_is_evicted_on_404(self):
+        """A direct read reporting the ticket missing evicts it from the mirror"""
+        self.service.http.get.return_value = MagicMock(status_code=404)
+
+        self.assertFalse(self.service.check_ticket_exists("PROJ-1"))
+        self.assertIsNone(self.mirror.get_issue("PROJ-1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
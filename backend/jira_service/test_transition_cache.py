@@ -0,0 +1,103 @@
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jira_service import jira_service
+from jira_service.jira_service import JiraService
+from jira_service.transition_cache import TransitionCache, transition_key
+
+TRANSITIONS = [
+    {"id": "21", "name": "Start Progress", "to": {"name": "In Progress"}},
+    {"id": "31", "name": "Send to Review", "to": {"name": "In Review"}},
+]
+KEY = ("proj", "bug", "open")
+
+
+def live_issue():
+    return {"fields": {"project": {"key": "PROJ"}, "issuetype": {"name": "Bug"}, "status": {"name": "Open"}},
+            "transitions": TRANSITIONS}
+
+
+def response(status_code, payload=None):
+    mock = MagicMock(status_code=status_code)
+    mock.json.return_value = payload or {}
+    return mock
+
+
+class TestTransitionCache(unittest.TestCase):
+    """Test cases for the workflow transition cache"""
+
+    def setUp(self):
+        self.cache = TransitionCache(ttl=60)
+        patchers = [
+            patch.object(jira_service, "get_transition_cache", return_value=self.cache),
+            patch.object(jira_service, "transition_key_for", return_value=KEY),
+            patch.object(jira_service, "get_ticket_mirror", return_value=None),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.service = JiraService()
+        self.service.is_configured = True
+        self.service.test_mode = False
+        self.service.jira_url = "https://jira.test"
+        self.service.auth = ("user", "token")
+        self.service.headers = {}
+        self.service.http = MagicMock()
+        self.service.http.get.return_value = response(200, live_issue())
+        self.service.http.post.return_value = response(204)
+
+    def test_key_from_issue(self):
+        """The key is (project, issue type, status), case-insensitive"""
+        issue = {"fields": {"project": {"key": "PROJ"}, "issuetype": {"name": "Bug"}, "status": {"name": "Open"}}}
+
+        self.assertEqual(transition_key(issue), KEY)
+        self.assertIsNone(transition_key({"fields": {"project": {"key": "PROJ"}}}))
+
+    def test_second_status_change_skips_transitions_request(self):
+        """With a warm cache a status change is a single POST"""
+        self.assertTrue(self.service.update_ticket_status("PROJ-1", "In Review"))
+        self.assertTrue(self.service.update_ticket_status("PROJ-2", "In Progress"))
+
+        self.assertEqual(self.service.http.get.call_count, 1)
+        self.assertEqual(self.service.http.post.call_count, 2)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_failed_transition_invalidates_entry(self):
+        """A rejected transition drops the cached workflow"""
+        self.service.http.post.return_value = response(400)
+
+        self.assertFalse(self.service.update_ticket_status("PROJ-1", "In Review"))
+
+        self.assertIsNone(self.cache.get(KEY))
+        self.assertEqual(self.cache.stats()["invalidations"], 1)
+
+    def test_fetched_transitions_are_keyed_by_live_status(self):
+        """A stale mirrored status does not file the live transitions under the wrong key"""
+        with patch.object(jira_service, "transition_key_for", return_value=("proj", "bug", "done")):
+            self.assertTrue(self.service.update_ticket_status("PROJ-1", "In Review"))
+
+        self.assertEqual(self.cache.get(KEY), TRANSITIONS)
+        self.assertIsNone(self.cache.get(("proj", "bug", "done")))
+
+    def test_rejected_cached_transition_is_retried_live(self):
+        """When a cached transition is rejected, the live transitions are fetched and tried once"""
+        self.cache.put(KEY, [{"id": "99", "name": "Send to Review", "to": {"name": "In Review"}}])
+        self.service.http.post.side_effect = [response(400), response(204)]
+
+        self.assertTrue(self.service.update_ticket_status("PROJ-1", "In Review"))
+
+        self.assertEqual(self.service.http.get.call_count, 1)
+        self.assertEqual([call.kwargs["json"]["transition"]["id"] for call in self.service.http.post.call_args_list],
+                         ["99", "31"])
+        self.assertEqual(self.cache.get(KEY), TRANSITIONS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,446 @@
+
+"""
+Local incremental mirror of JIRA tickets
+
+The orchestrator, controller, JiraService and the dashboard endpoints used
+to search JIRA independently for the same tickets on every poll. The mirror
+keeps the in-scope issues in a local SQLite database instead. Only issues
+with `updated >= watermark` are pulled on each sync, so API volume is
+proportional to the number of changes. Reads are indexed queries on status,
+labels, priority, issue type and project.
+
+Issues that leave the scope (label removed, issue type changed, moved to
+another project) are evicted on the next sync: one search for issues
+updated since the watermark outside the scope finds them. Deleted issues
+never show up in a search; they are evicted when a direct read of the
+ticket returns 404 (`evict`). Callers only read from the mirror when their
+filter is contained in its scope (`covers`) and the mirror is fresh, and
+ask JIRA otherwise.
+
+Issues are stored raw (the fields in MIRROR_FIELDS) so every caller keeps
+its own normalization. Successful writes (status transitions) update the
+mirror optimistically; the next sync overwrites them with what JIRA
+reports.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from . import config
+from .search import search_issues
+from .http_session import shared_async_client
+
+logger = logging.getLogger("jira-service.mirror")
+
+JIRA_MIRROR_ENABLED = os.getenv('JIRA_MIRROR_ENABLED', 'true').lower() == 'true'
+JIRA_MIRROR_PATH = os.getenv('JIRA_MIRROR_PATH', 'data/jira_mirror.sqlite3')
+# Seconds a sync stays fresh before readers trigger the next one
+JIRA_MIRROR_SYNC_INTERVAL = float(os.getenv('JIRA_MIRROR_SYNC_INTERVAL', '30'))
+# JQL `updated` has minute precision, so each sync re-reads a small overlap
+JIRA_MIRROR_OVERLAP_MINUTES = int(os.getenv('JIRA_MIRROR_OVERLAP_MINUTES', '2'))
+# Issues kept in the mirror; status filters are applied locally so tickets leaving a status are updated too
+JIRA_MIRROR_JQL = os.getenv('JIRA_MIRROR_JQL', '')
+
+# Union of the fields read by the JIRA callers
+MIRROR_FIELDS = [
+    "summary", "description", "status", "issuetype", "project", "created", "updated",
+    "assignee", "reporter", "priority", "labels", "attachment", "acceptanceCriteria",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    ticket_id TEXT PRIMARY KEY,
+    project TEXT COLLATE NOCASE,
+    issue_type TEXT COLLATE NOCASE,
+    status TEXT COLLATE NOCASE,
+    priority TEXT COLLATE NOCASE,
+    created TEXT,
+    updated TEXT,
+    raw TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets(status);
+CREATE INDEX IF NOT EXISTS idx_tickets_priority ON tickets(priority);
+CREATE INDEX IF NOT EXISTS idx_tickets_issue_type ON tickets(issue_type);
+CREATE INDEX IF NOT EXISTS idx_tickets_project ON tickets(project);
+CREATE INDEX IF NOT EXISTS idx_tickets_created ON tickets(created);
+CREATE TABLE IF NOT EXISTS ticket_labels (
+    label TEXT COLLATE NOCASE,
+    ticket_id TEXT,
+    PRIMARY KEY (label, ticket_id)
+);
+CREATE INDEX IF NOT EXISTS idx_ticket_labels_ticket ON ticket_labels(ticket_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class MirrorScope(NamedTuple):
+    """Structured form of the scope JQL: issues of any of the issue types or labels, in the project"""
+    issue_types: Tuple[str, ...] = ()
+    labels: Tuple[str, ...] = ()
+    project: Optional[str] = None
+
+
+def _name(field: Any, key: str = "name") -> Optional[str]:
+    return field.get(key) if isinstance(field, dict) else None
+
+
+def _jql_watermark(updated: str, overlap_minutes: int) -> Optional[str]:
+    """
+    Convert an issue `updated` timestamp to a JQL date, minus the overlap
+
+    JIRA renders `updated` in the service account's timezone, which is also
+    the timezone JQL dates are read in, so the wall-clock part is used as is.
+    """
+    try:
+        wall_clock = datetime.strptime(updated[:19], "%Y-%m-%dT%H:%M:%S")
+    except (TypeError, ValueError):
+        return None
+    return (wall_clock - timedelta(minutes=overlap_minutes)).strftime("%Y/%m/%d %H:%M")
+
+
+class JiraTicketMirror:
+    """SQLite mirror of the issues matching a scope JQL"""
+
+    def __init__(self, db_path: str, jira_url: str, auth: tuple, scope_jql: str,
+                 sync_interval: float = JIRA_MIRROR_SYNC_INTERVAL,
+                 overlap_minutes: int = JIRA_MIRROR_OVERLAP_MINUTES,
+                 scope: Optional[MirrorScope] = None):
+        """
+        Args:
+            db_path: SQLite database file (":memory:" for tests)
+            jira_url: Base URL of the JIRA instance
+            auth: (user, token) basic auth
+            scope_jql: JQL selecting every issue the mirror should hold
+            sync_interval: Seconds a sync stays fresh
+            overlap_minutes: Minutes re-read before the watermark on each sync
+            scope: What scope_jql selects, if known; without it no filter is considered covered
+        """
+        if db_path != ":memory:" and os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.jira_url = jira_url
+        self.auth = auth
+        self.scope_jql = scope_jql
+        self.scope = scope
+        self.sync_interval = sync_interval
+        self.overlap_minutes = overlap_minutes
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        if db_path != ":memory:":
+            # Readers in other processes keep working while a sync writes
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    # Sync
+
+    async def sync(self) -> int:
+        """
+        Pull issues updated since the watermark into the mirror
+
+        Returns:
+            Number of issues written
+        """
+        watermark = self._get_state("watermark")
+        jql = f"({self.scope_jql})" if self.scope_jql else ""
+        if watermark:
+            jql = f"{jql} AND updated >= \"{watermark}\"" if jql else f"updated >= \"{watermark}\""
+        jql += " ORDER BY updated ASC"
+
+        written = 0
+        newest = None
+        batch: List[Dict[str, Any]] = []
+        async with shared_async_client() as client:
+            async for issue in search_issues(client, self.jira_url, self.auth, jql, MIRROR_FIELDS):
+                batch.append(issue)
+                updated = (issue.get("fields") or {}).get("updated")
+                if updated and (newest is None or updated > newest):
+                    newest = updated
+                if len(batch) >= 100:
+                    written += self.upsert_issues(batch)
+                    batch = []
+            written += self.upsert_issues(batch)
+            evicted = await self._evict_out_of_scope(client, watermark) if watermark and self.scope_jql else 0
+
+        with self._lock:
+            if newest:
+                new_watermark = _jql_watermark(newest, self.overlap_minutes)
+                if new_watermark and (watermark is None or new_watermark > watermark):
+                    self._set_state("watermark", new_watermark)
+            self._set_state("last_sync", str(time.time()))
+            self._conn.commit()
+
+        logger.info(f"JIRA mirror synced {written} changed issues, evicted {evicted} "
+                    f"(watermark {watermark or 'none'})")
+        return written
+
+    async def _evict_out_of_scope(self, client, watermark: str) -> int:
+        """Remove mirrored issues updated since the watermark that no longer match the scope"""
+        gone_keys, gone_ids = set(), set()
+        jql = f"updated >= \"{watermark}\" AND NOT ({self.scope_jql})"
+        async for issue in search_issues(client, self.jira_url, self.auth, jql, ["updated"]):
+            # A moved issue comes back under its new key; its id is unchanged
+            gone_keys.add(issue.get("key"))
+            if issue.get("id"):
+                gone_ids.add(str(issue["id"]))
+        if not gone_keys:
+            return 0
+        with self._lock:
+            rows = self._conn.execute("SELECT ticket_id, raw FROM tickets").fetchall()
+            evict = [key for key, raw in rows
+                     if key in gone_keys or str(json.loads(raw).get("id", "")) in gone_ids]
+            self._delete(evict)
+        if evict:
+            logger.info(f"JIRA mirror evicted {len(evict)} issues that left the scope: {', '.join(evict)}")
+        return len(evict)
+
+    def covers(self, labels: Optional[List[str]] = None, issue_types: Optional[List[str]] = None,
+               project: Optional[str] = None) -> bool:
+        """
+        Whether every issue matching a filter is in the mirror's scope
+
+        Args:
+            labels: The filter matches any of these labels
+            issue_types: The filter matches any of these issue types
+            project: The filter's project (None for all projects)
+        """
+        scope = self.scope
+        if scope is None:
+            return False
+        if scope.project and (project or "").lower() != scope.project.lower():
+            return False
+        if not scope.labels and not scope.issue_types:
+            return True
+
+        def within(values: Optional[List[str]], allowed: Tuple[str, ...]) -> bool:
+            return bool(values) and {value.lower() for value in values} <= {value.lower() for value in allowed}
+
+        return within(labels, scope.labels) or within(issue_types, scope.issue_types)
+
+    async def ensure_fresh(self, max_age: Optional[float] = None) -> bool:
+        """
+        Sync if the last sync is older than max_age
+
+        Returns:
+            True if the mirror can serve reads (it has synced at least once)
+        """
+        if self.is_fresh(max_age):
+            return True
+        # Another caller is already syncing, serve what we have
+        if not self._sync_lock.acquire(blocking=False):
+            return self.has_synced()
+        try:
+            await self.sync()
+            return True
+        except Exception as e:
+            logger.warning(f"JIRA mirror sync failed, serving last synced data: {str(e)}")
+            return self.has_synced()
+        finally:
+            self._sync_lock.release()
+
+    def is_fresh(self, max_age: Optional[float] = None) -> bool:
+        """Whether the last sync is younger than max_age (defaults to the sync interval)"""
+        max_age = self.sync_interval if max_age is None else max_age
+        return time.time() - self.last_sync() < max_age
+
+    def last_sync(self) -> float:
+        return float(self._get_state("last_sync") or 0)
+
+    def has_synced(self) -> bool:
+        return self.last_sync() > 0
+
+    # Writes
+
+    def upsert_issues(self, issues: Iterable[Dict[str, Any]]) -> int:
+        """Insert or replace raw issues"""
+        now = time.time()
+        count = 0
+        with self._lock:
+            for issue in issues:
+                key = issue.get("key") if issue else None
+                if not key:
+                    continue
+                fields = issue.get("fields") or {}
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO tickets "
+                    "(ticket_id, project, issue_type, status, priority, created, updated, raw, synced_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, _name(fields.get("project"), "key"), _name(fields.get("issuetype")),
+                     _name(fields.get("status")), _name(fields.get("priority")),
+                     fields.get("created"), fields.get("updated"), json.dumps(issue), now)
+                )
+                self._conn.execute("DELETE FROM ticket_labels WHERE ticket_id = ?", (key,))
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO ticket_labels (label, ticket_id) VALUES (?, ?)",
+                    [(label, key) for label in fields.get("labels") or [] if isinstance(label, str)]
+                )
+                count += 1
+            self._conn.commit()
+        return count
+
+    def record_update(self, ticket_id: str, status: Optional[str] = None,
+                      fields: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Apply a successful write to the mirrored copy of a ticket
+
+        Args:
+            ticket_id: JIRA ticket ID
+            status: New status name, if the status changed
+            fields: Other raw fields that were written
+
+        Returns:
+            True if the ticket is mirrored and was updated
+        """
+        with self._lock:
+            issue = self.get_issue(ticket_id)
+            if issue is None:
+                return False
+            issue_fields = issue.setdefault("fields", {})
+            if fields:
+                issue_fields.update(fields)
+            if status:
+                current = issue_fields.get("status") if isinstance(issue_fields.get("status"), dict) else {}
+                issue_fields["status"] = {**current, "name": status}
+            self.upsert_issues([issue])
+            return True
+
+    def evict(self, ticket_id: str) -> bool:
+        """
+        Remove a ticket JIRA no longer returns (deleted or no longer visible)
+
+        Returns:
+            True if the ticket was mirrored
+        """
+        with self._lock:
+            evicted = self._delete([ticket_id]) > 0
+        if evicted:
+            logger.info(f"JIRA mirror evicted {ticket_id}, JIRA no longer returns it")
+        return evicted
+
+    # Reads
+
+    def get_issue(self, ticket_id: str) -> Optional[Dict[str, Any]]:
+        """Return the mirrored raw issue, or None if it is not mirrored"""
+        with self._lock:
+            row = self._conn.execute("SELECT raw FROM tickets WHERE ticket_id = ?", (ticket_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query(self, statuses: Optional[List[str]] = None, labels: Optional[List[str]] = None,
+              priorities: Optional[List[str]] = None, issue_types: Optional[List[str]] = None,
+              project: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Return mirrored raw issues matching all given filters, oldest first
+
+        Each filter matches any of its values, case-insensitively.
+        """
+        where = []
+        params: List[Any] = []
+
+        def any_of(column: str, values: Optional[List[str]]) -> None:
+            if values:
+                where.append(f"{column} IN ({', '.join('?' for _ in values)})")
+                params.extend(values)
+
+        any_of("t.status", statuses)
+        any_of("t.priority", priorities)
+        any_of("t.issue_type", issue_types)
+        if project:
+            where.append("t.project = ?")
+            params.append(project)
+        if labels:
+            where.append(
+                "EXISTS (SELECT 1 FROM ticket_labels l WHERE l.ticket_id = t.ticket_id "
+                f"AND l.label IN ({', '.join('?' for _ in labels)}))"
+            )
+            params.extend(labels)
+
+        sql = "SELECT t.raw FROM tickets t"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY t.created ASC, t.ticket_id ASC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _delete(self, ticket_ids: List[str]) -> int:
+        with self._lock:
+            deleted = self._conn.executemany("DELETE FROM tickets WHERE ticket_id = ?",
+                                             [(key,) for key in ticket_ids]).rowcount
+            self._conn.executemany("DELETE FROM ticket_labels WHERE ticket_id = ?", [(key,) for key in ticket_ids])
+            self._conn.commit()
+        return deleted
+
+    def _get_state(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
+
+
+def default_scope() -> Optional[MirrorScope]:
+    """Bugs by issue type or label, limited to the configured project (unknown for a custom JIRA_MIRROR_JQL)"""
+    if JIRA_MIRROR_JQL:
+        return None
+    return MirrorScope(("Bug",), ("Bug",), config.JIRA_PROJECT_KEY or None)
+
+
+def default_scope_jql() -> str:
+    """Bugs by issue type or label, limited to the configured project"""
+    if JIRA_MIRROR_JQL:
+        return JIRA_MIRROR_JQL
+    jql = "(issuetype = Bug OR labels = Bug)"
+    if config.JIRA_PROJECT_KEY:
+        jql += f" AND project = {config.JIRA_PROJECT_KEY}"
+    return jql
+
+
+_mirror: Optional[JiraTicketMirror] = None
+_mirror_lock = threading.Lock()
+
+
+def get_ticket_mirror() -> Optional[JiraTicketMirror]:
+    """
+    Return the process-wide ticket mirror
+
+    Returns None when the mirror is disabled or JIRA is not configured, in
+    which case callers query JIRA directly.
+    """
+    global _mirror
+    if not JIRA_MIRROR_ENABLED:
+        return None
+    with _mirror_lock:
+        if _mirror is None:
+            if not all([config.JIRA_URL, config.JIRA_USERNAME, config.JIRA_API_TOKEN]):
+                return None
+            try:
+                _mirror = JiraTicketMirror(
+                    JIRA_MIRROR_PATH, config.JIRA_URL,
+                    (config.JIRA_USERNAME, config.JIRA_API_TOKEN), default_scope_jql(),
+                    scope=default_scope()
+                )
+                logger.info(f"JIRA ticket mirror at {JIRA_MIRROR_PATH} for: {_mirror.scope_jql}")
+            except Exception as e:
+                logger.error(f"JIRA ticket mirror unavailable: {str(e)}")
+                # Don't retry on every read
+                _mirror = False
+        return _mirror or None
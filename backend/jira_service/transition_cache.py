@@ -0,0 +1,117 @@
+
+"""
+Cache of JIRA workflow transitions
+
+Every status change used to GET /issue/{key}/transitions and then scan the
+list by name before POSTing the transition. The transitions available from
+a status are defined by the workflow, so they are the same for every issue
+of a project and issue type in that status. They are cached under
+(project, issue type, current status), read from the local ticket mirror,
+which makes a status change a single POST when the cache is warm.
+
+The mirror can lag behind JIRA, so transitions are only cached under the
+ticket's live state: on a miss the issue is fetched with its transitions
+(TRANSITION_PARAMS) and keyed by the status JIRA reports. An entry is
+dropped when a transition POST using it fails or when it no longer contains
+the requested status; the transition is then retried once with transitions
+fetched live.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .ticket_mirror import get_ticket_mirror
+
+logger = logging.getLogger("jira-service.transitions")
+
+JIRA_TRANSITION_CACHE_TTL = float(os.getenv('JIRA_TRANSITION_CACHE_TTL', '3600'))
+
+TransitionKey = Tuple[str, str, str]
+
+# GET /issue/{key} with these parameters returns the live state and its transitions in one request
+TRANSITION_PARAMS = {"fields": "project,issuetype,status", "expand": "transitions"}
+
+
+class TransitionCache:
+    """Transitions per (project, issue type, status) with a TTL"""
+
+    def __init__(self, ttl: float = JIRA_TRANSITION_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[TransitionKey, Tuple[float, List[Dict[str, Any]]]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get(self, key: Optional[TransitionKey]) -> Optional[List[Dict[str, Any]]]:
+        """Return cached transitions, or None on a miss (or when the key is unknown)"""
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self._entries.pop(key, None)
+                self._misses += 1
+                return None
+            self._hits += 1
+            return entry[1]
+
+    def put(self, key: Optional[TransitionKey], transitions: List[Dict[str, Any]]) -> None:
+        if key is None:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), transitions)
+
+    def invalidate(self, key: Optional[TransitionKey]) -> None:
+        if key is None:
+            return
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._invalidations += 1
+                logger.info(f"Dropped cached transitions for {key}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+            }
+
+
+def transition_key(issue: Optional[Dict[str, Any]]) -> Optional[TransitionKey]:
+    """Build the cache key from a raw issue, or None if a part is missing"""
+    if not issue:
+        return None
+    fields = issue.get("fields") or {}
+    parts = (
+        (fields.get("project") or {}).get("key"),
+        (fields.get("issuetype") or {}).get("name"),
+        (fields.get("status") or {}).get("name"),
+    )
+    if not all(isinstance(part, str) and part for part in parts):
+        return None
+    return tuple(part.lower() for part in parts)
+
+
+def live_transitions(issue: Dict[str, Any]) -> Tuple[Optional[TransitionKey], List[Dict[str, Any]]]:
+    """Cache key of an issue's live state and its transitions, from an issue fetched with TRANSITION_PARAMS"""
+    return transition_key(issue), issue.get("transitions") or []
+
+
+def transition_key_for(ticket_id: str) -> Optional[TransitionKey]:
+    """Cache key of a ticket's current state, taken from the local mirror"""
+    mirror = get_ticket_mirror()
+    return transition_key(mirror.get_issue(ticket_id)) if mirror else None
+
+
+_cache = TransitionCache()
+
+
+def get_transition_cache() -> TransitionCache:
+    """Return the process-wide transition cache"""
+    return _cache
@@ -4,14 +4,23 @@ import os
 from datetime import datetime
 import httpx
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 from pydantic import BaseModel
 from env import JIRA_TOKEN, JIRA_USER, JIRA_URL
+from jira_service.search import search_issues
+from jira_service.adf import adf_to_text
+from jira_service.http_session import shared_async_client
+from jira_service.ticket_mirror import get_ticket_mirror
+from jira_service.transition_cache import TRANSITION_PARAMS, get_transition_cache, live_transitions, transition_key_for
+from jira_service.attachments import attachment_metadata
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("jira-utils")
 
+JIRA_TICKET_STATUSES = ["To Do", "In Progress", "Open"]
+JIRA_TICKET_FIELDS = ["summary", "description", "created", "assignee", "acceptanceCriteria", "attachment", "status", "priority", "reporter"]
+
 async def update_jira_ticket(ticket_id: str, status: str, comment: str, pr_url: Optional[str] = None) -> bool:
     """Update JIRA ticket status and add a comment"""
     try:
@@ -19,7 +28,7 @@ async def update_jira_ticket(ticket_id: str, status: str, comment: str, pr_url:
             logger.error("Missing JIRA credentials in environment variables")
             return False
             
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with shared_async_client() as client:
             auth = (JIRA_USER, JIRA_TOKEN)
             
             # Add comment
@@ -48,24 +57,47 @@ async def update_jira_ticket(ticket_id: str, status: str, comment: str, pr_url:
                 return False
             
             if status:
-                transitions_response = await client.get(
-                    f"{JIRA_URL}/rest/api/3/issue/{ticket_id}/transitions",
-                    auth=auth
-                )
-                
-                if transitions_response.status_code != 200:
-                    logger.error(f"Failed to get transitions for JIRA ticket {ticket_id}")
-                    return False
-                
-                transitions = transitions_response.json().get("transitions", [])
-                transition_id = None
-                
-                for t in transitions:
-                    if status.lower() in t['name'].lower():
-                        transition_id = t['id']
+                # Transitions are cached per project, issue type and current status
+                transition_cache = get_transition_cache()
+                key = transition_key_for(ticket_id)
+                transitions = transition_cache.get(key)
+                # Cached transitions get one retry with the ticket's live transitions
+                for cached in ((True, False) if transitions is not None else (False,)):
+                    if not cached:
+                        # Key the fetched transitions by the live status, the mirror's may be stale
+                        issue_response = await client.get(
+                            f"{JIRA_URL}/rest/api/3/issue/{ticket_id}",
+                            params=TRANSITION_PARAMS,
+                            auth=auth
+                        )
+                        
+                        if issue_response.status_code != 200:
+                            logger.error(f"Failed to get transitions for JIRA ticket {ticket_id}")
+                            mirror = get_ticket_mirror() if issue_response.status_code == 404 else None
+                            if mirror:
+                                # Deleted issues never show up in a sync
+                                mirror.evict(ticket_id)
+                            return False
+                        
+                        key, transitions = live_transitions(issue_response.json())
+                        transition_cache.put(key, transitions)
+                    transition_id = None
+                    
+                    transition_status = status
+                    for t in transitions:
+                        if status.lower() in t['name'].lower():
+                            transition_id = t['id']
+                            transition_status = t.get('to', {}).get('name') or status
+                            break
+                    
+                    if not transition_id:
+                        # The cached workflow (or the mirrored status) may be out of date
+                        transition_cache.invalidate(key)
+                        if cached:
+                            continue
+                        logger.warning(f"No transition found for status '{status}' for ticket {ticket_id}")
                         break
-                
-                if transition_id:
+                    
                     transition_data = {
                         "transition": {
                             "id": transition_id
@@ -78,11 +110,16 @@ async def update_jira_ticket(ticket_id: str, status: str, comment: str, pr_url:
                         auth=auth
                     )
                     
-                    if transition_response.status_code not in [200, 204]:
-                        logger.error(f"Failed to transition JIRA ticket {ticket_id}")
-                        return False
+                    if transition_response.status_code in [200, 204]:
+                        mirror = get_ticket_mirror()
+                        if mirror:
+                            mirror.record_update(ticket_id, status=transition_status)
+                        break
+                    
+                    logger.error(f"Failed to transition JIRA ticket {ticket_id}")
+                    transition_cache.invalidate(key)
                 else:
-                    logger.warning(f"No transition found for status '{status}' for ticket {ticket_id}")
+                    return False
             
             # If PR URL is provided, update the ticket with PR link
             if pr_url:
@@ -149,143 +186,120 @@ async def update_jira_ticket(ticket_id: str, status: str, comment: str, pr_url:
 
 async def fetch_jira_tickets() -> List[Dict[str, Any]]:
     """Poll the JIRA API for new tickets labeled as Bug"""
-    try:
-        if not all([JIRA_URL, JIRA_USER, JIRA_TOKEN]):
-            logger.error("Missing JIRA credentials in environment variables")
-            return []
-            
-        logger.info("Fetching new bug tickets from JIRA")
-        auth = (JIRA_USER, JIRA_TOKEN)
+    if not all([JIRA_URL, JIRA_USER, JIRA_TOKEN]):
+        logger.error("Missing JIRA credentials in environment variables")
+        return []
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # Include In Progress tickets as well to ensure workflow continuation
-            jql_query = 'labels = Bug AND (status = "To Do" OR status = "In Progress" OR status = "Open")'
-            
-            response = await client.get(
-                f"{JIRA_URL}/rest/api/3/search",
-                params={"jql": jql_query, "fields": "summary,description,created,assignee,acceptanceCriteria,attachments,status,priority,reporter"},
-                auth=auth
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"Failed to fetch JIRA tickets: {response.status_code}")
-                return []
-                
-            data = response.json()
-            issues = data.get("issues", [])
-            
-            if not issues:
-                logger.info("No new bug tickets found in JIRA")
-                return []
-                
-            new_tickets = []
-            
-            for issue in issues:
-                if not issue:
-                    continue
-                    
-                ticket_id = issue.get("key")
-                if not ticket_id:
-                    continue
-                    
-                fields = issue.get("fields", {})
-                if not fields:
-                    logger.warning(f"No fields found in ticket {ticket_id}, skipping")
-                    continue
-                
-                # Safely extract fields with proper error handling
-                acceptance_criteria = fields.get("acceptanceCriteria", "")
-                
-                attachments = []
-                for attachment in fields.get("attachments", []):
-                    if not attachment:
-                        continue
-                    attachments.append({
-                        "filename": attachment.get("filename", "unknown"),
-                        "content_url": attachment.get("content", ""),
-                        "mime_type": attachment.get("mimeType", "application/octet-stream")
-                    })
-                
-                # Safely get assignee
-                assignee = "Unassigned"
-                if fields.get("assignee"):
-                    assignee = fields["assignee"].get("displayName", "Unassigned")
-                
-                # Safely get reporter
-                reporter = "Unknown"
-                if fields.get("reporter"):
-                    reporter = fields["reporter"].get("displayName", "Unknown")
-                
-                # Safely get priority
-                priority = "Normal"
-                if fields.get("priority"):
-                    priority = fields["priority"].get("name", "Normal")
-                
-                # Safe extraction of status
-                status = "Unknown"
-                if fields.get("status") and isinstance(fields["status"], dict):
-                    status = fields["status"].get("name", "Unknown")
-                
-                # Handle description which might be in Atlassian Document Format
-                description = ""
-                if fields.get("description"):
-                    # Add additional null check and ensure we're not trying to access None values
-                    desc_field = fields["description"]
-                    if isinstance(desc_field, dict):
-                        # Try to extract text from ADF with enhanced error handling
-                        try:
-                            desc_content = desc_field.get("content", [])
-                            if desc_content is None:  # Additional null check
-                                desc_content = []
-                                
-                            desc_parts = []
-                            for content in desc_content:
-                                if not content or not isinstance(content, dict):
-                                    continue
-                                    
-                                if content.get("type") == "paragraph":
-                                    paragraph_content = content.get("content", [])
-                                    if paragraph_content is None:
-                                        continue
-                                        
-                                    for text in paragraph_content:
-                                        if not text or not isinstance(text, dict):
-                                            continue
-                                            
-                                        text_value = text.get("text")
-                                        if text_value:
-                                            desc_parts.append(text_value)
-                                        
-                            description = "\n".join(desc_parts)
-                            
-                            # If we couldn't extract any text, provide a fallback
-                            if not description:
-                                logger.warning(f"Failed to extract description text for {ticket_id} - using fallback")
-                                description = "No readable description available"
-                                
-                        except Exception as e:
-                            logger.warning(f"Failed to parse description for {ticket_id}: {e}")
-                            description = "Error extracting description"
-                    elif desc_field is None:
-                        description = ""
-                    else:
-                        description = str(desc_field)
-                
-                new_tickets.append({
-                    "ticket_id": ticket_id,
-                    "title": fields.get("summary", "No title"),
-                    "description": description,
-                    "created": fields.get("created", ""),
-                    "acceptance_criteria": acceptance_criteria,
-                    "attachments": attachments,
-                    "status": status,
-                    "priority": priority,
-                    "reporter": reporter,
-                    "assignee": assignee
-                })
-            
-            logger.info(f"Found {len(new_tickets)} bug tickets")
-            return new_tickets
+    # The search below is not limited to a project, so a project-scoped mirror cannot serve it
+    mirror = get_ticket_mirror()
+    if mirror and mirror.covers(labels=["Bug"]) and await mirror.ensure_fresh():
+        issues = mirror.query(labels=["Bug"], statuses=JIRA_TICKET_STATUSES)
+        new_tickets = [ticket for ticket in map(_normalize_ticket, issues) if ticket]
+        logger.info(f"Found {len(new_tickets)} bug tickets in the local mirror")
+        return new_tickets
+        
+    logger.info("Fetching new bug tickets from JIRA")
+    new_tickets = []
+    try:
+        async for ticket in iter_jira_tickets():
+            new_tickets.append(ticket)
     except Exception as e:
+        # Keep the pages that did arrive
         logger.error(f"Error fetching JIRA tickets: {str(e)}")
-        return []
+        
+    if not new_tickets:
+        logger.info("No new bug tickets found in JIRA")
+    else:
+        logger.info(f"Found {len(new_tickets)} bug tickets")
+    return new_tickets
+
+async def iter_jira_tickets(page_size: Optional[int] = None, concurrency: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Yield tickets labeled as Bug as JIRA search pages arrive"""
+    auth = (JIRA_USER, JIRA_TOKEN)
+    # Include In Progress tickets as well to ensure workflow continuation
+    jql_query = 'labels = Bug AND (status = "To Do" OR status = "In Progress" OR status = "Open") ORDER BY created ASC'
+    
+    async with shared_async_client() as client:
+        async for issue in search_issues(
+            client, JIRA_URL, auth, jql_query, JIRA_TICKET_FIELDS,
+            page_size=page_size, concurrency=concurrency
+        ):
+            ticket = _normalize_ticket(issue)
+            if ticket:
+                yield ticket
+
+def _normalize_ticket(issue: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Map a JIRA search issue to the ticket format, or None if it is unusable"""
+    if not issue:
+        return None
+
+    ticket_id = issue.get("key")
+    if not ticket_id:
+        return None
+
+    fields = issue.get("fields", {})
+    if not fields:
+        logger.warning(f"No fields found in ticket {ticket_id}, skipping")
+        return None
+
+    # Safely extract fields with proper error handling
+    acceptance_criteria = fields.get("acceptanceCriteria", "")
+
+    # Only the descriptors: the files are downloaded when the ticket is processed
+    attachments = attachment_metadata(fields)
+
+    # Safely get assignee
+    assignee = "Unassigned"
+    if fields.get("assignee"):
+        assignee = fields["assignee"].get("displayName", "Unassigned")
+
+    # Safely get reporter
+    reporter = "Unknown"
+    if fields.get("reporter"):
+        reporter = fields["reporter"].get("displayName", "Unknown")
+
+    # Safely get priority
+    priority = "Normal"
+    if fields.get("priority"):
+        priority = fields["priority"].get("name", "Normal")
+
+    # Safe extraction of status
+    status = "Unknown"
+    if fields.get("status") and isinstance(fields["status"], dict):
+        status = fields["status"].get("name", "Unknown")
+
+    # Handle description which might be in Atlassian Document Format
+    description = ""
+    if fields.get("description"):
+        # Add additional null check and ensure we're not trying to access None values
+        desc_field = fields["description"]
+        if isinstance(desc_field, dict):
+            # Convert Atlassian Document Format, keeping code blocks and lists
+            try:
+                description = adf_to_text(desc_field)
+
+                # If we couldn't extract any text, provide a fallback
+                if not description.strip():
+                    logger.warning(f"Failed to extract description text for {ticket_id} - using fallback")
+                    description = "No readable description available"
+
+            except Exception as e:
+                logger.warning(f"Failed to parse description for {ticket_id}: {e}")
+                description = "Error extracting description"
+        elif desc_field is None:
+            description = ""
+        else:
+            description = str(desc_field)
+
+    return {
+        "ticket_id": ticket_id,
+        "title": fields.get("summary", "No title"),
+        "description": description,
+        "created": fields.get("created", ""),
+        "acceptance_criteria": acceptance_criteria,
+        "attachments": attachments,
+        "status": status,
+        "priority": priority,
+        "reporter": reporter,
+        "assignee": assignee
+    }
@@ -9,6 +9,10 @@ import httpx
 import asyncio
 from env import verify_env_vars, GITHUB_TOKEN, JIRA_TOKEN, JIRA_USER, JIRA_URL
 import controller
+from jira_service.search import search_issues, JiraSearchError
+from jira_service.http_session import shared_async_client
+from jira_service.ticket_mirror import get_ticket_mirror
+from jira_service.attachments import attachment_metadata
 
 # Verify environment variables on startup
 verify_env_vars()
@@ -44,6 +48,8 @@ class AgentStatus(BaseModel):
     details: Optional[Dict[str, Any]] = None
     timestamp: str = datetime.now().isoformat()
 
+JIRA_TICKET_FIELDS = ["summary", "description", "created", "updated", "status", "priority", "reporter", "assignee", "labels"]
+
 class JiraTicketFilter(BaseModel):
     statuses: List[str] = ["To Do"]
     labels: List[str] = ["Bug"]
@@ -67,11 +73,11 @@ async def process_ticket(request: TicketRequest, background_tasks: BackgroundTas
     
     # Get ticket details from JIRA
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with shared_async_client() as client:
             auth = (JIRA_USER, JIRA_TOKEN)
             response = await client.get(
                 f"{JIRA_URL}/rest/api/3/issue/{ticket_id}",
-                params={"fields": "summary,description,created,acceptanceCriteria,attachments,status,priority,reporter,assignee"},
+                params={"fields": "summary,description,created,acceptanceCriteria,attachment,status,priority,reporter,assignee"},
                 auth=auth
             )
             
@@ -83,14 +89,8 @@ async def process_ticket(request: TicketRequest, background_tasks: BackgroundTas
             # Extract acceptance criteria from custom field if available
             acceptance_criteria = issue["fields"].get("acceptanceCriteria", "")
             
-            # Extract any attachments
-            attachments = []
-            for attachment in issue["fields"].get("attachments", []):
-                attachments.append({
-                    "filename": attachment["filename"],
-                    "content_url": attachment["content"],
-                    "mime_type": attachment["mimeType"]
-                })
+            # Extract any attachments (downloaded when the ticket is processed)
+            attachments = attachment_metadata(issue["fields"])
             
             ticket = {
                 "ticket_id": ticket_id,
@@ -131,7 +131,7 @@ async def get_jira_tickets(filters: JiraTicketFilter = None):
         filters = JiraTicketFilter()
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with shared_async_client() as client:
             auth = (JIRA_USER, JIRA_TOKEN)
             
             # Build JQL query
@@ -147,27 +147,20 @@ async def get_jira_tickets(filters: JiraTicketFilter = None):
             
             jql_query = " AND ".join(jql_parts) if jql_parts else ""
             
-            response = await client.get(
-                f"{JIRA_URL}/rest/api/3/search",
-                params={
-                    "jql": jql_query, 
-                    "fields": "summary,description,created,status,priority,reporter,assignee,labels", 
-                    "maxResults": filters.max_results
-                },
-                auth=auth
-            )
-            
-            if response.status_code != 200:
-                logger.error(f"Failed to fetch JIRA tickets: {response.status_code} - {response.text}")
-                raise HTTPException(
-                    status_code=response.status_code, 
-                    detail=f"Failed to fetch tickets from JIRA: {response.text}"
-                )
-                
-            data = response.json()
             tickets = []
             
-            for issue in data.get("issues", []):
+            # Served from the local mirror when it holds every issue the filter can match
+            mirror = get_ticket_mirror()
+            if mirror and mirror.covers(labels=filters.labels) and await mirror.ensure_fresh():
+                issues = mirror.query(labels=filters.labels, statuses=filters.statuses, limit=filters.max_results)
+            else:
+                # Page through the results so max_results above JIRA's page cap is honoured
+                issues = [issue async for issue in search_issues(
+                    client, JIRA_URL, auth, jql_query, JIRA_TICKET_FIELDS,
+                    max_results=filters.max_results
+                )]
+            
+            for issue in issues:
                 ticket_id = issue["key"]
                 
                 ticket = {
@@ -187,6 +180,9 @@ async def get_jira_tickets(filters: JiraTicketFilter = None):
                 tickets.append(ticket)
                 
             return tickets
+    except JiraSearchError as e:
+        logger.error(f"Failed to fetch JIRA tickets: {str(e)}")
+        raise HTTPException(status_code=e.status_code, detail=f"Failed to fetch tickets from JIRA: {str(e)}")
     except Exception as e:
         logger.error(f"Error fetching JIRA tickets: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching tickets: {str(e)}")
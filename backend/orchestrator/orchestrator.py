@@ -16,6 +16,7 @@ from agent_framework.planner_agent import PlannerAgent
 from agent_framework.developer_agent import DeveloperAgent
 from agent_framework.qa_agent import QAAgent 
 from agent_framework.communicator_agent import CommunicatorAgent
+from qa_service.junit_report import previous_failures
 from jira_service.jira_client import JiraClient
 from github_service.github_service import GitHubService
 from analytics_tracker import get_analytics_tracker
@@ -380,7 +381,8 @@ class Orchestrator:
                 qa_input = {
                     "ticket_id": ticket_id,
                     "test_command": "npm test",  # Default test command, could be customized
-                    "developer_result": developer_result  # Pass the entire result for test execution
+                    "developer_result": developer_result,  # Pass the entire result for test execution
+                    "previous_failures": previous_failures(retry_history)
                 }
                 
                 with open(f"{log_dir}/qa_input_{current_attempt}.json", 'w') as f:
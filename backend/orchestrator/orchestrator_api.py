@@ -13,6 +13,7 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from orchestrator.orchestrator import Orchestrator
+from qa_service.output_stream import all_progress, get_progress
 
 app = FastAPI(title="BugFix AI Orchestrator API")
 
@@ -79,6 +80,24 @@ async def get_tickets():
     return tickets
 
 
+@app.get("/qa/progress")
+async def get_qa_progress():
+    """Progress of the current and recent QA runs"""
+    return all_progress()
+
+
+@app.get("/qa/progress/{ticket_id}")
+async def get_ticket_qa_progress(ticket_id: str):
+    """Tests run, passed and failed so far in the latest QA run of a ticket"""
+    progress = get_progress(ticket_id)
+    if progress is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No QA run for ticket {ticket_id}"
+        )
+    return progress
+
+
 @app.get("/tickets/{ticket_id}")
 async def get_ticket_details(ticket_id: str):
     """Get detailed information for a specific ticket"""
@@ -277,5 +277,35 @@ async def test_acquire_ticket_lock():
         temp_dir.cleanup()
 
 
+
+@pytest.mark.asyncio
+async def test_retry_after_developer_error(tmp_path, monkeypatch, mock_jira_client):
+    """An attempt that failed before QA does not hide the failures of the last attempt that reached QA"""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("logs/BUG-123")
+    developer_result = {"ticket_id": "BUG-123", "success": True, "patched_files": ["src/app.py"]}
+    qa_result = {"ticket_id": "BUG-123", "passed": False, "success": True, "failure_summary": "assert 1 == 2",
+                 "test_results": [{"name": "tests/test_app.py::test_total", "status": "failed"}]}
+
+    orchestrator = Orchestrator()
+    orchestrator.jira_client = mock_jira_client
+    orchestrator.developer_agent = MagicMock()
+    orchestrator.developer_agent.run = MagicMock(side_effect=[
+        Exception("model timeout"), developer_result, Exception("model timeout"), developer_result])
+    orchestrator.qa_agent = MagicMock()
+    orchestrator.qa_agent.run = MagicMock(return_value=qa_result)
+    orchestrator.escalate_ticket = AsyncMock()
+    orchestrator.active_tickets = {"BUG-123": {}}
+
+    with patch('orchestrator.orchestrator.MAX_RETRIES', 4), \
+         patch('orchestrator.orchestrator.RETRY_DELAY_SECONDS', 0):
+        await orchestrator.run_development_qa_loop("BUG-123", {"affected_files": ["src/app.py"]})
+
+    # QA runs on every attempt the developer completed, with the failures of the previous QA run first
+    qa_inputs = [call.args[0] for call in orchestrator.qa_agent.run.call_args_list]
+    assert [qa_input["previous_failures"] for qa_input in qa_inputs] == [[], ["tests/test_app.py::test_total"]]
+    orchestrator.escalate_ticket.assert_awaited_once()
+
+
 if __name__ == "__main__":
     pytest.main(["-xvs", __file__])
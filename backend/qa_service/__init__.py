@@ -0,0 +1,2 @@
+
+# Empty file to mark the directory as a Python package
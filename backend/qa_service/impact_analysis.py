@@ -0,0 +1,355 @@
+
+"""
+Impact-based test selection
+
+Maps the files changed by a patch to the tests that can observe the change.
+Every Python file of the repository is parsed with ast to build a static
+import graph (parse results are kept per path, size and mtime, so only
+files that changed are parsed again on the next attempt). The tests
+affected by a change are the test files that reach a changed file through
+that graph, plus every test below a changed conftest.py. Selected tests run
+first; whether the rest of the suite runs afterwards is a per-repository
+setting, since imports the graph cannot see (importlib, plugins, data
+files) are only caught by the full run. Tests that failed in the previous
+attempt of the same ticket run before all of them, as long as their
+function still exists (pytest rejects the whole run when a node id is not
+found, and generated tests are rewritten between attempts). Tests that passed before
+on identical inputs are reported from the result cache (see result_cache)
+unless a full run is forced.
+"""
+
+import os
+import ast
+import sys
+import json
+import logging
+import threading
+from collections import OrderedDict, defaultdict, deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+logger = logging.getLogger("qa-impact-analysis")
+
+# impact = run the tests affected by the change first, all = always run the whole suite
+QA_TEST_SELECTION = os.environ.get("QA_TEST_SELECTION", "impact").lower()
+# Run the rest of the suite once the affected tests pass
+QA_RUN_FULL_SUITE = os.environ.get("QA_RUN_FULL_SUITE", "true").lower() == "true"
+# Stop at the first failing test (pytest -x, and the other shards are stopped)
+QA_FAIL_FAST = os.environ.get("QA_FAIL_FAST", "false").lower() == "true"
+# Report tests that passed before on identical inputs as cached instead of running them
+QA_RESULT_CACHE = os.environ.get("QA_RESULT_CACHE", "true").lower() == "true"
+# Run the whole suite without cached results (they are refreshed), whatever the change
+QA_FORCE_FULL_RUN = os.environ.get("QA_FORCE_FULL_RUN", "false").lower() == "true"
+# JSON file in the repository root overriding the settings above for that repository
+QA_CONFIG_FILE = os.environ.get("QA_CONFIG_FILE", ".bugfix-qa.json")
+
+SKIP_DIRS = {".git", ".hg", ".svn", ".tox", ".nox", ".venv", "venv", "env", "node_modules", "__pycache__",
+             "build", "dist", "site-packages", ".eggs", ".mypy_cache", ".pytest_cache"}
+# Changing one of these can affect any test, so the whole suite runs
+GLOBAL_FILES = {"pytest.ini", "setup.cfg", "tox.ini", "pyproject.toml", "setup.py", "Pipfile", "Pipfile.lock",
+                "poetry.lock", "uv.lock"}
+# Files that cannot change what a test does
+INERT_SUFFIXES = (".md", ".rst")
+
+# Result cache modes: off, use = report cached passes and record new ones, refresh = run everything and record
+CACHE_OFF = "off"
+CACHE_USE = "use"
+CACHE_REFRESH = "refresh"
+
+_PARSE_CACHE_SIZE = 50000
+# (path, size, mtime_ns) -> imported module names, shared by every graph so copies of a repository reuse it
+_parse_cache: "OrderedDict[Tuple[str, int, int], Tuple[str, ...]]" = OrderedDict()
+_parse_lock = threading.Lock()
+
+
+class QASettings(NamedTuple):
+    test_selection: str
+    run_full_suite: bool
+    fail_fast: bool
+    result_cache: bool
+
+
+class ImpactSelection(NamedTuple):
+    tests: Optional[List[str]]  # None: run the whole suite
+    reason: str
+    run_full_suite: bool
+    # Tests (node ids) that failed in the previous attempt of the ticket; they run before everything else
+    previous_failures: Tuple[str, ...] = ()
+    fail_fast: bool = False
+    cache_mode: str = CACHE_OFF
+
+
+def is_test_file(path: str) -> bool:
+    """Whether a repository path is a pytest test module"""
+    name = os.path.basename(path)
+    return name.endswith(".py") and (name.startswith("test_") or name.endswith("_test.py"))
+
+
+def _normalize(path: str) -> str:
+    normalized = path.strip().replace("\\", "/")
+    while normalized.startswith("./"):
+        normalized = normalized[2:]
+    return normalized.lstrip("/")
+
+
+def _module_name(path: str) -> str:
+    """Dotted module name of a repository path (packages map to their __init__.py)"""
+    parts = path[:-3].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def python_files(repo_path: str) -> Iterable[Tuple[str, os.stat_result]]:
+    """Repository paths and stats of the Python files outside virtualenvs, caches and build output"""
+    for root, dirs, files in os.walk(repo_path):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.endswith(".egg-info"))
+        for name in sorted(files):
+            if name.endswith(".py"):
+                full_path = os.path.join(root, name)
+                try:
+                    yield os.path.relpath(full_path, repo_path).replace(os.sep, "/"), os.stat(full_path)
+                except OSError:
+                    continue
+
+
+def discover_test_files(repo_path: str) -> List[str]:
+    """Test modules of a repository, found by name"""
+    return [path for path, _ in python_files(repo_path) if is_test_file(path)]
+
+
+def parse_imports(source: str, module: str, is_package: bool) -> Tuple[str, ...]:
+    """Absolute names of the modules a source file imports, including `from x import y` as x.y"""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return ()
+
+    package = module.split(".") if is_package else module.split(".")[:-1]
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = package[:len(package) - node.level + 1] if node.level <= len(package) else []
+                prefix = ".".join(base + ([node.module] if node.module else []))
+            else:
+                prefix = node.module or ""
+            if prefix:
+                names.append(prefix)
+            names.extend(f"{prefix}.{alias.name}" if prefix else alias.name
+                         for alias in node.names if alias.name != "*")
+    return tuple(dict.fromkeys(names))
+
+
+class ImportGraph:
+    """Static import graph of the Python files in a repository"""
+
+    def __init__(self, repo_path: str):
+        self.repo_path = repo_path
+        self.files: Set[str] = set()
+        self.tests: Set[str] = set()
+        self.deps: Dict[str, Set[str]] = {}
+        # Every dotted suffix of every module name -> files, so `import jira_service.adf` finds backend/jira_service/adf.py
+        self._modules: Dict[str, Set[str]] = defaultdict(set)
+        self.imports: Dict[str, Tuple[str, ...]] = {}
+        self.parsed = 0
+        self._build()
+
+    def _imports(self, path: str, stat: os.stat_result) -> Tuple[str, ...]:
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        with _parse_lock:
+            if key in _parse_cache:
+                _parse_cache.move_to_end(key)
+                return _parse_cache[key]
+        try:
+            with open(os.path.join(self.repo_path, path), "r", encoding="utf-8", errors="replace") as f:
+                source = f.read()
+        except OSError:
+            return ()
+        imports = parse_imports(source, _module_name(path), path.endswith("/__init__.py") or path == "__init__.py")
+        self.parsed += 1
+        with _parse_lock:
+            _parse_cache[key] = imports
+            while len(_parse_cache) > _PARSE_CACHE_SIZE:
+                _parse_cache.popitem(last=False)
+        return imports
+
+    def _build(self):
+        imports = self.imports
+        for path, stat in python_files(self.repo_path):
+            self.files.add(path)
+            if is_test_file(path):
+                self.tests.add(path)
+            parts = _module_name(path).split(".")
+            for start in range(len(parts)):
+                self._modules[".".join(parts[start:])].add(path)
+            imports[path] = self._imports(path, stat)
+
+        for path, names in imports.items():
+            deps = set()
+            for name in names:
+                deps.update(self.resolve(name, path))
+            deps.discard(path)
+            # A test module also runs every conftest.py above it
+            if path in self.tests:
+                directory = os.path.dirname(path)
+                while True:
+                    conftest = f"{directory}/conftest.py" if directory else "conftest.py"
+                    if conftest in self.files:
+                        deps.add(conftest)
+                    if not directory:
+                        break
+                    directory = os.path.dirname(directory)
+            self.deps[path] = deps
+
+    def resolve(self, name: str, importer: str) -> Set[str]:
+        """Repository files executed by importing a dotted name (the module and its parent packages)"""
+        resolved = set()
+        parts = name.split(".")
+        for end in range(len(parts), 0, -1):
+            candidates = self._modules.get(".".join(parts[:end]))
+            if candidates:
+                resolved.add(self._closest(candidates, importer))
+        return resolved
+
+    @staticmethod
+    def _closest(candidates: Set[str], importer: str) -> str:
+        """Pick the candidate sharing the longest directory prefix with the importer"""
+        if len(candidates) == 1:
+            return next(iter(candidates))
+        importer_dirs = importer.split("/")[:-1]
+
+        def shared(path: str) -> Tuple[int, str]:
+            count = 0
+            for a, b in zip(path.split("/")[:-1], importer_dirs):
+                if a != b:
+                    break
+                count += 1
+            return -count, path
+
+        return min(candidates, key=shared)
+
+    def external_modules(self) -> Set[str]:
+        """Top-level names imported by the repository that it does not provide itself (stdlib excluded)"""
+        stdlib = getattr(sys, "stdlib_module_names", frozenset())
+        external = set()
+        for path, names in self.imports.items():
+            for name in names:
+                top = name.split(".")[0]
+                if top and top not in stdlib and top not in external and not self.resolve(top, path):
+                    external.add(top)
+        return external
+
+    def dependents(self, paths: Iterable[str]) -> Set[str]:
+        """Files that import any of the paths, directly or transitively (the paths included)"""
+        reverse: Dict[str, Set[str]] = defaultdict(set)
+        for path, deps in self.deps.items():
+            for dep in deps:
+                reverse[dep].add(path)
+        seen = set(paths)
+        queue = deque(seen)
+        while queue:
+            for importer in reverse.get(queue.popleft(), ()):
+                if importer not in seen:
+                    seen.add(importer)
+                    queue.append(importer)
+        return seen
+
+    def affected_tests(self, changed_files: Iterable[str]) -> Tuple[Optional[List[str]], str]:
+        """Test files affected by a change, or None when the change cannot be mapped to tests"""
+        seeds = set()
+        for path in map(_normalize, changed_files):
+            name = os.path.basename(path)
+            if name in GLOBAL_FILES or (name.startswith("requirements") and name.endswith(".txt")):
+                return None, f"{path} affects the whole suite"
+            if path.endswith(INERT_SUFFIXES):
+                continue
+            if not path.endswith(".py"):
+                return None, f"{path} is not Python source"
+            if path not in self.files:
+                return None, f"{path} is not in the repository"
+            if name == "conftest.py":
+                directory = os.path.dirname(path)
+                seeds.update(test for test in self.tests if not directory or test.startswith(directory + "/"))
+            seeds.add(path)
+
+        tests = sorted(path for path in self.dependents(seeds) if path in self.tests)
+        return tests, f"{len(tests)} of {len(self.tests)} test files import the changed files"
+
+
+def load_settings(repo_path: str) -> QASettings:
+    """Selection settings for a repository: environment defaults, overridden by QA_CONFIG_FILE in the repository"""
+    settings = {"test_selection": QA_TEST_SELECTION, "run_full_suite": QA_RUN_FULL_SUITE, "fail_fast": QA_FAIL_FAST,
+                "result_cache": QA_RESULT_CACHE}
+    config_path = os.path.join(repo_path, QA_CONFIG_FILE)
+    if QA_CONFIG_FILE and os.path.isfile(config_path):
+        try:
+            with open(config_path) as f:
+                overrides = json.load(f)
+            settings.update({key: overrides[key] for key in settings if key in overrides})
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable QA config {config_path}: {str(e)}")
+    return QASettings(str(settings["test_selection"]).lower(), bool(settings["run_full_suite"]),
+                      bool(settings["fail_fast"]), bool(settings["result_cache"]))
+
+
+def rerunnable_nodeid(repo_path: str, nodeid: str) -> Optional[str]:
+    """
+    The node id to run a previously failed test with, or None if its module, class or function is gone
+
+    Parametrized ids become their function: the parameters may have changed as well.
+    """
+    path, *names = nodeid.split("::")
+    try:
+        with open(os.path.join(repo_path, path), "rb") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except OSError:
+        return None
+    except (SyntaxError, ValueError):
+        # The module fails to collect, which is a failure to report again
+        return path
+    names = names[:-1] + [names[-1].split("[")[0]] if names else []
+    body = tree.body
+    for name in names:
+        node = next((node for node in body if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef))
+                     and node.name == name), None)
+        if node is None:
+            return None
+        body = node.body
+    return "::".join([path] + names)
+
+
+def select_tests(repo_path: str, changed_files: Iterable[str], previous_failures: Optional[Iterable[str]] = None,
+                 force_full_run: bool = False) -> ImpactSelection:
+    """Decide which tests to run first for a change, and whether the rest of the suite follows"""
+    settings = load_settings(repo_path)
+    # Failed tests that are gone (e.g. a generated test that was renamed) cannot run again
+    previous = tuple(dict.fromkeys(filter(None, (rerunnable_nodeid(repo_path, nodeid)
+                                                 for nodeid in previous_failures or []))))
+    if force_full_run or QA_FORCE_FULL_RUN:
+        return ImpactSelection(None, "full run forced", False, previous, settings.fail_fast,
+                               CACHE_REFRESH if settings.result_cache else CACHE_OFF)
+    cache_mode = CACHE_USE if settings.result_cache else CACHE_OFF
+    changed_files = [path for path in changed_files if path]
+    if settings.test_selection != "impact":
+        return ImpactSelection(None, f"test selection is '{settings.test_selection}'", False, previous,
+                               settings.fail_fast, cache_mode)
+    if not changed_files:
+        return ImpactSelection(None, "no changed files reported", False, previous, settings.fail_fast, cache_mode)
+
+    try:
+        graph = ImportGraph(repo_path)
+    except Exception as e:
+        logger.warning(f"Could not build the import graph of {repo_path}: {str(e)}")
+        return ImpactSelection(None, f"import graph failed: {str(e)}", False, previous, settings.fail_fast,
+                               cache_mode)
+
+    tests, reason = graph.affected_tests(changed_files)
+    logger.info(f"Test selection for {len(changed_files)} changed files: {reason} "
+                f"({graph.parsed} of {len(graph.files)} files parsed)")
+    if tests is None:
+        return ImpactSelection(None, reason, False, previous, settings.fail_fast, cache_mode)
+    # Nothing is left to run after the selection when it already covers every test
+    return ImpactSelection(tests, reason, settings.run_full_suite and len(tests) < len(graph.tests), previous,
+                           settings.fail_fast, cache_mode)
@@ -0,0 +1,172 @@
+
+"""
+Per-test results from JUnit XML reports
+
+Every pytest run writes a JUnit XML report (junit_family=xunit1, which
+keeps the file and line of each test) that is streamed into one compact
+record per test: node id, status, duration and, for failures, where the
+test failed and the first line of the error. QA results, failure
+summaries and the duration history are built from these records instead
+of searching the console output.
+"""
+
+import os
+import re
+import logging
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+logger = logging.getLogger("qa-junit-report")
+
+# Longest error message kept per test
+MAX_MESSAGE_LENGTH = 300
+# `path/to/file.py:12: AssertionError` lines of pytest tracebacks
+TRACEBACK_LOCATION = re.compile(r"^(\S+\.py):(\d+): ", re.MULTILINE)
+# `E   ValueError: ...` lines, the exception in pytest tracebacks
+TRACEBACK_ERROR = re.compile(r"^E +(\S.*)$", re.MULTILINE)
+
+PASSED = "passed"
+FAILED = "failed"
+ERROR = "error"
+SKIPPED = "skipped"
+# Passed before on identical inputs and not run again (see result_cache)
+CACHED = "cached"
+
+
+class TestRecord(NamedTuple):
+    nodeid: str
+    file: str
+    status: str  # passed, failed, error, skipped or cached
+    duration: float
+    location: str  # file:line where the test failed (or is defined)
+    message: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.status in (PASSED, SKIPPED, CACHED)
+
+    def as_dict(self) -> Dict[str, Any]:
+        record = {"name": self.nodeid, "status": self.status, "duration": round(self.duration, 3),
+                  "location": self.location}
+        if self.message:
+            record["message"] = self.message
+        return record
+
+
+def junit_args(report_path: str) -> List[str]:
+    """pytest arguments that write a report parse_report understands"""
+    return [f"--junitxml={report_path}", "-o", "junit_family=xunit1"]
+
+
+def _relative(path: str, repo_path: str) -> str:
+    return os.path.relpath(os.path.join(repo_path, path), repo_path).replace(os.sep, "/")
+
+
+def _record(testcase: ET.Element, repo_path: str) -> Optional[TestRecord]:
+    classname = testcase.get("classname") or ""
+    test_file = testcase.get("file") or ""
+    if not test_file and classname:
+        # xunit2 reports only carry the dotted module path
+        test_file = classname.rsplit(".", 1)[0].replace(".", "/") + ".py"
+    if not test_file:
+        return None
+    test_file = _relative(test_file, repo_path)
+
+    # classname is the dotted module path followed by the test class, if any
+    module = test_file[:-3].replace("/", ".") if test_file.endswith(".py") else ""
+    parts = [test_file]
+    if module and classname.startswith(module + "."):
+        parts.extend(classname[len(module) + 1:].split("."))
+    name = testcase.get("name") or ""
+    # Collection errors are reported as a test named after the module
+    if classname or name != module:
+        parts.append(name)
+
+    status, message, location = PASSED, "", ""
+    line = testcase.get("line")
+    if line and line.isdigit():
+        location = f"{test_file}:{int(line) + 1}"
+    for child in testcase:
+        if child.tag in ("failure", "error"):
+            status = FAILED if child.tag == "failure" else ERROR
+            # The first `E` line names the exception, also for collection errors ("collection failure")
+            error = TRACEBACK_ERROR.search(child.text or "")
+            message = error.group(1) if error else (child.get("message") or "").strip().split("\n")[0]
+            message = message[:MAX_MESSAGE_LENGTH]
+            # The last frame of the traceback is where the test failed
+            frames = TRACEBACK_LOCATION.findall(child.text or "")
+            if frames:
+                location = f"{_relative(frames[-1][0], repo_path)}:{frames[-1][1]}"
+            break
+        if child.tag == SKIPPED:
+            status = SKIPPED
+            message = (child.get("message") or "").strip()[:MAX_MESSAGE_LENGTH]
+    return TestRecord("::".join(parts), test_file, status, float(testcase.get("time") or 0),
+                      location or test_file, message)
+
+
+def parse_report(report_path: str, repo_path: str) -> List[TestRecord]:
+    """Test records of a JUnit XML report, read incrementally"""
+    records = []
+    try:
+        for _, element in ET.iterparse(report_path):
+            if element.tag == "testcase":
+                record = _record(element, repo_path)
+                if record:
+                    records.append(record)
+                element.clear()
+    except (OSError, ET.ParseError) as e:
+        logger.warning(f"Could not read test report {report_path}: {str(e)}")
+    return records
+
+
+def module_durations(records: Iterable[TestRecord]) -> Dict[str, float]:
+    """Total duration of each test module"""
+    durations: Dict[str, float] = defaultdict(float)
+    for record in records:
+        durations[record.file] += record.duration
+    return dict(durations)
+
+
+def summarize(records: Iterable[TestRecord]) -> Dict[str, int]:
+    """Number of tests per status"""
+    counts = {PASSED: 0, FAILED: 0, ERROR: 0, SKIPPED: 0}
+    for record in records:
+        counts[record.status] = counts.get(record.status, 0) + 1
+    return counts
+
+
+def failure_summary(records: Iterable[TestRecord], limit: int = 3) -> str:
+    """One line per failed test (`location nodeid: message`), the first `limit` of them"""
+    failed = [record for record in records if not record.ok]
+    lines = [f"{record.location} {record.nodeid}" + (f": {record.message}" if record.message else "")
+             for record in failed[:limit]]
+    if len(failed) > limit:
+        lines.append(f"... and {len(failed) - limit} more failed tests")
+    return "\n".join(lines)
+
+
+def failed_tests(test_results: Optional[Iterable[Dict[str, Any]]]) -> List[str]:
+    """Node ids of the failed tests in QA test_results (records, or results holding records under `tests`)"""
+    failed = []
+    for result in test_results or []:
+        if not isinstance(result, dict):
+            continue
+        if "tests" in result:
+            failed.extend(failed_tests(result["tests"]))
+        elif result.get("status") in (FAILED, ERROR) and result.get("name"):
+            failed.append(result["name"])
+    return list(dict.fromkeys(failed))
+
+
+def previous_failures(retry_history: Optional[Iterable[Dict[str, Any]]]) -> List[str]:
+    """Tests that failed in the latest attempt that reached QA
+
+    They run first in the next attempt, so a still-broken fix fails quickly.
+    Attempts that ended before QA (e.g. the developer agent raised) carry no
+    QA results and are passed over.
+    """
+    qa_results = next((entry["qa_results"] for entry in reversed(list(retry_history or []))
+                       if isinstance(entry, dict) and entry.get("qa_results")), {})
+    return failed_tests(qa_results.get("test_results") if isinstance(qa_results, dict) else None)
@@ -0,0 +1,214 @@
+
+"""
+Streamed test output and live progress
+
+Test sessions used to be captured whole in memory and then logged at INFO.
+Their output is now read line by line as it is written: the last
+QA_OUTPUT_TAIL_LINES lines stay in memory (the part QA results and failure
+reports show) and the whole output goes to a gzip file in QA_OUTPUT_DIR,
+of which the newest QA_OUTPUT_KEEP_FILES are kept. The same lines feed the
+progress of the ticket's QA run (tests run, passed, failed so far, from
+pytest's progress characters), which the QA services expose while the run
+is going.
+"""
+
+import os
+import re
+import gzip
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("qa-output")
+
+# Lines of each test session kept in memory
+QA_OUTPUT_TAIL_LINES = int(os.environ.get("QA_OUTPUT_TAIL_LINES", "200"))
+# Directory of the compressed full outputs (not kept when empty)
+QA_OUTPUT_DIR = os.environ.get("QA_OUTPUT_DIR", "logs/qa_output")
+QA_OUTPUT_KEEP_FILES = int(os.environ.get("QA_OUTPUT_KEEP_FILES", "500"))
+
+# Longest line kept in memory; longer lines are cut in the tail (the file keeps them whole)
+MAX_LINE_LENGTH = 4000
+# Finished runs whose progress stays available
+KEEP_FINISHED_RUNS = 50
+
+# `tests/test_cart.py ..F.s   [ 40%]` and its continuation lines (`....  [ 80%]`)
+PROGRESS_LINE = re.compile(r"^(?:\S+\.py )?([.FEsxX]+)\s*(?:\[\s*\d+%\])?$")
+COLLECTED_LINE = re.compile(r"^collected (\d+) items?(?: / \d+ deselected / (\d+) selected)?")
+OUTCOMES = {".": "passed", "F": "failed", "E": "errors", "s": "skipped", "x": "skipped", "X": "passed"}
+
+
+class TestProgress:
+    """Counts of a ticket's QA run, updated from the output of its test sessions"""
+
+    def __init__(self, ticket_id: str):
+        self.ticket_id = ticket_id
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.phase = ""
+        self._lock = threading.Lock()
+        self._counts = {"collected": 0, "run": 0, "passed": 0, "failed": 0, "errors": 0, "skipped": 0,
+                        "cached": 0}
+        self._outputs: List[str] = []
+        # Outcomes already counted from the line pytest is still writing
+        self._pending = 0
+
+    def set_phase(self, phase: str):
+        with self._lock:
+            self.phase = phase
+
+    def add_output(self, path: str):
+        with self._lock:
+            self._outputs.append(path)
+
+    def add_cached(self, count: int):
+        """Tests reported from the result cache instead of being run"""
+        with self._lock:
+            self._counts["cached"] += count
+
+    def feed(self, line: str, complete: bool = True):
+        """Count the outcomes in one line of pytest output
+
+        pytest writes a module's progress characters one test at a time and
+        ends the line after the module's last test, so the line still being
+        written (complete=False) is counted as it grows.
+        """
+        line = line.rstrip()
+        collected = COLLECTED_LINE.match(line) if complete else None
+        progress = None if collected else PROGRESS_LINE.match(line)
+        with self._lock:
+            pending, self._pending = self._pending, 0
+            if collected:
+                self._counts["collected"] += int(collected.group(2) or collected.group(1))
+            if not progress:
+                return
+            outcomes = progress.group(1)
+            if not complete:
+                self._pending = len(outcomes)
+            for outcome in outcomes[pending:]:
+                self._counts["run"] += 1
+                self._counts[OUTCOMES[outcome]] += 1
+
+    def finish(self):
+        with self._lock:
+            self.finished_at = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            end = self.finished_at or time.time()
+            return dict(self._counts, ticket_id=self.ticket_id, phase=self.phase,
+                        running=self.finished_at is None, elapsed=round(end - self.started_at, 1),
+                        outputs=list(self._outputs))
+
+
+class OutputBuffer:
+    """Last lines of a test session in memory, all of it in a gzip file"""
+
+    def __init__(self, spill_path: Optional[str] = None, progress: Optional[TestProgress] = None,
+                 max_lines: Optional[int] = None):
+        self.spill_path = spill_path
+        self.progress = progress
+        self.lines = 0
+        self._tail: deque = deque(maxlen=max(1, QA_OUTPUT_TAIL_LINES if max_lines is None else max_lines))
+        self._partial = ""
+        self._file = None
+        if spill_path:
+            try:
+                os.makedirs(os.path.dirname(spill_path) or ".", exist_ok=True)
+                self._file = gzip.open(spill_path, "wt", encoding="utf-8", errors="replace")
+                if progress is not None:
+                    progress.add_output(spill_path)
+            except OSError as e:
+                logger.warning(f"Could not write test output to {spill_path}: {str(e)}")
+                self.spill_path = None
+
+    def write(self, text: str):
+        """Add a chunk of output; complete lines go to the tail and the progress"""
+        if not text:
+            return
+        if self._file is not None:
+            self._file.write(text)
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        if len(self._partial) > MAX_LINE_LENGTH:
+            # A huge line without newline: keep its start, as for any long line
+            lines.append(self._partial)
+            self._partial = ""
+        for line in lines:
+            self._add(line)
+        if self._partial and self.progress is not None:
+            self.progress.feed(self._partial, complete=False)
+
+    def _add(self, line: str):
+        self.lines += 1
+        self._tail.append(line if len(line) <= MAX_LINE_LENGTH else line[:MAX_LINE_LENGTH] + " [...]")
+        if self.progress is not None:
+            self.progress.feed(line)
+
+    def close(self):
+        if self._partial:
+            self._add(self._partial)
+            self._partial = ""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def getvalue(self) -> str:
+        """The kept lines, after a note on how many were left out and where to find them"""
+        text = "\n".join(self._tail)
+        if self.lines > len(self._tail):
+            where = f", full output in {self.spill_path}" if self.spill_path else ""
+            text = f"[{self.lines - len(self._tail)} earlier lines not shown{where}]\n" + text
+        return text
+
+
+def _prune_outputs():
+    try:
+        files = sorted((entry for entry in os.scandir(QA_OUTPUT_DIR) if entry.name.endswith(".log.gz")),
+                       key=lambda entry: entry.stat().st_mtime)
+        for entry in files[:max(0, len(files) - QA_OUTPUT_KEEP_FILES)]:
+            os.unlink(entry.path)
+    except OSError as e:
+        logger.warning(f"Could not prune test outputs in {QA_OUTPUT_DIR}: {str(e)}")
+
+
+def new_output(name: str, progress: Optional[TestProgress] = None) -> OutputBuffer:
+    """Output buffer of a test session, spilled to a new file in QA_OUTPUT_DIR"""
+    if not QA_OUTPUT_DIR:
+        return OutputBuffer(progress=progress)
+    label = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{progress.ticket_id}-{name}" if progress else name)
+    path = os.path.join(QA_OUTPUT_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{label}-{uuid.uuid4().hex[:8]}.log.gz")
+    buffer = OutputBuffer(path, progress)
+    _prune_outputs()
+    return buffer
+
+
+_runs: "OrderedDict[str, TestProgress]" = OrderedDict()
+_runs_lock = threading.Lock()
+
+
+def start_progress(ticket_id: Optional[str]) -> TestProgress:
+    """Progress of a new QA run for a ticket (replaces the ticket's previous run)"""
+    progress = TestProgress(ticket_id or "unknown")
+    with _runs_lock:
+        _runs.pop(progress.ticket_id, None)
+        _runs[progress.ticket_id] = progress
+        finished = [key for key, run in _runs.items() if run.finished_at is not None]
+        for key in finished[:max(0, len(finished) - KEEP_FINISHED_RUNS)]:
+            del _runs[key]
+    return progress
+
+
+def get_progress(ticket_id: str) -> Optional[Dict[str, Any]]:
+    with _runs_lock:
+        progress = _runs.get(ticket_id)
+    return progress.snapshot() if progress else None
+
+
+def all_progress() -> List[Dict[str, Any]]:
+    with _runs_lock:
+        runs = list(_runs.values())
+    return [progress.snapshot() for progress in runs]
@@ -0,0 +1,292 @@
+
+"""
+Content-addressed test result cache
+
+Tickets often touch disjoint parts of a repository, yet every QA run used
+to execute every test again. A passing test is now remembered under a key
+built from its node id and the content of everything it can observe: the
+source of its module and of every file the module reaches through the
+static import graph (conftest.py files included), the dependency files of
+the repository (requirements, lockfiles, pyproject.toml, ...), the
+installed distributions, the Python version and the pytest options. Later
+runs, in any workspace and for any ticket, report a test with a cached
+pass on the same key as cached instead of running it; a module whose
+tests all have one is not started at all. Only passes are cached.
+Imports the graph cannot see (importlib, plugins, data files) are not
+part of the key, so the cache can be turned off per repository
+(`result_cache` in QA_CONFIG_FILE), and a forced full run executes every
+test and refreshes the cache. The database keeps the
+QA_RESULT_CACHE_MAX_ENTRIES most recently used tests.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict, deque
+from importlib import metadata
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .impact_analysis import CACHE_USE, GLOBAL_FILES, SKIP_DIRS, ImportGraph
+from .junit_report import CACHED, PASSED, TestRecord
+
+logger = logging.getLogger("qa-result-cache")
+
+# SQLite database of cached passes (in memory only when empty)
+QA_RESULT_CACHE_PATH = os.environ.get("QA_RESULT_CACHE_PATH", "logs/qa_results.sqlite3")
+# Cached tests kept; the least recently used are evicted beyond this
+QA_RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("QA_RESULT_CACHE_MAX_ENTRIES", "200000"))
+
+# Arguments that do not change what a test does, left out of the key (with their values, if any)
+IGNORED_OPTIONS = {"-x": 0, "--exitfirst": 0, "--deselect": 1}
+
+_HASH_CACHE_SIZE = 50000
+# (full path, size, mtime_ns, inode) -> sha256 of the content
+_hash_cache: "OrderedDict[Tuple[str, int, int, int], str]" = OrderedDict()
+_hash_lock = threading.Lock()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cached_tests (
+    cache_key TEXT PRIMARY KEY,
+    module_key TEXT NOT NULL,
+    nodeid TEXT NOT NULL,
+    duration REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cached_tests_module ON cached_tests (module_key);
+CREATE INDEX IF NOT EXISTS cached_tests_used ON cached_tests (used_at);
+CREATE TABLE IF NOT EXISTS cached_modules (
+    module_key TEXT PRIMARY KEY,
+    test_file TEXT NOT NULL,
+    nodeids TEXT NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cached_modules_used ON cached_modules (used_at);
+"""
+
+
+class CachePlan(NamedTuple):
+    module_keys: Dict[str, str]  # test module -> key of its inputs (modules that can be cached)
+    cached: List[TestRecord]  # Tests reported from the cache
+    skipped_files: List[str]  # Modules whose tests are all cached; they are not run
+    deselected: List[str]  # Cached tests of modules that still run
+
+
+def file_hash(path: str) -> Optional[str]:
+    """sha256 of a file's content, kept per path, size, mtime and inode"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (path, stat.st_size, stat.st_mtime_ns, stat.st_ino)
+    with _hash_lock:
+        if key in _hash_cache:
+            _hash_cache.move_to_end(key)
+            return _hash_cache[key]
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    with _hash_lock:
+        _hash_cache[key] = digest.hexdigest()
+        while len(_hash_cache) > _HASH_CACHE_SIZE:
+            _hash_cache.popitem(last=False)
+    return digest.hexdigest()
+
+
+def dependency_files(repo_path: str) -> List[str]:
+    """Repository paths of the files declaring dependencies or pytest configuration"""
+    found = []
+    for root, dirs, files in os.walk(repo_path):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.endswith(".egg-info"))
+        for name in sorted(files):
+            if name in GLOBAL_FILES or (name.startswith("requirements") and name.endswith(".txt")):
+                found.append(os.path.relpath(os.path.join(root, name), repo_path).replace(os.sep, "/"))
+    return found
+
+
+def _options(command: List[str]) -> List[str]:
+    """The pytest command without the arguments that only choose which tests run or when to stop"""
+    options, skip = [], 0
+    for arg in command:
+        if skip:
+            skip -= 1
+        elif arg in IGNORED_OPTIONS:
+            skip = IGNORED_OPTIONS[arg]
+        elif not arg.startswith(("--deselect=", "--junitxml=")):
+            options.append(arg)
+    # The interpreter is part of the environment key, not its path
+    return options[1:] if options[1:3] == ["-m", "pytest"] else options
+
+
+def environment_key(repo_path: str, command: List[str]) -> str:
+    """Hash of what every test of a repository shares: dependencies, interpreter and pytest options"""
+    digest = hashlib.sha256()
+    digest.update(sys.version.encode())
+    digest.update(json.dumps(_options(command)).encode())
+    for path in dependency_files(repo_path):
+        digest.update(f"\0{path}\0{file_hash(os.path.join(repo_path, path))}".encode())
+    distributions = sorted(f"{dist.metadata['Name']}=={dist.version}" for dist in metadata.distributions())
+    digest.update("\0".join(distributions).encode())
+    return digest.hexdigest()
+
+
+def module_keys(repo_path: str, test_files: Iterable[str], command: List[str],
+                graph: Optional[ImportGraph] = None) -> Dict[str, str]:
+    """Key of each test module's inputs: the environment and the content of its transitive imports"""
+    graph = graph or ImportGraph(repo_path)
+    environment = environment_key(repo_path, command)
+    keys = {}
+    for test_file in test_files:
+        if test_file not in graph.files:
+            continue
+        closure: Set[str] = {test_file}
+        queue = deque(closure)
+        while queue:
+            for dep in graph.deps.get(queue.popleft(), ()):
+                if dep not in closure:
+                    closure.add(dep)
+                    queue.append(dep)
+        digest = hashlib.sha256(f"{environment}\0{test_file}".encode())
+        for path in sorted(closure):
+            content = file_hash(os.path.join(repo_path, path))
+            if content is None:
+                break
+            digest.update(f"\0{path}\0{content}".encode())
+        else:
+            keys[test_file] = digest.hexdigest()
+    return keys
+
+
+def _test_key(module_key: str, nodeid: str) -> str:
+    return hashlib.sha256(f"{module_key}\0{nodeid}".encode()).hexdigest()
+
+
+class ResultCache:
+    """Passing tests, by the hash of their inputs"""
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.path = QA_RESULT_CACHE_PATH if path is None else path
+        self.max_entries = QA_RESULT_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        if self.path and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path or ":memory:", check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+
+    def plan(self, repo_path: str, test_files: List[str], command: List[str], mode: str = CACHE_USE) -> CachePlan:
+        """Which tests of the modules to run can be reported from the cache"""
+        keys = module_keys(repo_path, test_files, command)
+        if mode != CACHE_USE or not keys:
+            return CachePlan(keys, [], [], [])
+
+        by_key = {key: test_file for test_file, key in keys.items()}
+        passes: Dict[str, Dict[str, float]] = {}
+        modules: Dict[str, List[str]] = {}
+        with self._lock:
+            module_list = list(by_key)
+            # Stay below SQLite's bound-parameter limit
+            for start in range(0, len(module_list), 500):
+                chunk = module_list[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                for module_key, nodeid, duration in self._conn.execute(
+                        f"SELECT module_key, nodeid, duration FROM cached_tests WHERE module_key IN ({marks})", chunk):
+                    passes.setdefault(module_key, {})[nodeid] = duration
+                for module_key, nodeids in self._conn.execute(
+                        f"SELECT module_key, nodeids FROM cached_modules WHERE module_key IN ({marks})", chunk):
+                    modules[module_key] = json.loads(nodeids)
+
+        cached, skipped, deselected = [], [], []
+        for module_key, tests in passes.items():
+            test_file = by_key[module_key]
+            cached.extend(TestRecord(nodeid, test_file, CACHED, duration, test_file)
+                          for nodeid, duration in sorted(tests.items()))
+            # A module is only left out when every test it had on these inputs passed
+            if module_key in modules and set(modules[module_key]) <= set(tests):
+                skipped.append(test_file)
+            else:
+                deselected.extend(sorted(tests))
+        self._touch([_test_key(keys[record.file], record.nodeid) for record in cached],
+                    [keys[test_file] for test_file in skipped])
+        logger.info(f"Result cache: {len(cached)} tests of {len(passes)} modules passed before on identical inputs, "
+                    f"{len(skipped)} of {len(test_files)} modules need not run")
+        return CachePlan(keys, cached, skipped, deselected)
+
+    def _touch(self, test_keys: List[str], module_keys: List[str]):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE cached_tests SET used_at = ? WHERE cache_key = ?",
+                                   [(now, key) for key in test_keys])
+            self._conn.executemany("UPDATE cached_modules SET used_at = ? WHERE module_key = ?",
+                                   [(now, key) for key in module_keys])
+
+    def record(self, plan: CachePlan, records: Iterable[TestRecord], partial_files: Iterable[str] = ()):
+        """Remember the passes of a run and which modules passed completely
+
+        partial_files are modules that ran with tests left out by the caller
+        (e.g. tests that already ran first); they cannot be skipped as a whole.
+        """
+        now = time.time()
+        partial = set(partial_files)
+        deselected: Dict[str, List[str]] = {}
+        for nodeid in plan.deselected:
+            deselected.setdefault(nodeid.split("::")[0], []).append(nodeid)
+        passed, failed = [], []
+        ran: Dict[str, List[TestRecord]] = {}
+        for record in records:
+            module_key = plan.module_keys.get(record.file)
+            if module_key is None or record.status == CACHED:
+                continue
+            ran.setdefault(record.file, []).append(record)
+            if record.status == PASSED:
+                passed.append((_test_key(module_key, record.nodeid), module_key, record.nodeid, record.duration, now))
+            else:
+                failed.append((_test_key(module_key, record.nodeid),))
+        complete = [(plan.module_keys[test_file], test_file,
+                     json.dumps(sorted({record.nodeid for record in tests} | set(deselected.get(test_file, [])))), now)
+                    for test_file, tests in ran.items()
+                    if test_file not in partial and all(record.status == PASSED for record in tests)]
+
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO cached_tests (cache_key, module_key, nodeid, duration, "
+                                   "used_at) VALUES (?, ?, ?, ?, ?)", passed)
+            self._conn.executemany("DELETE FROM cached_tests WHERE cache_key = ?", failed)
+            self._conn.executemany("INSERT OR REPLACE INTO cached_modules (module_key, test_file, nodeids, used_at) "
+                                   "VALUES (?, ?, ?, ?)", complete)
+            self._evict()
+
+    def _evict(self):
+        for table in ("cached_tests", "cached_modules"):
+            count = self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(f"DELETE FROM {table} WHERE rowid IN "
+                                   f"(SELECT rowid FROM {table} ORDER BY used_at LIMIT ?)", (count - self.max_entries,))
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cached_tests").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Process-wide result cache"""
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache()
+        return _result_cache
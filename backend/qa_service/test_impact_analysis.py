@@ -0,0 +1,158 @@
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qa_service.impact_analysis import ImportGraph, parse_imports, select_tests
+from qa_service.junit_report import failed_tests, previous_failures
+from qa_service import output_stream, result_cache, shard_runner
+from qa_service.result_cache import ResultCache
+from qa_service.shard_runner import TimingDB
+from agent_framework.qa_agent import QAAgent
+
+REPO = {
+    "shop/__init__.py": "",
+    "shop/pricing.py": "def total(items):\n    return sum(items)\n",
+    "shop/cart.py": "from .pricing import total\n\ndef checkout(items):\n    return total(items)\n",
+    "shop/text.py": "def shout(value):\n    return value.upper()\n",
+    "tests/conftest.py": "",
+    "tests/test_cart.py": "from shop.cart import checkout\n\ndef test_checkout():\n    assert checkout([1, 2]) == 3\n",
+    "tests/test_text.py": "from shop import text\n\ndef test_shout():\n    assert text.shout('a') == 'A'\n",
+    "README.md": "# shop\n",
+}
+
+
+class TestImpactAnalysis(unittest.TestCase):
+    """Test cases for import-graph based test selection"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.repo = self.temp_dir.name
+        for path, content in REPO.items():
+            os.makedirs(os.path.dirname(os.path.join(self.repo, path)), exist_ok=True)
+            with open(os.path.join(self.repo, path), "w") as f:
+                f.write(content)
+        # Every test starts without cached passes or timings from earlier runs, and keeps its output in the temp dir
+        cache = ResultCache(path="")
+        self.addCleanup(cache.close)
+        timing_db = TimingDB(path="")
+        self.addCleanup(timing_db.close)
+        patchers = [
+            patch.object(result_cache, "_result_cache", cache),
+            patch.object(shard_runner, "_timing_db", timing_db),
+            patch.object(output_stream, "QA_OUTPUT_DIR", os.path.join(self.temp_dir.name, ".qa_output")),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_changes_map_to_importing_tests(self):
+        """Only tests reaching a changed file are selected; unmappable changes select the whole suite"""
+        graph = ImportGraph(self.repo)
+
+        self.assertEqual(graph.affected_tests(["shop/pricing.py"])[0], ["tests/test_cart.py"])
+        self.assertEqual(graph.affected_tests(["./shop/text.py", "README.md"])[0], ["tests/test_text.py"])
+        self.assertEqual(graph.affected_tests(["tests/conftest.py"])[0], ["tests/test_cart.py", "tests/test_text.py"])
+        self.assertIsNone(graph.affected_tests(["setup.cfg"])[0])
+        self.assertIsNone(graph.affected_tests(["shop/fixtures.json"])[0])
+        self.assertEqual(parse_imports("from ..core import api\n", "pkg.sub.mod", False), ("pkg.core", "pkg.core.api"))
+        self.assertEqual(ImportGraph(self.repo).parsed, 0)
+
+    def test_full_suite_is_configured_per_repo(self):
+        """The repository config decides whether the rest of the suite runs after the selection"""
+        selection = select_tests(self.repo, ["shop/cart.py"])
+        self.assertEqual((selection.tests, selection.run_full_suite), (["tests/test_cart.py"], True))
+
+        with open(os.path.join(self.repo, ".bugfix-qa.json"), "w") as f:
+            json.dump({"run_full_suite": False}, f)
+        self.assertFalse(select_tests(self.repo, ["shop/cart.py"]).run_full_suite)
+
+        with open(os.path.join(self.repo, ".bugfix-qa.json"), "w") as f:
+            json.dump({"test_selection": "all"}, f)
+        self.assertIsNone(select_tests(self.repo, ["shop/cart.py"]).tests)
+
+    def test_qa_agent_runs_affected_tests_first(self):
+        """The QA agent runs the selected tests, then the rest of the suite without them"""
+        with patch.dict(os.environ, {"REPO_PATH": self.repo}):
+            success, output = QAAgent()._run_selected_tests("python -m pytest -p no:cacheprovider",
+                                                            select_tests(self.repo, ["shop/cart.py"]))
+
+        self.assertTrue(success)
+        first, rest = output.split("test session starts")[1:]
+        self.assertIn("tests/test_cart.py .", first)
+        self.assertNotIn("test_text", first)
+        self.assertIn("tests/test_text.py .", rest)
+        self.assertIn("collected 1 item", rest)
+
+    def test_previous_failures_run_first(self):
+        """Tests that failed in the previous attempt run before the others; fail_fast stops there"""
+        previous = failed_tests([{"name": "agg", "status": "fail", "tests": [
+            {"name": "tests/test_text.py::test_shout", "status": "failed"},
+            {"name": "tests/test_cart.py::test_checkout", "status": "passed"}]},
+            {"name": "tests/test_removed.py::test_gone", "status": "error"}])
+        self.assertEqual(previous, ["tests/test_text.py::test_shout", "tests/test_removed.py::test_gone"])
+        with open(os.path.join(self.repo, ".bugfix-qa.json"), "w") as f:
+            json.dump({"fail_fast": True}, f)
+        with open(os.path.join(self.repo, "shop/text.py"), "w") as f:
+            f.write("def shout(value):\n    return value\n")
+
+        selection = select_tests(self.repo, ["shop/cart.py"], previous)
+        self.assertEqual((selection.previous_failures, selection.fail_fast), (("tests/test_text.py::test_shout",), True))
+        records = []
+        with patch.dict(os.environ, {"REPO_PATH": self.repo}):
+            success, output = QAAgent()._run_selected_tests("python -m pytest -p no:cacheprovider", selection,
+                                                            records=records)
+        self.assertFalse(success)
+        self.assertEqual([(record.nodeid, record.status) for record in records],
+                         [("tests/test_text.py::test_shout", "failed")])
+
+        os.remove(os.path.join(self.repo, ".bugfix-qa.json"))
+        with open(os.path.join(self.repo, "shop/text.py"), "w") as f:
+            f.write(REPO["shop/text.py"])
+        records = []
+        with patch.dict(os.environ, {"REPO_PATH": self.repo}):
+            success, output = QAAgent()._run_selected_tests("python -m pytest -p no:cacheprovider",
+                                                            select_tests(self.repo, ["shop/cart.py"], previous),
+                                                            records=records)
+        self.assertTrue(success)
+        self.assertEqual([record.nodeid for record in records],
+                         ["tests/test_text.py::test_shout", "tests/test_cart.py::test_checkout"])
+
+    def test_previous_failures_that_no_longer_collect_are_dropped(self):
+        """A renamed test is not rerun (pytest would reject the whole run); parametrized ids rerun their function"""
+        with open(os.path.join(self.repo, "tests/test_params.py"), "w") as f:
+            f.write("import pytest\n\nclass TestValues:\n    @pytest.mark.parametrize('value', [2, 4])\n"
+                    "    def test_even(self, value):\n        assert value % 2 == 0\n")
+        previous = ["tests/test_text.py::test_old_name", "tests/test_params.py::TestValues::test_even[3]",
+                    "tests/test_params.py::TestGone::test_even", "tests/test_text.py::test_shout"]
+
+        selection = select_tests(self.repo, ["shop/cart.py"], previous)
+        self.assertEqual(selection.previous_failures,
+                         ("tests/test_params.py::TestValues::test_even", "tests/test_text.py::test_shout"))
+        records = []
+        with patch.dict(os.environ, {"REPO_PATH": self.repo}):
+            success, output = QAAgent()._run_selected_tests("python -m pytest -p no:cacheprovider", selection,
+                                                            records=records)
+        self.assertTrue(success, output)
+        self.assertEqual(len(records), 4)
+
+    def test_previous_failures_skip_attempts_without_qa(self):
+        """An attempt that ended before QA (the developer agent raised) does not hide earlier QA failures"""
+        failing = {"test_results": [{"name": "tests/test_text.py::test_shout", "status": "failed"}]}
+        history = [{"attempt": 1, "qa_results": failing}, {"attempt": 2, "error": "DeveloperAgent failed"}]
+
+        self.assertEqual(previous_failures(history), ["tests/test_text.py::test_shout"])
+        self.assertEqual(previous_failures([{"attempt": 1, "error": "DeveloperAgent failed"}]), [])
+        self.assertEqual(previous_failures([{"attempt": 1, "qa_results": None}]), [])
+        self.assertEqual(previous_failures([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qa_service.junit_report import failure_summary, module_durations, summarize
+from qa_service.shard_runner import TimingDB, run_shards
+from qa_service.impact_analysis import select_tests
+from qa_service import output_stream, result_cache, shard_runner
+from qa_service.result_cache import ResultCache
+from agent_framework.qa_agent import QAAgent
+
+TESTS = {
+    "tests/test_checks.py": (
+        "import pytest\n"
+        "\n"
+        "def expect_two(value):\n"
+        "    assert value == 2\n"
+        "\n"
+        "def test_ok():\n"
+        "    pass\n"
+        "\n"
+        "class TestValues:\n"
+        "    def test_bad(self):\n"
+        "        expect_two(1)\n"
+        "\n"
+        "@pytest.mark.skip(reason='not yet')\n"
+        "def test_later():\n"
+        "    pass\n"
+    ),
+    "tests/test_imports.py": "import no_such_module\n",
+}
+
+
+class TestJUnitReport(unittest.TestCase):
+    """Test cases for per-test results read from JUnit reports"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.repo = self.temp_dir.name
+        for path, content in TESTS.items():
+            os.makedirs(os.path.dirname(os.path.join(self.repo, path)), exist_ok=True)
+            with open(os.path.join(self.repo, path), "w") as f:
+                f.write(content)
+        self.timing_db = TimingDB(path="")
+        self.addCleanup(self.timing_db.close)
+        # Every test starts without cached passes from earlier runs, and keeps its output in the temp dir
+        cache = ResultCache(path="")
+        self.addCleanup(cache.close)
+        patchers = [
+            patch.object(result_cache, "_result_cache", cache),
+            patch.object(shard_runner, "_timing_db", self.timing_db),
+            patch.object(output_stream, "QA_OUTPUT_DIR", os.path.join(self.temp_dir.name, ".qa_output")),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_shards_report_each_test(self):
+        """Each test gets its node id, status, duration and the line it failed on"""
+        results = run_shards([sys.executable, "-m", "pytest", "-p", "no:cacheprovider"], self.repo, list(TESTS),
+                             workers=2, timing_db=self.timing_db)
+        records = {record.nodeid: record for result in results for record in result.tests}
+
+        self.assertEqual(sorted(records), ["tests/test_checks.py::TestValues::test_bad",
+                                           "tests/test_checks.py::test_later", "tests/test_checks.py::test_ok",
+                                           "tests/test_imports.py"])
+        bad = records["tests/test_checks.py::TestValues::test_bad"]
+        self.assertEqual((bad.status, bad.location, bad.message), ("failed", "tests/test_checks.py:4", "assert 1 == 2"))
+        self.assertEqual(records["tests/test_checks.py::test_later"].message, "not yet")
+        self.assertEqual(records["tests/test_imports.py"].status, "error")
+        self.assertIn("No module named 'no_such_module'", records["tests/test_imports.py"].message)
+        self.assertEqual(summarize(records.values()), {"passed": 1, "failed": 1, "error": 1, "skipped": 1})
+        self.assertEqual(set(module_durations(records.values())), set(TESTS))
+        self.assertEqual(failure_summary(records.values(), limit=1).splitlines(), [
+            "tests/test_checks.py:4 tests/test_checks.py::TestValues::test_bad: assert 1 == 2",
+            "... and 1 more failed tests"])
+
+    def test_qa_agent_results_come_from_reports(self):
+        """The QA agent returns compact per-test records and summarizes the failures from them"""
+        records = []
+        with patch.dict(os.environ, {"REPO_PATH": self.repo}):
+            success, output = QAAgent()._run_selected_tests("python -m pytest -p no:cacheprovider",
+                                                            select_tests(self.repo, ["tests/test_checks.py"]),
+                                                            records=records)
+        agent = QAAgent()
+
+        self.assertFalse(success)
+        self.assertEqual([result["status"] for result in agent._parse_test_output(output, records)],
+                         ["passed", "failed", "skipped"])
+        self.assertEqual(agent._parse_test_output(output, records)[1],
+                         {"name": "tests/test_checks.py::TestValues::test_bad", "status": "failed",
+                          "duration": round(records[1].duration, 3), "location": "tests/test_checks.py:4",
+                          "message": "assert 1 == 2"})
+        self.assertEqual(agent._extract_failure_summary(output, records),
+                         "tests/test_checks.py:4 tests/test_checks.py::TestValues::test_bad: assert 1 == 2")
+        self.assertEqual(agent._parse_test_output("crashed", []), [{"raw_output": "crashed"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+
+import os
+import sys
+import gzip
+import time
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qa_service import output_stream
+from qa_service.output_stream import OutputBuffer, get_progress, new_output, start_progress
+from qa_service.warm_pool import run_cold, run_pytest
+
+TESTS = {
+    "test_noisy.py": (
+        "import time\n"
+        "\n"
+        "def test_quick():\n"
+        "    pass\n"
+        "\n"
+        "def test_noisy():\n"
+        "    for line in range(500):\n"
+        "        print('noise', line)\n"
+        "    assert False\n"
+        "\n"
+        "def test_slow():\n"
+        "    time.sleep(3)\n"
+    ),
+}
+
+
+class TestOutputStream(unittest.TestCase):
+    """Test cases for streamed test output and live progress"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.repo = os.path.join(self.temp_dir.name, "repo")
+        os.makedirs(self.repo)
+        for path, content in TESTS.items():
+            with open(os.path.join(self.repo, path), "w") as f:
+                f.write(content)
+        patcher = patch.object(output_stream, "QA_OUTPUT_DIR", os.path.join(self.temp_dir.name, "outputs"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_progress_is_live_and_output_bounded(self):
+        """Progress counts update while the session runs; memory keeps the tail, the file everything"""
+        progress = start_progress("PROJ-1")
+        with patch.object(output_stream, "QA_OUTPUT_TAIL_LINES", 20):
+            output = new_output("session", progress)
+        result = {}
+        session = threading.Thread(target=lambda: result.update(outcome=run_pytest(
+            [sys.executable, "-m", "pytest", "-p", "no:cacheprovider", "test_noisy.py"], self.repo, timeout=60,
+            output=output)))
+        session.start()
+
+        deadline = time.monotonic() + 30
+        while get_progress("PROJ-1")["run"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertTrue(session.is_alive())
+        self.assertEqual(get_progress("PROJ-1")["failed"], 1)
+        session.join()
+        progress.finish()
+
+        returncode, text = result["outcome"]
+        self.assertEqual(returncode, 1)
+        self.assertEqual(len(text.splitlines()), 21)
+        self.assertIn("earlier lines not shown, full output in", text.splitlines()[0])
+        self.assertIn("1 failed, 2 passed", text)
+        with gzip.open(output.spill_path, "rt") as f:
+            self.assertIn("noise 499", f.read())
+        snapshot = get_progress("PROJ-1")
+        self.assertEqual({key: snapshot[key] for key in ("collected", "run", "passed", "failed", "running")},
+                         {"collected": 3, "run": 3, "passed": 2, "failed": 1, "running": False})
+
+    def test_cold_session_is_streamed_and_stopped(self):
+        """A cold session streams into the buffer and is killed when asked to stop"""
+        stop = threading.Event()
+        output = OutputBuffer(max_lines=5)
+        threading.Timer(1.5, stop.set).start()
+        started = time.monotonic()
+
+        returncode, text = run_cold([sys.executable, "-c", "import time\nfor i in range(100):\n    print(i)\n"
+                                     "time.sleep(30)"], self.repo, stop=stop, output=output)
+
+        self.assertIsNone(returncode)
+        self.assertLess(time.monotonic() - started, 15)
+        self.assertEqual(text.splitlines()[1:], ["95", "96", "97", "98", "99"])
+        self.assertEqual(output.lines, 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qa_service import output_stream
+from qa_service.impact_analysis import CACHE_OFF, CACHE_REFRESH, CACHE_USE, select_tests
+from qa_service.junit_report import summarize
+from qa_service.result_cache import ResultCache, module_keys
+from qa_service.shard_runner import TimingDB, merged_output, run_shards
+
+FILES = {
+    "shop/__init__.py": "",
+    "shop/cart.py": "def total(items):\n    return sum(items)\n",
+    "shop/text.py": "def shout(text):\n    return text.upper()\n",
+    "tests/test_cart.py": (
+        "from shop.cart import total\n"
+        "\n"
+        "def test_total():\n"
+        "    assert total([1, 2]) == 3\n"
+        "\n"
+        "def test_empty():\n"
+        "    assert total([]) == 0\n"
+    ),
+    "tests/test_text.py": (
+        "from shop.text import shout\n"
+        "\n"
+        "def test_shout():\n"
+        "    assert shout('a') == 'A'\n"
+        "\n"
+        "def test_whisper():\n"
+        "    assert shout('A') == 'a'\n"
+    ),
+}
+TEST_FILES = ["tests/test_cart.py", "tests/test_text.py"]
+COMMAND = [sys.executable, "-m", "pytest", "-p", "no:cacheprovider"]
+
+
+class TestResultCache(unittest.TestCase):
+    """Test cases for the content-addressed test result cache"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.repo = self.temp_dir.name
+        for path, content in FILES.items():
+            self.write(path, content)
+        self.timing_db = TimingDB(path="")
+        self.addCleanup(self.timing_db.close)
+        self.cache = ResultCache(path="")
+        self.addCleanup(self.cache.close)
+        patcher = patch.object(output_stream, "QA_OUTPUT_DIR", os.path.join(self.temp_dir.name, ".qa_output"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, path, content):
+        os.makedirs(os.path.dirname(os.path.join(self.repo, path)), exist_ok=True)
+        with open(os.path.join(self.repo, path), "w") as f:
+            f.write(content)
+
+    def run_tests(self, cache_mode=CACHE_USE):
+        results = run_shards(COMMAND, self.repo, TEST_FILES, workers=2, timing_db=self.timing_db,
+                             cache_mode=cache_mode, result_cache=self.cache)
+        return results, {record.nodeid: record.status for result in results for record in result.tests}
+
+    def test_passes_are_reused_until_an_input_changes(self):
+        """Tests with a cached pass are not run again; changing an imported file invalidates them"""
+        _, first = self.run_tests()
+        self.assertEqual(sorted(first.values()), ["failed", "passed", "passed", "passed"])
+
+        results, second = self.run_tests()
+        self.assertEqual(second, {"tests/test_cart.py::test_total": "cached", "tests/test_cart.py::test_empty": "cached",
+                                  "tests/test_text.py::test_shout": "cached", "tests/test_text.py::test_whisper": "failed"})
+        # test_cart.py passed completely and is not started; only the failing test of test_text.py runs
+        self.assertEqual([result.shard.test_files for result in results if not result.cached], [["tests/test_text.py"]])
+        self.assertIn("3 tests passed before on identical inputs", merged_output(results))
+        self.assertEqual(summarize(record for result in results for record in result.tests),
+                         {"passed": 0, "failed": 1, "error": 0, "skipped": 0, "cached": 3})
+
+        self.write("shop/cart.py", "def total(items):\n    return sum(items, 0)\n")
+        _, third = self.run_tests()
+        self.assertEqual(third["tests/test_cart.py::test_total"], "passed")
+        self.assertEqual(third["tests/test_text.py::test_shout"], "cached")
+
+    def test_refresh_runs_everything_and_cache_is_bounded(self):
+        """A refresh runs every test but still records passes; the least recently used entries are evicted"""
+        self.run_tests()
+        _, refreshed = self.run_tests(CACHE_REFRESH)
+        self.assertNotIn("cached", refreshed.values())
+        _, cached = self.run_tests()
+        self.assertEqual(list(cached.values()).count("cached"), 3)
+
+        small = ResultCache(path="", max_entries=2)
+        self.addCleanup(small.close)
+        plan = small.plan(self.repo, TEST_FILES, COMMAND)
+        small.record(plan, [record for result in run_shards(COMMAND, self.repo, TEST_FILES, timing_db=self.timing_db)
+                            for record in result.tests])
+        self.assertEqual(small.size(), 2)
+
+    def test_keys_follow_the_import_closure_and_dependencies(self):
+        """A module's key covers what it imports, the dependency files and the pytest options"""
+        keys = module_keys(self.repo, TEST_FILES, COMMAND)
+        self.write("shop/text.py", "def shout(text):\n    return text.upper() + ''\n")
+        changed = module_keys(self.repo, TEST_FILES, COMMAND)
+        self.assertEqual(keys["tests/test_cart.py"], changed["tests/test_cart.py"])
+        self.assertNotEqual(keys["tests/test_text.py"], changed["tests/test_text.py"])
+
+        self.assertEqual(module_keys(self.repo, TEST_FILES, COMMAND + ["-x", "--deselect", "tests/test_cart.py::a"]),
+                         changed)
+        self.assertNotEqual(module_keys(self.repo, TEST_FILES, COMMAND + ["-k", "total"]), changed)
+        self.write("requirements.txt", "requests==2.31.0\n")
+        self.assertNotEqual(module_keys(self.repo, TEST_FILES, COMMAND), changed)
+
+    def test_cache_mode_follows_settings(self):
+        """The cache is used by default, refreshed by a forced full run and can be turned off per repository"""
+        self.assertEqual(select_tests(self.repo, ["shop/cart.py"]).cache_mode, CACHE_USE)
+        forced = select_tests(self.repo, ["shop/cart.py"], force_full_run=True)
+        self.assertEqual((forced.tests, forced.cache_mode), (None, CACHE_REFRESH))
+
+        self.write(".bugfix-qa.json", json.dumps({"result_cache": False}))
+        self.assertEqual(select_tests(self.repo, ["shop/cart.py"]).cache_mode, CACHE_OFF)
+
+
+if __name__ == "__main__":
+    unittest.main()
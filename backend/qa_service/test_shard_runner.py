@@ -0,0 +1,85 @@
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qa_service import output_stream, shard_runner
+from qa_service.shard_runner import TimingDB, merged_output, plan_shards, run_shards
+
+TESTS = {
+    "tests/test_fast.py": "def test_fast():\n    assert True\n",
+    "tests/test_broken.py": "def test_broken():\n    assert 1 == 2\n",
+    "tests/test_slow.py": "import time\n\ndef test_slow():\n    time.sleep(30)\n",
+}
+
+
+class TestShardRunner(unittest.TestCase):
+    """Test cases for duration-balanced test shards"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.repo = self.temp_dir.name
+        for path, content in TESTS.items():
+            os.makedirs(os.path.dirname(os.path.join(self.repo, path)), exist_ok=True)
+            with open(os.path.join(self.repo, path), "w") as f:
+                f.write(content)
+        self.timing_db = TimingDB(path="")
+        self.addCleanup(self.timing_db.close)
+        patcher = patch.object(output_stream, "QA_OUTPUT_DIR", os.path.join(self.temp_dir.name, ".qa_output"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_shards_are_balanced_by_history(self):
+        """Longest modules are placed first on the least loaded shard; history sets the timeout"""
+        shards = plan_shards(["a.py", "b.py", "c.py", "d.py"], 2, {"a.py": 10, "b.py": 6, "c.py": 5, "d.py": 1})
+
+        self.assertEqual([shard.test_files for shard in shards], [["a.py", "d.py"], ["b.py", "c.py"]])
+        self.assertEqual([shard.estimate for shard in shards], [11, 11])
+        self.assertEqual(shards[0].timeout, 11 * shard_runner.QA_TIMEOUT_FACTOR + shard_runner.STARTUP_SECONDS)
+        self.assertEqual(plan_shards(["a.py", "new.py"], 1, {"a.py": 10})[0].timeout, shard_runner.QA_TEST_TIMEOUT)
+        self.assertEqual(len(plan_shards(["a.py"], 8, {})), 1)
+
+    def test_shards_run_in_parallel_and_record_durations(self):
+        """Shard results are merged, module durations recorded and slow shards cut off by their timeout"""
+        self.timing_db.record({"tests/test_slow.py": 0.01, "tests/test_fast.py": 0.01, "tests/test_broken.py": 0.01})
+        command = [sys.executable, "-m", "pytest", "-p", "no:cacheprovider"]
+
+        results = run_shards(command, self.repo, ["tests/test_broken.py", "tests/test_fast.py"], workers=2,
+                             timing_db=self.timing_db)
+        with patch.object(shard_runner, "STARTUP_SECONDS", 0), patch.object(shard_runner, "QA_TEST_MIN_TIMEOUT", 3):
+            results += run_shards(command, self.repo, ["tests/test_slow.py"], timing_db=self.timing_db)
+
+        by_file = {result.shard.test_files[0]: result for result in results}
+        self.assertTrue(by_file["tests/test_fast.py"].passed)
+        self.assertFalse(by_file["tests/test_broken.py"].passed)
+        self.assertTrue(by_file["tests/test_slow.py"].timed_out)
+        self.assertLess(by_file["tests/test_slow.py"].duration, 10)
+        self.assertIn("shard 2/2", merged_output(results[:2]))
+        self.assertIn("1 failed", merged_output(results))
+        durations = self.timing_db.durations(TESTS)
+        self.assertLess(durations["tests/test_fast.py"], 0.01)
+        self.assertEqual(durations["tests/test_slow.py"], 0.01)
+
+    def test_fail_fast_stops_other_shards(self):
+        """With fail_fast the first failing shard stops the others, which record no durations"""
+        command = [sys.executable, "-m", "pytest", "-p", "no:cacheprovider"]
+        with patch.object(shard_runner, "QA_TEST_TIMEOUT", 60):
+            results = run_shards(command, self.repo, ["tests/test_broken.py", "tests/test_slow.py"], workers=2,
+                                 timing_db=self.timing_db, fail_fast=True)
+
+        by_file = {result.shard.test_files[0]: result for result in results}
+        self.assertEqual(by_file["tests/test_broken.py"].returncode, 1)
+        self.assertTrue(by_file["tests/test_slow.py"].stopped)
+        self.assertFalse(by_file["tests/test_slow.py"].timed_out)
+        self.assertLess(by_file["tests/test_slow.py"].duration, 20)
+        self.assertEqual(self.timing_db.durations(TESTS), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qa_service.warm_pool import WarmRunner, probe_imports
+
+FILES = {
+    "qa_service/__init__.py": "",
+    "qa_service/core.py": "def answer():\n    return 42\n",
+    "test_core.py": "from qa_service.core import answer\n\ndef test_answer():\n    assert answer() == 42\n",
+    "test_slow.py": "import time\n\ndef test_slow():\n    time.sleep(60)\n",
+    "test_extra.py": "def test_extra():\n    import extra_dependency\n",
+    "vendor/extra_dependency.py": "",
+}
+
+
+class TestWarmRunner(unittest.TestCase):
+    """Test cases for pytest sessions forked from a warm runner"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.runner = WarmRunner()
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.repo = self.temp_dir.name
+        for path, content in FILES.items():
+            os.makedirs(os.path.dirname(os.path.join(self.repo, path)), exist_ok=True)
+            with open(os.path.join(self.repo, path), "w") as f:
+                f.write(content)
+
+    def test_session_imports_project_code_fresh(self):
+        """A project package named like ours is imported from the workspace, not the forkserver"""
+        returncode, output = self.runner.run(["-p", "no:cacheprovider", "test_core.py"], self.repo, timeout=120)
+
+        self.assertEqual(returncode, 0, output)
+        self.assertIn("1 passed", output)
+        stats = self.runner.stats()
+        self.assertTrue(stats["started"])
+        self.assertEqual(stats["fallbacks"], 0)
+        self.assertIn("pytest", stats["preloaded"])
+
+        returncode, output = self.runner.run(["-p", "no:cacheprovider", "missing_test.py"], self.repo, timeout=120)
+        self.assertEqual(returncode, 4)
+
+    def test_startup_variables_run_cold(self):
+        """A session with its own PYTHONPATH runs in a cold interpreter that honours it"""
+        fallbacks = self.runner.stats()["fallbacks"]
+        env = dict(os.environ, PYTHONPATH=os.path.join(self.repo, "vendor"))
+
+        returncode, output = self.runner.run(["-p", "no:cacheprovider", "test_extra.py"], self.repo, env=env,
+                                             timeout=120)
+
+        self.assertEqual(returncode, 0, output)
+        self.assertEqual(self.runner.stats()["fallbacks"], fallbacks + 1)
+
+    def test_timeout_kills_session(self):
+        """A session running past its timeout is killed and reported without an exit code"""
+        returncode, _ = self.runner.run(["-p", "no:cacheprovider", "test_slow.py"], self.repo, timeout=3)
+        self.assertIsNone(returncode)
+
+    def test_broken_modules_are_not_preloaded(self):
+        """Modules that fail to import are left out of the preload list"""
+        with open(os.path.join(self.repo, "broken_dependency.py"), "w") as f:
+            f.write("raise RuntimeError('import side effect')\n")
+
+        with patch.dict(os.environ, {"PYTHONPATH": self.repo}):
+            preloaded = probe_imports(["json", "broken_dependency", "no_such_module", "json"])
+        self.assertEqual(preloaded, ["json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
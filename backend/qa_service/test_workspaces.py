@@ -0,0 +1,128 @@
+
+import os
+import sys
+import tempfile
+import unittest
+import subprocess
+from unittest.mock import patch
+
+# Add the backend directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from qa_service import output_stream, result_cache, shard_runner
+from qa_service.result_cache import ResultCache
+from qa_service.shard_runner import TimingDB
+from qa_service.workspaces import WorkspacePool
+from agent_framework.qa_agent import QAAgent
+
+BUGGY = "def greet(name):\n    return 'Hello ' + name.strip()\n"
+FIXED = "def greet(name):\n    return 'Hello ' + (name or '').strip()\n"
+TEST = "from app import greet\n\ndef test_none():\n    assert greet(None) == 'Hello '\n"
+
+
+def git(repo, *args):
+    subprocess.run(["git", "-c", "user.name=QA", "-c", "user.email=qa@example.com"] + list(args),
+                   cwd=repo, check=True, capture_output=True)
+
+
+class TestWorkspacePool(unittest.TestCase):
+    """Test cases for isolated per-attempt workspaces"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.repo = os.path.join(self.temp_dir.name, "repo")
+        os.makedirs(self.repo)
+        with open(os.path.join(self.repo, "app.py"), "w") as f:
+            f.write(BUGGY)
+        with open(os.path.join(self.repo, "test_app.py"), "w") as f:
+            f.write(TEST)
+        git(self.repo, "init", "-q")
+        git(self.repo, "add", ".")
+        git(self.repo, "commit", "-q", "-m", "initial")
+        self.root = os.path.join(self.temp_dir.name, "workspaces")
+        # QAAgent runs record nothing in the shared logs directory
+        cache = ResultCache(path="")
+        self.addCleanup(cache.close)
+        timing_db = TimingDB(path="")
+        self.addCleanup(timing_db.close)
+        patchers = [
+            patch.object(result_cache, "_result_cache", cache),
+            patch.object(shard_runner, "_timing_db", timing_db),
+            patch.object(output_stream, "QA_OUTPUT_DIR", os.path.join(self.temp_dir.name, "qa_output")),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def read(self, *path):
+        with open(os.path.join(*path)) as f:
+            return f.read()
+
+    def test_attempts_are_isolated_and_reused(self):
+        """Concurrent workspaces see only their own changes and come back clean"""
+        pool = WorkspacePool(self.repo, root=self.root, warm_size=1, max_size=2)
+        self.addCleanup(pool.close)
+        pool.warm()
+        self.assertEqual(pool.stats()["idle"], 1)
+
+        first, second = pool.acquire("PROJ-1"), pool.acquire("PROJ-2")
+        first.write_files({"app.py": FIXED, "notes/new.py": ""})
+        second.write_files({"../escape.py": "", "test_app.py": ""})
+
+        self.assertEqual(first.changed_files(), ["app.py", "notes/new.py"])
+        self.assertEqual(second.changed_files(), ["test_app.py"])
+        self.assertEqual(self.read(self.repo, "app.py"), BUGGY)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "escape.py")))
+        pool.release(first)
+        pool.release(second)
+
+        with open(os.path.join(self.repo, "app.py"), "w") as f:
+            f.write(FIXED)
+        git(self.repo, "commit", "-q", "-am", "fix")
+        with pool.workspace("PROJ-3") as third:
+            self.assertEqual(third.path, first.path)
+            self.assertEqual(third.changed_files(), [])
+            self.assertEqual(self.read(third.path, "app.py"), FIXED)
+
+        self.assertEqual(pool.stats()["created"], 2)
+        self.assertEqual(pool.stats()["reused"], 2)
+        self.assertFalse(os.path.exists(second.path))
+
+    def test_qa_agent_tests_fix_in_workspace(self):
+        """QAAgent applies the patch in a workspace and leaves REPO_PATH untouched"""
+        developer_result = {"success": True, "confidence_score": 80, "patched_files": ["app.py"],
+                            "patched_code": {"app.py": FIXED}}
+        pool = WorkspacePool(self.repo, root=self.root, warm_size=0)
+        self.addCleanup(pool.close)
+
+        with patch.dict(os.environ, {"REPO_PATH": self.repo}), \
+                patch("agent_framework.qa_agent.get_workspace_pool", return_value=pool):
+            result = QAAgent().run({"ticket_id": "PROJ-1", "developer_result": developer_result})
+            unchanged = QAAgent().run({"ticket_id": "PROJ-2", "developer_result": dict(
+                developer_result, patched_code={"app.py": BUGGY})})
+
+        self.assertTrue(result["passed"])
+        self.assertEqual(result["selected_tests"], ["test_app.py"])
+        self.assertEqual(unchanged["error_message"], "No code changes detected")
+        self.assertEqual(self.read(self.repo, "app.py"), BUGGY)
+        self.assertEqual(pool.stats()["in_use"], 0)
+
+    def test_plain_directory_is_copied(self):
+        """Repositories without git get a throwaway copy"""
+        plain = os.path.join(self.temp_dir.name, "plain")
+        os.makedirs(plain)
+        with open(os.path.join(plain, "app.py"), "w") as f:
+            f.write(BUGGY)
+        pool = WorkspacePool(plain, root=self.root)
+
+        with pool.workspace("PROJ-1") as workspace:
+            workspace.write_files({"app.py": FIXED})
+            self.assertEqual(workspace.changed_files(), ["app.py"])
+            self.assertEqual(self.read(plain, "app.py"), BUGGY)
+
+        self.assertFalse(os.path.exists(workspace.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
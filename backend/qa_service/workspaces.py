@@ -0,0 +1,237 @@
+
+"""
+Isolated per-attempt workspaces
+
+QA used to run in the single checkout at REPO_PATH (or in a full copy of
+it made for every request), so runs for different tickets had to be
+serialized and `git diff` saw whatever anyone had written. The pool gives
+each attempt its own git worktree of the repository, detached at the
+current HEAD. Worktrees share the object store, so a new one costs a
+checkout, not a clone. Released worktrees are reset (`git reset --hard`
+and `git clean -fd`, which keeps ignored build output and virtualenvs) and
+reused by the next attempt; QA_WORKSPACE_POOL_SIZE of them are created
+ahead of time. Repositories that are not git checkouts get a copy instead
+(reflinked where the filesystem supports it), which is not reused.
+"""
+
+import os
+import shutil
+import logging
+import tempfile
+import threading
+import subprocess
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("qa-workspaces")
+
+# Directory the worktrees are created in (a temporary directory when empty)
+QA_WORKSPACE_ROOT = os.environ.get("QA_WORKSPACE_ROOT", "")
+# Idle worktrees kept ready for the next attempt
+QA_WORKSPACE_POOL_SIZE = int(os.environ.get("QA_WORKSPACE_POOL_SIZE", "2"))
+# Workspaces in use at the same time; further attempts wait for one to be released
+QA_WORKSPACE_MAX = int(os.environ.get("QA_WORKSPACE_MAX", "8"))
+
+GIT_TIMEOUT = 120
+
+
+class WorkspaceError(Exception):
+    """A workspace could not be created or reset"""
+
+
+def _git(args: List[str], cwd: str) -> str:
+    try:
+        process = subprocess.run(["git"] + args, cwd=cwd, capture_output=True, text=True, timeout=GIT_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise WorkspaceError(f"git {args[0]} failed: {str(e)}")
+    if process.returncode != 0:
+        raise WorkspaceError(f"git {args[0]} failed: {process.stderr.strip()}")
+    return process.stdout
+
+
+class Workspace:
+    """A private checkout of the repository for one attempt"""
+
+    def __init__(self, path: str, is_git: bool):
+        self.path = path
+        self.is_git = is_git
+        self.head: Optional[str] = None
+        self.ticket_id: Optional[str] = None
+        self._written: List[str] = []
+
+    def write_files(self, files: Dict[str, str]) -> List[str]:
+        """Write file contents given by repository path, returning the paths written"""
+        written = []
+        for file_path, content in files.items():
+            full_path = os.path.join(self.path, file_path)
+            if not os.path.abspath(full_path).startswith(os.path.abspath(self.path) + os.sep):
+                logger.warning(f"Refusing to write {file_path} outside the workspace")
+                continue
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w") as f:
+                f.write(content)
+            written.append(file_path)
+        self._written.extend(written)
+        return written
+
+    def changed_files(self) -> List[str]:
+        """Files modified, added or deleted in this workspace only"""
+        if not self.is_git:
+            return sorted(set(self._written))
+        changed = []
+        for entry in _git(["status", "--porcelain", "-z", "--untracked-files=all"], self.path).split("\0"):
+            if len(entry) > 3:
+                changed.append(entry[3:])
+        return sorted(changed)
+
+
+class WorkspacePool:
+    """Warm pool of git worktrees of one repository"""
+
+    def __init__(self, repo_path: str, root: Optional[str] = None, warm_size: Optional[int] = None,
+                 max_size: Optional[int] = None):
+        self.repo_path = os.path.abspath(repo_path)
+        self.root = root or QA_WORKSPACE_ROOT or os.path.join(tempfile.gettempdir(), "qa-workspaces")
+        self.warm_size = QA_WORKSPACE_POOL_SIZE if warm_size is None else warm_size
+        self.max_size = max(1, QA_WORKSPACE_MAX if max_size is None else max_size)
+        self.is_git = os.path.exists(os.path.join(self.repo_path, ".git"))
+        self._idle: List[Workspace] = []
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._stats = {"created": 0, "reused": 0, "discarded": 0, "waits": 0}
+        os.makedirs(self.root, exist_ok=True)
+
+    def _head(self) -> Optional[str]:
+        return _git(["rev-parse", "HEAD"], self.repo_path).strip() if self.is_git else None
+
+    def _create(self, head: Optional[str]) -> Workspace:
+        path = tempfile.mkdtemp(prefix="ws-", dir=self.root)
+        try:
+            if self.is_git:
+                _git(["worktree", "add", "--detach", "--force", path, head], self.repo_path)
+            elif subprocess.run(["cp", "-a", "--reflink=auto", f"{self.repo_path}/.", path],
+                                capture_output=True).returncode != 0:
+                shutil.copytree(self.repo_path, path, symlinks=True, dirs_exist_ok=True)
+        except Exception:
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+        workspace = Workspace(path, self.is_git)
+        workspace.head = head
+        with self._cond:
+            self._stats["created"] += 1
+        return workspace
+
+    def _remove(self, workspace: Workspace):
+        if workspace.is_git:
+            try:
+                _git(["worktree", "remove", "--force", workspace.path], self.repo_path)
+            except WorkspaceError as e:
+                logger.warning(f"Could not remove worktree {workspace.path}: {str(e)}")
+        shutil.rmtree(workspace.path, ignore_errors=True)
+
+    def warm(self):
+        """Create worktrees until QA_WORKSPACE_POOL_SIZE are idle"""
+        if not self.is_git:
+            return
+        while True:
+            with self._cond:
+                if len(self._idle) >= self.warm_size or len(self._idle) + self._in_use >= self.max_size:
+                    return
+            try:
+                workspace = self._create(self._head())
+            except WorkspaceError as e:
+                logger.warning(f"Could not warm the workspace pool: {str(e)}")
+                return
+            with self._cond:
+                self._idle.append(workspace)
+                self._cond.notify()
+
+    def acquire(self, ticket_id: Optional[str] = None) -> Workspace:
+        """A clean workspace at the current HEAD, waiting while QA_WORKSPACE_MAX are in use"""
+        with self._cond:
+            if self._in_use >= self.max_size:
+                self._stats["waits"] += 1
+            while self._in_use >= self.max_size:
+                self._cond.wait()
+            self._in_use += 1
+            workspace = self._idle.pop() if self._idle else None
+
+        try:
+            head = self._head()
+            if workspace is None:
+                workspace = self._create(head)
+            else:
+                if workspace.head != head:
+                    _git(["checkout", "-q", "--detach", "--force", head], workspace.path)
+                    workspace.head = head
+                with self._cond:
+                    self._stats["reused"] += 1
+        except Exception:
+            if workspace is not None:
+                self._remove(workspace)
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        workspace.ticket_id = ticket_id
+        logger.info(f"Workspace {workspace.path} acquired for ticket {ticket_id}")
+        return workspace
+
+    def release(self, workspace: Workspace):
+        """Reset a workspace and keep it for the next attempt (or drop it when the pool is full)"""
+        keep = False
+        if workspace.is_git:
+            try:
+                _git(["reset", "-q", "--hard"], workspace.path)
+                _git(["clean", "-fdq"], workspace.path)
+                keep = True
+            except WorkspaceError as e:
+                logger.warning(f"Discarding workspace {workspace.path}: {str(e)}")
+        workspace.ticket_id = None
+        workspace._written = []
+
+        with self._cond:
+            self._in_use -= 1
+            keep = keep and len(self._idle) < max(self.warm_size, 1)
+            if keep:
+                self._idle.append(workspace)
+            else:
+                self._stats["discarded"] += 1
+            self._cond.notify()
+        if not keep:
+            self._remove(workspace)
+
+    @contextmanager
+    def workspace(self, ticket_id: Optional[str] = None) -> Iterator[Workspace]:
+        workspace = self.acquire(ticket_id)
+        try:
+            yield workspace
+        finally:
+            self.release(workspace)
+
+    def close(self):
+        """Remove the idle worktrees"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for workspace in idle:
+            self._remove(workspace)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return dict(self._stats, idle=len(self._idle), in_use=self._in_use, git=self.is_git)
+
+
+_pools: Dict[str, WorkspacePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_workspace_pool(repo_path: str) -> WorkspacePool:
+    """Process-wide pool for a repository, warmed in the background on first use"""
+    repo_path = os.path.abspath(repo_path)
+    with _pools_lock:
+        pool = _pools.get(repo_path)
+        if pool is None:
+            pool = _pools[repo_path] = WorkspacePool(repo_path)
+            threading.Thread(target=pool.warm, name="qa-workspace-warm", daemon=True).start()
+        return pool
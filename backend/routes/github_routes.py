@@ -12,6 +12,8 @@ from ..github_utils import get_file_content, generate_diff, apply_patch_to_conte
 from ..github_service.github_service import GitHubService
 from ..github_service.utils import prepare_response_metadata, is_test_mode, is_production, verify_module_imports
 from ..github_service.config import verify_config, get_repo_info, preserve_branch_case, include_test_files
+from ..github_service.content_cache import get_content_cache
+from ..github_service.request_scheduler import get_request_scheduler
 from ..log_utils import log_diff_summary, format_validation_result, create_structured_error
 
 # Configure logging
@@ -65,6 +67,15 @@ def get_github_config():
             'error': f"Failed to get GitHub config: {str(e)}"
         }), 500
 
+@github_bp.route('/metrics', methods=['GET'])
+def get_github_metrics():
+    """Get performance metrics for the GitHub layer"""
+    return jsonify({
+        'success': True,
+        'content_cache': get_content_cache().stats(),
+        'request_scheduler': get_request_scheduler().stats()
+    }), 200
+
 @github_bp.route('/validate-diff', methods=['POST'])
 def validate_diff():
     """Validate a diff to ensure it's properly formatted and applies cleanly"""
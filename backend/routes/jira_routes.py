@@ -3,6 +3,9 @@ import logging
 import json
 from flask import Blueprint, request, jsonify, current_app
 from ..jira_service.jira_service import JiraService
+from ..jira_service.http_session import get_jira_session
+from ..jira_service.transition_cache import get_transition_cache
+from ..jira_service.attachments import get_attachment_fetcher
 from ..log_utils import log_operation_attempt, log_operation_result, get_error_metadata, GitHubOperationError
 import asyncio
 
@@ -20,6 +23,16 @@ try:
 except Exception as e:
     logger.error(f"Failed to initialize Jira service: {str(e)}")
 
+@jira_bp.route('/metrics', methods=['GET'])
+def get_jira_metrics():
+    """Get performance metrics for the JIRA layer"""
+    return jsonify({
+        'success': True,
+        'http_session': get_jira_session().stats(),
+        'transition_cache': get_transition_cache().stats(),
+        'attachments': get_attachment_fetcher().stats()
+    }), 200
+
 @jira_bp.route('/tickets', methods=['GET'])
 def get_tickets():
     """Get tickets from Jira"""
@@ -10,9 +10,11 @@ from agent_utils import (
     call_planner_agent,
     call_developer_agent,
     call_qa_agent,
-    call_communicator_agent
+    call_communicator_agent,
+    report_fix_outcome
 )
 from env import MAX_RETRIES
+from qa_service.junit_report import previous_failures
 from test_processor import process_qa_results
 from ticket_status import (
     active_tickets,
@@ -27,6 +29,7 @@ from log_utils import (
     log_error
 )
 from analytics_tracker import get_analytics_tracker
+from jira_service.attachments import fetch_ticket_attachments
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -37,50 +40,37 @@ RETRY_DELAY_SECONDS = int(os.environ.get('RETRY_DELAY_SECONDS', '5'))
 # Get confidence threshold from environment or default to 60%
 CONFIDENCE_THRESHOLD = int(os.environ.get('CONFIDENCE_THRESHOLD', '60'))
 
-# QA agent lock management with timestamps to detect stale locks
-qa_locks = {}
-QA_LOCK_TIMEOUT = 300  # 5 minutes in seconds
-
-def acquire_qa_lock(ticket_id: str, orchestrator_id: str) -> bool:
-    """Attempt to acquire a lock for running QA tests on a ticket"""
-    current_time = time.time()
+async def link_duplicate_ticket(ticket_id: str, duplicate_of: Dict[str, Any]):
+    """Link a near-duplicate ticket to the existing fix instead of running the developer-QA loop"""
+    original_id = duplicate_of.get("ticket_id")
+    logger.info(f"Ticket {ticket_id} is a near-duplicate of {original_id}, linking instead of fixing")
     
-    # Check if there's an existing lock
-    if ticket_id in qa_locks:
-        lock_info = qa_locks[ticket_id]
-        lock_age = current_time - lock_info['timestamp']
-        
-        # If lock is stale or held by same orchestrator, allow it
-        if lock_age > QA_LOCK_TIMEOUT:
-            logger.warning(f"Found stale QA lock for ticket {ticket_id}, replacing it")
-        elif lock_info['orchestrator_id'] == orchestrator_id:
-            logger.info(f"Orchestrator {orchestrator_id} already has QA lock for ticket {ticket_id}")
-            return True
-        else:
-            logger.warning(f"QA tests for ticket {ticket_id} already in progress by orchestrator {lock_info['orchestrator_id']}")
-            return False
+    progress = f"The fix is in {duplicate_of['pr_url']}." if duplicate_of.get("pr_url") else "It has already been fixed."
+    similarity = duplicate_of.get("similarity") or 0
+    await update_jira_ticket(
+        ticket_id,
+        "",
+        f"BugFix AI: This ticket looks like a duplicate of {original_id} ({similarity:.0%} similar). {progress}"
+    )
+    update_ticket_status(ticket_id, "duplicate", {"duplicate_of": duplicate_of})
     
-    # Set new lock
-    qa_locks[ticket_id] = {
-        'orchestrator_id': orchestrator_id,
-        'timestamp': current_time
-    }
-    logger.info(f"Acquired QA lock for ticket {ticket_id} by orchestrator {orchestrator_id}")
-    return True
-
-def release_qa_lock(ticket_id: str, orchestrator_id: str) -> bool:
-    """Release a lock if it's held by the specified orchestrator"""
-    if ticket_id in qa_locks and qa_locks[ticket_id]['orchestrator_id'] == orchestrator_id:
-        del qa_locks[ticket_id]
-        logger.info(f"Released QA lock for ticket {ticket_id} by orchestrator {orchestrator_id}")
-        return True
-    return False
+    analytics_tracker = get_analytics_tracker()
+    analytics_tracker.log_ticket_result(
+        ticket_id=ticket_id,
+        total_retries=0,
+        final_status="duplicate",
+        additional_data={"duplicate_of": duplicate_of}
+    )
 
 async def process_ticket(ticket: Dict[str, Any]):
     """Process a single ticket through the enhanced agent workflow"""
     ticket_id = ticket["ticket_id"]
     # Generate a unique orchestrator ID for this process
     orchestrator_id = f"orchestrator-{os.getpid()}-{time.time()}"
+    # The Planner indexes every ticket it plans; it is told whether the fix shipped
+    planned = False
+    fixed = False
+    pr_url = None
     
     try:
         # Setup logging and initialize ticket
@@ -114,12 +104,24 @@ async def process_ticket(ticket: Dict[str, Any]):
             except Exception as e:
                 logger.warning(f"Could not fetch additional ticket data: {str(e)}")
         
+        # Download attachments (cached by ID) so log files reach the planner as text excerpts
+        if ticket.get("attachments"):
+            try:
+                enhanced_ticket["attachments"] = await fetch_ticket_attachments(ticket["attachments"])
+            except Exception as e:
+                logger.warning(f"Could not download attachments of ticket {ticket_id}: {str(e)}")
+        
         log_agent_input(ticket_id, "planner", enhanced_ticket)
         planner_analysis = await call_planner_agent(enhanced_ticket)
         
         if planner_analysis:
             log_agent_output(ticket_id, "planner", planner_analysis)
             
+            if planner_analysis.get("duplicate_of"):
+                await link_duplicate_ticket(ticket_id, planner_analysis["duplicate_of"])
+                return
+            planned = True
+            
             # Log information about file validation results
             if 'affected_files' in planner_analysis and isinstance(planner_analysis['affected_files'], list):
                 valid_files = 0
@@ -271,44 +273,23 @@ async def process_ticket(ticket: Dict[str, Any]):
                 
             update_ticket_status(ticket_id, "processing", {"developer_diffs": developer_response})
             
-            # Call QA - first try to acquire a lock
-            logger.info(f"Attempting to run QA tests for ticket {ticket_id} (attempt {current_attempt})")
-            
-            if not acquire_qa_lock(ticket_id, orchestrator_id):
-                logger.warning(f"Another orchestrator is already running QA tests for ticket {ticket_id}, waiting...")
-                # Wait and check again
-                for _ in range(10):  # Try 10 times with 5-second intervals
-                    await asyncio.sleep(5)
-                    if acquire_qa_lock(ticket_id, orchestrator_id):
-                        logger.info(f"Successfully acquired QA lock for ticket {ticket_id} after waiting")
-                        break
-                else:
-                    logger.error(f"Failed to acquire QA lock for ticket {ticket_id} after multiple attempts. Skipping QA.")
-                    # We could either fail the ticket or continue with a synthetic QA failure result
-                    qa_passed = False
-                    qa_response = {
-                        "passed": False,
-                        "error_message": "QA tests could not be run due to orchestrator lock contention",
-                        "failure_summary": "Orchestrator lock contention prevented QA tests from running"
-                    }
-                    continue
+            # Call QA - each attempt is tested in its own workspace, so no lock is needed
+            logger.info(f"Running QA tests for ticket {ticket_id} (attempt {current_attempt})")
             
             await update_jira_ticket(ticket_id, "", f"QA testing fix (attempt {current_attempt}, orchestrator: {orchestrator_id})")
             
+            failures = previous_failures(retry_history)
             qa_input = {
                 "ticket_id": ticket_id,
                 "diffs": developer_response["diffs"],
                 "attempt": current_attempt,
-                "orchestrator_id": orchestrator_id  # Include orchestrator ID
+                "orchestrator_id": orchestrator_id,  # Include orchestrator ID
+                "previous_failures": failures
             }
             log_agent_input(ticket_id, "qa", qa_input)
             
-            try:
-                qa_response = await call_qa_agent(developer_response)
-                qa_passed = process_qa_results(ticket_id, developer_response, qa_response)
-            finally:
-                # Always release the lock when done
-                release_qa_lock(ticket_id, orchestrator_id)
+            qa_response = await call_qa_agent(dict(developer_response, previous_failures=failures))
+            qa_passed = process_qa_results(ticket_id, developer_response, qa_response)
             
             update_ticket_status(ticket_id, "processing", {"qa_results": qa_response})
             
@@ -474,6 +455,8 @@ async def process_ticket(ticket: Dict[str, Any]):
         if communicator_response:
             log_agent_output(ticket_id, "communicator", communicator_response)
             update_ticket_status(ticket_id, "completed", {"communicator_result": communicator_response})
+            fixed = True
+            pr_url = communicator_response.get("pr_url")
             logger.info(f"Completed processing for ticket {ticket_id}")
             
             # Log successful ticket completion in analytics
@@ -533,6 +516,6 @@ async def process_ticket(ticket: Dict[str, Any]):
             )
         except Exception as analytics_error:
             logger.error(f"Error logging analytics: {str(analytics_error)}")
-
-        # Make sure to release any locks
-        release_qa_lock(ticket_id, orchestrator_id)
+    finally:
+        if planned:
+            await report_fix_outcome(ticket_id, "fixed" if fixed else "failed", pr_url)